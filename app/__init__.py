@@ -3,15 +3,36 @@ Módulo de inicialização da aplicação Flask e configuração de logging.
 """
 
 import os
-import logging
+import json
 import click
 from flask import Flask
 from flask_cors import CORS
 
 # Importa blueprint de rotas e registra endpoints no app
 from .api import bp as api_bp
-from .builder import build_index
-from .model import MODEL_NAME, DATA_DIR 
+from .builder import IndexBuilder, build_index
+from .config import (
+    BUILD_CHUNK_SIZE,
+    BUILD_SOURCE,
+    CLASSIFY_CHUNK_SIZE,
+    CLASSIFY_QUEUE_SIZE,
+    DEFAULT_THRESHOLD,
+    EMBED_WORKERS,
+    INDEX_EF_CONSTRUCTION,
+    INDEX_FACTORY,
+    INDEX_SEARCH_PARAMS,
+    RERANK_ENABLED,
+    RERANK_OVERSAMPLE,
+    TRAIN_SAMPLE_SIZE,
+)
+from .delta import delta_path
+from .ingest import FORMATS, Corpus
+from .logs import setup_logging
+from .labels import label_paths, migrate_legacy_labels
+from .manifest import manifest_path
+from .model import MODEL_NAME, DATA_DIR, IntentModel
+from .rerank import vectors_path
+from .scoring import STRATEGIES, calibration_path
 
 # Cria a instância da aplicação Flask
 app = Flask(__name__)
@@ -19,35 +40,365 @@ CORS(app)
 
 app.register_blueprint(api_bp)
 
-# Remove handlers herdados do Flask para evitar logs duplicados, em seguida configura nosso handler de console
-app.logger.handlers.clear()
+# Remove handlers herdados do Flask para evitar logs duplicados, em seguida configura nosso
+# handler de console (atrás de uma fila com LOG_ASYNC)
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
-handler = logging.StreamHandler()
-handler.setLevel(LOG_LEVEL)
-LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
-handler.setFormatter(logging.Formatter(LOG_FORMAT))
-app.logger.setLevel(LOG_LEVEL)
-app.logger.addHandler(handler)
-app.logger.propagate = False
+handler = setup_logging(app.logger, LOG_LEVEL)
 
 
 @app.cli.command("build-index")
 @click.option("--force", is_flag=True, help="Força a reconstrução do índice FAISS.")
-def build_index_command(force):
-    """Gera o índice FAISS e os labels (usado na inicialização do modelo)."""
+@click.option("--factory", default=INDEX_FACTORY, show_default=True,
+              help="String do faiss.index_factory (ex.: Flat, HNSW32,SQ8, IVF256,PQ48).")
+@click.option("--search-params", default=INDEX_SEARCH_PARAMS, show_default=True,
+              help="Parâmetros de busca (ex.: efSearch=128 ou nprobe=16).")
+@click.option("--ef-construction", default=INDEX_EF_CONSTRUCTION, show_default=True,
+              help="efConstruction para índices HNSW.")
+@click.option("--source", default=BUILD_SOURCE,
+              help="Corpus de treino: arquivo .jsonl/.csv/.parquet ou hf:<dataset> "
+                   "(padrão: CLINC-OOS local).")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None,
+              help="Formato do corpus (padrão: pela extensão).")
+@click.option("--text-column", default="text", show_default=True, help="Campo com o texto.")
+@click.option("--label-column", default="label", show_default=True, help="Campo com a intenção.")
+@click.option("--split", default="train", show_default=True, help="Split de datasets hf:.")
+@click.option("--chunk-size", default=BUILD_CHUNK_SIZE, show_default=True,
+              help="Exemplos lidos, codificados e indexados por bloco.")
+@click.option("--train-sample", default=TRAIN_SAMPLE_SIZE, show_default=True,
+              help="Tamanho da amostra para treinar índices IVF/PQ.")
+@click.option("--workers", default=EMBED_WORKERS, show_default=True,
+              help="Processos de encoding em paralelo (0 ou 1 = no próprio processo).")
+@click.option("--save-vectors/--no-save-vectors", default=RERANK_ENABLED, show_default=True,
+              help="Grava os vetores exatos para o re-ranking (obrigatório para índices LSH).")
+def build_index_command(force, factory, search_params, ef_construction, source, fmt,
+                        text_column, label_column, split, chunk_size, train_sample, workers,
+                        save_vectors):
+    """Gera o índice FAISS e os labels em streaming (usado na inicialização do modelo)."""
 
     idx_path = os.path.join(DATA_DIR, f"{MODEL_NAME}.faiss")
-    lbl_path = os.path.join(DATA_DIR, f"{MODEL_NAME}_labels.json")
+    lbl_paths = label_paths(DATA_DIR, MODEL_NAME)
+    centroids_path = os.path.join(DATA_DIR, f"{MODEL_NAME}_centroids.npy")
 
     if force:
-        for path in [idx_path, lbl_path]:
+        for path in [idx_path, centroids_path, manifest_path(DATA_DIR, MODEL_NAME),
+                     vectors_path(DATA_DIR, MODEL_NAME), calibration_path(DATA_DIR, MODEL_NAME),
+                     delta_path(DATA_DIR, MODEL_NAME), *lbl_paths.values()]:
             try:
                 os.remove(path)
                 print(f"Removido: {path}")
             except FileNotFoundError:
                 pass
 
-    print("Gerando índice FAISS e labels...")
-    idx_path, lbl_path = build_index()
+    corpus = None
+    if source:
+        corpus = Corpus(source, fmt, text_column=text_column, label_column=label_column, split=split)
+
+    print(f"Gerando índice FAISS '{factory}' ({search_params}) e labels...")
+    builder = IndexBuilder(
+        index_factory=factory,
+        search_params=search_params,
+        ef_construction=ef_construction,
+        corpus=corpus,
+        chunk_size=chunk_size,
+        train_sample_size=train_sample,
+        embed_workers=workers,
+        save_vectors=save_vectors,
+    )
+    idx_path, lbl_path = builder.build()
     print(f"Index criado: {idx_path}")
     print(f"Labels salvos: {lbl_path}")
+    if builder.last_report:
+        report = builder.last_report
+        print(f"Textos indexados: {report['texts']} em {report['chunks']} blocos, "
+              f"{report['seconds']:.1f}s ({report['texts_per_s']:.0f} textos/s), "
+              f"pico de RSS {report['peak_rss_mb']:.0f} MB")
+        print("Tempo por etapa: " + ", ".join(
+            f"{k[:-len('_seconds')]}={v:.2f}s" for k, v in report.items() if k.endswith("_seconds")))
+
+
+@app.cli.command("bench-index")
+@click.option("--candidate", "candidates", multiple=True,
+              help="Candidato no formato 'factory|params' (repetível). Padrão: lista embutida.")
+@click.option("--k", default=5, show_default=True, help="Vizinhos usados no recall@k.")
+@click.option("--min-recall", default=0.95, show_default=True,
+              help="Recall@k mínimo para um candidato ser escolhido.")
+@click.option("--max-queries", default=0, help="Limita o número de consultas (0 = todas).")
+@click.option("--rerank-oversample", default=RERANK_OVERSAMPLE, show_default=True,
+              help="Mede também os candidatos comprimidos com re-ranking exato (0 = não mede).")
+@click.option("--output", type=click.Path(dir_okay=False), help="Salva o relatório em JSON.")
+def bench_index_command(candidates, k, min_recall, max_queries, rerank_oversample, output):
+    """Compara tipos de índice FAISS (recall@k, QPS, latência, build e memória)."""
+    from .tuning import benchmark_indexes, pick_best  # pylint: disable=import-outside-toplevel
+
+    builder = IndexBuilder()
+    texts, _, _ = builder._load_dataset("train")  # pylint: disable=protected-access
+    queries, _, _ = builder._load_dataset("validation")  # pylint: disable=protected-access
+    if max_queries:
+        queries = queries[:max_queries]
+    embeddings = builder._generate_embeddings(texts)  # pylint: disable=protected-access
+    query_emb = builder._generate_embeddings(queries)  # pylint: disable=protected-access
+
+    rows = benchmark_indexes(
+        embeddings, query_emb, list(candidates) or None, k=k, rerank_oversample=rerank_oversample
+    )
+    best = pick_best(rows, min_recall=min_recall)
+
+    print(f"{'candidate':<28} {'rerank':>6} {'recall@' + str(k):>9} {'qps':>10} {'p50_ms':>8} "
+          f"{'p99_ms':>8} {'build_s':>8} {'mem_mb':>8} {'mem_x':>6} {'vec_mb':>8} {'rss_mb':>8}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r['candidate']:<28} {r['rerank']:>6} erro: {r['error']}")
+            continue
+        print(f"{r['candidate']:<28} {r['rerank']:>6} {r['recall']:>9.4f} {r['qps']:>10.0f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['build_s']:>8.2f} "
+              f"{r['memory_mb']:>8.1f} {r.get('memory_ratio', float('nan')):>6.2f} "
+              f"{r['vectors_mb']:>8.1f} {r['rss_mb']:>8.1f}")
+
+    if best is None:
+        raise click.ClickException("Nenhum candidato pôde ser avaliado.")
+    factory, _, params = best["candidate"].partition("|")
+    print(f"\nEscolhido: {best['candidate']} (recall@{k}={best['recall']:.4f})")
+    print(f"  INDEX_FACTORY='{factory}' INDEX_SEARCH_PARAMS='{params}'")
+    if best["rerank"]:
+        print(f"  RERANK_ENABLED=true RERANK_OVERSAMPLE={best['rerank']}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"k": k, "min_recall": min_recall, "results": rows, "best": best}, f, indent=2)
+        print(f"Relatório salvo em {output}")
+
+
+@app.cli.command("export-onnx")
+@click.option("--model-dir", default=None,
+              help="Pasta do modelo SentenceTransformer (padrão: models/<MODEL_NAME>).")
+@click.option("--quantize/--no-quantize", default=True, show_default=True,
+              help="Gera também o modelo int8 quantizado dinamicamente.")
+@click.option("--opset", default=14, show_default=True, help="Versão do opset ONNX.")
+@click.option("--parity-texts", default=500, show_default=True,
+              help="Textos do split de validação usados na checagem de paridade (0 = pula).")
+@click.option("--min-cosine", default=0.99, show_default=True,
+              help="Cosseno mínimo aceito entre os embeddings ONNX e os do torch.")
+def export_onnx_command(model_dir, quantize, opset, parity_texts, min_cosine):
+    """Exporta o encoder para ONNX (fp32 e int8) e compara os embeddings com o torch."""
+    # pylint: disable=import-outside-toplevel
+    from .encoders import (
+        PARITY_TEXTS,
+        default_model_dir,
+        export_onnx,
+        load_encoder,
+        parity_check,
+        quantize_onnx,
+    )
+
+    model_dir = model_dir or default_model_dir(MODEL_NAME)
+    print(f"Modelo ONNX salvo em {export_onnx(model_dir, opset=opset)}")
+    backends = ["onnx"]
+    if quantize:
+        print(f"Modelo int8 salvo em {quantize_onnx(model_dir)}")
+        backends.append("onnx-int8")
+    if not parity_texts:
+        return
+
+    try:
+        texts, _, _ = IndexBuilder()._load_dataset("validation")  # pylint: disable=protected-access
+        texts = list(texts[:parity_texts])
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Justificado: sem o dataset local a checagem usa frases fixas
+        texts = PARITY_TEXTS
+    reference = load_encoder(model_dir, "torch")
+    failed = []
+    for backend in backends:
+        report = parity_check(reference, load_encoder(model_dir, backend), texts)
+        print(f"{backend:<10} textos={report['texts']} cos_min={report['min_cosine']:.5f} "
+              f"cos_médio={report['mean_cosine']:.5f}")
+        if report["min_cosine"] < min_cosine:
+            failed.append(backend)
+    if failed:
+        raise click.ClickException(
+            f"Paridade abaixo de {min_cosine} para: {', '.join(failed)}."
+        )
+
+
+@app.cli.command("migrate-labels")
+def migrate_labels_command():
+    """Converte o arquivo de labels JSON antigo para o formato compacto (.npy)."""
+    lbl_paths = label_paths(DATA_DIR, MODEL_NAME)
+    if not os.path.exists(lbl_paths["legacy"]):
+        raise click.ClickException(f"Arquivo não encontrado: {lbl_paths['legacy']}")
+
+    ids_path = migrate_legacy_labels(DATA_DIR, MODEL_NAME)
+    print(f"Labels migrados: {ids_path}")
+    print(f"Intenções: {lbl_paths['intents']}")
+    print(f"Textos: {lbl_paths['texts']}")
+
+
+def _load_cli_model() -> IntentModel:
+    model = IntentModel()
+    model.load()
+    return model
+
+
+def _compact_if_needed(model: IntentModel):
+    """Compacta o índice, como as rotas HTTP, ao atingir DELTA_COMPACT_THRESHOLD."""
+    if model.needs_compaction:
+        print("Limite de alterações pendentes atingido: compactando o índice...")
+        result = model.compact()
+        print(f"Índice compactado: {result['vectors']} vetores em {result['index_path']}")
+
+
+@app.cli.command("add-examples")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def add_examples_command(path):
+    """Insere exemplos de um arquivo NDJSON ({"text", "label"} por linha) sem rebuild."""
+    texts, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                texts.append(item["text"].strip())
+                labels.append(item["label"].strip())
+
+    model = _load_cli_model()
+    ids = model.add_examples(texts, labels)
+    print(f"{len(ids)} exemplos inseridos (ids {ids[0]}-{ids[-1]})." if ids else "Nada a inserir.")
+    print(f"Alterações registradas em {delta_path(DATA_DIR, MODEL_NAME)}")
+    _compact_if_needed(model)
+
+
+@app.cli.command("remove-examples")
+@click.argument("ids", nargs=-1, type=int, required=True)
+def remove_examples_command(ids):
+    """Remove exemplos do índice pelos seus ids."""
+    model = _load_cli_model()
+    try:
+        removed = model.remove_examples(list(ids))
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    print(f"{removed} exemplos removidos.")
+    _compact_if_needed(model)
+
+
+@app.cli.command("compact-index")
+def compact_index_command():
+    """Incorpora inserções e remoções pendentes ao índice em disco e esvazia o log."""
+    result = _load_cli_model().compact()
+    print(f"Índice compactado: {result['vectors']} vetores em {result['index_path']}")
+
+
+@app.cli.command("classify")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_path", type=click.Path(dir_okay=False))
+@click.option("--top-k", default=5, show_default=True, help="Vizinhos considerados no voto.")
+@click.option("--threshold", default=DEFAULT_THRESHOLD, show_default=True, help="Limiar OOS.")
+@click.option("--text-column", default="text", show_default=True, help="Campo com o texto.")
+@click.option("--id-column", default=None,
+              help="Campo copiado para a saída como 'id' (padrão: número do registro).")
+@click.option("--chunk-size", default=CLASSIFY_CHUNK_SIZE, show_default=True,
+              help="Registros lidos, codificados e buscados por bloco.")
+@click.option("--queue-size", default=CLASSIFY_QUEUE_SIZE, show_default=True,
+              help="Blocos em espera entre os estágios do pipeline.")
+@click.option("--resume", is_flag=True, help="Continua do checkpoint (<saída>.ckpt), se existir.")
+def classify_command(input_path, output_path, top_k, threshold, text_column, id_column,
+                     chunk_size, queue_size, resume):
+    """Classifica um arquivo NDJSON/CSV em lote, gravando um resultado por registro."""
+    from .classify import checkpoint_path, classify_file  # pylint: disable=import-outside-toplevel
+
+    model = _load_cli_model()
+    try:
+        report = classify_file(
+            model, input_path, output_path, top_k, threshold,
+            text_column=text_column, id_column=id_column, chunk_size=chunk_size,
+            queue_size=queue_size, resume=resume,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        if os.path.exists(checkpoint_path(output_path)):
+            print(f"Interrompido: use --resume para continuar de {checkpoint_path(output_path)}.")
+    print(f"Registros classificados: {report['records']} em {report['chunks']} blocos, "
+          f"{report['seconds']:.1f}s ({report['records_per_s']:.0f} registros/s), "
+          f"pico de RSS {report['peak_rss_mb']:.0f} MB")
+    if report["resumed_from"]:
+        print(f"Retomado a partir do registro {report['resumed_from']}.")
+    print("Tempo ocupado por estágio: " + ", ".join(
+        f"{k[:-len('_seconds')]}={v:.2f}s" for k, v in report.items() if k.endswith("_seconds")
+        and k != "seconds"))
+    print(f"Resultados salvos em {output_path}")
+
+
+@app.cli.command("calibrate")
+@click.option("--source", default=None,
+              help="Consultas rotuladas (.jsonl/.csv) com exemplos OOS (padrão: CLINC-OOS local).")
+@click.option("--split", default="validation", show_default=True, help="Split do CLINC-OOS.")
+@click.option("--text-column", default="text", show_default=True, help="Campo com o texto.")
+@click.option("--label-column", default="label", show_default=True, help="Campo com a intenção.")
+@click.option("--oos-label", default="oos", show_default=True, help="Rótulo das consultas OOS.")
+@click.option("--strategy", "strategies", multiple=True, type=click.Choice(STRATEGIES),
+              help="Estratégias avaliadas (repetível). Padrão: todas.")
+@click.option("--top-k", "top_ks", multiple=True, type=int,
+              help="Valores de top_k avaliados (repetível). Padrão: 1, 3, 5 e 10.")
+@click.option("--temperature", "temperatures", multiple=True, type=float,
+              help="Temperaturas do softmax (repetível). Padrão: 0.02, 0.05 e 0.1.")
+@click.option("--tolerance", default=0.002, show_default=True,
+              help="Perda de acurácia aceita para preferir um top_k menor.")
+@click.option("--max-queries", default=0, help="Limita o número de consultas (0 = todas).")
+@click.option("--dry-run", is_flag=True, help="Só imprime as métricas, sem salvar a calibração.")
+def calibrate_command(source, split, text_column, label_column, oos_label, strategies, top_ks,
+                      temperatures, tolerance, max_queries, dry_run):
+    """Ajusta a estratégia de voto, o top_k e a probabilidade OOS em um split rotulado."""
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+
+    from .scoring import fit_calibration
+    from .utils import preprocess_batch
+
+    if source:
+        texts, labels = [], []
+        corpus = Corpus(source, text_column=text_column, label_column=label_column)
+        for chunk_texts, chunk_labels in corpus.chunks(BUILD_CHUNK_SIZE):
+            texts += chunk_texts
+            labels += chunk_labels
+    else:
+        texts, labels, _ = IndexBuilder()._load_dataset(split)  # pylint: disable=protected-access
+    if max_queries:
+        texts, labels = texts[:max_queries], labels[:max_queries]
+
+    model = _load_cli_model()
+    codes = {name: i for i, name in enumerate(model.intent_names)}
+    known = [l == oos_label or l in codes for l in labels]
+    if not all(known):
+        print(f"Ignoradas {known.count(False)} consultas de intenções fora do índice.")
+        texts = [t for t, ok in zip(texts, known) if ok]
+        labels = [l for l, ok in zip(labels, known) if ok]
+    truth = np.asarray([-1 if l == oos_label else codes[l] for l in labels])
+
+    top_ks = sorted(top_ks) or [1, 3, 5, 10]
+    sims, cand = model.neighbors(preprocess_batch(texts), max(top_ks))
+    try:
+        calibration, rows = fit_calibration(
+            cand, sims, cand >= 0, truth,
+            strategies=strategies or STRATEGIES,
+            top_ks=top_ks,
+            temperatures=temperatures or (0.02, 0.05, 0.1),
+            tolerance=tolerance,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    print(f"Consultas: {len(texts)} ({int((truth < 0).sum())} OOS)")
+    print(f"{'strategy':<10} {'temp':>6} {'top_k':>6} {'thr':>7} {'acc_thr':>8} "
+          f"{'acc_cal':>8} {'holdout':>8}")
+    for r in rows:
+        temp = f"{r['temperature']:.3g}" if r["temperature"] is not None else "-"
+        print(f"{r['strategy']:<10} {temp:>6} {r['top_k']:>6} {r['threshold']:>7.3f} "
+              f"{r['threshold_accuracy']:>8.4f} {r['calibrated_accuracy']:>8.4f} "
+              f"{r['holdout_accuracy']:>8.4f}{'  <- escolhida' if r.get('chosen') else ''}")
+
+    print(f"\nEscolhida: {calibration.strategy}, top_k={calibration.top_k}, "
+          f"corte de probabilidade OOS {calibration.cutoff:.3f}")
+    print(f"  Use top_k={calibration.top_k} nas requisições e THRESHOLD=0: "
+          "a probabilidade calibrada decide o OOS.")
+    if not dry_run:
+        path = calibration_path(DATA_DIR, MODEL_NAME)
+        calibration.save(path)
+        print(f"Calibração salva em {path} (carregada na próxima inicialização).")
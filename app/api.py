@@ -2,17 +2,112 @@
 API Blueprint para endpoints de health check, predição de intenções e construção do índice FAISS.
 """
 
+import math
+import time
 import traceback
+from functools import wraps
+from typing import Optional
 
-from flask import Blueprint, current_app, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 
-from .model import predict
-from .config import DEFAULT_THRESHOLD
-from .utils import preprocess
-from .builder import build_index
+from . import metrics
+from . import registry
+from .jobs import jobs
+from .model import (
+    add_examples,
+    build_and_reload,
+    cache_stats,
+    compact_index,
+    get_model,
+    predict,
+    predict_batch,
+    readiness,
+    remove_examples,
+)
+from .config import DEFAULT_THRESHOLD, PREDICT_BATCH_MAX_TEXTS, PREDICT_MAX_TOP_K
+from .logs import request_log
+from .prefork import worker_count
+from .utils import preprocess, preprocess_batch, timed
 
 bp = Blueprint("api", __name__)
 
+# Cabeçalho que inclui na resposta o tempo de cada etapa da predição ("timing")
+TIMING_HEADER = "X-Debug-Timing"
+
+
+class RequestError(ValueError):
+    """Corpo de requisição inválido (respondido com HTTP 400)."""
+
+
+def _parse_top_k(value) -> int:
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError) as e:
+        raise RequestError("'top_k' must be an integer") from e
+    if not 1 <= top_k <= PREDICT_MAX_TOP_K:
+        raise RequestError(f"'top_k' must be between 1 and {PREDICT_MAX_TOP_K}")
+    return top_k
+
+
+def _parse_threshold(value) -> float:
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError) as e:
+        raise RequestError("'threshold' must be a number") from e
+    if not math.isfinite(threshold):
+        raise RequestError("'threshold' must be a finite number")
+    return threshold
+
+
+def _parse_per_item(value, n: int, name: str, parse):
+    """Valida um valor global ou uma lista com um valor por texto."""
+    if isinstance(value, list):
+        if len(value) != n:
+            raise RequestError(f"'{name}' must have {n} values, got {len(value)}")
+        return [parse(v) for v in value]
+    return parse(value)
+
+
+def parse_predict_payload(payload: dict) -> tuple[str, int, float]:
+    """Valida o JSON de /predict e retorna (texto pré-processado, top_k, threshold)."""
+    text = payload.get("text", "").strip()
+    if not text:
+        raise RequestError("Missing 'text' parameter")
+    top_k = _parse_top_k(payload.get("top_k", 5))
+    threshold = _parse_threshold(payload.get("threshold", DEFAULT_THRESHOLD))
+    return preprocess(text), top_k, threshold
+
+
+def parse_predict_batch_payload(payload: dict) -> tuple[list[str], object, object]:
+    """
+    Valida o JSON de /predict_batch e retorna (textos pré-processados, top_k,
+    threshold); top_k e threshold podem ser escalares ou listas.
+    """
+    texts = payload.get("texts")
+    if not isinstance(texts, list) or not texts:
+        raise RequestError("Missing 'texts' parameter")
+    if len(texts) > PREDICT_BATCH_MAX_TEXTS:
+        raise RequestError(f"Too many texts (max {PREDICT_BATCH_MAX_TEXTS})")
+    if not all(isinstance(t, str) and t.strip() for t in texts):
+        raise RequestError("All 'texts' must be non-empty strings")
+    top_k = _parse_per_item(payload.get("top_k", 5), len(texts), "top_k", _parse_top_k)
+    threshold = _parse_per_item(
+        payload.get("threshold", DEFAULT_THRESHOLD), len(texts), "threshold", _parse_threshold
+    )
+
+    texts = preprocess_batch(texts)
+    return texts, top_k, threshold
+
+
+def parse_tenant(payload: dict) -> Optional[str]:
+    """Tenant da requisição (campo 'tenant'); ``None`` usa o modelo padrão."""
+    tenant = payload.get("tenant")
+    if tenant is None:
+        return None
+    if not isinstance(tenant, str) or not tenant.strip():
+        raise RequestError("'tenant' must be a non-empty string")
+    return tenant.strip()
+
 
 @bp.route("/health", methods=["GET"])
 def health():
@@ -21,35 +116,75 @@ def health():
     return jsonify(status="ok")
 
 
+@bp.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness probe: 200 apenas depois que modelo, índice e labels foram
+    carregados; 503 enquanto carregam ou se o carregamento falhou.
+    """
+    state = readiness()
+    return jsonify(state), 200 if state["status"] == "ready" else 503
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Métricas do processo no formato de texto do Prometheus."""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
+@bp.route("/tenants", methods=["GET"])
+def tenants_route():
+    """Tenants declarados, índices carregados, encoders compartilhados e memória usada."""
+    return jsonify(registry.get_registry().stats())
+
+
+@bp.route("/cache/stats", methods=["GET"])
+def cache_stats_route():
+    """Endpoint com os contadores de hit/miss e ocupação dos caches de predição."""
+    return jsonify(cache_stats())
+
+
 @bp.route("/predict", methods=["POST"])
 def predict_route():
     """
     Endpoint de predição de intenções.
-    Espera JSON com 'text' (obrigatório), 'top_k' e 'threshold' (opcionais).
+    Espera JSON com 'text' (obrigatório), 'top_k', 'threshold' e 'tenant' (opcionais).
     """
     try:
+        start = time.perf_counter()
         payload = request.get_json(force=True)
         current_app.logger.debug("Received payload: %s", payload)
 
-        text = payload.get("text", "").strip()
-        if not text:
-            current_app.logger.warning("Missing 'text' parameter in request")
-            return jsonify(error="Missing 'text' parameter"), 400
-
-        text = preprocess(text)
-        top_k = int(payload.get("top_k", 5))
-        threshold = float(payload.get("threshold", DEFAULT_THRESHOLD))
+        timings = {}
+        try:
+            with timed(timings, "preprocess"):
+                text, top_k, threshold = parse_predict_payload(payload)
+            tenant = parse_tenant(payload)
+        except RequestError as e:
+            current_app.logger.warning("Invalid /predict request: %s", e)
+            return jsonify(error=str(e)), 400
 
-        current_app.logger.info(
+        request_log.info(
             'Predicting intent for text="%s", top_k=%d, threshold=%s',
             text,
             top_k,
             threshold,
         )
 
-        result = predict(text, top_k=top_k, threshold=threshold)
-        current_app.logger.info("Prediction result: %s", result)
+        try:
+            if tenant is None:
+                result = predict(text, top_k=top_k, threshold=threshold, timings=timings)
+            else:
+                result = registry.predict(tenant, text, top_k, threshold, timings=timings)
+        except registry.UnknownTenant:
+            return jsonify(error=f"Unknown tenant '{tenant}'"), 404
+        request_log.info("Prediction result: %s", result)
 
+        timings["total"] = time.perf_counter() - start
+        metrics.observe_stages(timings, ("preprocess",))
+        metrics.observe_request("/predict", timings["total"])
+        if metrics.timing_requested(request.headers.get(TIMING_HEADER)):
+            result = {**result, "timing": metrics.timing_ms(timings)}
         return jsonify(result)
 
     except Exception as e:  # pylint: disable=broad-exception-caught
@@ -62,20 +197,189 @@ def predict_route():
         )
 
 
+@bp.route("/predict_batch", methods=["POST"])
+def predict_batch_route():
+    """
+    Endpoint de predição de intenções em lote.
+    Espera JSON com 'texts' (lista obrigatória), 'top_k' e 'threshold' (opcionais,
+    com um valor global ou uma lista com um valor por texto) e 'tenant' (opcional).
+    """
+    try:
+        start = time.perf_counter()
+        payload = request.get_json(force=True)
+
+        timings = {}
+        try:
+            with timed(timings, "preprocess"):
+                texts, top_k, threshold = parse_predict_batch_payload(payload)
+            tenant = parse_tenant(payload)
+        except RequestError as e:
+            current_app.logger.warning("Invalid /predict_batch request: %s", e)
+            return jsonify(error=str(e)), 400
+
+        request_log.info("Predicting intents for a batch of %d texts", len(texts))
+
+        try:
+            if tenant is None:
+                results = predict_batch(texts, top_k=top_k, threshold=threshold, timings=timings)
+            else:
+                results = registry.predict_batch(tenant, texts, top_k, threshold, timings=timings)
+        except registry.UnknownTenant:
+            return jsonify(error=f"Unknown tenant '{tenant}'"), 404
+        except (TypeError, ValueError) as e:
+            return jsonify(error=str(e)), 400
+
+        timings["total"] = time.perf_counter() - start
+        metrics.observe_stages(timings, ("preprocess",))
+        metrics.observe_request("/predict_batch", timings["total"])
+        body = {"results": results}
+        if metrics.timing_requested(request.headers.get(TIMING_HEADER)):
+            body["timing"] = metrics.timing_ms(timings)
+        return jsonify(body)
+
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        current_app.logger.exception("Erro ao processar /predict_batch")
+        excerpt = "\n".join(traceback.format_exc().splitlines()[-3:])
+        return (
+            jsonify(error="Internal server error", detail=str(e), excerpt=excerpt),
+            500,
+        )
+
+
+def single_worker(view):
+    """
+    Recusa (409) as rotas que alteram o modelo quando há vários workers: a
+    troca do índice e o log de alterações valeriam só para o worker que
+    atendeu a requisição. Nesse caso, use ``WEB_CONCURRENCY=1`` ou a linha de
+    comando seguida de um restart do gunicorn.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        workers = worker_count()
+        if workers > 1:
+            return jsonify(
+                error=f"Model mutations are disabled with {workers} workers; "
+                "run with WEB_CONCURRENCY=1 or use the CLI and restart the server",
+            ), 409
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
 @bp.route("/build_index", methods=["POST"])
+@single_worker
 def build_index_route():
     """
     Endpoint para construção (ou reconstrução) do índice FAISS.
-    Retorna os caminhos dos arquivos gerados.
+    O índice é gerado em segundo plano e, ao final, o modelo em memória é
+    trocado atomicamente pelo novo. Aceita 'force' (opcional) no JSON para
+    reconstruir mesmo com artefatos válidos. Retorna o id do job.
     """
-    current_app.logger.info("Iniciando geração do índice FAISS e labels")
+    payload = request.get_json(silent=True) or {}
+    force = bool(payload.get("force", False))
+
+    current_app.logger.info("Agendando geração do índice FAISS e labels (force=%s)", force)
     try:
-        index_path, labels_path = build_index()
-        current_app.logger.info(
-            "Index gerado em %s, labels em %s", index_path, labels_path
+        job_id = jobs.submit("build_index", build_and_reload, force=force)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        current_app.logger.exception("Erro ao agendar geração do índice")
+        return jsonify(error="Falha ao gerar índice", detail=str(e)), 500
+
+    response = jsonify(job_id=job_id, status="pending")
+    response.headers["Location"] = f"/build_index/{job_id}"
+    return response, 202
+
+
+@bp.route("/build_index/<job_id>", methods=["GET"])
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def build_index_status_route(job_id):
+    """
+    Endpoint de status de um job (construção ou compactação do índice).
+    Quando concluído, 'result' traz os caminhos dos arquivos gerados.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify(error="Job not found"), 404
+    return jsonify(job)
+
+
+def _schedule_compaction() -> str:
+    job_id = jobs.submit("compact_index", compact_index)
+    current_app.logger.info("Compactação do índice agendada (job %s)", job_id)
+    return job_id
+
+
+@bp.route("/examples", methods=["POST"])
+@single_worker
+def add_examples_route():
+    """
+    Endpoint de inserção incremental de exemplos no índice.
+    Espera JSON com 'examples': lista de objetos {'text', 'label'}.
+    Retorna os ids atribuídos e, se o limite de alterações pendentes for
+    atingido, o id do job de compactação agendado.
+    """
+    payload = request.get_json(silent=True) or {}
+    examples = payload.get("examples")
+    if not isinstance(examples, list) or not examples:
+        return jsonify(error="Missing 'examples' parameter"), 400
+    if not all(
+        isinstance(ex, dict)
+        and isinstance(ex.get("text"), str) and ex["text"].strip()
+        and isinstance(ex.get("label"), str) and ex["label"].strip()
+        for ex in examples
+    ):
+        return jsonify(error="Each example must have non-empty 'text' and 'label'"), 400
+
+    try:
+        ids = add_examples(
+            [ex["text"].strip() for ex in examples], [ex["label"].strip() for ex in examples]
         )
-        return jsonify(index_path=index_path, labels_path=labels_path), 201
+        body = {"ids": ids}
+        if get_model().needs_compaction:
+            body["compaction_job_id"] = _schedule_compaction()
+        return jsonify(body), 201
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        current_app.logger.exception("Erro ao inserir exemplos")
+        return jsonify(error="Falha ao inserir exemplos", detail=str(e)), 500
+
 
+@bp.route("/examples", methods=["DELETE"])
+@single_worker
+def remove_examples_route():
+    """
+    Endpoint de remoção de exemplos por id (tombstones até a compactação).
+    Espera JSON com 'ids': lista de inteiros.
+    """
+    payload = request.get_json(silent=True) or {}
+    ids = payload.get("ids")
+    if not isinstance(ids, list) or not ids or not all(
+        isinstance(i, int) and not isinstance(i, bool) for i in ids
+    ):
+        return jsonify(error="Missing 'ids' parameter"), 400
+
+    try:
+        removed = remove_examples(ids)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:  # pylint: disable=broad-exception-caught
-        current_app.logger.exception("Erro ao gerar índice")
-        return jsonify(error="Falha ao gerar índice", detail=str(e)), 500
+        current_app.logger.exception("Erro ao remover exemplos")
+        return jsonify(error="Falha ao remover exemplos", detail=str(e)), 500
+
+    body = {"removed": removed}
+    if get_model().needs_compaction:
+        body["compaction_job_id"] = _schedule_compaction()
+    return jsonify(body)
+
+
+@bp.route("/examples/compact", methods=["POST"])
+@single_worker
+def compact_examples_route():
+    """
+    Endpoint que agenda a compactação do índice: incorpora as inserções e
+    remoções pendentes aos artefatos em disco e esvazia o log de alterações.
+    """
+    job_id = _schedule_compaction()
+    response = jsonify(job_id=job_id, status="pending")
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return response, 202
@@ -0,0 +1,316 @@
+"""
+Aplicação ASGI para produção (``SERVER_MODE=asgi``).
+
+O HTTP roda no laço de eventos do uvicorn e as rotas de predição mandam o
+trabalho do ``IntentModel`` para um ``InferenceExecutor`` limitado:
+
+- fila cheia (ou servidor em desligamento) responde 503 com ``Retry-After``;
+- cada requisição tem um prazo (``REQUEST_TIMEOUT_MS``, que o cliente pode
+  reduzir com o cabeçalho ``X-Request-Timeout-Ms``); vencido, responde 504 e a
+  tarefa é descartada se ainda estiver na fila;
+- no desligamento, o executor para de aceitar tarefas e espera as pendentes
+  por até ``SHUTDOWN_TIMEOUT_S``.
+
+As demais rotas (build do índice, exemplos, jobs, caches) são servidas pelo
+app Flask através do adaptador WSGI do ``asgiref``.
+
+    uvicorn app.asgi:asgi_app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import json
+import logging
+import time
+import traceback
+from typing import Optional
+
+from asgiref.wsgi import WsgiToAsgi
+
+from . import app as flask_app
+from . import metrics
+from . import registry
+from .api import (
+    RequestError,
+    parse_predict_batch_payload,
+    parse_predict_payload,
+    parse_tenant,
+)
+from .config import (
+    BACKGROUND_LOAD,
+    INFERENCE_QUEUE_SIZE,
+    INFERENCE_WORKERS,
+    REQUEST_TIMEOUT_MS,
+    SHUTDOWN_TIMEOUT_S,
+)
+from .executor import DeadlineExceeded, InferenceExecutor, Overloaded
+from .model import (
+    is_loaded,
+    load_model,
+    load_model_in_background,
+    predict,
+    predict_batch,
+    readiness,
+)
+from .prefork import cpu_budget
+from .utils import timed
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo aceito para o corpo das requisições de predição
+MAX_BODY_BYTES = 16 * 1024 * 1024
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+TIMING_HEADER = b"x-debug-timing"
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, body: dict, headers: Optional[list] = None):
+        super().__init__(body.get("error"))
+        self.status = status
+        self.body = body
+        self.headers = headers or []
+
+
+async def _send_json(send, status: int, body: dict, headers: Optional[list] = None):
+    data = json.dumps(body).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(data)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+async def _read_json(receive) -> dict:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise _HTTPError(499, {"error": "Client disconnected"})
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise _HTTPError(413, {"error": f"Body too large (max {MAX_BODY_BYTES} bytes)"})
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    try:
+        payload = json.loads(b"".join(chunks) or b"null")
+    except ValueError as e:
+        raise _HTTPError(400, {"error": "Invalid JSON body"}) from e
+    if not isinstance(payload, dict):
+        raise _HTTPError(400, {"error": "JSON body must be an object"})
+    return payload
+
+
+class IntentASGIApp:
+    """
+    App ASGI com rotas de predição assíncronas e o app Flask como fallback.
+
+    Args:
+        executor: Executor de inferência. Por padrão é criado na primeira
+            requisição (já no worker, em servidores pre-fork), com
+            ``INFERENCE_WORKERS`` threads ou os núcleos reservados ao processo.
+        timeout_ms: Prazo máximo de cada requisição de predição.
+        load_on_startup: Carrega modelo e índice no evento ``lifespan.startup``,
+            se ainda não tiverem sido pré-carregados.
+        background_load: Conclui o startup sem esperar o carregamento, que
+            segue em segundo plano; ``/ready`` responde 503 até terminar.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[InferenceExecutor] = None,
+        timeout_ms: float = REQUEST_TIMEOUT_MS,
+        load_on_startup: bool = True,
+        background_load: bool = BACKGROUND_LOAD,
+        shutdown_timeout_s: float = SHUTDOWN_TIMEOUT_S,
+    ):
+        self._executor = executor
+        self.timeout_ms = timeout_ms
+        self.load_on_startup = load_on_startup
+        self.background_load = background_load
+        self._loading = None
+        self.shutdown_timeout_s = shutdown_timeout_s
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.routes = {
+            ("GET", "/health"): self._health,
+            ("GET", "/ready"): self._ready,
+            ("POST", "/predict"): self._predict,
+            ("POST", "/predict_batch"): self._predict_batch,
+        }
+
+    @property
+    def executor(self) -> InferenceExecutor:
+        if self._executor is None:
+            self._executor = InferenceExecutor(
+                INFERENCE_WORKERS or cpu_budget(), INFERENCE_QUEUE_SIZE
+            )
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        handler = self.routes.get((scope.get("method"), scope.get("path")))
+        if scope["type"] != "http" or handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        try:
+            status, body = await handler(scope, receive)
+            await _send_json(send, status, body)
+        except _HTTPError as e:
+            if e.status != 499:
+                await _send_json(send, e.status, e.body, e.headers)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Justificado: captura ampla para retornar erro HTTP controlado em produção
+            logger.exception("Erro ao processar %s", scope.get("path"))
+            excerpt = "\n".join(traceback.format_exc().splitlines()[-3:])
+            await _send_json(
+                send, 500, {"error": "Internal server error", "detail": str(e), "excerpt": excerpt}
+            )
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    if self.load_on_startup and not is_loaded():
+                        if self.background_load:
+                            self._loading = load_model_in_background()
+                        else:
+                            await loop.run_in_executor(None, load_model)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # Justificado: a falha é reportada ao servidor, que aborta a inicialização
+                    logger.exception("Falha ao carregar o modelo")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                logger.info(
+                    "Servidor ASGI pronto (%d threads de inferência, fila %d).",
+                    self.executor.max_workers,
+                    self.executor.max_queue,
+                )
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                logger.info("Desligando: aguardando tarefas de inferência pendentes...")
+                await loop.run_in_executor(
+                    None, self.executor.shutdown, True, self.shutdown_timeout_s
+                )
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def collect_metrics(self):
+        """Métricas do executor de inferência, lidas a cada coleta de /metrics."""
+        if self._executor is None:
+            return
+        stats = self._executor.stats()
+        yield "intent_executor_pending", "gauge", "Predições na fila ou em execução.", [
+            ({}, stats["pending"])
+        ]
+        for field, doc in (
+            ("rejected", "Predições rejeitadas com 503 (fila cheia)."),
+            ("expired", "Predições descartadas por prazo vencido (504)."),
+            ("failed", "Predições que terminaram com erro."),
+        ):
+            yield f"intent_executor_{field}_total", "counter", doc, [({}, stats[field])]
+
+    def _timeout_s(self, scope) -> float:
+        timeout_ms = self.timeout_ms
+        for name, value in scope.get("headers", []):
+            if name == TIMEOUT_HEADER:
+                try:
+                    timeout_ms = min(timeout_ms, float(value))
+                except ValueError as e:
+                    raise _HTTPError(400, {"error": "Invalid X-Request-Timeout-Ms header"}) from e
+        return timeout_ms / 1000.0
+
+    async def _run(self, scope, fn, *args, **kwargs):
+        """Executa ``fn`` no executor respeitando a fila e o prazo da requisição."""
+        timeout_s = self._timeout_s(scope)
+        try:
+            future = self.executor.submit(
+                fn, *args, deadline=time.monotonic() + timeout_s, **kwargs
+            )
+        except Overloaded as e:
+            raise _HTTPError(503, {"error": str(e)}, [(b"retry-after", b"1")]) from e
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout_s)
+        except (asyncio.TimeoutError, DeadlineExceeded) as e:
+            raise _HTTPError(504, {"error": "Deadline exceeded"}) from e
+
+    async def _health(self, _scope, _receive):
+        return 200, {"status": "ok"}
+
+    async def _ready(self, _scope, _receive):
+        state = readiness()
+        return (200 if state["status"] == "ready" else 503), state
+
+    @staticmethod
+    def _finish_timing(scope, route: str, start: float, timings: dict, body: dict) -> dict:
+        """Registra as métricas da requisição e, se pedido, inclui ``timing`` no corpo."""
+        timings["total"] = time.perf_counter() - start
+        metrics.observe_stages(timings, ("preprocess",))
+        metrics.observe_request(route, timings["total"])
+        for name, value in scope.get("headers", []):
+            if name == TIMING_HEADER and metrics.timing_requested(value):
+                return {**body, "timing": metrics.timing_ms(timings)}
+        return body
+
+    async def _predict(self, scope, receive):
+        start = time.perf_counter()
+        payload = await _read_json(receive)
+        timings = {}
+        try:
+            with timed(timings, "preprocess"):
+                text, top_k, threshold = parse_predict_payload(payload)
+            tenant = parse_tenant(payload)
+        except RequestError as e:
+            return 400, {"error": str(e)}
+        try:
+            if tenant is None:
+                result = await self._run(
+                    scope, predict, text, top_k=top_k, threshold=threshold, timings=timings
+                )
+            else:
+                result = await self._run(
+                    scope, registry.predict, tenant, text, top_k, threshold, timings=timings
+                )
+        except registry.UnknownTenant:
+            return 404, {"error": f"Unknown tenant '{tenant}'"}
+        return 200, self._finish_timing(scope, "/predict", start, timings, result)
+
+    async def _predict_batch(self, scope, receive):
+        start = time.perf_counter()
+        payload = await _read_json(receive)
+        timings = {}
+        try:
+            with timed(timings, "preprocess"):
+                texts, top_k, threshold = parse_predict_batch_payload(payload)
+            tenant = parse_tenant(payload)
+        except RequestError as e:
+            return 400, {"error": str(e)}
+        try:
+            if tenant is None:
+                results = await self._run(
+                    scope, predict_batch, texts, top_k=top_k, threshold=threshold, timings=timings
+                )
+            else:
+                results = await self._run(
+                    scope, registry.predict_batch, tenant, texts, top_k, threshold,
+                    timings=timings,
+                )
+        except registry.UnknownTenant:
+            return 404, {"error": f"Unknown tenant '{tenant}'"}
+        except (TypeError, ValueError) as e:
+            return 400, {"error": str(e)}
+        body = {"results": results}
+        return 200, self._finish_timing(scope, "/predict_batch", start, timings, body)
+
+
+asgi_app = IntentASGIApp()
+metrics.REGISTRY.add_collector(asgi_app.collect_metrics)
@@ -0,0 +1,137 @@
+"""
+Micro-batching dinâmico: agrupa predições concorrentes em um único lote
+para que o modelo faça um só ``encode`` e uma só busca FAISS por lote.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesce chamadas concorrentes em lotes de até ``max_batch_size`` itens.
+
+    O primeiro item que chega abre uma janela de no máximo ``max_wait_ms``;
+    o lote é despachado quando enche ou quando a janela expira. O ``handler``
+    recebe a lista de itens e deve devolver uma lista de resultados na mesma
+    ordem, e cada chamador recebe apenas o seu resultado. Se o lote falha, cada
+    item é refeito sozinho, para que um item inválido não derrube os demais.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list], list],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size deve ser >= 1.")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, item: Any) -> Future:
+        """Enfileira um item e retorna um Future com o seu resultado."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher encerrado.")
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Enfileira um item e bloqueia até o seu resultado ficar pronto."""
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self):
+        """Processa os itens pendentes e encerra a thread de despacho."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> tuple[list, bool]:
+        """Aguarda o primeiro item e acumula outros até encher ou expirar a janela."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _loop(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+    def _dispatch(self, batch: list):
+        entries = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not entries:
+            return
+
+        logger.debug("Despachando lote com %d itens", len(entries))
+        try:
+            results = self._handle([item for item, _ in entries])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Justificado: o erro é repassado aos chamadores pelos seus Futures
+            if len(entries) == 1:
+                entries[0][1].set_exception(e)
+                return
+            logger.debug("Lote falhou (%s); refazendo %d itens um a um", e, len(entries))
+            for entry in entries:
+                self._dispatch_one(*entry)
+            return
+
+        for (_, fut), result in zip(entries, results):
+            fut.set_result(result)
+
+    def _handle(self, items: list) -> list:
+        results = self.handler(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"Handler retornou {len(results)} resultados para {len(items)} itens.")
+        return results
+
+    def _dispatch_one(self, item: Any, fut: Future):
+        try:
+            fut.set_result(self._handle([item])[0])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Justificado: o erro é repassado só ao chamador do item
+            fut.set_exception(e)
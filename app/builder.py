@@ -1,144 +1,600 @@
 """
 Geração do índice FAISS e labels para o serviço de detecção de intenções
-usando o dataset CLINC-OOS e embeddings do SentenceTransformer.
+usando o dataset CLINC-OOS (ou outro corpus) e embeddings do SentenceTransformer.
 """
 
 import os
 import json
+import time
 import logging
+import resource
+from contextlib import nullcontext
+from functools import partial
+from typing import Optional
 
 import numpy as np
 import faiss
-from datasets import load_dataset
-from sentence_transformers import SentenceTransformer
 
-from .config import MODEL_NAME, DATA_DIR
+from .config import (
+    BUILD_CHUNK_SIZE,
+    BUILD_SOURCE,
+    DATA_DIR,
+    EMBED_CHUNK_SIZE,
+    EMBED_WORKERS,
+    EMBEDDING_STORE_ENABLED,
+    ENCODE_MAX_TOKENS,
+    ENCODER_BACKEND,
+    ENCODER_THREADS,
+    INDEX_EF_CONSTRUCTION,
+    INDEX_FACTORY,
+    INDEX_SEARCH_PARAMS,
+    MODEL_NAME,
+    RERANK_ENABLED,
+    SAVE_LABEL_TEXTS,
+    TRAIN_SAMPLE_SIZE,
+    VERIFY_ARTIFACT_CHECKSUMS,
+)
+from .delta import delta_path
+from .embedding_store import EmbeddingStore
+from .encoder_pool import EncoderPool
+from .encoders import default_model_dir, encode_batched, encoder_key, load_encoder
+from .ingest import Corpus
+from .labels import LabelStore, label_paths, migrate_legacy_labels
+from .manifest import verify_manifest, write_manifest
+from .rerank import VectorFileWriter, needs_rerank, vectors_path
+from .scoring import calibration_path
+from .utils import format_timings, timed
 
 logger = logging.getLogger(__name__)
 
-LOCAL_MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "all-MiniLM-L6-v2")
+# Acima deste número de blocos o cache de embeddings é consolidado após o build
+MAX_STORE_CHUNKS = 64
+
+
+def apply_search_params(index: faiss.Index, params: str):
+    """
+    Aplica parâmetros de busca no formato do ``faiss.ParameterSpace``
+    (ex.: ``"efSearch=128"`` ou ``"nprobe=16"``). Parâmetros que não se
+    aplicam ao tipo de índice são ignorados.
+    """
+    space = faiss.ParameterSpace()
+    for item in filter(None, (p.strip() for p in (params or "").split(","))):
+        name, _, value = item.partition("=")
+        try:
+            space.set_index_parameter(index, name.strip(), float(value))
+        except RuntimeError:
+            logger.debug("Parâmetro de busca '%s' não se aplica ao índice.", name)
+
+
+def read_index(path: str, mmap: bool = False) -> faiss.Index:
+    """
+    Lê um índice FAISS. Com ``mmap``, os vetores (códigos flat) ficam mapeados
+    do arquivo em vez de copiados para a memória do processo, e processos que
+    leem o mesmo arquivo compartilham as páginas pelo page cache. O índice
+    mapeado é somente leitura: copie-o (serializando) antes de alterá-lo.
+    """
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None) if mmap else 0
+    if flag is None:
+        logger.warning("Esta versão do FAISS não mapeia índices flat; lendo em memória.")
+        flag = 0
+    return faiss.read_index(path, flag)
+
+
+def write_index(index: faiss.Index, path: str):
+    """
+    Grava o índice em um arquivo temporário e o move sobre ``path``, para não
+    sobrescrever páginas de um índice mapeado em memória por outro processo.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def make_index(
+    dim: int,
+    factory: str = INDEX_FACTORY,
+    ef_construction: int = INDEX_EF_CONSTRUCTION,
+    search_params: str = INDEX_SEARCH_PARAMS,
+) -> faiss.Index:
+    """
+    Cria um índice FAISS de inner-product (cosine) a partir de uma string do
+    ``faiss.index_factory`` (ex.: ``"Flat"``, ``"HNSW32,Flat"``, ``"HNSW32,SQ8"``,
+    ``"IVF256,PQ48"``). Índices que exigem treino devem passar por ``train_index``.
+    Índices binários (``"LSH"``, ``"LSHrt"``) só existem com distância de Hamming
+    e exigem o re-ranking exato (``rerank``).
+    """
+    if factory.startswith("LSH"):
+        index = faiss.index_factory(dim, factory)
+    else:
+        index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efConstruction = ef_construction
+    apply_search_params(index, search_params)
+    return index
+
+
+def train_index(index: faiss.Index, embeddings: np.ndarray):
+    """Treina o índice (IVF, PQ, SQ...) com os embeddings, quando necessário."""
+    if not index.is_trained:
+        logger.info("Treinando índice FAISS com %d vetores...", len(embeddings))
+        index.train(embeddings)
+
+
+def add_vectors(index: faiss.Index, vectors: np.ndarray, ids: np.ndarray):
+    """
+    Adiciona vetores com ids explícitos. Índices com mapeamento de ids
+    (``IndexIDMap``) usam ``add_with_ids``; nos demais o id é a posição,
+    então os ids precisam começar em ``index.ntotal``.
+    """
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+        return
+    if len(ids) and int(ids[0]) != index.ntotal:
+        raise ValueError(f"Ids devem começar em {index.ntotal}, recebido {ids[0]}.")
+    index.add(vectors)
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """Ids dos vetores presentes no índice (posições, ou o ``id_map`` do IndexIDMap)."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map)
+    return np.arange(index.ntotal, dtype="int64")
+
+
+def reconstruct_vectors(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """Recupera os vetores (float32) armazenados no índice para os ids informados."""
+    ids = np.asarray(ids, dtype="int64")
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        positions = {int(v): i for i, v in enumerate(faiss.vector_to_array(index.id_map))}
+        inner, ids = faiss.downcast_index(index.index), np.array([positions[int(i)] for i in ids])
+    else:
+        inner = index
+    try:
+        ivf = faiss.extract_index_ivf(inner)
+        ivf.make_direct_map()
+    except RuntimeError:
+        pass
+    if len(ids) == 0:
+        return np.empty((0, index.d), dtype="float32")
+    full = inner.reconstruct_n(0, inner.ntotal)
+    return np.ascontiguousarray(full[ids], dtype="float32")
+
+
+def compute_centroids(embeddings: np.ndarray, label_ids: np.ndarray, n_intents: int) -> np.ndarray:
+    """
+    Calcula o centróide normalizado de cada intenção, shape (n_intents, dim).
+    Intenções sem exemplos ficam com vetor nulo.
+    """
+    centroids = np.zeros((n_intents, embeddings.shape[1]), dtype="float32")
+    np.add.at(centroids, np.asarray(label_ids), embeddings)
+    return normalize_centroids(centroids)
+
+
+def normalize_centroids(sums: np.ndarray) -> np.ndarray:
+    """Normaliza as somas de embeddings por intenção; linhas nulas continuam nulas."""
+    centroids = np.asarray(sums, dtype="float32")
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return np.divide(centroids, norms, out=centroids, where=norms > 0)
+
+
+def build_hnsw(dim: int, m: int = 32, ef_construction: int = 400) -> faiss.Index:
+    """Cria um índice FAISS do tipo HNSW para similaridade com inner-product (cosine)."""
+    return make_index(dim, f"HNSW{m},Flat", ef_construction, "efSearch=128")
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo, em MB (ru_maxrss é em KB no Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class BuildProgress:
+    """Progresso e vazão do build em streaming, registrados no log a cada bloco."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.texts = 0
+        self.chunks = 0
+        # Tempo acumulado por etapa (sample, train, encode, add, save)
+        self.timings: dict[str, float] = {}
+
+    def update(self, n_texts: int):
+        self.texts += n_texts
+        self.chunks += 1
+        elapsed = time.perf_counter() - self.start
+        logger.info(
+            "Build: %d textos em %d blocos, %.0f textos/s (%s, pico de RSS %.0f MB).",
+            self.texts,
+            self.chunks,
+            self.texts / elapsed if elapsed > 0 else 0.0,
+            format_timings(self.timings),
+            peak_rss_mb(),
+        )
+
+    def report(self) -> dict:
+        """Resumo do build: totais, vazão, tempo por etapa e pico de memória."""
+        elapsed = time.perf_counter() - self.start
+        return {
+            "texts": self.texts,
+            "chunks": self.chunks,
+            "seconds": round(elapsed, 3),
+            "texts_per_s": round(self.texts / elapsed, 1) if elapsed > 0 else 0.0,
+            **{f"{name}_seconds": round(value, 3) for name, value in self.timings.items()},
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
 
 
 class IndexBuilder:
     """
     Encapsula a lógica de construção do índice FAISS e dos labels
-    a partir do dataset CLINC-OOS.
+    a partir do dataset CLINC-OOS ou de outro corpus (``ingest.Corpus``).
     """
 
-    def __init__(self, model_name: str = MODEL_NAME, data_dir: str = DATA_DIR):
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        data_dir: str = DATA_DIR,
+        index_factory: str = INDEX_FACTORY,
+        search_params: str = INDEX_SEARCH_PARAMS,
+        ef_construction: int = INDEX_EF_CONSTRUCTION,
+        encoder_backend: str = ENCODER_BACKEND,
+        corpus: Optional[Corpus] = None,
+        chunk_size: int = BUILD_CHUNK_SIZE,
+        train_sample_size: int = TRAIN_SAMPLE_SIZE,
+        embed_workers: int = EMBED_WORKERS,
+        save_vectors: bool = RERANK_ENABLED,
+    ):
         """
         Inicializa o builder.
 
         Args:
             model_name (str): Nome do modelo a ser usado.
             data_dir (str): Diretório para salvar/carregar o índice e labels.
+            index_factory (str): String do ``faiss.index_factory`` do índice.
+            search_params (str): Parâmetros de busca (ex.: ``"efSearch=128"``).
+            ef_construction (int): efConstruction, para índices HNSW.
+            encoder_backend (str): Backend do encoder (torch, onnx ou onnx-int8).
+            corpus (Corpus): Fonte dos exemplos de treino (padrão: ``BUILD_SOURCE``
+                ou, se vazio, o CLINC-OOS local).
+            chunk_size (int): Exemplos lidos, codificados e indexados por bloco.
+            train_sample_size (int): Tamanho da amostra usada no treino de
+                índices que exigem treino (IVF, PQ...).
+            embed_workers (int): Processos que dividem a codificação dos textos
+                (``EncoderPool``); 0 ou 1 codifica no próprio processo.
+            save_vectors (bool): Grava os vetores float32 exatos (``_vectors.npy``)
+                para o re-ranking dos candidatos de índices comprimidos.
         """
         self.model_name = model_name
         self.data_dir = data_dir
-        self.model_path = LOCAL_MODEL_PATH
+        self.index_factory = index_factory
+        self.search_params = search_params
+        self.ef_construction = ef_construction
+        self.encoder_backend = encoder_backend
+        self.corpus = corpus
+        self.chunk_size = chunk_size
+        self.train_sample_size = train_sample_size
+        self.embed_workers = embed_workers
+        self.save_vectors = save_vectors
+        self.last_report: Optional[dict] = None
+        self.model_path = default_model_dir(self.model_name)
         self.index_path = os.path.join(self.data_dir, f"{self.model_name}.faiss")
-        self.labels_path = os.path.join(self.data_dir, f"{self.model_name}_labels.json")
+        self.label_paths = label_paths(self.data_dir, self.model_name)
+        self.labels_path = self.label_paths["ids"]
+        self.centroids_path = os.path.join(self.data_dir, f"{self.model_name}_centroids.npy")
+        self.vectors_path = vectors_path(self.data_dir, self.model_name)
+        self.delta_path = delta_path(self.data_dir, self.model_name)
+        self.calibration_path = calibration_path(self.data_dir, self.model_name)
         self.model = None
 
     def _load_model(self):
-        """Carrega o modelo SentenceTransformer."""
-        logger.info("Carregando modelo de embeddings '%s'...", self.model_name)
-        self.model = SentenceTransformer(self.model_path, trust_remote_code=True)
+        """Carrega o modelo de embeddings no backend configurado."""
+        logger.info(
+            "Carregando modelo de embeddings '%s' (backend %s)...",
+            self.model_name,
+            self.encoder_backend,
+        )
+        if self.embed_workers > 1:
+            self.model = EncoderPool(
+                self.model_path,
+                self.encoder_backend,
+                self.embed_workers,
+                ENCODER_THREADS,
+                max_tokens=ENCODE_MAX_TOKENS,
+            )
+        else:
+            self.model = load_encoder(self.model_path, self.encoder_backend, ENCODER_THREADS)
 
-    def _load_dataset(self) -> tuple[list[str], list[str]]:
-        """Carrega o dataset CLINC-OOS e extrai textos e labels."""
-        logger.info("Carregando dataset CLINC-OOS...")
+    def close(self):
+        """Encerra os processos de encoding, se houver (o encoder é recarregado sob demanda)."""
+        if isinstance(self.model, EncoderPool):
+            self.model.close()
+            self.model = None
+
+    def _load_dataset(self, split: str = "train") -> tuple[list[str], list[str], list[str]]:
+        """Carrega um split do dataset CLINC-OOS e extrai textos, labels e nomes das intenções."""
+        # Importado aqui para que o caminho de serviço não carregue o datasets
+        from datasets import load_dataset  # pylint: disable=import-outside-toplevel
+
+        logger.info("Carregando dataset CLINC-OOS (split '%s')...", split)
         dataset = load_dataset(
             path="./datasets/clinc_oos", name="default", cache_dir="./datasets"
         )
-        train = dataset["train"]
+        train = dataset[split]
         texts = train["text"]
         intents = train["intent"]
         intent_names = train.features["intent"].names
         labels = [intent_names[i] for i in intents]
-        return texts, labels
+        return texts, labels, intent_names
 
-    def _generate_embeddings(self, texts: list[str]) -> np.ndarray:
-        """Gera embeddings para uma lista de textos."""
+    def _encode_texts(self, texts: list[str], progress: bool = True) -> np.ndarray:
+        """Codifica uma lista de textos com o modelo de embeddings."""
         if not self.model:
             self._load_model()
 
-        logger.info("Gerando embeddings com o modelo '%s'...", self.model_name)
-        embeddings = self.model.encode(
-            texts,
-            batch_size=256,
-            show_progress_bar=True,
-            normalize_embeddings=True,
+        if progress:
+            logger.info("Gerando embeddings com o modelo '%s'...", self.model_name)
+        # Sem cópia: a saída do EncoderPool já é float32 (mapeada em memória)
+        return encode_batched(
+            self.model, texts, ENCODE_MAX_TOKENS, max_batch_size=256, show_progress_bar=progress
         )
-        array = np.array(embeddings, dtype="float32")
+
+    def _generate_embeddings(self, texts: list[str]) -> np.ndarray:
+        """
+        Gera embeddings para uma lista de textos.
+        Com o cache de embeddings ativo, só os textos ainda não codificados por
+        este modelo passam pelo encoder, e o modelo nem é carregado se todos
+        estiverem em cache.
+        """
+        store = self._embedding_store()
+        if store is not None:
+            array = store.encode(list(texts), self._encode_texts, chunk_size=EMBED_CHUNK_SIZE)
+            if store.num_chunks > MAX_STORE_CHUNKS:
+                store.consolidate()
+        else:
+            array = self._encode_texts(texts)
+
         if len(array.shape) != 2:
             raise ValueError("Embeddings não possuem shape 2D esperado.")
         return array
 
-    @staticmethod
-    def _build_hnsw_index(dim: int, m: int = 32, ef_construction: int = 400) -> faiss.Index:
-        """Cria um índice FAISS do tipo HNSW para similaridade com inner-product (cosine)."""
-        index = faiss.IndexHNSWFlat(dim, m, faiss.METRIC_INNER_PRODUCT)
-        index.hnsw.efConstruction = ef_construction
-        index.hnsw.efSearch = 128
-        return index
+    def _new_index(self, dim: int) -> faiss.Index:
+        logger.info(
+            "Construindo índice FAISS '%s' (dim=%d, busca='%s')...",
+            self.index_factory,
+            dim,
+            self.search_params,
+        )
+        return make_index(dim, self.index_factory, self.ef_construction, self.search_params)
 
-    def _create_and_save_artifacts(self) -> tuple[str, str]:
-        """Orquestra a criação e salvamento do índice e labels."""
-        texts, labels = self._load_dataset()
-        embeddings = self._generate_embeddings(texts)
+    def _embedding_store(self) -> Optional[EmbeddingStore]:
+        if not EMBEDDING_STORE_ENABLED:
+            return None
+        return EmbeddingStore(self.data_dir, encoder_key(self.model_name, self.encoder_backend))
+
+    def _embed_chunk(self, texts: list[str], store: Optional[EmbeddingStore]) -> np.ndarray:
+        """Embeddings de um bloco do corpus, pelo cache de embeddings quando ativo."""
+        encode = partial(self._encode_texts, progress=False)
+        if store is not None:
+            return store.encode(texts, encode, chunk_size=EMBED_CHUNK_SIZE)
+        return encode(texts)
+
+    def _train_on_sample(
+        self,
+        index: faiss.Index,
+        corpus: Corpus,
+        store: Optional[EmbeddingStore],
+        progress: BuildProgress,
+    ):
+        """
+        Treina o índice com uma amostra uniforme do corpus, lida em uma passada
+        extra só de texto. Com o cache de embeddings ativo, os textos da
+        amostra não são codificados de novo na passada de indexação.
+        """
+        with timed(progress.timings, "sample"):
+            sample = corpus.sample(self.train_sample_size, self.chunk_size)
+        with timed(progress.timings, "encode"):
+            embeddings = np.concatenate([
+                self._embed_chunk(sample[i : i + self.chunk_size], store)
+                for i in range(0, len(sample), self.chunk_size)
+            ])
+        del sample
+        with timed(progress.timings, "train"):
+            train_index(index, embeddings)
 
-        logger.info("Construindo índice FAISS (dim=%d)...", embeddings.shape[1])
-        index = self._build_hnsw_index(embeddings.shape[1])
-        index.add(embeddings)
+    def _create_and_save_artifacts(self) -> tuple[str, str]:
+        """
+        Orquestra a criação e salvamento do índice e labels em streaming: cada
+        bloco do corpus é codificado e adicionado ao índice em seguida, e os
+        textos vão direto para o arquivo. Além do próprio índice, só os ids de
+        intenção (4 bytes por exemplo) e as somas por intenção ficam em memória.
+        """
+        corpus = self.corpus or Corpus(BUILD_SOURCE)
+        store = self._embedding_store()
+        progress = BuildProgress()
+        logger.info("Build em streaming de %r em blocos de %d...", corpus, self.chunk_size)
 
         os.makedirs(self.data_dir, exist_ok=True)
-        logger.info("Salvando índice em '%s' e labels em '%s'...", self.index_path, self.labels_path)
-        faiss.write_index(index, self.index_path)
-
-        with open(self.labels_path, "w", encoding="utf-8") as f:
-            json.dump(
-                [{"text": text, "label": label} for text, label in zip(texts, labels)],
-                f,
-                indent=2,
-                ensure_ascii=False,
-            )
+        texts_tmp = f"{self.label_paths['texts']}.tmp"
+        index, vocab, sums, label_ids, vectors_file = None, {}, None, [], None
+        with open(texts_tmp, "wb") if SAVE_LABEL_TEXTS else nullcontext() as texts_file:
+            for texts, labels in corpus.chunks(self.chunk_size):
+                if not vocab and corpus.intent_names:
+                    vocab = {name: i for i, name in enumerate(corpus.intent_names)}
+                with timed(progress.timings, "encode"):
+                    embeddings = self._embed_chunk(texts, store)
+                if embeddings.ndim != 2:
+                    raise ValueError("Embeddings não possuem shape 2D esperado.")
 
-        logger.info("Geração do índice finalizada.")
+                if index is None:
+                    index = self._new_index(embeddings.shape[1])
+                    if needs_rerank(index) and not self.save_vectors:
+                        raise ValueError(
+                            f"O índice '{self.index_factory}' não devolve similaridades de "
+                            "produto interno: ative o re-ranking (RERANK_ENABLED)."
+                        )
+                    if self.save_vectors:
+                        vectors_file = VectorFileWriter(
+                            f"{self.vectors_path}.tmp", embeddings.shape[1]
+                        )
+                    if not index.is_trained:
+                        self._train_on_sample(index, corpus, store, progress)
+
+                ids = np.fromiter(
+                    (vocab.setdefault(label, len(vocab)) for label in labels),
+                    dtype=np.int32,
+                    count=len(labels),
+                )
+                if sums is None or len(sums) < len(vocab):
+                    grown = np.zeros((len(vocab), embeddings.shape[1]), dtype="float64")
+                    if sums is not None:
+                        grown[: len(sums)] = sums
+                    sums = grown
+                np.add.at(sums, ids, embeddings)
+
+                with timed(progress.timings, "add"):
+                    index.add(embeddings)
+                    if vectors_file is not None:
+                        vectors_file.write(embeddings)
+                label_ids.append(ids)
+                if texts_file is not None:
+                    texts_file.writelines(
+                        (json.dumps(text, ensure_ascii=False) + "\n").encode("utf-8")
+                        for text in texts
+                    )
+                progress.update(len(texts))
+
+        if index is None:
+            if SAVE_LABEL_TEXTS:
+                os.remove(texts_tmp)
+            raise ValueError(f"Corpus {corpus!r} vazio.")
+        if store is not None and store.num_chunks > MAX_STORE_CHUNKS:
+            store.consolidate()
+
+        label_ids = np.concatenate(label_ids)
+        intent_names = list(vocab)
+        if not corpus.intent_names:
+            # Mesmo vocabulário de LabelStore.from_labels: intenções em ordem alfabética
+            order = np.argsort(intent_names)
+            remap = np.empty(len(order), dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            label_ids, sums = remap[label_ids], sums[order]
+            intent_names = [intent_names[i] for i in order]
+
+        with timed(progress.timings, "save"):
+            logger.info("Salvando índice em '%s' e labels em '%s'...", self.index_path, self.labels_path)
+            write_index(index, self.index_path)
+            store_labels = LabelStore(label_ids, intent_names)
+            store_labels.save(self.data_dir, self.model_name, save_texts=False)
+            if SAVE_LABEL_TEXTS:
+                os.replace(texts_tmp, self.label_paths["texts"])
+            if vectors_file is not None:
+                vectors_file.close()
+                os.replace(vectors_file.path, self.vectors_path)
+            elif os.path.exists(self.vectors_path):
+                # Vetores de um build anterior não correspondem mais aos ids
+                os.remove(self.vectors_path)
+
+            logger.info("Salvando centróides das intenções em '%s'...", self.centroids_path)
+            np.save(self.centroids_path, normalize_centroids(sums))
+
+            self.write_manifest(
+                ntotal=index.ntotal, n_labels=len(store_labels), index_factory=self.index_factory
+            )
+            # Inserções e remoções registradas referem-se aos ids da base anterior,
+            # e a calibração OOS foi ajustada sobre os vizinhos dela
+            for stale in (self.delta_path, self.calibration_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        self.last_report = progress.report()
+        logger.info("Geração do índice finalizada: %s", self.last_report)
         return self.index_path, self.labels_path
 
+    def artifact_files(self) -> dict:
+        """Arquivos de artefatos do modelo, por papel, registrados no manifesto."""
+        return {
+            "index": self.index_path,
+            "labels": self.label_paths["ids"],
+            "intents": self.label_paths["intents"],
+            "texts": self.label_paths["texts"],
+            "centroids": self.centroids_path,
+            "vectors": self.vectors_path,
+        }
+
+    def write_manifest(self, **info) -> str:
+        """Grava o manifesto com os checksums dos artefatos atuais."""
+        return write_manifest(self.data_dir, self.model_name, self.artifact_files(), **info)
+
     def _artifacts_are_valid(self) -> bool:
-        """Verifica se o índice e os labels existem e são válidos."""
-        if not os.path.exists(self.index_path) or not os.path.exists(self.labels_path):
+        """
+        Verifica se os artefatos conferem com o manifesto. Sem manifesto válido,
+        faz a validação completa e, se ela passar, grava um manifesto novo.
+        """
+        if verify_manifest(
+            self.data_dir, self.model_name, verify_checksums=VERIFY_ARTIFACT_CHECKSUMS
+        ):
+            return True
+        return self._validate_artifacts()
+
+    def _validate_artifacts(self) -> bool:
+        """Verifica se o índice e os labels existem, são legíveis e têm o mesmo tamanho."""
+        if not os.path.exists(self.index_path):
             return False
+        if not LabelStore.exists(self.data_dir, self.model_name):
+            if not os.path.exists(self.label_paths["legacy"]):
+                return False
+            # Índice gerado com o formato JSON antigo: converte sem recodificar
+            try:
+                migrate_legacy_labels(self.data_dir, self.model_name)
+            except (ValueError, KeyError, OSError) as e:
+                logger.warning("Erro ao migrar labels no formato antigo: %s", e)
+                return False
         try:
-            faiss.read_index(self.index_path)
-            with open(self.labels_path, "r", encoding="utf-8") as f:
-                json.load(f)
-            return True
-        except (faiss.FaissException, json.JSONDecodeError, OSError) as e:
+            index = read_index(self.index_path, mmap=True)
+            store = LabelStore.load(self.data_dir, self.model_name)
+        except (RuntimeError, ValueError, OSError) as e:
             logger.warning("Erro ao validar artefatos existentes: %s", e)
             return False
+        # Após compactações o índice pode omitir ids removidos, nunca ter ids a mais
+        if index.ntotal > len(store):
+            logger.warning(
+                "Índice com %d vetores, mas %d labels.", index.ntotal, len(store)
+            )
+            return False
+        try:
+            self.write_manifest(ntotal=index.ntotal, n_labels=len(store))
+        except OSError as e:
+            logger.warning("Não foi possível gravar o manifesto: %s", e)
+        return True
 
-    def build(self) -> tuple[str, str]:
+    def build(self, force: bool = False, create: bool = True) -> tuple[str, str]:
         """
         Gera o índice FAISS e o arquivo de labels.
-        Se já existirem arquivos válidos, eles são reutilizados.
+        Se já existirem arquivos válidos, eles são reutilizados, a menos que ``force`` seja True.
+        Com ``create=False``, artefatos ausentes ou inválidos geram FileNotFoundError
+        em vez de um build a partir do CLINC-OOS.
         
         Returns:
-            Tuple com caminhos para o arquivo .faiss e o .json de labels.
+            Tuple com caminhos para o arquivo .faiss e o .npy de labels.
         """
-        if self._artifacts_are_valid():
+        if not force and self._artifacts_are_valid():
             logger.info("Índice e labels já existem. Usando arquivos salvos.")
             return self.index_path, self.labels_path
+        if not create:
+            raise FileNotFoundError(
+                f"Artefatos de '{self.model_name}' não encontrados ou inválidos em '{self.data_dir}'."
+            )
         
         logger.warning("Artefatos não encontrados ou inválidos. Recriando...")
-        return self._create_and_save_artifacts()
+        try:
+            return self._create_and_save_artifacts()
+        finally:
+            self.close()
 
 
-def build_index() -> tuple[str, str]:
+def build_index(force: bool = False, create: bool = True, **builder_kwargs) -> tuple[str, str]:
     """
     Interface pública para construir o índice. Instancia e executa o IndexBuilder.
+    Argumentos extras (``index_factory``, ``search_params``...) vão para o builder.
     """
-    builder = IndexBuilder()
-    return builder.build()
+    builder = IndexBuilder(**builder_kwargs)
+    return builder.build(force=force, create=create)
@@ -0,0 +1,383 @@
+"""
+Classificação offline em lote de arquivos grandes (ex.: dumps de logs), sem o HTTP.
+
+Lê um arquivo NDJSON ou CSV em blocos e prediz as intenções com o
+``IntentModel`` em um pipeline de estágios ligados por filas limitadas:
+leitura + pré-processamento, encode, busca + voto e escrita rodam cada um em
+uma thread (torch, ONNX Runtime e FAISS liberam o GIL), então a E/S, o encode
+e a busca de blocos vizinhos se sobrepõem. A memória é constante: cada fila
+guarda no máximo ``queue_size`` blocos.
+
+Depois de cada bloco escrito, um checkpoint (``<saída>.ckpt``) guarda o offset
+em bytes da entrada e o tamanho da saída; com ``resume``, a classificação
+continua desse ponto e descarta o que foi escrito depois do último checkpoint.
+"""
+
+import csv
+import io
+import json
+import os
+import queue
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from .builder import peak_rss_mb
+from .config import CLASSIFY_CHUNK_SIZE, CLASSIFY_QUEUE_SIZE
+from .ingest import detect_format
+from .utils import format_timings, preprocess_batch, timed
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv")
+
+# Colunas da saída em CSV (o NDJSON traz também os candidatos e os scores)
+CSV_COLUMNS = ["id", "text", "predicted_intent", "score", "path"]
+
+_DONE = object()
+
+
+def checkpoint_path(output: str) -> str:
+    """Caminho do checkpoint de uma saída."""
+    return f"{output}.ckpt"
+
+
+def _file_format(path: str) -> str:
+    fmt = detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"'{path}': a classificação em lote lê e grava só .jsonl/.ndjson ou .csv.")
+    return fmt
+
+
+class RecordReader:
+    """
+    Lê registros ``(id, texto)`` de um arquivo NDJSON ou CSV em blocos,
+    acompanhando o offset em bytes do fim de cada registro.
+
+    Args:
+        path (str): Arquivo .jsonl/.ndjson ou .csv/.tsv.
+        text_column (str): Campo/coluna com o texto.
+        id_column (str, opcional): Campo/coluna copiado para a saída como ``id``;
+            sem ele, o ``id`` é o número do registro (a partir de 0).
+    """
+
+    def __init__(self, path: str, text_column: str = "text", id_column: Optional[str] = None):
+        self.path = path
+        self.fmt = _file_format(path)
+        self.text_column = text_column
+        self.id_column = id_column
+        # Offset logo após o último registro lido
+        self.offset = 0
+
+    def chunks(
+        self, chunk_size: int, start: int = 0, first_record: int = 0
+    ) -> Iterator[tuple[list, list[str], int]]:
+        """
+        Blocos ``(ids, textos, offset do fim do bloco)`` a partir do offset
+        ``start`` (0 ou um offset devolvido por um bloco anterior).
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size deve ser positivo.")
+        ids, texts = [], []
+        for number, (record_id, text) in enumerate(self._records(start), first_record):
+            ids.append(number if record_id is None else record_id)
+            texts.append(text)
+            if len(texts) == chunk_size:
+                yield ids, texts, self.offset
+                ids, texts = [], []
+        if texts:
+            yield ids, texts, self.offset
+
+    def _lines(self, f, start: int) -> Iterator[str]:
+        # Linhas decodificadas; o offset avança quando o consumidor pede a próxima
+        f.seek(start)
+        self.offset = start
+        for line in iter(f.readline, b""):
+            self.offset += len(line)
+            yield line.decode("utf-8")
+
+    def _field(self, record: dict, where: str):
+        record_id = None
+        try:
+            text = record[self.text_column]
+            if self.id_column:
+                record_id = record[self.id_column]
+        except KeyError as e:
+            raise ValueError(f"{where}: campo {e} ausente.") from e
+        if not isinstance(text, str):
+            raise ValueError(f"{where}: texto inválido.")
+        return record_id, text
+
+    def _records(self, start: int) -> Iterator[tuple[Optional[object], str]]:
+        with open(self.path, "rb") as f:
+            if self.fmt == "jsonl":
+                for line in self._lines(f, start):
+                    if line.strip():
+                        yield self._field(json.loads(line), f"{self.path}@{self.offset}")
+                return
+
+            delimiter = "\t" if self.path.lower().endswith(".tsv") else ","
+            header = next(csv.reader([f.readline().decode("utf-8")], delimiter=delimiter), None)
+            if header is None:
+                return
+            # O csv.reader só pede a linha seguinte ao montar o próximo registro,
+            # então o offset marca o fim do registro (mesmo com quebras entre aspas)
+            reader = csv.DictReader(
+                self._lines(f, max(start, f.tell())), fieldnames=header, delimiter=delimiter
+            )
+            for record in reader:
+                yield self._field(record, f"{self.path}@{self.offset}")
+
+
+class ResultWriter:
+    """
+    Grava os resultados em NDJSON ou CSV (pela extensão de ``path``) e mantém
+    o checkpoint ao lado da saída.
+    """
+
+    def __init__(self, path: str, input_path: str, resume: bool = False):
+        self.path = path
+        self.fmt = _file_format(path)
+        self.input_path = os.path.abspath(input_path)
+        self.checkpoint = checkpoint_path(path)
+        state = self.load_checkpoint() if resume else None
+        if resume and state is None:
+            logger.info("Sem checkpoint em '%s'; classificando desde o início.", self.checkpoint)
+        if state is not None and state["input"] != self.input_path:
+            raise ValueError(
+                f"O checkpoint '{self.checkpoint}' é da entrada '{state['input']}', "
+                f"não de '{self.input_path}'."
+            )
+        self.state = state or {"input": self.input_path, "offset": 0, "records": 0, "output_bytes": 0}
+
+        if state is None:
+            if os.path.exists(self.checkpoint):
+                os.remove(self.checkpoint)
+            self._file = open(path, "wb")  # pylint: disable=consider-using-with
+            if self.fmt == "csv":
+                self._write_rows([CSV_COLUMNS])
+        else:
+            # Descarta linhas escritas depois do último checkpoint
+            self._file = open(path, "r+b")  # pylint: disable=consider-using-with
+            self._file.truncate(state["output_bytes"])
+            self._file.seek(state["output_bytes"])
+
+    def load_checkpoint(self) -> Optional[dict]:
+        if not os.path.exists(self.checkpoint) or not os.path.exists(self.path):
+            return None
+        with open(self.checkpoint, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_rows(self, rows: list[list]):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        self._file.write(buffer.getvalue().encode("utf-8"))
+
+    def write(self, ids: list, texts: list[str], results: list[dict], offset: int):
+        """Grava um bloco e, com ele já no disco, o checkpoint que aponta para o seguinte."""
+        if self.fmt == "jsonl":
+            lines = []
+            for record_id, text, result in zip(ids, texts, results):
+                row = {"id": record_id, "text": text}
+                row.update((k, v) for k, v in result.items() if k != "query")
+                lines.append(json.dumps(row, ensure_ascii=False) + "\n")
+            self._file.write("".join(lines).encode("utf-8"))
+        else:
+            self._write_rows(
+                [
+                    [record_id, text, r["predicted_intent"], r["scores"][0] if r["scores"] else "",
+                     r.get("path", "")]
+                    for record_id, text, r in zip(ids, texts, results)
+                ]
+            )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self.state = {
+            "input": self.input_path,
+            "offset": offset,
+            "records": self.state["records"] + len(ids),
+            "output_bytes": self._file.tell(),
+        }
+        tmp_path = f"{self.checkpoint}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint)
+
+    def close(self, completed: bool):
+        """Fecha a saída; o checkpoint é removido quando a entrada foi lida até o fim."""
+        self._file.close()
+        if completed and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+
+class _Pipeline:
+    """
+    Threads ligadas por filas limitadas. Um erro em qualquer estágio para os
+    demais (as esperas em filas cheias ou vazias checam ``stop``) e é relançado
+    por ``results``.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = max(1, queue_size)
+        self.stop = threading.Event()
+        self.errors: list[BaseException] = []
+        self.threads: list[threading.Thread] = []
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, q: queue.Queue) -> Iterator:
+        while not self.stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _run(self, source: Iterable, fn: Callable, outbox: queue.Queue):
+        try:
+            for item in source:
+                if not self._put(outbox, fn(item)):
+                    break
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            # Justificado: o erro é relançado na thread que consome o pipeline
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            self._put(outbox, _DONE)
+
+    def stage(self, name: str, source: Iterable, fn: Callable) -> Iterable:
+        """Aplica ``fn`` a cada item de ``source`` em uma thread; devolve a saída."""
+        outbox: queue.Queue = queue.Queue(self.queue_size)
+        thread = threading.Thread(
+            target=self._run, args=(source, fn, outbox), name=f"classify-{name}", daemon=True
+        )
+        thread.start()
+        self.threads.append(thread)
+        return self._drain(outbox)
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+
+def classify_file(
+    model,
+    input_path: str,
+    output_path: str,
+    top_k: int,
+    threshold: float,
+    text_column: str = "text",
+    id_column: Optional[str] = None,
+    chunk_size: int = CLASSIFY_CHUNK_SIZE,
+    queue_size: int = CLASSIFY_QUEUE_SIZE,
+    resume: bool = False,
+) -> dict:
+    """
+    Classifica todos os registros de ``input_path`` e grava um resultado por
+    registro em ``output_path``, na ordem da entrada.
+
+    Args:
+        model (IntentModel): Modelo carregado.
+        input_path (str): Arquivo .jsonl/.ndjson ou .csv/.tsv.
+        output_path (str): Saída .jsonl/.ndjson (resultado completo) ou .csv
+            (``CSV_COLUMNS``).
+        top_k (int): Vizinhos considerados no voto.
+        threshold (float): Limiar OOS.
+        text_column (str): Campo/coluna com o texto.
+        id_column (str, opcional): Campo/coluna copiado como ``id``.
+        chunk_size (int): Registros por bloco.
+        queue_size (int): Blocos em espera entre dois estágios.
+        resume (bool): Continua do checkpoint de ``output_path``, se existir.
+
+    Returns:
+        dict: Relatório com registros, blocos, vazão, tempo ocupado de cada
+        estágio e pico de RSS. Com os estágios sobrepostos, a soma dos tempos
+        passa do tempo total.
+    """
+    reader = RecordReader(input_path, text_column, id_column)
+    writer = ResultWriter(output_path, input_path, resume=resume)
+    start_offset, resumed = writer.state["offset"], writer.state["records"]
+    if resumed:
+        logger.info("Retomando '%s' do registro %d (byte %d).", input_path, resumed, start_offset)
+
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    records = chunks = 0
+
+    def read(chunk):
+        ids, raw, offset = chunk
+        with timed(timings, "preprocess"):
+            return ids, raw, preprocess_batch(raw), offset
+
+    def encode(item):
+        ids, raw, texts, offset = item
+        with timed(timings, "encode"):
+            emb = model.encode(texts)
+        return ids, raw, texts, emb, offset
+
+    def search(item):
+        ids, raw, texts, emb, offset = item
+        with timed(timings, "search"):
+            results = model.predict_embeddings(emb, texts, top_k, threshold)
+        return ids, raw, results, offset
+
+    pipeline = _Pipeline(queue_size)
+    completed = False
+    try:
+        chunks_iter = reader.chunks(chunk_size, start_offset, first_record=resumed)
+        stream = pipeline.stage("read", _timed_iter(chunks_iter, timings, "read"), read)
+        stream = pipeline.stage("encode", stream, encode)
+        stream = pipeline.stage("search", stream, search)
+        for ids, raw, results, offset in stream:
+            with timed(timings, "write"):
+                writer.write(ids, raw, results, offset)
+            records += len(ids)
+            chunks += 1
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "Classify: %d registros em %d blocos, %.0f registros/s (%s).",
+                resumed + records, chunks, records / elapsed if elapsed > 0 else 0.0,
+                format_timings(dict(timings)),
+            )
+        completed = not pipeline.stop.is_set()
+    finally:
+        try:
+            pipeline.close()
+        finally:
+            writer.close(completed and not pipeline.errors)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "records": records,
+        "resumed_from": resumed,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "records_per_s": round(records / elapsed, 1) if elapsed > 0 else 0.0,
+        **{f"{name}_seconds": round(value, 3) for name, value in timings.items()},
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _timed_iter(items: Iterable, timings: dict, name: str) -> Iterator:
+    """Itera ``items`` somando em ``timings[name]`` o tempo gasto para produzir cada item."""
+    items = iter(items)
+    while True:
+        with timed(timings, name):
+            item = next(items, _DONE)
+        if item is _DONE:
+            return
+        yield item
@@ -5,3 +5,131 @@ import os
 MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
 DATA_DIR = os.getenv("DATA_DIR", "faiss_indices")
 DEFAULT_THRESHOLD = float(os.getenv("THRESHOLD", "0.7"))
+
+# Micro-batching dinâmico das chamadas de /predict (desligado por padrão)
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "false").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# Predição em lote (/predict_batch)
+PREDICT_ENCODE_CHUNK_SIZE = int(os.getenv("PREDICT_ENCODE_CHUNK_SIZE", "256"))
+PREDICT_BATCH_MAX_TEXTS = int(os.getenv("PREDICT_BATCH_MAX_TEXTS", "10000"))
+# Maior top_k aceito por /predict e /predict_batch (limita a memória da busca e do voto)
+PREDICT_MAX_TOP_K = int(os.getenv("PREDICT_MAX_TOP_K", "100"))
+
+# Lotes do encoder (builder e predição em lote) agrupados por comprimento:
+# máximo de tokens com padding por lote; 0 usa lotes fixos na ordem recebida
+ENCODE_MAX_TOKENS = int(os.getenv("ENCODE_MAX_TOKENS", "4096"))
+
+# Logging: handlers em uma thread própria atrás de uma fila (QueueHandler) e
+# fração dos logs por requisição (texto e resultado das predições) emitida
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Pré-processamento das consultas: etapas aplicadas em ordem após o strip
+# (lower, accents = remove acentos, punct = remove pontuação, whitespace =
+# colapsa espaços repetidos)
+PREPROCESS_STEPS = os.getenv("PREPROCESS_STEPS", "lower,punct")
+
+# Cache LRU de embeddings de consultas e, opcionalmente, de resultados finais
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Cache semântico: consultas com similaridade de cosseno >= threshold com uma
+# consulta recente reaproveitam os vizinhos dela e pulam a busca no índice;
+# guarda até MAX_ENTRIES consultas, descartadas por lru ou fifo
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "4096"))
+SEMANTIC_CACHE_POLICY = os.getenv("SEMANTIC_CACHE_POLICY", "lru").lower()
+
+# Salva os textos de treino em arquivo lateral (<MODEL_NAME>_texts.jsonl)
+SAVE_LABEL_TEXTS = os.getenv("SAVE_LABEL_TEXTS", "true").lower() in ("1", "true", "yes")
+
+# Tipo de índice FAISS (string do faiss.index_factory) e parâmetros de busca
+INDEX_FACTORY = os.getenv("INDEX_FACTORY", "HNSW32,Flat")
+INDEX_EF_CONSTRUCTION = int(os.getenv("INDEX_EF_CONSTRUCTION", "400"))
+INDEX_SEARCH_PARAMS = os.getenv("INDEX_SEARCH_PARAMS", "efSearch=128")
+
+# Re-ranking exato para índices comprimidos (ex.: HNSW32,SQ8, IVF4096,PQ48 ou
+# LSHrt): o build grava os vetores float32 em <MODEL_NAME>_vectors.npy e a busca
+# traz RERANK_OVERSAMPLE x top_k candidatos, reordenados pela similaridade exata
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_OVERSAMPLE = int(os.getenv("RERANK_OVERSAMPLE", "4"))
+
+# Voto dos vizinhos do kNN: majority (contagem), weighted (soma das
+# similaridades) ou softmax (pesos exp(sim / SCORING_TEMPERATURE)). Com
+# OOS_CALIBRATION_ENABLED, a calibração gerada por 'flask calibrate'
+# (<MODEL_NAME>_calibration.json) define a estratégia e a probabilidade OOS
+SCORING_STRATEGY = os.getenv("SCORING_STRATEGY", "majority").lower()
+SCORING_TEMPERATURE = float(os.getenv("SCORING_TEMPERATURE", "0.05"))
+OOS_CALIBRATION_ENABLED = os.getenv("OOS_CALIBRATION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Caminho rápido por centróides de intenção: evita o kNN quando a margem
+# entre os dois centróides mais próximos é de pelo menos CENTROID_MARGIN
+CENTROID_FAST_PATH = os.getenv("CENTROID_FAST_PATH", "false").lower() in ("1", "true", "yes")
+CENTROID_MARGIN = float(os.getenv("CENTROID_MARGIN", "0.1"))
+
+# Atualizações incrementais: número de inserções/remoções pendentes que
+# dispara a compactação automática do índice (rotas HTTP e comandos flask)
+DELTA_COMPACT_THRESHOLD = int(os.getenv("DELTA_COMPACT_THRESHOLD", "1000"))
+
+# Cache persistente de embeddings do builder (<DATA_DIR>/embeddings/<MODEL_NAME>)
+EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBED_CHUNK_SIZE = int(os.getenv("EMBED_CHUNK_SIZE", "4096"))
+
+# Build do índice em streaming: corpus de treino (arquivo .jsonl/.csv/.parquet
+# ou hf:<dataset>; vazio = CLINC-OOS local), exemplos por bloco e tamanho da
+# amostra usada no treino de índices IVF/PQ
+BUILD_SOURCE = os.getenv("BUILD_SOURCE", "")
+BUILD_CHUNK_SIZE = int(os.getenv("BUILD_CHUNK_SIZE", "8192"))
+TRAIN_SAMPLE_SIZE = int(os.getenv("TRAIN_SAMPLE_SIZE", "100000"))
+
+# Classificação offline em lote ('flask classify'): registros por bloco e
+# blocos em espera entre os estágios do pipeline (leitura, encode, busca, escrita)
+CLASSIFY_CHUNK_SIZE = int(os.getenv("CLASSIFY_CHUNK_SIZE", "1024"))
+CLASSIFY_QUEUE_SIZE = int(os.getenv("CLASSIFY_QUEUE_SIZE", "2"))
+
+# Processos que dividem a codificação dos textos no build (cada um com o seu
+# encoder e ENCODER_THREADS threads, ou núcleos / processos se 0); 0 ou 1
+# codifica no próprio processo
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))
+
+# Backend do encoder de textos: torch (SentenceTransformer), onnx ou onnx-int8
+# (modelos gerados com 'flask export-onnx'); ENCODER_THREADS=0 usa o padrão do runtime
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch").lower()
+ENCODER_THREADS = int(os.getenv("ENCODER_THREADS", "0"))
+
+# Modo de serviço (flask = servidor de desenvolvimento, asgi = uvicorn) e
+# executor de inferência do modo ASGI: threads (0 = núcleos), fila máxima,
+# prazo por requisição e tempo máximo de espera no desligamento
+SERVER_MODE = os.getenv("SERVER_MODE", "flask").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+REQUEST_TIMEOUT_MS = float(os.getenv("REQUEST_TIMEOUT_MS", "10000"))
+SHUTDOWN_TIMEOUT_S = float(os.getenv("SHUTDOWN_TIMEOUT_S", "30"))
+
+# Lê os vetores do índice FAISS via memory-map (compartilhados entre processos
+# pelo page cache); o índice é copiado para a memória na primeira inserção
+INDEX_MMAP = os.getenv("INDEX_MMAP", "false").lower() in ("1", "true", "yes")
+
+# Recalcula o checksum de todos os artefatos na inicialização, mesmo quando o
+# tamanho e a data de modificação conferem com o manifesto
+VERIFY_ARTIFACT_CHECKSUMS = os.getenv("VERIFY_ARTIFACT_CHECKSUMS", "false").lower() in ("1", "true", "yes")
+
+# Começa a atender (/health, /ready) antes de terminar de carregar o modelo;
+# /ready responde 503 até o carregamento terminar
+BACKGROUND_LOAD = os.getenv("BACKGROUND_LOAD", "false").lower() in ("1", "true", "yes")
+
+# Métricas no formato do Prometheus em /metrics (latência por etapa, contadores
+# por intenção, tamanho dos lotes); desligadas, a coleta vira no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Vários tenants (encoder + índice) no mesmo processo: arquivo JSON com a
+# configuração de cada um e orçamento de memória (bytes) dos índices e encoders
+# carregados sob demanda, descartados do menos usado para o mais usado
+TENANTS_FILE = os.getenv("TENANTS_FILE", "")
+REGISTRY_MAX_BYTES = int(os.getenv("REGISTRY_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
@@ -0,0 +1,57 @@
+"""
+Log de alterações incrementais do índice (inserções e remoções de exemplos).
+
+Cada linha de ``<MODEL_NAME>_delta.jsonl`` é uma operação aplicada sobre os
+artefatos base; na inicialização o log é reaplicado em vez de reconstruir o
+índice, e a compactação incorpora as operações aos artefatos e o esvazia.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def delta_path(data_dir: str, model_name: str) -> str:
+    """Caminho do log de alterações de um modelo."""
+    return os.path.join(data_dir, f"{model_name}_delta.jsonl")
+
+
+class DeltaLog:
+    """Log append-only de operações ``add``/``remove`` em NDJSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record: dict):
+        """Acrescenta uma operação e força a escrita em disco."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self) -> Iterator[dict]:
+        """Itera sobre as operações registradas, ignorando uma última linha truncada."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Linha %d inválida no log '%s'; ignorando.", lineno, self.path)
+
+    def truncate(self):
+        """Esvazia o log (após a compactação)."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
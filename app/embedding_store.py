@@ -0,0 +1,216 @@
+"""
+Cache persistente de embeddings, chaveado pelo nome do modelo e pelo hash
+do conteúdo de cada texto.
+
+Os vetores ficam em ``<DATA_DIR>/embeddings/<chave do modelo>/`` como pares de
+arquivos por bloco: ``<bloco>.vectors.npy`` (float32, lido via memory-map) e
+``<bloco>.keys.npy`` (hash uint64 de cada texto). Cada bloco é gravado assim
+que é codificado, então um build interrompido retoma de onde parou.
+"""
+
+import os
+import glob
+import time
+import uuid
+import hashlib
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(text: str) -> int:
+    """Hash de 64 bits do conteúdo do texto."""
+    return int.from_bytes(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def text_keys(texts: list[str]) -> np.ndarray:
+    """Hashes de 64 bits de uma lista de textos."""
+    return np.fromiter((text_key(t) for t in texts), dtype=np.uint64, count=len(texts))
+
+
+class EmbeddingStore:
+    """
+    Armazena embeddings já calculados para não recodificar textos repetidos
+    entre builds (ex.: ao trocar só o tipo de índice ou inserir poucos exemplos).
+    """
+
+    def __init__(self, data_dir: str, model_key: str):
+        self.path = os.path.join(data_dir, "embeddings", model_key)
+        self._vectors: list[np.ndarray] = []
+        self._chunk_keys: list[np.ndarray] = []
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._loc = np.empty(0, dtype=np.int64)
+        self._dirty = False
+        self._load_chunks()
+
+    def __len__(self) -> int:
+        return sum(len(k) for k in self._chunk_keys)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._chunk_keys)
+
+    def _load_chunks(self):
+        # O arquivo de chaves é gravado por último e marca o bloco como completo
+        for keys_path in sorted(glob.glob(os.path.join(self.path, "*.keys.npy"))):
+            vectors_path = keys_path[: -len(".keys.npy")] + ".vectors.npy"
+            if not os.path.exists(vectors_path):
+                continue
+            self._chunk_keys.append(np.load(keys_path))
+            self._vectors.append(np.load(vectors_path, mmap_mode="r"))
+        self._dirty = True
+        if self._chunk_keys:
+            logger.info(
+                "Cache de embeddings '%s': %d vetores em %d blocos.",
+                self.path, len(self), self.num_chunks,
+            )
+
+    def _refresh(self):
+        """Reconstrói o índice ordenado chave -> (bloco, linha) usado nas consultas."""
+        if not self._dirty:
+            return
+        if self._chunk_keys:
+            keys = np.concatenate(self._chunk_keys)
+            loc = np.concatenate([
+                (np.int64(i) << 32) | np.arange(len(k), dtype=np.int64)
+                for i, k in enumerate(self._chunk_keys)
+            ])
+            order = np.argsort(keys, kind="stable")
+            self._keys, self._loc = keys[order], loc[order]
+        self._dirty = False
+
+    def lookup(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Procura as chaves no cache.
+
+        Returns:
+            Tuple (found, loc): máscara de chaves encontradas e a localização
+            codificada (bloco << 32 | linha) de cada uma.
+        """
+        self._refresh()
+        if not len(self._keys):
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        found = self._keys[pos] == keys
+        return found, self._loc[pos]
+
+    def gather(self, loc: np.ndarray, out: np.ndarray):
+        """Copia para ``out`` os vetores nas localizações informadas."""
+        chunks, rows = loc >> 32, loc & 0xFFFFFFFF
+        for chunk in np.unique(chunks):
+            sel = chunks == chunk
+            out[sel] = self._vectors[int(chunk)][rows[sel]]
+
+    def _chunk_base(self) -> str:
+        """Prefixo dos arquivos de um bloco novo (ordenável pela criação)."""
+        os.makedirs(self.path, exist_ok=True)
+        return os.path.join(self.path, f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}")
+
+    def _commit_chunk(self, base: str, keys: np.ndarray):
+        """Grava as chaves de um bloco cujos vetores já estão em disco e o registra."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        tmp_path = f"{base}.keys.npy.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, keys)
+        os.replace(tmp_path, base + ".keys.npy")
+        self._chunk_keys.append(keys)
+        self._vectors.append(np.load(base + ".vectors.npy", mmap_mode="r"))
+        self._dirty = True
+
+    def put(self, keys: np.ndarray, vectors: np.ndarray):
+        """Grava um novo bloco de forma atômica (vetores primeiro, chaves por último)."""
+        if not len(keys):
+            return
+        base = self._chunk_base()
+        tmp_path = f"{base}.vectors.npy.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype="float32"))
+        os.replace(tmp_path, base + ".vectors.npy")
+        self._commit_chunk(base, keys)
+
+    def encode(
+        self,
+        texts: list[str],
+        encode_fn: Callable[[list[str]], np.ndarray],
+        chunk_size: int = 4096,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Retorna os embeddings de ``texts``, codificando apenas os que não estão
+        no cache. Os textos inéditos são codificados em blocos de ``chunk_size``
+        e cada bloco é persistido antes do próximo (checkpoint).
+
+        Args:
+            texts: Textos a codificar.
+            encode_fn: Função que codifica uma lista de textos em float32 (n, d).
+            chunk_size: Textos inéditos por bloco persistido.
+            out: Matriz (n, d) pré-alocada (ex.: memory-map) a ser preenchida.
+        """
+        keys = text_keys(texts)
+        found, loc = self.lookup(keys)
+
+        missing = np.flatnonzero(~found)
+        # Textos repetidos são codificados uma única vez
+        unique_keys, first = np.unique(keys[missing], return_index=True)
+        todo = missing[first]
+        logger.info(
+            "Embeddings: %d em cache, %d textos novos a codificar.",
+            len(texts) - len(missing), len(todo),
+        )
+
+        for start in range(0, len(todo), chunk_size):
+            idx = todo[start : start + chunk_size]
+            vectors = np.asarray(encode_fn([texts[i] for i in idx]), dtype="float32")
+            self.put(unique_keys[start : start + chunk_size], vectors)
+            logger.info(
+                "Checkpoint de embeddings: %d/%d textos novos.",
+                min(start + chunk_size, len(todo)), len(todo),
+            )
+
+        if len(missing):
+            found, loc = self.lookup(keys)
+            if not found.all():
+                raise RuntimeError("Embeddings ausentes no cache após a codificação.")
+        if not len(texts):
+            return np.empty((0, 0), dtype="float32") if out is None else out
+
+        if out is None:
+            dim = self._vectors[int(loc[0] >> 32)].shape[1]
+            out = np.empty((len(texts), dim), dtype="float32")
+        self.gather(loc, out)
+        return out
+
+    def consolidate(self):
+        """
+        Une todos os blocos em um só, para reduzir o número de arquivos. Os
+        vetores são copiados bloco a bloco para um memory-map, sem carregar o
+        cache inteiro em memória.
+        """
+        if self.num_chunks <= 1:
+            return
+        old_files = glob.glob(os.path.join(self.path, "*.npy"))
+        base = self._chunk_base()
+        tmp_path = f"{base}.vectors.npy.tmp"
+        merged = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype="float32",
+            shape=(len(self), self._vectors[0].shape[1]),
+        )
+        start = 0
+        for vectors in self._vectors:
+            merged[start : start + len(vectors)] = vectors
+            start += len(vectors)
+        merged.flush()
+        del merged
+        os.replace(tmp_path, base + ".vectors.npy")
+
+        keys = np.concatenate(self._chunk_keys)
+        self._chunk_keys, self._vectors = [], []
+        self._commit_chunk(base, keys)
+        for path in old_files:
+            os.remove(path)
+        logger.info("Cache de embeddings consolidado em 1 bloco (%d vetores).", len(keys))
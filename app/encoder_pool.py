@@ -0,0 +1,136 @@
+"""
+Codificação de textos em paralelo, com um pool de processos.
+
+Cada processo do pool carrega a sua cópia do encoder (qualquer backend) e
+recebe uma fatia dos núcleos. Um lote de textos é dividido em fatias
+contíguas; cada worker escreve os seus embeddings direto nas linhas
+correspondentes de uma matriz ``.npy`` pré-alocada e mapeada em memória, então
+os vetores não voltam serializados pelo pool e a ordem dos textos é mantida.
+"""
+
+import os
+import logging
+import tempfile
+import multiprocessing
+from typing import Optional
+
+import numpy as np
+
+from .encoders import encode_batched, load_encoder
+from .prefork import set_num_threads, threads_per_worker
+
+logger = logging.getLogger(__name__)
+
+# Encoder do processo worker (carregado uma vez, em _init_worker)
+_worker_encoder = None
+
+
+def _init_worker(model_dir: str, backend: str, num_threads: int, encoder_loader):
+    global _worker_encoder  # pylint: disable=global-statement
+    set_num_threads(num_threads)
+    _worker_encoder = encoder_loader(model_dir, backend, num_threads)
+
+
+def _encode_shard(task: tuple) -> int:
+    """Codifica uma fatia e a grava nas linhas ``[start, start + n)`` da saída."""
+    path, start, texts, max_tokens, batch_size = task
+    vectors = encode_batched(_worker_encoder, texts, max_tokens, max_batch_size=batch_size)
+    out = np.load(path, mmap_mode="r+")
+    out[start : start + len(texts)] = vectors
+    out.flush()
+    return len(texts)
+
+
+def _dimension(_) -> int:
+    return int(_worker_encoder.encode(["dim"], normalize_embeddings=True).shape[-1])
+
+
+class EncoderPool:
+    """
+    Pool de processos que codificam textos com o mesmo encoder.
+
+    Args:
+        model_dir (str): Pasta local do modelo.
+        backend (str): Backend do encoder (torch, onnx ou onnx-int8).
+        workers (int): Número de processos.
+        num_threads (int): Threads de inferência por processo (0 = núcleos / workers).
+        batch_size (int): Textos por lote nos workers.
+        max_tokens (int): Orçamento de tokens por lote nos workers (``encode_batched``).
+        shards_per_worker (int): Fatias por worker em cada lote, para equilibrar a carga.
+        encoder_loader: Função (de módulo, para ser enviada aos workers) que
+            carrega o encoder, com a assinatura de ``load_encoder``.
+    """
+
+    # Os workers já agrupam os textos por comprimento (ver encode_batched)
+    token_batching = True
+
+    def __init__(
+        self,
+        model_dir: str,
+        backend: str,
+        workers: int,
+        num_threads: int = 0,
+        batch_size: int = 256,
+        max_tokens: int = 0,
+        shards_per_worker: int = 4,
+        encoder_loader=load_encoder,
+    ):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.shards_per_worker = shards_per_worker
+        num_threads = num_threads or threads_per_worker(self.workers)
+        logger.info(
+            "Iniciando %d processos de encoding (%d threads cada)...", self.workers, num_threads
+        )
+        # spawn: o torch e o OpenMP não são seguros após fork com threads ativas
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(model_dir, backend, num_threads, encoder_loader),
+        )
+        self.dim = self._pool.apply(_dimension, (None,))
+
+    def encode(self, texts: list[str], out_path: Optional[str] = None, **_) -> np.ndarray:
+        """
+        Embeddings float32 normalizados de ``texts``, na ordem recebida.
+
+        A saída é pré-alocada como ``.npy`` mapeado em memória em ``out_path``
+        (mantido) ou em um arquivo temporário, removido após a leitura; os
+        argumentos extras (``batch_size``...) são aceitos por compatibilidade
+        com ``SentenceTransformer.encode`` e ignorados.
+        """
+        n = len(texts)
+        if n == 0:
+            return np.empty((0, self.dim), dtype="float32")
+        if out_path is None:
+            fd, path = tempfile.mkstemp(suffix=".npy")
+            os.close(fd)
+        else:
+            path = out_path
+        out = np.lib.format.open_memmap(path, mode="w+", dtype="float32", shape=(n, self.dim))
+        try:
+            step = max(1, -(-n // (self.workers * self.shards_per_worker)))
+            tasks = [
+                (path, start, texts[start : start + step], self.max_tokens, self.batch_size)
+                for start in range(0, n, step)
+            ]
+            for _ in self._pool.imap_unordered(_encode_shard, tasks):
+                pass
+        finally:
+            if out_path is None:
+                # O mapeamento continua válido depois de remover o arquivo
+                os.remove(path)
+        return out
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,421 @@
+"""
+Backends de codificação de textos em embeddings.
+
+Todos expõem o mesmo método ``encode`` do ``SentenceTransformer`` (apenas os
+argumentos usados pela aplicação), então o modelo e o builder trocam de backend
+sem mudanças:
+
+- ``torch``: o próprio ``SentenceTransformer`` (padrão);
+- ``onnx``: o mesmo transformer exportado para ONNX e executado no ONNX Runtime;
+- ``onnx-int8``: o modelo ONNX com pesos quantizados dinamicamente para int8.
+
+Os modelos ONNX ficam em ``<pasta do modelo>/onnx/`` e são gerados com
+``flask export-onnx``.
+"""
+
+import os
+import json
+import inspect
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model_int8.onnx"}
+
+# Frases usadas na checagem de paridade quando o dataset não está disponível
+PARITY_TEXTS = [
+    "check my balance",
+    "hi",
+    "how do i reset my pin",
+    "can you book a table for two at an italian restaurant tonight",
+    "what's the weather going to be like tomorrow in boston",
+    "please freeze my credit card because i think i lost it somewhere",
+    "set an alarm for 7am",
+    "tell me a joke",
+]
+
+
+def onnx_path(model_dir: str, backend: str = "onnx") -> str:
+    """Caminho do arquivo ONNX de um backend dentro da pasta do modelo."""
+    return os.path.join(model_dir, "onnx", ONNX_FILES[backend])
+
+
+def encoder_key(model_name: str, backend: str) -> str:
+    """
+    Chave do cache de embeddings para o par modelo/backend. O backend torch
+    mantém a chave antiga (só o nome do modelo) para reaproveitar o cache.
+    """
+    return model_name if backend == "torch" else f"{model_name}-{backend}"
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _FastTokenizer:
+    """
+    Tokenizador lido direto do ``tokenizer.json`` com a biblioteca
+    ``tokenizers``, sem importar transformers (que por sua vez importa o torch).
+    """
+
+    def __init__(self, model_dir: str, max_length: int):
+        from tokenizers import Tokenizer  # pylint: disable=import-outside-toplevel
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        pad = _read_json(os.path.join(model_dir, "tokenizer_config.json")).get("pad_token", "[PAD]")
+        pad = pad.get("content", "[PAD]") if isinstance(pad, dict) else pad
+        self.tokenizer.enable_truncation(max_length)
+        # Cópia sem padding, usada só para medir o comprimento de cada texto
+        self._unpadded = Tokenizer.from_str(self.tokenizer.to_str())
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad) or 0, pad_token=pad)
+
+    def __call__(self, texts: list[str]) -> dict:
+        encodings = self.tokenizer.encode_batch(texts)
+        return {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+        }
+
+    def lengths(self, texts: list[str]) -> list[int]:
+        """Tokens de cada texto, com truncamento e tokens especiais."""
+        return [len(e.ids) for e in self._unpadded.encode_batch(texts)]
+
+
+class _HFTokenizer:
+    """Tokenizador do transformers, para modelos sem ``tokenizer.json``."""
+
+    def __init__(self, model_dir: str, max_length: int):
+        from transformers import AutoTokenizer  # pylint: disable=import-outside-toplevel
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def __call__(self, texts: list[str]) -> dict:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        return {k: v.astype(np.int64) for k, v in tokens.items()}
+
+    def lengths(self, texts: list[str]) -> list[int]:
+        """Tokens de cada texto, com truncamento e tokens especiais."""
+        ids = self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]
+        return [len(i) for i in ids]
+
+
+class OnnxEncoder:
+    """
+    Reproduz o pipeline do SentenceTransformer (tokenização, transformer,
+    pooling e normalização) com o transformer executado no ONNX Runtime.
+    """
+
+    def __init__(self, model_dir: str, model_file: str, num_threads: int = 0):
+        self.model_dir = model_dir
+        st_config = _read_json(os.path.join(model_dir, "sentence_bert_config.json"))
+        tok_config = _read_json(os.path.join(model_dir, "tokenizer_config.json"))
+        self.max_seq_length = int(
+            st_config.get("max_seq_length") or min(tok_config.get("model_max_length", 512), 512)
+        )
+        if os.path.exists(os.path.join(model_dir, "tokenizer.json")):
+            self.tokenizer = _FastTokenizer(model_dir, self.max_seq_length)
+        else:
+            self.tokenizer = _HFTokenizer(model_dir, self.max_seq_length)
+        pooling = _read_json(os.path.join(model_dir, "1_Pooling", "config.json"))
+        self.cls_pooling = bool(pooling.get("pooling_mode_cls_token"))
+
+        self.model_file = model_file
+        self.num_threads = num_threads
+        self.session = self._make_session(num_threads)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _make_session(self, num_threads: int):
+        import onnxruntime as ort  # pylint: disable=import-outside-toplevel
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(
+            self.model_file, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def set_num_threads(self, num_threads: int):
+        """
+        Recria a sessão com outro número de threads. Necessário também após um
+        fork: as threads do pool da sessão criada no processo pai não existem
+        no filho.
+        """
+        if num_threads != self.num_threads:
+            self.session = self._make_session(num_threads)
+            self.num_threads = num_threads
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        return self.tokenizer.lengths(texts)
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        tokens = self.tokenizer(texts)
+        feeds = {k: v for k, v in tokens.items() if k in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        if self.cls_pooling:
+            return hidden[:, 0]
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **_kwargs,
+    ) -> np.ndarray:
+        """Codifica textos com a mesma assinatura do ``SentenceTransformer.encode``."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = range(0, len(texts), batch_size)
+        if show_progress_bar:
+            from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+            batches = tqdm(batches, desc="Batches")
+        parts = [self._encode_batch(texts[start:start + batch_size]) for start in batches]
+        if parts:
+            out = np.vstack(parts).astype(np.float32, copy=False)
+        else:
+            out = np.empty((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def token_lengths(encoder, texts: list[str]) -> np.ndarray:
+    """
+    Tokens de cada texto (com truncamento e tokens especiais), pelo tokenizador
+    do encoder. Sem tokenizador (ex.: encoders falsos dos testes), estima pelo
+    número de palavras.
+    """
+    if hasattr(encoder, "token_lengths"):
+        lengths = encoder.token_lengths(texts)
+    elif getattr(encoder, "tokenizer", None) is not None:
+        # SentenceTransformer: tokenizador do Hugging Face, sem padding
+        ids = encoder.tokenizer(
+            texts, truncation=True, max_length=encoder.max_seq_length
+        )["input_ids"]
+        lengths = map(len, ids)
+    else:
+        lengths = (len(t.split()) + 2 for t in texts)
+    return np.fromiter(lengths, dtype=np.int64, count=len(texts))
+
+
+def token_budget_batches(lengths: np.ndarray, max_tokens: int, max_batch_size: int) -> list[np.ndarray]:
+    """
+    Agrupa textos de comprimento parecido: ordena pelos tokens e fecha cada
+    lote quando o lote com padding (textos x maior comprimento) passaria de
+    ``max_tokens`` ou quando atinge ``max_batch_size`` textos. Um texto sozinho
+    maior que o orçamento forma um lote próprio.
+
+    Returns:
+        Posições (na ordem original) dos textos de cada lote.
+    """
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = np.asarray(lengths)[order].tolist()
+    batches, start = [], 0
+    for i, length in enumerate(sorted_lengths):
+        size = i - start + 1
+        if i > start and (size > max_batch_size or size * length > max_tokens):
+            batches.append(order[start:i])
+            start = i
+    if start < len(order):
+        batches.append(order[start:])
+    return batches
+
+
+def encode_batched(
+    encoder,
+    texts: list[str],
+    max_tokens: int,
+    max_batch_size: int = 256,
+    show_progress_bar: bool = False,
+) -> np.ndarray:
+    """
+    Etapa de codificação comum ao builder e ao modelo: embeddings float32
+    normalizados de ``texts``, na ordem recebida, calculados em lotes de
+    comprimento parecido sob um orçamento de ``max_tokens`` tokens com padding
+    (ver ``token_budget_batches``), para não gastar computação com padding.
+    Com ``max_tokens=0``, usa lotes de ``max_batch_size`` na ordem recebida.
+    Encoders que já agrupam por conta própria (``token_batching``, ex.:
+    ``EncoderPool``) recebem todos os textos de uma vez.
+
+    A medição dos comprimentos tokeniza os textos (e o ``encode`` os tokeniza de
+    novo); ela é pulada quando todos cabem em um lote mesmo no pior caso
+    (``max_seq_length`` tokens cada), como nas predições do caminho quente.
+    """
+    texts = list(texts)
+    if getattr(encoder, "token_batching", False):
+        embeddings = encoder.encode(
+            texts, normalize_embeddings=True, show_progress_bar=show_progress_bar
+        )
+        return np.asarray(embeddings, dtype="float32")
+    max_seq_length = getattr(encoder, "max_seq_length", None) or max_tokens + 1
+    fits = len(texts) <= max_batch_size and len(texts) * max_seq_length <= max_tokens
+    if max_tokens > 0 and len(texts) > 1 and not fits:
+        batches = token_budget_batches(token_lengths(encoder, texts), max_tokens, max_batch_size)
+    else:
+        batches = [
+            np.arange(start, min(start + max_batch_size, len(texts)))
+            for start in range(0, len(texts), max_batch_size)
+        ]
+    if show_progress_bar:
+        from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+        batches = tqdm(batches, desc="Batches")
+
+    out = None
+    for idx in batches:
+        emb = encoder.encode(
+            [texts[i] for i in idx],
+            batch_size=len(idx),
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        )
+        emb = np.asarray(emb, dtype="float32")
+        if out is None:
+            out = np.empty((len(texts), emb.shape[1]), dtype="float32")
+        out[idx] = emb
+    return out if out is not None else np.empty((0, 0), dtype="float32")
+
+
+def load_encoder(model_dir: str, backend: str = "torch", num_threads: int = 0):
+    """
+    Carrega o encoder do backend pedido a partir da pasta local do modelo.
+
+    Raises:
+        ValueError: Backend desconhecido.
+        FileNotFoundError: Modelo ONNX ainda não exportado.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de encoder inválido: {backend!r} (use {', '.join(BACKENDS)}).")
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer  # pylint: disable=import-outside-toplevel
+
+        return SentenceTransformer(model_dir, trust_remote_code=True)
+
+    path = onnx_path(model_dir, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Modelo ONNX não encontrado em '{path}': execute 'flask export-onnx'."
+        )
+    logger.info("Carregando encoder ONNX de '%s'...", path)
+    return OnnxEncoder(model_dir, path, num_threads=num_threads)
+
+
+def encoder_nbytes(model_dir: str, backend: str = "torch") -> int:
+    """
+    Estimativa da memória ocupada pelo encoder: o tamanho do arquivo ONNX ou,
+    no backend torch, dos arquivos de pesos da pasta do modelo.
+    """
+    if backend != "torch":
+        path = onnx_path(model_dir, backend)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    total = 0
+    for root, _, files in os.walk(model_dir):
+        if os.path.basename(root) == "onnx":
+            continue
+        for name in files:
+            if name.endswith((".safetensors", ".bin", ".pt")):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def export_onnx(model_dir: str, opset: int = 14) -> str:
+    """
+    Exporta o transformer da pasta do modelo para ``onnx/model.onnx``, com eixos
+    dinâmicos de lote e sequência. A saída é o ``last_hidden_state``; pooling e
+    normalização ficam no ``OnnxEncoder``.
+    """
+    # pylint: disable=import-outside-toplevel
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModel.from_pretrained(model_dir, attn_implementation="eager")
+    model.eval()
+
+    dummy = tokenizer(["exemplo de frase", "outra"], padding=True, return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy
+    ]
+
+    class _HiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            return self.inner(**dict(zip(input_names, args))).last_hidden_state
+
+    path = onnx_path(model_dir, "onnx")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenState(model),
+            tuple(dummy[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: dynamic for name in input_names}, "last_hidden_state": dynamic},
+            opset_version=opset,
+            **kwargs,
+        )
+    logger.info("Modelo ONNX salvo em '%s'.", path)
+    return path
+
+
+def quantize_onnx(model_dir: str) -> str:
+    """Gera ``onnx/model_int8.onnx`` quantizando dinamicamente os pesos para int8."""
+    # pylint: disable=import-outside-toplevel
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    path = onnx_path(model_dir, "onnx-int8")
+    quantize_dynamic(onnx_path(model_dir, "onnx"), path, weight_type=QuantType.QInt8)
+    logger.info("Modelo ONNX int8 salvo em '%s'.", path)
+    return path
+
+
+def parity_check(reference, candidate, texts: list[str], batch_size: int = 64) -> dict:
+    """
+    Compara os embeddings normalizados de dois encoders nos mesmos textos.
+
+    Returns:
+        dict: ``min_cosine`` e ``mean_cosine`` entre os pares de vetores.
+    """
+    ref = np.asarray(
+        reference.encode(texts, batch_size=batch_size, normalize_embeddings=True), dtype=np.float32
+    )
+    cand = np.asarray(
+        candidate.encode(texts, batch_size=batch_size, normalize_embeddings=True), dtype=np.float32
+    )
+    cosines = (ref * cand).sum(axis=1)
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+    }
+
+
+def default_model_dir(model_name: str, base_dir: Optional[str] = None) -> str:
+    """Pasta local do modelo (``models/<nome>`` na raiz do projeto)."""
+    base = base_dir or os.path.join(os.path.dirname(__file__), "..", "models")
+    return os.path.join(base, model_name)
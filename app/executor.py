@@ -0,0 +1,118 @@
+"""
+Executor limitado para o trabalho de inferência do modo ASGI.
+
+O laço de eventos só cuida do HTTP; encode e busca rodam em um pool de threads
+do tamanho dos núcleos (torch, ONNX Runtime e FAISS liberam o GIL). A fila tem
+tamanho fixo: quando está cheia, ``submit`` falha na hora com ``Overloaded`` em
+vez de acumular requisições que já chegariam atrasadas.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(RuntimeError):
+    """Fila de inferência cheia ou executor encerrado."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """O prazo da requisição venceu antes de a tarefa começar a rodar."""
+
+
+class InferenceExecutor:
+    """
+    Pool de threads com no máximo ``max_workers + max_queue`` tarefas
+    aceitas (em execução ou na fila) ao mesmo tempo.
+
+    Tarefas com ``deadline`` (em ``time.monotonic()``) vencido ao sair da fila
+    não são executadas: o future termina com ``DeadlineExceeded``.
+    """
+
+    def __init__(self, max_workers: int = 0, max_queue: int = 64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pending = 0
+        self._counters = {"completed": 0, "rejected": 0, "expired": 0, "failed": 0}
+
+    def submit(
+        self, fn: Callable[..., Any], *args, deadline: Optional[float] = None, **kwargs
+    ) -> Future:
+        """
+        Agenda ``fn(*args, **kwargs)``.
+
+        Raises:
+            Overloaded: Fila cheia ou executor em desligamento.
+        """
+        if self._closed or not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise Overloaded("Fila de inferência cheia." if not self._closed else "Encerrando.")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._pool.submit(self._run, fn, args, kwargs, deadline)
+        except RuntimeError as e:
+            # O pool foi encerrado entre a checagem e o submit
+            self._release()
+            self._count("rejected")
+            raise Overloaded("Encerrando.") from e
+        # O callback também roda quando o future é cancelado ainda na fila (ex.:
+        # asyncio.wait_for no prazo da requisição), caso em que _run não executa
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, fn, args, kwargs, deadline):
+        if deadline is not None and time.monotonic() >= deadline:
+            self._count("expired")
+            raise DeadlineExceeded("Prazo da requisição vencido na fila.")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._count("failed")
+            raise
+        self._count("completed")
+        return result
+
+    def _release(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        """Tarefas aceitas no momento e contadores acumulados."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                **self._counters,
+            }
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Para de aceitar tarefas e, com ``wait``, aguarda as já aceitas por até
+        ``timeout`` segundos. Retorna ``True`` se nenhuma ficou pendente.
+        """
+        self._closed = True
+        self._pool.shutdown(wait=False)
+        if not wait:
+            return self._pending == 0
+        end = None if timeout is None else time.monotonic() + timeout
+        while self._pending and (end is None or time.monotonic() < end):
+            time.sleep(0.01)
+        if self._pending:
+            logger.warning("%d tarefas de inferência pendentes no desligamento.", self._pending)
+        return self._pending == 0
@@ -0,0 +1,180 @@
+"""
+Leitura em blocos dos corpora de treino para o build do índice em streaming.
+
+Um ``Corpus`` lê exemplos (texto, intenção) de um arquivo JSONL, CSV ou
+Parquet, ou de um dataset do Hugging Face, e os entrega em blocos de tamanho
+fixo: nenhum formato carrega o corpus inteiro na memória. O corpus pode ser
+percorrido mais de uma vez (amostragem para treino do índice e build).
+"""
+
+import csv
+import json
+import random
+import logging
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv", "parquet", "hf")
+
+# Dataset usado quando nenhuma fonte é informada
+CLINC_SOURCE = "./datasets/clinc_oos"
+
+_EXTENSIONS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".tsv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+Chunk = tuple[list[str], list[str]]
+
+
+def detect_format(source: str) -> str:
+    """Formato da fonte pela extensão; o prefixo ``hf:`` indica um dataset do Hugging Face."""
+    if source.startswith("hf:"):
+        return "hf"
+    for ext, fmt in _EXTENSIONS.items():
+        if source.lower().endswith(ext):
+            return fmt
+    raise ValueError(
+        f"Formato de '{source}' não reconhecido; use .jsonl, .csv, .parquet ou o prefixo 'hf:'."
+    )
+
+
+def _batched(rows: Iterable[tuple[str, str]], size: int) -> Iterator[Chunk]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        texts, labels = zip(*batch)
+        yield list(texts), list(labels)
+
+
+class Corpus:
+    """
+    Fonte de exemplos de treino lida em blocos.
+
+    Args:
+        source (str): Caminho do arquivo, ``hf:<nome ou pasta>`` ou vazio
+            para o CLINC-OOS local.
+        fmt (str): jsonl, csv, parquet ou hf (padrão: detectado pela extensão).
+        text_column (str): Campo/coluna com o texto.
+        label_column (str): Campo/coluna com a intenção.
+        split (str): Split do dataset do Hugging Face.
+    """
+
+    def __init__(
+        self,
+        source: str = "",
+        fmt: Optional[str] = None,
+        text_column: str = "text",
+        label_column: str = "label",
+        split: str = "train",
+    ):
+        if not source:
+            source, fmt, label_column = f"hf:{CLINC_SOURCE}", "hf", "intent"
+        self.source = source
+        self.fmt = fmt or detect_format(source)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Formato '{self.fmt}' inválido; use um de {FORMATS}.")
+        self.text_column = text_column
+        self.label_column = label_column
+        self.split = split
+        # Vocabulário conhecido de antemão (ClassLabel de datasets do Hugging Face)
+        self.intent_names: Optional[list[str]] = None
+
+    def __repr__(self) -> str:
+        return f"Corpus({self.source!r}, fmt={self.fmt!r})"
+
+    def chunks(self, chunk_size: int) -> Iterator[Chunk]:
+        """Blocos ``(textos, intenções)`` com até ``chunk_size`` exemplos, na ordem da fonte."""
+        if chunk_size <= 0:
+            raise ValueError("chunk_size deve ser positivo.")
+        if self.fmt == "parquet":
+            return self._parquet_chunks(chunk_size)
+        if self.fmt == "hf":
+            return self._hf_chunks(chunk_size)
+        rows = self._jsonl_rows() if self.fmt == "jsonl" else self._csv_rows()
+        return _batched(rows, chunk_size)
+
+    def sample(self, size: int, chunk_size: int, seed: int = 0) -> list[str]:
+        """
+        Amostra uniforme (reservoir sampling) de até ``size`` textos, em uma
+        passada pelo corpus; a memória usada depende só de ``size``.
+        """
+        rng = random.Random(seed)
+        reservoir: list[str] = []
+        seen = 0
+        for texts, _ in self.chunks(chunk_size):
+            for text in texts:
+                if seen < size:
+                    reservoir.append(text)
+                else:
+                    j = rng.randrange(seen + 1)
+                    if j < size:
+                        reservoir[j] = text
+                seen += 1
+        return reservoir
+
+    def _row(self, record: dict, where: str) -> tuple[str, str]:
+        try:
+            text, label = record[self.text_column], record[self.label_column]
+        except KeyError as e:
+            raise ValueError(f"{where}: campo {e} ausente.") from e
+        if not isinstance(text, str) or not text:
+            raise ValueError(f"{where}: texto vazio ou inválido.")
+        return text, str(label)
+
+    def _jsonl_rows(self) -> Iterator[tuple[str, str]]:
+        with open(self.source, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                if line.strip():
+                    yield self._row(json.loads(line), f"{self.source}:{lineno}")
+
+    def _csv_rows(self) -> Iterator[tuple[str, str]]:
+        delimiter = "\t" if self.source.lower().endswith(".tsv") else ","
+        with open(self.source, "r", encoding="utf-8", newline="") as f:
+            for lineno, record in enumerate(csv.DictReader(f, delimiter=delimiter), 2):
+                yield self._row(record, f"{self.source}:{lineno}")
+
+    def _parquet_chunks(self, chunk_size: int) -> Iterator[Chunk]:
+        try:
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError("Leitura de Parquet requer o pacote 'pyarrow'.") from e
+
+        parquet = pq.ParquetFile(self.source)
+        columns = [self.text_column, self.label_column]
+        missing = [c for c in columns if c not in parquet.schema_arrow.names]
+        if missing:
+            raise ValueError(f"{self.source}: colunas ausentes {missing}.")
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            data = batch.to_pydict()
+            yield data[self.text_column], [str(l) for l in data[self.label_column]]
+
+    def _hf_chunks(self, chunk_size: int) -> Iterator[Chunk]:
+        # Importado aqui para que o caminho de serviço não carregue o datasets
+        from datasets import load_dataset  # pylint: disable=import-outside-toplevel
+
+        path = self.source[len("hf:"):] if self.source.startswith("hf:") else self.source
+        if path == CLINC_SOURCE:
+            # Dataset local: as tabelas Arrow são lidas via memory-map
+            dataset = load_dataset(path=path, name="default", cache_dir="./datasets", split=self.split)
+        else:
+            dataset = load_dataset(path, split=self.split, streaming=True)
+
+        feature = (dataset.features or {}).get(self.label_column)
+        names = getattr(feature, "names", None)
+        if names:
+            self.intent_names = list(names)
+        logger.info("Lendo dataset '%s' (split '%s') em blocos de %d...", path, self.split, chunk_size)
+        for batch in dataset.iter(batch_size=chunk_size):
+            labels = batch[self.label_column]
+            if names:
+                labels = [names[i] for i in labels]
+            yield list(batch[self.text_column]), [str(l) for l in labels]
@@ -0,0 +1,110 @@
+"""
+Execução de tarefas longas (ex.: construção do índice) em segundo plano,
+com ids de job e consulta de status.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    Executa jobs em um pool de threads e guarda o status dos mais recentes.
+
+    Com ``max_workers=1`` (padrão) os jobs rodam em série, o que evita duas
+    construções de índice concorrentes escrevendo nos mesmos arquivos.
+    """
+
+    def __init__(self, max_workers: int = 1, max_history: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """Agenda ``fn(*args, **kwargs)`` e retorna o id do job."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": "pending",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._trim()
+            self._futures[job_id] = self._executor.submit(self._run, job_id, fn, args, kwargs)
+        logger.info("Job %s (%s) agendado", job_id, kind)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Retorna uma cópia do status do job, ou ``None`` se ele não existir."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> list[dict]:
+        """Retorna o status de todos os jobs guardados, do mais antigo ao mais novo."""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Bloqueia até o job terminar (ou o timeout expirar) e retorna o seu status."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Justificado: o erro já foi registrado no status do job
+                pass
+        return self.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o pool, aguardando os jobs em andamento se ``wait`` for True."""
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Justificado: a falha é exposta no status do job em vez de derrubar o worker
+            logger.exception("Job %s falhou", job_id)
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            raise
+        self._update(job_id, status="succeeded", result=result, finished_at=time.time())
+        logger.info("Job %s concluído", job_id)
+        return result
+
+    def _trim(self):
+        """Descarta os jobs finalizados mais antigos além de ``max_history``."""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in ("succeeded", "failed")
+        ]
+        while len(self._jobs) > self.max_history and finished:
+            job_id = finished.pop(0)
+            self._jobs.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+
+# Instância compartilhada pela aplicação.
+jobs = JobManager()
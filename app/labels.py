@@ -0,0 +1,159 @@
+"""
+Armazenamento compacto dos labels do índice FAISS.
+
+Cada vetor do índice tem um id de intenção int32 em ``<MODEL_NAME>_labels.npy``
+(memory-mappable); os nomes das intenções ficam em ``<MODEL_NAME>_intents.json``
+e os textos de treino, opcionais, em ``<MODEL_NAME>_texts.jsonl``. O formato
+antigo ``<MODEL_NAME>_labels.json`` continua legível para migração.
+"""
+
+import os
+import json
+import logging
+from typing import Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _replace_atomically(path: str, write):
+    """
+    Escreve em um arquivo temporário e o move sobre ``path``. Processos que
+    mantêm o arquivo antigo mapeado em memória continuam lendo a versão antiga.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def label_paths(data_dir: str, model_name: str) -> dict:
+    """Caminhos dos arquivos de labels de um modelo."""
+    base = os.path.join(data_dir, model_name)
+    return {
+        "ids": f"{base}_labels.npy",
+        "intents": f"{base}_intents.json",
+        "texts": f"{base}_texts.jsonl",
+        "legacy": f"{base}_labels.json",
+    }
+
+
+class LabelStore:
+    """
+    Labels do índice: um array int32 com o id da intenção de cada vetor
+    e o vocabulário de nomes de intenção.
+    """
+
+    def __init__(
+        self,
+        label_ids: np.ndarray,
+        intent_names: list[str],
+        texts: Optional[list[str]] = None,
+    ):
+        self.label_ids = label_ids
+        self.intent_names = list(intent_names)
+        self.texts = texts
+
+    def __len__(self) -> int:
+        return len(self.label_ids)
+
+    @classmethod
+    def from_labels(
+        cls,
+        labels: Iterable[str],
+        texts: Optional[list[str]] = None,
+        intent_names: Optional[list[str]] = None,
+    ) -> "LabelStore":
+        """
+        Cria o store a partir de um label (string) por vetor.
+        Sem ``intent_names``, o vocabulário é formado pelos labels em ordem alfabética.
+        """
+        labels = list(labels)
+        if intent_names is None:
+            intent_names = sorted(set(labels))
+        vocab = {name: i for i, name in enumerate(intent_names)}
+        label_ids = np.fromiter((vocab[l] for l in labels), dtype=np.int32, count=len(labels))
+        return cls(label_ids, intent_names, texts)
+
+    @classmethod
+    def from_legacy_json(cls, path: str) -> "LabelStore":
+        """Lê o formato antigo: lista JSON de objetos ``{"text", "label"}``."""
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        return cls.from_labels(
+            (item["label"] for item in items), texts=[item["text"] for item in items]
+        )
+
+    def names(self, ids: np.ndarray) -> np.ndarray:
+        """Converte ids de vetores do índice nos nomes das suas intenções."""
+        return np.asarray(self.intent_names, dtype=object)[self.label_ids[ids]]
+
+    def save(self, data_dir: str, model_name: str, save_texts: bool = True) -> str:
+        """
+        Salva o array de ids, o vocabulário e, opcionalmente, os textos.
+
+        Returns:
+            str: Caminho do arquivo ``.npy`` de ids.
+        """
+        paths = label_paths(data_dir, model_name)
+        os.makedirs(data_dir, exist_ok=True)
+        _replace_atomically(
+            paths["ids"], lambda f: np.save(f, np.asarray(self.label_ids, dtype=np.int32))
+        )
+        _replace_atomically(
+            paths["intents"],
+            lambda f: f.write(json.dumps(self.intent_names, ensure_ascii=False).encode("utf-8")),
+        )
+        if save_texts and self.texts is not None:
+            _replace_atomically(
+                paths["texts"],
+                lambda f: f.writelines(
+                    (json.dumps(text, ensure_ascii=False) + "\n").encode("utf-8")
+                    for text in self.texts
+                ),
+            )
+        return paths["ids"]
+
+    @classmethod
+    def exists(cls, data_dir: str, model_name: str) -> bool:
+        """Indica se os arquivos do formato compacto existem."""
+        paths = label_paths(data_dir, model_name)
+        return os.path.exists(paths["ids"]) and os.path.exists(paths["intents"])
+
+    @classmethod
+    def load(
+        cls,
+        data_dir: str,
+        model_name: str,
+        mmap: bool = True,
+        load_texts: bool = False,
+    ) -> "LabelStore":
+        """
+        Carrega os labels no formato compacto, com o array de ids mapeado em
+        memória. Se apenas o JSON antigo existir, ele é lido e convertido.
+        """
+        paths = label_paths(data_dir, model_name)
+        if not cls.exists(data_dir, model_name):
+            if os.path.exists(paths["legacy"]):
+                logger.warning("Lendo labels no formato JSON antigo: '%s'", paths["legacy"])
+                return cls.from_legacy_json(paths["legacy"])
+            raise FileNotFoundError(f"Labels não encontrados em '{paths['ids']}'.")
+
+        label_ids = np.load(paths["ids"], mmap_mode="r" if mmap else None)
+        with open(paths["intents"], "r", encoding="utf-8") as f:
+            intent_names = json.load(f)
+
+        texts = None
+        if load_texts and os.path.exists(paths["texts"]):
+            with open(paths["texts"], "r", encoding="utf-8") as f:
+                texts = [json.loads(line) for line in f]
+        return cls(label_ids, intent_names, texts)
+
+
+def migrate_legacy_labels(data_dir: str, model_name: str) -> str:
+    """Converte ``<MODEL_NAME>_labels.json`` para o formato compacto."""
+    paths = label_paths(data_dir, model_name)
+    store = LabelStore.from_legacy_json(paths["legacy"])
+    logger.info("Migrando %d labels de '%s'...", len(store), paths["legacy"])
+    return store.save(data_dir, model_name)
@@ -0,0 +1,127 @@
+"""
+Configuração do logging do processo e logs do caminho quente das requisições.
+
+Com ``LOG_ASYNC``, os handlers de saída rodam em uma thread própria
+(``QueueListener``): a requisição só enfileira o registro, e a formatação da
+mensagem e a escrita no stream ficam fora do caminho da resposta. Os logs por
+requisição (texto e resultado de cada predição) passam por ``request_log``, que
+só emite uma a cada ``1 / LOG_SAMPLE_RATE`` chamadas.
+"""
+
+import os
+import queue
+import atexit
+import logging
+import weakref
+import itertools
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import LOG_ASYNC, LOG_SAMPLE_RATE
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que não formata o registro ao enfileirar: a fila é local ao
+    processo, então o registro não precisa ser serializável e ``getMessage``
+    roda na thread do listener. Os argumentos das mensagens (ex.: o dict do
+    resultado) não são alterados depois de logados.
+    """
+
+    def __init__(self, handler: logging.Handler):
+        self.listener = QueueListener(queue.SimpleQueue(), handler, respect_handler_level=True)
+        super().__init__(self.listener.queue)
+        self.listener.start()
+        _queue_handlers.add(self)
+
+    def prepare(self, record):
+        return record
+
+    def restart(self):
+        """Nova fila e nova thread (após o fork, que não copia a thread do listener)."""
+        self.listener.queue = self.queue = queue.SimpleQueue()
+        self.listener._thread = None  # pylint: disable=protected-access
+        self.listener.start()
+
+    def close(self):
+        if self.listener._thread is not None:  # pylint: disable=protected-access
+            self.listener.stop()
+        _queue_handlers.discard(self)
+        super().close()
+
+
+# Handlers assíncronos ativos no processo
+_queue_handlers: weakref.WeakSet = weakref.WeakSet()
+
+
+def setup_logging(
+    logger: logging.Logger, level: str, async_: bool = LOG_ASYNC, stream=None
+) -> logging.Handler:
+    """
+    Substitui os handlers de ``logger`` por um handler de console (``stream``,
+    padrão stderr) com ``LOG_FORMAT`` e, com ``async_``, o coloca atrás de uma fila.
+
+    Returns:
+        logging.Handler: O handler instalado em ``logger``.
+    """
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+        if isinstance(old, _DeferredQueueHandler):
+            old.close()
+    handler = logging.StreamHandler(stream)
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.setLevel(level)
+    logger.propagate = False
+    if async_:
+        handler = _DeferredQueueHandler(handler)
+    logger.addHandler(handler)
+    return handler
+
+
+def _restart_after_fork():
+    # Sem a thread do listener, o filho só acumularia registros na fila herdada
+    for handler in list(_queue_handlers):
+        handler.restart()
+
+
+def flush_logs():
+    """Escreve os registros pendentes e encerra as threads de logging (no fim do processo)."""
+    for handler in list(_queue_handlers):
+        handler.close()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(flush_logs)
+
+
+class SampledLogger:
+    """
+    Logger que emite uma a cada ``round(1 / rate)`` chamadas de ``info``
+    (``rate`` = 1 emite todas, 0 nenhuma); ``debug`` não é amostrado. A
+    amostragem é decidida antes de criar o registro, então as chamadas
+    descartadas custam só um contador.
+
+    Args:
+        logger (logging.Logger): Logger de destino.
+        rate (float): Fração das chamadas emitidas.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float):
+        self.logger = logger
+        self.every = round(1 / rate) if rate > 0 else 0
+        self._calls = itertools.count()
+
+    def info(self, msg: str, *args):
+        if self.every and self.logger.isEnabledFor(logging.INFO):
+            # next() em itertools.count é atômico no CPython
+            if next(self._calls) % self.every == 0:
+                self.logger.info(msg, *args)
+
+    def debug(self, msg: str, *args):
+        self.logger.debug(msg, *args)
+
+
+# Logs por requisição (payload e resultado das predições)
+request_log = SampledLogger(logging.getLogger("app.requests"), LOG_SAMPLE_RATE)
@@ -0,0 +1,112 @@
+"""
+Manifesto dos artefatos de um modelo (``<MODEL_NAME>_manifest.json``).
+
+Registra tamanho, data de modificação e checksum (blake2b) de cada arquivo
+gerado pelo build ou pela compactação. Na inicialização, conferir o manifesto
+substitui a validação completa (ler índice e labels só para compará-los), que
+passa a ser feita apenas quando o manifesto falta ou não confere.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+# Artefatos sem os quais o modelo não carrega
+REQUIRED_ARTIFACTS = ("index", "labels", "intents")
+
+
+def manifest_path(data_dir: str, model_name: str) -> str:
+    """Caminho do manifesto dos artefatos de um modelo."""
+    return os.path.join(data_dir, f"{model_name}_manifest.json")
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Checksum blake2b (128 bits, hexadecimal) do conteúdo de um arquivo."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(data_dir: str, model_name: str, files: dict, **info) -> str:
+    """
+    Grava o manifesto dos arquivos em ``files`` (papel -> caminho; arquivos
+    inexistentes são ignorados). ``info`` guarda metadados extras (ex.: ntotal).
+    """
+    artifacts = {}
+    for role, path in files.items():
+        if path is None or not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        artifacts[role] = {
+            "file": os.path.basename(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "blake2b": file_digest(path),
+        }
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "model_name": model_name,
+        "created_at": time.time(),
+        "artifacts": artifacts,
+        **info,
+    }
+    path = manifest_path(data_dir, model_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_manifest(data_dir: str, model_name: str) -> Optional[dict]:
+    """Lê o manifesto; retorna ``None`` se ele não existir ou estiver corrompido."""
+    path = manifest_path(data_dir, model_name)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Manifesto '%s' ilegível: %s", path, e)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def verify_manifest(data_dir: str, model_name: str, verify_checksums: bool = False) -> bool:
+    """
+    Confere os artefatos contra o manifesto. Arquivos com o mesmo tamanho e a
+    mesma data de modificação são aceitos sem leitura; se a data mudou (ex.:
+    arquivos copiados) ou ``verify_checksums`` for True, o checksum é recalculado.
+    """
+    manifest = load_manifest(data_dir, model_name)
+    if manifest is None:
+        return False
+    artifacts = manifest.get("artifacts", {})
+    if any(role not in artifacts for role in REQUIRED_ARTIFACTS):
+        return False
+
+    for role, entry in artifacts.items():
+        path = os.path.join(data_dir, entry["file"])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            logger.info("Artefato '%s' do manifesto não encontrado: %s", role, path)
+            return False
+        if stat.st_size != entry["size"]:
+            logger.info("Artefato '%s' com tamanho diferente do manifesto.", role)
+            return False
+        if verify_checksums or stat.st_mtime_ns != entry["mtime_ns"]:
+            if file_digest(path) != entry["blake2b"]:
+                logger.info("Artefato '%s' com checksum diferente do manifesto.", role)
+                return False
+    return True
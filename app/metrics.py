@@ -0,0 +1,302 @@
+"""
+Métricas no formato de texto do Prometheus, sem dependências externas.
+
+Contadores e histogramas ficam em memória, no processo; ``GET /metrics``
+renderiza o registro. Valores que já existem em outros objetos (caches,
+tempos de carga, executor) são lidos apenas na coleta, por funções
+registradas com ``REGISTRY.add_collector``, sem custo no caminho quente.
+
+Em servidores com vários processos (gunicorn), cada worker tem o seu
+registro: o Prometheus deve coletar cada worker ou somar as séries.
+"""
+
+import bisect
+import threading
+from typing import Callable, Iterable, Optional
+
+from .config import METRICS_ENABLED
+
+# Limites (em segundos) dos histogramas de latência: de 0,1 ms a 10 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Série do metric com os valores de label dados (criada na primeira vez)."""
+        # Caminho rápido: labels já em str, série existente
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera os labels {self.labelnames}.")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def series(self) -> list[tuple[tuple, object]]:
+        """Séries existentes, como (valores dos labels, série), em ordem."""
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self.series():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: tuple, child) -> list[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Contador monotônico (sufixo ``_total`` por convenção)."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        """Incrementa a série sem labels."""
+        self.labels().inc(amount)
+
+    def values(self) -> dict:
+        """Valor de cada série, chaveado pela tupla de valores dos labels."""
+        return {key: child.value for key, child in self.series()}
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # Uma posição por limite e a última para +Inf (contagens não cumulativas)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Histograma com limites fixos, renderizado com buckets cumulativos."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """Registra um valor na série sem labels."""
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        with child._lock:  # pylint: disable=protected-access
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Coletor: devolve (nome, tipo, descrição, [(labels, valor)]) lidos na hora
+Collector = Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]]
+
+
+class Registry:
+    """Conjunto de métricas e coletores renderizados por ``/metrics``."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        """Registra uma função chamada a cada coleta (ex.: leitura de contadores de cache)."""
+        self._collectors.append(collector)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    values = tuple(labels[n] for n in names)
+                    lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Zera as séries de todas as métricas (usado nos testes)."""
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "intent_stage_seconds",
+    "Tempo de cada etapa da predição (preprocess, encode, centroid, semantic_cache, search, rerank, vote).",
+    ["stage"],
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "intent_request_seconds", "Latência das rotas de predição.", ["route"]
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "intent_batch_size",
+    "Textos por chamada de IntentModel.predict_batch (inclui os lotes do micro-batcher).",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+PREDICTIONS = REGISTRY.counter(
+    "intent_predictions_total", "Predições servidas por intenção prevista (inclui oos).", ["intent"]
+)
+
+# Estado global: desligado, observe e contadores viram no-op
+_state = {"enabled": METRICS_ENABLED}
+
+
+def enabled() -> bool:
+    return _state["enabled"]
+
+
+def set_enabled(value: bool):
+    """Liga ou desliga a coleta (o endpoint continua respondendo)."""
+    _state["enabled"] = bool(value)
+
+
+def observe_stages(timings: dict, names: Optional[Iterable[str]] = None):
+    """Registra no histograma de etapas os tempos (segundos) de ``timings``."""
+    if not _state["enabled"]:
+        return
+    for name in names if names is not None else timings:
+        if name in timings:
+            STAGE_SECONDS.labels(name).observe(timings[name])
+
+
+def observe_request(route: str, seconds: float):
+    if _state["enabled"]:
+        REQUEST_SECONDS.labels(route).observe(seconds)
+
+
+def record_predictions(results: list[dict]):
+    """Conta as predições por intenção e o tamanho do lote."""
+    if not _state["enabled"]:
+        return
+    BATCH_SIZE.observe(len(results))
+    for result in results:
+        PREDICTIONS.labels(result["predicted_intent"]).inc()
+
+
+def prediction_counts() -> dict:
+    """Predições contadas por intenção (``{intent: total}``)."""
+    return {key[0]: value for key, value in PREDICTIONS.values().items()}
+
+
+def timing_requested(value) -> bool:
+    """Interpreta o cabeçalho que pede o detalhamento de tempos na resposta."""
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    return bool(value) and value.strip().lower() in ("1", "true", "yes")
+
+
+def timing_ms(timings: dict) -> dict:
+    """Tempos por etapa em milissegundos, para a resposta JSON (``timing``)."""
+    return {f"{name}_ms": round(seconds * 1000.0, 3) for name, seconds in timings.items()}
+
+
+def render() -> str:
+    return REGISTRY.render()
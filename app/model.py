@@ -3,122 +3,1183 @@ Módulo de inferência: encapsula o modelo de detecção de intenção e sua ló
 """
 
 import os
-import json
 import logging
-from collections import Counter
+import threading
+import time
+from typing import Optional, Sequence, Union
 
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 
-from .builder import build_index
-from .config import DATA_DIR, DEFAULT_THRESHOLD, MODEL_NAME
+from . import metrics
+from .batching import MicroBatcher
+from .builder import (
+    IndexBuilder,
+    add_vectors,
+    apply_search_params,
+    build_index,
+    compute_centroids,
+    index_ids,
+    make_index,
+    read_index,
+    reconstruct_vectors,
+    train_index,
+    write_index,
+)
+from .cache import LRUCache
+from .delta import DeltaLog, delta_path
+from .embedding_store import EmbeddingStore
+from .encoders import default_model_dir, encode_batched, encoder_key, load_encoder
+from .labels import LabelStore, label_paths
+from .locks import ReadWriteLock
+from .rerank import ExactVectors, needs_rerank, rerank, vectors_path
+from .scoring import Calibration, calibration_path, oos_features, score_neighbors
+from .semantic_cache import SemanticCache
+from .utils import format_timings, timed
+from .config import (
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    BATCHING_ENABLED,
+    CACHE_ENABLED,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    CENTROID_FAST_PATH,
+    CENTROID_MARGIN,
+    DATA_DIR,
+    DEFAULT_THRESHOLD,
+    DELTA_COMPACT_THRESHOLD,
+    EMBED_CHUNK_SIZE,
+    EMBEDDING_STORE_ENABLED,
+    ENCODE_MAX_TOKENS,
+    ENCODER_BACKEND,
+    ENCODER_THREADS,
+    INDEX_MMAP,
+    INDEX_SEARCH_PARAMS,
+    MODEL_NAME,
+    OOS_CALIBRATION_ENABLED,
+    PREDICT_ENCODE_CHUNK_SIZE,
+    RERANK_ENABLED,
+    RERANK_OVERSAMPLE,
+    RESULT_CACHE_ENABLED,
+    SCORING_STRATEGY,
+    SCORING_TEMPERATURE,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_POLICY,
+    SEMANTIC_CACHE_THRESHOLD,
+)
 
 logger = logging.getLogger(__name__)
 
+OOS_LABEL = "oos"
+
+# Etapas do IntentModel registradas no histograma intent_stage_seconds
+MODEL_STAGES = ("encode", "centroid", "semantic_cache", "search", "rerank", "vote")
+
+# Limite de vizinhos extras da primeira busca para compensar vetores removidos
+# (tombstones); consultas que ainda ficam sem vizinhos suficientes são refeitas
+MAX_TOMBSTONE_OVERFETCH = 256
+
+
+def _vote(
+    cand: np.ndarray,
+    sims: np.ndarray,
+    valid: np.ndarray,
+    thresholds: np.ndarray,
+    strategy: str = "majority",
+    temperature: float = 0.05,
+    calibration: Optional[Calibration] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Voto vetorizado sobre os vizinhos de ``n`` consultas (ver ``scoring``).
+
+    Args:
+        cand (np.ndarray): ids de intenção dos vizinhos, shape (n, k).
+        sims (np.ndarray): similaridades dos vizinhos, shape (n, k), em ordem decrescente.
+        valid (np.ndarray): máscara booleana (n, k) dos vizinhos que participam do voto.
+        thresholds (np.ndarray): limiar OOS de cada consulta, shape (n,).
+        strategy (str): ``majority``, ``weighted`` ou ``softmax``.
+        temperature (float): Temperatura do ``softmax``.
+        calibration (Calibration, opcional): Com ela, consultas com probabilidade
+            OOS de pelo menos ``calibration.cutoff`` também viram OOS.
+
+    Returns:
+        tuple: id da intenção vencedora por consulta (-1 para OOS), confiança da
+        intenção mais votada (n,), confiança da intenção de cada vizinho (n, k) e
+        a probabilidade OOS (n,), ou ``None`` sem calibração.
+    """
+    n, k = cand.shape
+    if k == 0:
+        return np.full(n, -1, dtype=np.int64), np.zeros(n), np.zeros((n, 0)), None
+
+    best, shares = score_neighbors(cand, sims, valid, strategy, temperature)
+    rows = np.arange(n)
+    winners = cand[rows, best].astype(np.int64)
+    confidence = shares[rows, best]
+
+    oos = ~valid[:, 0] | (sims[:, 0] < thresholds)
+    p_oos = None
+    if calibration is not None:
+        p_oos = calibration.oos_probability(oos_features(sims, valid, confidence))
+        oos |= p_oos >= calibration.cutoff
+    winners[oos] = -1
+    return winners, confidence, shares, p_oos
+
+
+def _majority_vote(
+    cand: np.ndarray, sims: np.ndarray, valid: np.ndarray, thresholds: np.ndarray
+) -> np.ndarray:
+    """
+    Votação majoritária vetorizada: id da intenção vencedora por consulta, ou
+    -1 para OOS. Empates na contagem são decididos pela média de similaridade;
+    persistindo o empate, vence a intenção que aparece primeiro entre os vizinhos.
+    """
+    return _vote(cand, sims, valid, thresholds)[0]
+
+
+def _predict_intent(
+    intents: list[str], sims: list[float], thr: float, strategy: str = "majority"
+) -> str:
+    """
+    Realiza uma votação entre os vizinhos mais próximos,
+    com um limiar para classificar como out-of-scope (OOS).
+    """
+    if not sims:
+        return OOS_LABEL
+
+    names, codes = np.unique(np.asarray(intents, dtype=object), return_inverse=True)
+    winner = _vote(
+        codes.reshape(1, -1),
+        np.asarray(sims, dtype="float32").reshape(1, -1),
+        np.ones((1, len(sims)), dtype=bool),
+        np.asarray([thr], dtype="float32"),
+        strategy,
+    )[0][0]
+    return OOS_LABEL if winner < 0 else names[winner]
+
+
+def _per_item(value, n: int, name: str, cast) -> np.ndarray:
+    """Expande um valor escalar ou valida uma sequência com um valor por item."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if len(value) != n:
+            raise ValueError(f"'{name}' deve ter {n} valores, recebido {len(value)}.")
+        return np.asarray([cast(v) for v in value])
+    return np.full(n, cast(value))
+
 
 class IntentModel:
     """
-    Encapsula o modelo SentenceTransformer, o índice FAISS e os labels
+    Encapsula o modelo de embeddings, o índice FAISS e os labels
     para realizar a predição de intenções.
     """
 
     def __init__(self, model_name: str = MODEL_NAME, data_dir: str = DATA_DIR):
         self.model_name = model_name
         self.data_dir = data_dir
+        self.encoder_backend = ENCODER_BACKEND
         self.model = None
         self.index = None
-        self.labels = None
+        self.label_ids = None
+        self.intent_names = None
+        self.centroids = None
+        self.index_mmap = INDEX_MMAP
+        self.centroid_fast_path = CENTROID_FAST_PATH
+        self.centroid_margin = CENTROID_MARGIN
+        # Re-ranking exato dos candidatos de índices comprimidos
+        self.rerank = RERANK_ENABLED
+        self.rerank_oversample = RERANK_OVERSAMPLE
+        self.exact_vectors: Optional[ExactVectors] = None
+        # Estratégia do voto kNN e probabilidade OOS calibrada (flask calibrate)
+        self.scoring_strategy = SCORING_STRATEGY
+        self.scoring_temperature = SCORING_TEMPERATURE
+        self.calibration: Optional[Calibration] = None
+        self.embedding_cache = self._make_cache() if CACHE_ENABLED else None
+        self.result_cache = self._make_cache() if RESULT_CACHE_ENABLED else None
+        # Cache semântico dos vizinhos do kNN, criado em load() (depende da dimensão)
+        self.semantic_cache: Optional[SemanticCache] = None
+
+        # Estado das atualizações incrementais: máscara de ids removidos, quantos
+        # deles ainda estão fisicamente no índice (tombstones), textos inseridos
+        # desde a última compactação e o log de alterações.
+        self.deleted = None
+        self.n_deleted = 0
+        self.pending_changes = 0
+        self.added_texts: dict[int, str] = {}
+        self.delta_log = None
+        self._index_mapped = False
+        self.load_timings: dict[str, float] = {}
+        self._embedding_store = None
+        self._rw_lock = ReadWriteLock()
+        self._mutation_lock = threading.Lock()
 
-    def load(self):
+    @staticmethod
+    def _make_cache() -> LRUCache:
+        return LRUCache(
+            max_entries=CACHE_MAX_ENTRIES,
+            max_bytes=CACHE_MAX_BYTES,
+            ttl_seconds=CACHE_TTL_SECONDS,
+        )
+
+    def clear_cache(self):
+        """Invalida os caches de embeddings, de resultados e semântico."""
+        for cache in (self.embedding_cache, self.result_cache, self.semantic_cache):
+            if cache is not None:
+                cache.clear()
+
+    def cache_stats(self) -> dict:
+        """Retorna os contadores dos caches (``None`` para cache desativado)."""
+        return {
+            "embedding": self.embedding_cache.stats() if self.embedding_cache else None,
+            "result": self.result_cache.stats() if self.result_cache else None,
+            "semantic": self.semantic_cache.stats() if self.semantic_cache else None,
+        }
+
+    def load(self, encoder=None, build_missing: bool = True):
         """
         Carrega o modelo, o índice FAISS e os labels.
         Se os artefatos não existirem, eles são gerados automaticamente.
+        Os caches são invalidados, pois podem refletir um índice anterior.
+
+        Args:
+            encoder: Modelo de embeddings já carregado a ser reutilizado
+                (ex.: ao recarregar apenas o índice).
+            build_missing: Se False, artefatos ausentes geram FileNotFoundError
+                em vez de um build a partir do CLINC-OOS.
         """
         logger.info("Iniciando carregamento do modelo e do índice FAISS...")
+        self.clear_cache()
+        timings = {}
+        start = time.perf_counter()
 
-        index_path, labels_path = build_index()
+        with timed(timings, "artifacts"):
+            index_path, labels_path = build_index(
+                create=build_missing, model_name=self.model_name, data_dir=self.data_dir
+            )
 
         logger.info("Carregando índice FAISS de '%s'...", index_path)
-        self.index = faiss.read_index(index_path)
+        with timed(timings, "index"):
+            self.index = read_index(index_path, mmap=self.index_mmap)
+            self._index_mapped = self.index_mmap
+            apply_search_params(self.index, INDEX_SEARCH_PARAMS)
+        if SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                self.index.d,
+                SEMANTIC_CACHE_THRESHOLD,
+                SEMANTIC_CACHE_MAX_ENTRIES,
+                SEMANTIC_CACHE_POLICY,
+            )
 
         logger.info("Carregando labels de '%s'...", labels_path)
-        with open(labels_path, "r", encoding="utf-8") as f:
-            self.labels = json.load(f)
+        with timed(timings, "labels"):
+            store = LabelStore.load(self.data_dir, self.model_name, mmap=True)
+            self.label_ids = store.label_ids
+            self.intent_names = np.asarray(store.intent_names, dtype=object)
+
+            centroids_path = os.path.join(self.data_dir, f"{self.model_name}_centroids.npy")
+            self.centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+            self.exact_vectors = self._load_exact_vectors()
+            self._load_calibration()
+        if self.centroids is None and self.centroid_fast_path:
+            logger.warning(
+                "Centróides não encontrados em '%s'; caminho rápido desativado.", centroids_path
+            )
+        elif self.calibration is not None and self.centroid_fast_path:
+            logger.warning("Calibração OOS carregada; caminho rápido por centróides desativado.")
+
+        with timed(timings, "encoder"):
+            if encoder is not None:
+                self.model = encoder
+            else:
+                logger.info(
+                    "Carregando modelo de embeddings '%s' (backend %s)...",
+                    self.model_name,
+                    self.encoder_backend,
+                )
+                self.model = load_encoder(
+                    default_model_dir(self.model_name), self.encoder_backend, ENCODER_THREADS
+                )
+
+        with timed(timings, "delta"):
+            # Ids ausentes do índice (removidos em compactações anteriores) ficam
+            # marcados como removidos, mas não exigem busca extra.
+            self.deleted = np.ones(len(self.label_ids), dtype=bool)
+            self.deleted[index_ids(self.index)] = False
+            self.n_deleted = 0
+            self.pending_changes = 0
+            self.added_texts = {}
+            self.delta_log = DeltaLog(delta_path(self.data_dir, self.model_name))
+            self._replay_delta()
 
-        logger.info("Carregando modelo de embeddings '%s'...", self.model_name)
-        local_model_path = os.path.join(
-            os.path.dirname(__file__), "..", "models", self.model_name
+        timings["total"] = time.perf_counter() - start
+        self.load_timings = timings
+        logger.info(
+            "Recursos carregados com sucesso: %d labels, índice FAISS e modelo prontos (%s).",
+            len(self.label_ids),
+            format_timings(timings),
         )
-        self.model = SentenceTransformer(local_model_path, trust_remote_code=True)
 
+    def _load_calibration(self):
+        """Adota a estratégia de voto e a probabilidade OOS ajustadas por ``flask calibrate``."""
+        path = calibration_path(self.data_dir, self.model_name)
+        self.calibration = None
+        if not OOS_CALIBRATION_ENABLED or not os.path.exists(path):
+            return
+        self.calibration = Calibration.load(path)
+        self.scoring_strategy = self.calibration.strategy
+        self.scoring_temperature = self.calibration.temperature
         logger.info(
-            "Recursos carregados com sucesso: %d labels, índice FAISS e modelo prontos.",
-            len(self.labels),
+            "Calibração OOS carregada de '%s': voto %s, ajustada com top_k=%d.",
+            path, self.calibration.strategy, self.calibration.top_k,
         )
 
-    def predict(self, text: str, top_k: int, threshold: float) -> dict:
+    def _load_exact_vectors(self) -> Optional[ExactVectors]:
+        """Vetores exatos do re-ranking (memory-map), se ativo e compatível com os labels."""
+        path = vectors_path(self.data_dir, self.model_name)
+        vectors = None
+        if self.rerank and os.path.exists(path):
+            vectors = ExactVectors.load(path)
+            if len(vectors) != len(self.label_ids):
+                logger.warning(
+                    "'%s' tem %d vetores, mas há %d labels; re-ranking desativado.",
+                    path, len(vectors), len(self.label_ids),
+                )
+                vectors = None
+        elif self.rerank:
+            logger.warning("Vetores exatos não encontrados em '%s'; re-ranking desativado.", path)
+        if vectors is None and needs_rerank(self.index):
+            raise RuntimeError(
+                "O índice não devolve similaridades de produto interno (ex.: LSH) e "
+                "exige o re-ranking exato: ative RERANK_ENABLED e reconstrua o índice."
+            )
+        return vectors
+
+    def memory_bytes(self) -> int:
+        """
+        Estimativa da memória de índice, labels, centróides e caches (sem o encoder). O
+        tamanho do arquivo do índice aproxima a sua representação em memória; os caches
+        LRU contam pelo limite de bytes, que atingem com o uso.
+        """
+        total = 0
+        index_path = os.path.join(self.data_dir, f"{self.model_name}.faiss")
+        if self.index is not None and os.path.exists(index_path):
+            total += os.path.getsize(index_path)
+        for array in (self.label_ids, self.centroids, self.deleted):
+            if array is not None:
+                total += array.nbytes
+        if self.semantic_cache is not None:
+            total += self.semantic_cache.nbytes
+        for cache in (self.embedding_cache, self.result_cache):
+            if cache is not None:
+                total += cache.max_bytes
+        if self.exact_vectors is not None and self.exact_vectors.extra is not None:
+            # O arquivo mapeado fica no page cache; só as linhas inseridas estão no heap
+            total += self.exact_vectors.extra.nbytes
+        return total
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Indica se as alterações pendentes atingiram ``DELTA_COMPACT_THRESHOLD``."""
+        return self.pending_changes >= DELTA_COMPACT_THRESHOLD
+
+    def add_examples(self, texts: list[str], labels: list[str]) -> list[int]:
+        """
+        Insere novos exemplos no índice em memória sem reconstruí-lo: apenas os
+        textos novos são codificados, e a operação é registrada no log de
+        alterações para ser reaplicada na próxima inicialização.
+
+        Returns:
+            list[int]: Ids atribuídos aos novos vetores (usados em ``remove_examples``).
+        """
+        if len(texts) != len(labels):
+            raise ValueError("'texts' e 'labels' devem ter o mesmo tamanho.")
+        if not texts:
+            return []
+        emb = self._encode_examples(list(texts))
+        with self._mutation_lock:
+            ids = self._append_vectors(emb, texts, labels)
+            self.delta_log.append(
+                {"op": "add", "ids": ids, "texts": list(texts), "labels": list(labels)}
+            )
+        logger.info("%d exemplos inseridos (ids %d-%d).", len(ids), ids[0], ids[-1])
+        return ids
+
+    def remove_examples(self, ids: list[int]) -> int:
+        """
+        Remove exemplos por id marcando-os como tombstones; eles deixam de ser
+        retornados na busca e são descartados fisicamente na compactação.
+
+        Returns:
+            int: Quantidade de ids efetivamente removidos (ignora os já removidos).
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if len(ids) and (ids.min() < 0 or ids.max() >= len(self.label_ids)):
+            raise ValueError("Id de exemplo inexistente.")
+        with self._mutation_lock:
+            removed = self._tombstone(ids)
+            if removed:
+                self.delta_log.append({"op": "remove", "ids": ids.tolist()})
+        logger.info("%d exemplos removidos.", removed)
+        return removed
+
+    def compact(self) -> dict:
+        """
+        Incorpora as alterações pendentes aos artefatos em disco: reconstrói o
+        índice só com os vetores vivos (preservando os seus ids), recalcula os
+        centróides, salva labels e textos e esvazia o log de alterações.
+        O novo índice é construído fora do lock de leitura e trocado no final.
+        """
+        with self._mutation_lock:
+            alive = np.flatnonzero(~self.deleted)
+            exact = self.exact_vectors
+            if exact is not None:
+                # Índices comprimidos reconstroem vetores com perda
+                vectors = exact.take(alive)
+            else:
+                vectors = reconstruct_vectors(self.index, alive)
+
+            builder = IndexBuilder(self.model_name, self.data_dir)
+            inner = make_index(
+                self.index.d, builder.index_factory, builder.ef_construction,
+                builder.search_params,
+            )
+            train_index(inner, vectors)
+            if len(alive) == len(self.deleted):
+                index = inner
+                index.add(vectors)
+            else:
+                index = faiss.IndexIDMap2(inner)
+                index.add_with_ids(vectors, alive)
+            apply_search_params(index, INDEX_SEARCH_PARAMS)
+
+            label_ids = np.array(self.label_ids, dtype=np.int32)
+            centroids = compute_centroids(vectors, label_ids[alive], len(self.intent_names))
+            texts = self._all_texts()
+
+            write_index(index, builder.index_path)
+            LabelStore(label_ids, self.intent_names.tolist(), texts).save(
+                self.data_dir, self.model_name
+            )
+            np.save(builder.centroids_path, centroids)
+            if exact is not None:
+                exact.save(builder.vectors_path)
+                exact = ExactVectors.load(builder.vectors_path)
+            builder.write_manifest(ntotal=index.ntotal, n_labels=len(label_ids))
+
+            with self._rw_lock.write():
+                self.index = index
+                self._index_mapped = False
+                self.label_ids = label_ids
+                self.centroids = centroids
+                self.exact_vectors = exact
+                self.deleted = self.deleted.copy()
+                self.n_deleted = 0
+                self.pending_changes = 0
+                self.added_texts = {}
+            self.delta_log.truncate()
+
+        logger.info("Índice compactado: %d vetores vivos.", len(alive))
+        return {"vectors": int(len(alive)), "index_path": builder.index_path}
+
+    def _append_vectors(self, emb: np.ndarray, texts: list[str], labels: list[str]) -> list[int]:
+        """Acrescenta vetores, labels (criando intenções novas) e tombstones vazios."""
+        names = self.intent_names.tolist()
+        vocab = {name: i for i, name in enumerate(names)}
+        for label in labels:
+            if label not in vocab:
+                vocab[label] = len(names)
+                names.append(label)
+        codes = np.asarray([vocab[label] for label in labels], dtype=np.int32)
+
+        start = len(self.label_ids)
+        ids = np.arange(start, start + len(labels), dtype=np.int64)
+        self._make_index_writable()
+        with self._rw_lock.write():
+            # Vocabulário e labels são publicados antes dos vetores, para que
+            # qualquer id retornado pela busca já tenha o seu label.
+            self.intent_names = np.asarray(names, dtype=object)
+            self.label_ids = np.concatenate([self.label_ids, codes])
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(ids), dtype=bool)])
+            if self.exact_vectors is not None:
+                self.exact_vectors.append(emb)
+            add_vectors(self.index, emb, ids)
+            self._after_mutation(len(ids))
+        self.added_texts.update(zip(ids.tolist(), texts))
+        return ids.tolist()
+
+    def _make_index_writable(self):
+        """
+        O índice mapeado em memória é somente leitura (inserir nele aborta o
+        processo): na primeira inserção ele é copiado para a memória. O
+        ``faiss.clone_index`` manteria os vetores mapeados; a serialização não.
+        """
+        if not self._index_mapped:
+            return
+        logger.info("Copiando o índice mapeado em memória para receber inserções...")
+        index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        apply_search_params(index, INDEX_SEARCH_PARAMS)
+        with self._rw_lock.write():
+            self.index = index
+            self._index_mapped = False
+
+    def _tombstone(self, ids: np.ndarray) -> int:
+        with self._rw_lock.write():
+            fresh = ids[~self.deleted[ids]]
+            self.deleted[fresh] = True
+            self.n_deleted += len(fresh)
+            self._after_mutation(len(fresh))
+        return len(fresh)
+
+    def _after_mutation(self, n_changes: int):
+        """Invalida o que depende do conteúdo do índice após uma alteração."""
+        self.pending_changes += n_changes
+        # Centróides ficam desatualizados até a próxima compactação
+        self.centroids = None
+        for cache in (self.result_cache, self.semantic_cache):
+            if cache is not None:
+                cache.clear()
+
+    def _replay_delta(self):
+        """Reaplica o log de alterações sobre os artefatos base recém-carregados."""
+        id_map: dict[int, int] = {}
+        n_ops = 0
+        for record in self.delta_log.records():
+            n_ops += 1
+            if record["op"] == "add":
+                emb = self._encode_examples(record["texts"])
+                new_ids = self._append_vectors(emb, record["texts"], record["labels"])
+                id_map.update(zip(record["ids"], new_ids))
+            elif record["op"] == "remove":
+                ids = np.asarray([id_map.get(i, i) for i in record["ids"]], dtype=np.int64)
+                self._tombstone(ids[ids < len(self.label_ids)])
+        if n_ops:
+            logger.info(
+                "Log de alterações reaplicado: %d operações, %d alterações pendentes.",
+                n_ops,
+                self.pending_changes,
+            )
+
+    def _encode_examples(self, texts: list[str]) -> np.ndarray:
+        """
+        Codifica exemplos de treino inseridos incrementalmente. Usa o cache
+        persistente de embeddings do builder, o que torna a reaplicação do log
+        na inicialização praticamente gratuita.
+        """
+        if not EMBEDDING_STORE_ENABLED:
+            return self._encode_chunks(texts)
+        if self._embedding_store is None:
+            self._embedding_store = EmbeddingStore(
+                self.data_dir, encoder_key(self.model_name, self.encoder_backend)
+            )
+        return self._embedding_store.encode(texts, self._encode_chunks, EMBED_CHUNK_SIZE)
+
+    def _all_texts(self) -> Optional[list[str]]:
+        """Textos de todos os ids (base + inseridos), se o arquivo lateral existir."""
+        if not os.path.exists(label_paths(self.data_dir, self.model_name)["texts"]):
+            return None
+        base = LabelStore.load(self.data_dir, self.model_name, load_texts=True).texts or []
+        texts = base + [""] * (len(self.label_ids) - len(base))
+        for i, text in self.added_texts.items():
+            texts[i] = text
+        return texts
+
+    def predict(
+        self, text: str, top_k: int, threshold: float, timings: Optional[dict] = None
+    ) -> dict:
         """
         Prediz a intenção do texto de entrada.
         Retorna um dicionário com a query, a intenção prevista, os candidatos e os scores.
         """
-        if not all((self.model, self.index, self.labels)):
+        logger.debug("Realizando predição para: '%s'", text)
+
+        result = self.predict_batch([text], top_k, threshold, timings=timings)[0]
+        logger.debug("Resultado da predição: %s", result)
+        return result
+
+    def predict_batch(
+        self,
+        texts: list[str],
+        top_k: Union[int, Sequence[int]],
+        threshold: Union[float, Sequence[float]],
+        timings: Optional[dict] = None,
+    ) -> list[dict]:
+        """
+        Prediz as intenções de vários textos de uma só vez.
+
+        Os textos são codificados em lotes de comprimento parecido, de até
+        ``PREDICT_ENCODE_CHUNK_SIZE`` textos e ``ENCODE_MAX_TOKENS`` tokens com
+        padding, a busca FAISS é feita uma única vez sobre toda a matriz de
+        embeddings (com o maior ``top_k``) e o voto é vetorizado sobre os
+        arrays (n, k).
+
+        Args:
+            texts (list[str]): Textos já pré-processados.
+            top_k (int | Sequence[int]): Vizinhos considerados, global ou por item.
+            threshold (float | Sequence[float]): Limiar OOS, global ou por item.
+            timings (dict, opcional): Recebe o tempo (segundos) de cada etapa
+                do lote; as etapas também vão para as métricas.
+
+        Returns:
+            list[dict]: Um resultado por texto, no mesmo formato de ``predict``.
+        """
+        if not all(x is not None for x in (self.model, self.index, self.label_ids)):
             raise RuntimeError(
                 "Modelo não carregado. Execute o método load() antes de usar predict()."
             )
+        if not texts:
+            return []
 
-        logger.debug("Realizando predição para: '%s'", text)
+        n = len(texts)
+        top_ks = _per_item(top_k, n, "top_k", int)
+        thresholds = _per_item(threshold, n, "threshold", float).astype("float32")
+        if top_ks.min() < 1:
+            raise ValueError("'top_k' deve ser >= 1.")
 
-        emb = self.model.encode([text], normalize_embeddings=True)
-        emb = np.array(emb, dtype="float32")
-        sims, ids = self.index.search(emb, top_k)
+        timings = {} if timings is None else timings
+        if self.result_cache is None:
+            results = self._predict_uncached(texts, top_ks, thresholds, timings)
+        else:
+            results = self._predict_cached(texts, top_ks, thresholds, timings)
+        metrics.observe_stages(timings, MODEL_STAGES)
+        metrics.record_predictions(results)
+        return results
 
-        sims = sims[0].tolist()
-        ids = ids[0].tolist()
-        candidates = [self.labels[i]["label"] for i in ids]
-        intent = self._predict_intent(candidates, sims, threshold)
+    def encode(self, texts: list[str], timings: Optional[dict] = None) -> np.ndarray:
+        """
+        Embeddings normalizados (float32) dos textos já pré-processados, com o
+        cache de embeddings; com ``predict_embeddings``, separa o encode da
+        busca (ex.: estágios do pipeline de ``flask classify``).
+        """
+        if self.model is None:
+            raise RuntimeError("Modelo não carregado. Execute o método load() antes de usar encode().")
+        timings = {} if timings is None else timings
+        with timed(timings, "encode"):
+            return self._encode(texts)
 
-        result = {
-            "query": text,
-            "predicted_intent": intent,
-            "candidates": candidates,
-            "scores": sims,
-        }
-        logger.info("Resultado da predição: %s", result)
-        return result
+    def neighbors(self, texts: list[str], k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vizinhos dos textos já pré-processados, sem o voto (ex.: ``flask calibrate``).
 
-    @staticmethod
-    def _predict_intent(intents: list[str], sims: list[float], thr: float) -> str:
+        Returns:
+            tuple[np.ndarray, np.ndarray]: similaridades (n, k) e ids de intenção
+            (n, k) dos vizinhos, -1 onde não há vizinho.
+        """
+        if self.index is None or self.label_ids is None:
+            raise RuntimeError("Modelo não carregado. Execute o método load() antes de usar neighbors().")
+        sims, ids = self._search_index(self.encode(texts), k, {})
+        return sims, np.where(ids >= 0, self.label_ids[np.maximum(ids, 0)], -1)
+
+    def predict_embeddings(
+        self,
+        emb: np.ndarray,
+        texts: list[str],
+        top_k: Union[int, Sequence[int]],
+        threshold: Union[float, Sequence[float]],
+        timings: Optional[dict] = None,
+    ) -> list[dict]:
+        """
+        Como ``predict_batch``, para embeddings já calculados com ``encode``:
+        só o caminho por centróides, a busca e o voto (sem o cache de resultados).
+        """
+        if self.index is None or self.label_ids is None:
+            raise RuntimeError(
+                "Modelo não carregado. Execute o método load() antes de usar predict()."
+            )
+        if len(emb) != len(texts):
+            raise ValueError("'emb' e 'texts' devem ter o mesmo número de linhas.")
+        if not texts:
+            return []
+
+        n = len(texts)
+        top_ks = _per_item(top_k, n, "top_k", int)
+        thresholds = _per_item(threshold, n, "threshold", float).astype("float32")
+        if top_ks.min() < 1:
+            raise ValueError("'top_k' deve ser >= 1.")
+
+        timings = {} if timings is None else timings
+        results = self._predict_encoded(emb, texts, top_ks, thresholds, timings)
+        metrics.observe_stages(timings, MODEL_STAGES)
+        metrics.record_predictions(results)
+        return results
+
+    def _predict_cached(
+        self, texts: list[str], top_ks: np.ndarray, thresholds: np.ndarray, timings: dict
+    ) -> list[dict]:
+        keys = [(t, int(k), float(thr)) for t, k, thr in zip(texts, top_ks, thresholds)]
+        results = [self.result_cache.get(key) for key in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            computed = self._predict_uncached(
+                [texts[i] for i in missing], top_ks[missing], thresholds[missing], timings
+            )
+            for i, result in zip(missing, computed):
+                self.result_cache.put(keys[i], result)
+                results[i] = result
+        # Cópias rasas para que o chamador não altere as entradas do cache
+        return [dict(r) for r in results]
+
+    def _predict_uncached(
+        self, texts: list[str], top_ks: np.ndarray, thresholds: np.ndarray, timings: dict
+    ) -> list[dict]:
+        """Encode dos textos seguido de ``_predict_encoded``."""
+        with timed(timings, "encode"):
+            emb = self._encode(texts)
+        return self._predict_encoded(emb, texts, top_ks, thresholds, timings)
+
+    def _predict_encoded(
+        self,
+        emb: np.ndarray,
+        texts: list[str],
+        top_ks: np.ndarray,
+        thresholds: np.ndarray,
+        timings: dict,
+    ) -> list[dict]:
         """
-        Realiza uma votação majoritária entre os vizinhos mais próximos,
-        com um limiar para classificar como out-of-scope (OOS).
+        Busca e voto para os textos, com ``top_k`` e limiar já expandidos por item.
+        Com o caminho rápido ativo, consultas com margem suficiente entre os dois
+        centróides mais próximos são respondidas sem a busca kNN. A calibração
+        OOS é ajustada sobre os vizinhos do kNN, então com ela carregada todas
+        as consultas passam pelo voto kNN.
         """
-        if not sims or sims[0] < thr:
-            return "oos"
+        results: list = [None] * len(texts)
 
-        votes = Counter(intents)
-        top_count = max(votes.values())
-        tied = [c for c, v in votes.items() if v == top_count]
+        pending = np.arange(len(texts))
+        if self.centroids is not None and self.centroid_fast_path and self.calibration is None:
+            with timed(timings, "centroid"):
+                accepted = self._centroid_predict(emb, texts, top_ks, thresholds)
+            for row, result in accepted:
+                results[row] = result
+            pending = np.array([i for i, r in enumerate(results) if r is None], dtype=np.int64)
 
-        # Em caso de empate, desempata pela média de similaridade
-        best = max(
-            tied, key=lambda c: np.mean([s for i, s in enumerate(sims) if intents[i] == c])
+        if len(pending):
+            knn = self._knn_predict(
+                emb[pending],
+                [texts[i] for i in pending],
+                top_ks[pending],
+                thresholds[pending],
+                timings,
+            )
+            for row, result in zip(pending, knn):
+                results[row] = result
+        return results
+
+    def _centroid_predict(
+        self,
+        emb: np.ndarray,
+        texts: list[str],
+        top_ks: np.ndarray,
+        thresholds: np.ndarray,
+    ) -> list[tuple[int, dict]]:
+        """
+        Pontua as consultas contra os centróides das intenções com um único matmul.
+        Retorna (linha, resultado) apenas das consultas em que a margem entre os
+        dois melhores centróides atinge ``centroid_margin`` e o melhor score
+        atinge o limiar OOS; as demais seguem para o voto kNN.
+        """
+        scores = emb @ self.centroids.T
+        order = np.argsort(-scores, axis=1)
+        top = np.take_along_axis(scores, order[:, :2], axis=1)
+        margin = top[:, 0] - (top[:, 1] if top.shape[1] > 1 else -np.inf)
+        accepted = np.flatnonzero((margin >= self.centroid_margin) & (top[:, 0] >= thresholds))
+
+        if not len(accepted):
+            return []
+        cols = order[accepted, : int(top_ks[accepted].max())]
+        valid = np.arange(cols.shape[1]) < top_ks[accepted][:, None]
+        # Cada centróide é uma intenção distinta: a contagem não as diferenciaria
+        strategy = "weighted" if self.scoring_strategy == "majority" else self.scoring_strategy
+        _, shares = score_neighbors(
+            cols, np.take_along_axis(scores[accepted], cols, axis=1), valid,
+            strategy, self.scoring_temperature,
         )
 
-        return best
+        out = []
+        for i, row in enumerate(accepted):
+            best = cols[i][valid[i]]
+            candidates = self.intent_names[best].tolist()
+            out.append(
+                (
+                    int(row),
+                    {
+                        "query": texts[row],
+                        "predicted_intent": candidates[0],
+                        "candidates": candidates,
+                        "scores": scores[row, best].tolist(),
+                        "confidence": float(shares[i, 0]),
+                        "intent_confidence": dict(zip(candidates, shares[i][valid[i]].tolist())),
+                        "path": "centroid",
+                    },
+                )
+            )
+        return out
+
+    def _knn_predict(
+        self,
+        emb: np.ndarray,
+        texts: list[str],
+        top_ks: np.ndarray,
+        thresholds: np.ndarray,
+        timings: dict,
+    ) -> list[dict]:
+        """Busca os vizinhos no índice FAISS e aplica a votação majoritária."""
+        sims, ids, hits = self._search(emb, top_ks, timings)
+        with timed(timings, "vote"):
+            # Inserções só acrescentam labels e a compactação preserva os ids
+            label_ids = self.label_ids
+            found = ids >= 0
+            # Vizinhos inexistentes (id -1) e colunas além do top_k do item não votam
+            valid = found & (np.arange(ids.shape[1]) < top_ks[:, None])
+            cand = np.where(found, label_ids[np.maximum(ids, 0)], -1)
+            winners, confidence, shares, p_oos = _vote(
+                cand, sims, valid, thresholds,
+                self.scoring_strategy, self.scoring_temperature, self.calibration,
+            )
+
+            results = []
+            for row, text in enumerate(texts):
+                keep = valid[row]
+                candidates = self.intent_names[cand[row][keep]].tolist()
+                result = {
+                    "query": text,
+                    "predicted_intent": (
+                        OOS_LABEL if winners[row] < 0 else self.intent_names[winners[row]]
+                    ),
+                    "candidates": candidates,
+                    "scores": sims[row][keep].tolist(),
+                    "confidence": float(confidence[row]),
+                    # Intenções repetidas entre os vizinhos têm a mesma confiança
+                    "intent_confidence": dict(zip(candidates, shares[row][keep].tolist())),
+                    "path": "semantic_cache" if hits[row] else "knn",
+                }
+                if p_oos is not None:
+                    result["oos_probability"] = float(p_oos[row])
+                results.append(result)
+        return results
+
+    def _search(
+        self, emb: np.ndarray, top_ks: np.ndarray, timings: dict
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vizinhos ``(sims, ids)`` de cada consulta, com ``max(top_ks)`` colunas, e a
+        máscara das consultas respondidas pelo cache semântico; ids removidos
+        (tombstones) são descartados e as lacunas ficam com id -1. Consultas
+        quase idênticas a uma recente reaproveitam os vizinhos dela e só as
+        demais vão ao índice.
+        """
+        k = int(top_ks.max())
+        hits = np.zeros(len(emb), dtype=bool)
+        if self.semantic_cache is None:
+            return (*self._search_index(emb, k, timings), hits)
+
+        with timed(timings, "semantic_cache"):
+            cached = self.semantic_cache.lookup(emb, top_ks)
+        sims = np.full((len(emb), k), -np.inf, dtype="float32")
+        ids = np.full((len(emb), k), -1, dtype=np.int64)
+        missing = np.array([i for i, entry in enumerate(cached) if entry is None], dtype=np.int64)
+        if len(missing):
+            fresh_sims, fresh_ids = self._search_index(emb[missing], k, timings)
+            sims[missing], ids[missing] = fresh_sims, fresh_ids
+            self.semantic_cache.put(emb[missing], fresh_sims, fresh_ids)
+        for row, entry in enumerate(cached):
+            if entry is not None:
+                width = min(k, len(entry[0]))
+                sims[row, :width], ids[row, :width] = entry[0][:width], entry[1][:width]
+                hits[row] = True
+        return sims, ids, hits
+
+    def _search_index(self, emb: np.ndarray, k: int, timings: dict) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Busca no índice; com os vetores exatos, traz ``rerank_oversample * k``
+        candidatos e os reordena pela similaridade exata.
+        """
+        with timed(timings, "search"), self._rw_lock.read():
+            exact = self.exact_vectors
+            fetch = k * max(1, self.rerank_oversample) if exact is not None else k
+            extra = min(self.n_deleted, MAX_TOMBSTONE_OVERFETCH)
+            sims, ids = self.index.search(emb, fetch + extra)
+            if extra:
+                sims, ids = self._skip_deleted(emb, sims, ids, fetch)
+        if exact is not None:
+            with timed(timings, "rerank"):
+                sims, ids = rerank(emb, ids, exact, k)
+        return sims, ids
+
+    def _skip_deleted(
+        self, emb: np.ndarray, sims: np.ndarray, ids: np.ndarray, fetch: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Descarta vetores removidos e recompacta cada linha mantendo a ordem. As
+        consultas que ficam com menos de ``fetch`` vizinhos vivos são refeitas
+        com o dobro de candidatos, até cobrir todas as remoções. Chamado com o
+        lock de leitura.
+        """
+        deleted = self.deleted
+
+        def live(sims, ids):
+            found = (ids >= 0) & ~deleted[np.maximum(ids, 0)]
+            order = np.argsort(~found, axis=1, kind="stable")[:, :fetch]
+            ids = np.where(np.take_along_axis(found, order, axis=1),
+                           np.take_along_axis(ids, order, axis=1), -1)
+            return np.take_along_axis(sims, order, axis=1), ids, found.sum(axis=1)
+
+        width = ids.shape[1]
+        sims, ids, n_live = live(sims, ids)
+        limit = min(fetch + self.n_deleted, self.index.ntotal)
+        rows = np.flatnonzero(n_live < fetch)
+        while len(rows) and width < limit:
+            width = min(width * 2, limit)
+            more_sims, more_ids, n_live = live(*self.index.search(emb[rows], width))
+            sims[rows], ids[rows] = more_sims, more_ids
+            rows = rows[n_live < fetch]
+        return sims, ids
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Codifica os textos em blocos, preenchendo uma única matriz float32.
+        Com o cache de embeddings ativo, apenas textos inéditos são codificados.
+        """
+        if self.embedding_cache is None:
+            return self._encode_chunks(texts)
+
+        cached = [self.embedding_cache.get(t) for t in texts]
+        pending = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        fresh = {}
+        if pending:
+            emb = self._encode_chunks(pending)
+            for text, vector in zip(pending, emb):
+                # Copia a linha para não manter a matriz inteira viva no cache
+                fresh[text] = vector.copy()
+                self.embedding_cache.put(text, fresh[text])
+
+        return np.stack([v if v is not None else fresh[t] for t, v in zip(texts, cached)])
+
+    def _encode_chunks(self, texts: list[str]) -> np.ndarray:
+        """Lotes de até PREDICT_ENCODE_CHUNK_SIZE textos de comprimento parecido."""
+        return encode_batched(
+            self.model, texts, ENCODE_MAX_TOKENS, max_batch_size=PREDICT_ENCODE_CHUNK_SIZE
+        )
 
 
 # --- Interface Pública do Módulo ---
 
 # Instância única (singleton) do modelo para ser usada pela aplicação.
+# Recargas seguem read-copy-update: um novo IntentModel é carregado fora do
+# caminho quente e publicado com uma única atribuição; chamadas em andamento
+# terminam com a instância que já haviam lido.
 _intent_model = IntentModel()
+_swap_lock = threading.Lock()
+
+
+def get_model() -> IntentModel:
+    """Retorna a instância publicada no momento."""
+    return _intent_model
+
+
+def is_loaded() -> bool:
+    """Indica se a instância publicada já tem índice e encoder carregados."""
+    model = get_model()
+    return model.index is not None and model.model is not None
+
+
+def swap_model(new_model: IntentModel) -> IntentModel:
+    """Publica ``new_model`` atomicamente e retorna a instância anterior."""
+    global _intent_model  # pylint: disable=global-statement
+    with _swap_lock:
+        old, _intent_model = _intent_model, new_model
+    return old
+
+
+# Situação do carregamento inicial, exposta no readiness probe (/ready)
+_load_state = {"status": "starting", "error": None}
 
 
 def load_model():
     """Carrega o modelo singleton, o índice e os labels."""
-    _intent_model.load()
+    _load_state.update(status="loading", error=None)
+    try:
+        get_model().load()
+    except Exception as e:
+        _load_state.update(status="failed", error=str(e))
+        raise
+    _load_state.update(status="ready")
+
+
+def load_model_in_background() -> threading.Thread:
+    """
+    Carrega o modelo em uma thread, para que o servidor responda /health e
+    /ready enquanto isso. Falhas ficam no log e no estado exposto em /ready.
+    """
+    def run():
+        try:
+            load_model()
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Justificado: o servidor continua no ar e /ready reporta a falha
+            logger.exception("Falha ao carregar o modelo em segundo plano")
+
+    thread = threading.Thread(target=run, name="load-model", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness() -> dict:
+    """
+    Estado para o readiness probe: ``status`` é ``ready`` só com o modelo
+    carregado (``starting``, ``loading`` ou ``failed`` caso contrário), com os
+    tempos de cada etapa do carregamento.
+    """
+    status = _load_state["status"]
+    if is_loaded():
+        status = "ready"
+    elif status == "ready":
+        status = "starting"
+    return {
+        "status": status,
+        "error": _load_state["error"],
+        "startup": get_model().load_timings,
+    }
+
+
+def reload_model() -> IntentModel:
+    """
+    Carrega um novo IntentModel a partir dos artefatos em disco, reaproveitando
+    o modelo de embeddings já carregado, e o publica no lugar do atual.
+    """
+    current = get_model()
+    new_model = IntentModel(current.model_name, current.data_dir)
+    new_model.encoder_backend = current.encoder_backend
+    new_model.load(encoder=current.model)
+    swap_model(new_model)
+    logger.info("Novo índice publicado (%d labels).", len(new_model.label_ids))
+    return new_model
+
+
+def build_and_reload(force: bool = False) -> dict:
+    """Gera o índice (reconstruindo se ``force``) e publica o modelo recarregado."""
+    index_path, labels_path = build_index(force=force)
+    reload_model()
+    return {"index_path": index_path, "labels_path": labels_path}
+
+
+def add_examples(texts: list[str], labels: list[str]) -> list[int]:
+    """Insere exemplos no modelo publicado e retorna os seus ids."""
+    return get_model().add_examples(texts, labels)
+
+
+def remove_examples(ids: list[int]) -> int:
+    """Remove exemplos do modelo publicado pelos seus ids."""
+    return get_model().remove_examples(ids)
+
+
+def compact_index() -> dict:
+    """Compacta o índice do modelo publicado, incorporando o log de alterações."""
+    return get_model().compact()
+
+
+def _predict_coalesced(items: list[tuple[str, int, float, Optional[dict]]]) -> list[dict]:
+    """
+    Handler do micro-batcher: prediz um lote de (text, top_k, threshold, timings);
+    os tempos do lote são copiados para o ``timings`` de cada chamador.
+    """
+    texts, top_ks, thresholds, item_timings = (list(col) for col in zip(*items))
+    timings = {}
+    results = get_model().predict_batch(texts, top_ks, thresholds, timings=timings)
+    for target in item_timings:
+        if target is not None:
+            target.update(timings)
+    return results
+
+
+# Criado sob demanda apenas quando BATCHING_ENABLED está ativo. Em servidores
+# pre-fork a thread do batcher não sobrevive ao fork: cada processo cria o seu.
+_batcher = None
+_batcher_pid = None
+
+
+def _get_batcher() -> MicroBatcher:
+    global _batcher, _batcher_pid  # pylint: disable=global-statement
+    if _batcher is None or _batcher_pid != os.getpid():
+        _batcher_pid = os.getpid()
+        _batcher = MicroBatcher(
+            _predict_coalesced,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
+    return _batcher
+
+
+def predict(
+    text: str,
+    top_k: int = 5,
+    threshold: float = DEFAULT_THRESHOLD,
+    timings: Optional[dict] = None,
+) -> dict:
+    """
+    Executa a predição usando a instância singleton do modelo.
+    Com BATCHING_ENABLED, a chamada é agrupada com outras requisições concorrentes.
+    """
+    if BATCHING_ENABLED:
+        return _get_batcher().run((text, top_k, threshold, timings))
+    return get_model().predict(text, top_k=top_k, threshold=threshold, timings=timings)
+
+
+def cache_stats() -> dict:
+    """Retorna os contadores de cache da instância singleton."""
+    return get_model().cache_stats()
+
+
+def clear_cache():
+    """Invalida os caches da instância singleton."""
+    get_model().clear_cache()
+
+
+def predict_batch(
+    texts: list[str],
+    top_k: Union[int, Sequence[int]] = 5,
+    threshold: Union[float, Sequence[float]] = DEFAULT_THRESHOLD,
+    timings: Optional[dict] = None,
+) -> list[dict]:
+    """Executa a predição em lote usando a instância singleton do modelo."""
+    return get_model().predict_batch(texts, top_k=top_k, threshold=threshold, timings=timings)
+
+
+def _collect_metrics():
+    """Métricas lidas do modelo publicado a cada coleta de /metrics."""
+    model = get_model()
+    caches = {name: stats for name, stats in model.cache_stats().items() if stats}
+    for field, kind, doc in (
+        ("hits", "counter", "Acertos dos caches de predição."),
+        ("misses", "counter", "Faltas dos caches de predição."),
+        ("evictions", "counter", "Entradas descartadas pelos caches de predição."),
+        ("entries", "gauge", "Entradas nos caches de predição."),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        yield (
+            f"intent_cache_{field}{suffix}",
+            kind,
+            doc,
+            [({"cache": name}, stats[field]) for name, stats in caches.items()],
+        )
+
+    yield (
+        "intent_load_seconds",
+        "gauge",
+        "Duração de cada etapa da última carga do modelo e do índice.",
+        [({"stage": stage}, seconds) for stage, seconds in model.load_timings.items()],
+    )
+    yield "intent_model_loaded", "gauge", "1 com modelo e índice carregados.", [({}, int(is_loaded()))]
+    if model.index is not None:
+        yield (
+            "intent_index_vectors", "gauge", "Vetores no índice FAISS.", [({}, model.index.ntotal)]
+        )
+
+    counts = metrics.prediction_counts()
+    total = sum(counts.values())
+    yield (
+        "intent_oos_ratio",
+        "gauge",
+        "Fração das predições respondidas como oos desde o início do processo.",
+        [({}, counts.get(OOS_LABEL, 0.0) / total if total else 0.0)],
+    )
 
 
-def predict(text: str, top_k: int = 5, threshold: float = DEFAULT_THRESHOLD) -> dict:
-    """Executa a predição usando a instância singleton do modelo."""
-    return _intent_model.predict(text, top_k=top_k, threshold=threshold)
+metrics.REGISTRY.add_collector(_collect_metrics)
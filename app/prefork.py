@@ -0,0 +1,96 @@
+"""
+Suporte a servidores pre-fork (gunicorn com ``preload_app``).
+
+O processo master carrega modelo, índice e labels uma única vez e os workers,
+criados por fork, compartilham essas páginas em copy-on-write. O índice FAISS e
+os labels são lidos via memory-map (``INDEX_MMAP``), então também são
+compartilhados pelo page cache. Cada worker recebe uma fatia dos núcleos para
+as threads do torch, do OpenMP (FAISS) e do ONNX Runtime.
+
+Veja ``gunicorn.conf.py`` na raiz do projeto.
+"""
+
+import gc
+import os
+import sys
+import logging
+
+import faiss
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Núcleos reservados para este processo (ajustado em cada worker)
+_cpu_budget = 0
+# Workers do servidor pre-fork (1 fora do gunicorn)
+_workers = 1
+
+
+def cpu_budget() -> int:
+    """Núcleos disponíveis para a inferência neste processo."""
+    return _cpu_budget or os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    """
+    Workers que servem o mesmo modelo. Com mais de um, cada processo tem a sua
+    cópia em memória: recargas e alterações incrementais só valeriam para o
+    worker que atendeu a requisição.
+    """
+    return _workers
+
+
+def threads_per_worker(workers: int, cpus: int = 0) -> int:
+    """Divide os núcleos entre os workers (pelo menos uma thread cada)."""
+    return max(1, (cpus or os.cpu_count() or 1) // max(1, workers))
+
+
+def set_num_threads(n: int, encoder=None):
+    """
+    Limita as threads de inferência do processo: OpenMP do FAISS, pool
+    intra-op do torch (se carregado) e sessão do ONNX Runtime do encoder.
+    """
+    global _cpu_budget  # pylint: disable=global-statement
+    _cpu_budget = n
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(n)
+    faiss.omp_set_num_threads(n)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(n)
+    if hasattr(encoder, "set_num_threads"):
+        encoder.set_num_threads(n)
+
+
+def preload():
+    """
+    Executado no master antes do fork: carrega os recursos e congela os
+    objetos existentes no GC, para que as coletas nos workers não toquem
+    (e copiem) as páginas herdadas.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .model import is_loaded, load_model
+
+    if not is_loaded():
+        load_model()
+    gc.collect()
+    gc.freeze()
+    logger.info("Recursos pré-carregados no master (pid %d).", os.getpid())
+
+
+def init_worker(workers: int, threads: int = 0, preloaded: bool = True):
+    """
+    Executado em cada worker logo após o fork: ajusta as threads à fatia de
+    núcleos do worker e, sem preload, carrega os recursos no próprio worker.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .model import get_model, is_loaded, load_model
+
+    global _workers  # pylint: disable=global-statement
+    _workers = max(1, workers)
+    n = threads or threads_per_worker(workers)
+    if not preloaded and not is_loaded():
+        set_num_threads(n)
+        load_model()
+    set_num_threads(n, encoder=get_model().model)
+    logger.info("Worker %d pronto com %d threads de inferência.", os.getpid(), n)
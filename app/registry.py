@@ -0,0 +1,348 @@
+"""
+Registro de vários pares (encoder, índice) servidos pelo mesmo processo, um
+por tenant, escolhido em cada requisição pelo campo ``tenant``.
+
+Os tenants são declarados em um arquivo JSON (``TENANTS_FILE``)::
+
+    {
+      "loja": {"model_name": "all-MiniLM-L6-v2", "data_dir": "faiss_indices/loja"},
+      "banco": {"model_name": "all-MiniLM-L6-v2", "data_dir": "faiss_indices/banco",
+                "encoder_backend": "onnx-int8"}
+    }
+
+Cada tenant usa os artefatos ``<data_dir>/<model_name>.*`` gerados pelo build.
+Índices são carregados na primeira requisição e descartados, do menos usado
+para o mais usado, quando a memória estimada de índices e encoders passa de
+``REGISTRY_MAX_BYTES``. Encoders são compartilhados entre os tenants com o
+mesmo modelo e backend (inclusive com o modelo padrão) e descartados quando
+nenhum índice carregado os usa.
+
+O tenant ``default`` (ou requisições sem ``tenant``) continua servido pelo
+modelo singleton de ``app.model``, que nunca é descartado.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from . import metrics
+from .config import (
+    DATA_DIR,
+    ENCODER_BACKEND,
+    ENCODER_THREADS,
+    MODEL_NAME,
+    REGISTRY_MAX_BYTES,
+    TENANTS_FILE,
+)
+from .encoders import BACKENDS, default_model_dir, encoder_key, encoder_nbytes, load_encoder
+from .model import IntentModel, get_model, is_loaded
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+TENANT_KEYS = ("model_name", "data_dir", "encoder_backend")
+
+LOOKUPS = metrics.REGISTRY.counter(
+    "intent_registry_lookups_total",
+    "Consultas ao registro de tenants (result=hit com índice já carregado, miss com carga).",
+    ["tenant", "result"],
+)
+LOAD_SECONDS = metrics.REGISTRY.histogram(
+    "intent_registry_load_seconds", "Tempo de carga do índice (e do encoder) de um tenant.", ["tenant"]
+)
+EVICTIONS = metrics.REGISTRY.counter(
+    "intent_registry_evictions_total", "Índices descartados pelo orçamento de memória.", ["tenant"]
+)
+
+
+class UnknownTenant(KeyError):
+    """Tenant não declarado em ``TENANTS_FILE`` (respondido com HTTP 404)."""
+
+
+def load_tenants(path: str) -> dict[str, dict]:
+    """
+    Lê a configuração dos tenants. Campos ausentes usam ``MODEL_NAME``,
+    ``DATA_DIR/<tenant>`` e ``ENCODER_BACKEND``.
+
+    Raises:
+        ValueError: Arquivo com formato inválido.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict):
+        raise ValueError(f"'{path}' deve conter um objeto tenant -> configuração.")
+
+    tenants = {}
+    for name, spec in raw.items():
+        if name == DEFAULT_TENANT:
+            raise ValueError(f"O tenant '{DEFAULT_TENANT}' é reservado ao modelo padrão.")
+        if not isinstance(spec, dict) or set(spec) - set(TENANT_KEYS):
+            raise ValueError(f"Tenant '{name}': use apenas as chaves {', '.join(TENANT_KEYS)}.")
+        tenants[name] = {
+            "model_name": spec.get("model_name", MODEL_NAME),
+            "data_dir": spec.get("data_dir", f"{DATA_DIR}/{name}"),
+            "encoder_backend": spec.get("encoder_backend", ENCODER_BACKEND).lower(),
+        }
+        if tenants[name]["encoder_backend"] not in BACKENDS:
+            raise ValueError(f"Tenant '{name}': backend de encoder inválido.")
+    return tenants
+
+
+class ModelRegistry:
+    """
+    Índices de vários tenants carregados sob demanda, com LRU por memória.
+
+    Args:
+        tenants: Configuração de cada tenant (ver ``load_tenants``).
+        max_bytes: Orçamento de memória estimada de índices e encoders; o
+            índice usado por último é mantido mesmo que sozinho o ultrapasse.
+        encoder_loader: Função ``(model_dir, backend, num_threads)`` que
+            carrega um encoder (``load_encoder`` por padrão).
+    """
+
+    def __init__(
+        self,
+        tenants: dict[str, dict],
+        max_bytes: int = REGISTRY_MAX_BYTES,
+        encoder_loader: Callable = load_encoder,
+    ):
+        self.tenants = tenants
+        self.max_bytes = max_bytes
+        self.encoder_loader = encoder_loader
+        # tenant -> {"model", "bytes", "encoder_key", "loaded_at", "hits"}
+        self._models: "OrderedDict[str, dict]" = OrderedDict()
+        # chave do encoder -> {"encoder", "bytes", "tenants", "pending"}
+        self._encoders: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant: str) -> IntentModel:
+        """
+        Retorna o modelo do tenant, carregando-o (e descartando outros, se
+        preciso) na primeira vez.
+
+        Raises:
+            UnknownTenant: Tenant não declarado.
+        """
+        if tenant == DEFAULT_TENANT:
+            return get_model()
+        spec = self.tenants.get(tenant)
+        if spec is None:
+            raise UnknownTenant(tenant)
+
+        model = self._lookup(tenant)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(tenant, threading.Lock())
+        # Uma carga por tenant por vez; outros tenants seguem carregando em paralelo
+        with load_lock:
+            model = self._lookup(tenant)
+            if model is not None:
+                return model
+            LOOKUPS.labels(tenant, "miss").inc()
+            return self._load(tenant, spec)
+
+    def _lookup(self, tenant: str) -> Optional[IntentModel]:
+        with self._lock:
+            entry = self._models.get(tenant)
+            if entry is None:
+                return None
+            self._models.move_to_end(tenant)
+            entry["hits"] += 1
+        LOOKUPS.labels(tenant, "hit").inc()
+        return entry["model"]
+
+    def _load(self, tenant: str, spec: dict) -> IntentModel:
+        start = time.perf_counter()
+        key = encoder_key(spec["model_name"], spec["encoder_backend"])
+        encoder, tracked = self._acquire_encoder(key, spec)
+
+        model = IntentModel(spec["model_name"], spec["data_dir"])
+        model.encoder_backend = spec["encoder_backend"]
+        try:
+            model.load(encoder=encoder, build_missing=False)
+        except Exception:
+            if tracked:
+                self._release_encoder(key, tenant=None)
+            raise
+
+        elapsed = time.perf_counter() - start
+        LOAD_SECONDS.labels(tenant).observe(elapsed)
+        nbytes = model.memory_bytes()
+        with self._lock:
+            self._models[tenant] = {
+                "model": model,
+                "bytes": nbytes,
+                "encoder_key": key if tracked else None,
+                "loaded_at": time.time(),
+                "hits": 0,
+            }
+            if tracked:
+                self._encoders[key]["tenants"].add(tenant)
+                self._encoders[key]["pending"] -= 1
+            self.loads += 1
+            evicted = self._evict()
+        logger.info(
+            "Tenant '%s' carregado em %.2fs (%d bytes; descartados: %s).",
+            tenant,
+            elapsed,
+            nbytes,
+            ", ".join(evicted) or "nenhum",
+        )
+        return model
+
+    def _acquire_encoder(self, key: str, spec: dict) -> tuple[object, bool]:
+        """
+        Encoder compartilhado do par modelo/backend, carregado se ainda não
+        estiver. Retorna (encoder, se ele é mantido pelo registro); o encoder do
+        modelo padrão é reaproveitado sem entrar na conta de memória.
+        """
+        default = get_model()
+        if is_loaded() and encoder_key(default.model_name, default.encoder_backend) == key:
+            return default.model, False
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(f"encoder:{key}", threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._encoders.get(key)
+                if entry is not None:
+                    entry["pending"] += 1
+                    return entry["encoder"], True
+            model_dir = default_model_dir(spec["model_name"])
+            encoder = self.encoder_loader(model_dir, spec["encoder_backend"], ENCODER_THREADS)
+            with self._lock:
+                self._encoders[key] = {
+                    "encoder": encoder,
+                    "bytes": encoder_nbytes(model_dir, spec["encoder_backend"]),
+                    "tenants": set(),
+                    # Cargas de tenant em andamento que já seguram este encoder
+                    "pending": 1,
+                }
+            return encoder, True
+
+    def _release_encoder(self, key: Optional[str], tenant: Optional[str]):
+        with self._lock:
+            entry = self._encoders.get(key) if key is not None else None
+            if entry is None:
+                return
+            if tenant is None:
+                entry["pending"] -= 1
+            else:
+                entry["tenants"].discard(tenant)
+            if not entry["tenants"] and entry["pending"] <= 0:
+                del self._encoders[key]
+
+    def _used_bytes(self) -> int:
+        return sum(e["bytes"] for e in self._models.values()) + sum(
+            e["bytes"] for e in self._encoders.values()
+        )
+
+    def _evict(self) -> list[str]:
+        """Descarta os índices menos usados até caber no orçamento (com ``_lock``)."""
+        evicted = []
+        while len(self._models) > 1 and self._used_bytes() > self.max_bytes:
+            tenant, entry = self._models.popitem(last=False)
+            encoder = self._encoders.get(entry["encoder_key"])
+            if encoder is not None:
+                encoder["tenants"].discard(tenant)
+                if not encoder["tenants"] and encoder["pending"] <= 0:
+                    del self._encoders[entry["encoder_key"]]
+            self.evictions += 1
+            EVICTIONS.labels(tenant).inc()
+            evicted.append(tenant)
+        return evicted
+
+    def evict(self, tenant: str) -> bool:
+        """Descarta o índice de um tenant; retorna False se ele não estava carregado."""
+        with self._lock:
+            entry = self._models.pop(tenant, None)
+        if entry is None:
+            return False
+        self._release_encoder(entry["encoder_key"], tenant)
+        return True
+
+    def stats(self) -> dict:
+        """Memória usada, tenants carregados e encoders compartilhados."""
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "bytes": self._used_bytes(),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "tenants": {
+                    name: {
+                        "loaded": name in self._models,
+                        "bytes": self._models[name]["bytes"] if name in self._models else 0,
+                        "hits": self._models[name]["hits"] if name in self._models else 0,
+                        **spec,
+                    }
+                    for name, spec in self.tenants.items()
+                },
+                "encoders": {
+                    key: {"bytes": entry["bytes"], "tenants": sorted(entry["tenants"])}
+                    for key, entry in self._encoders.items()
+                },
+            }
+
+    def collect_metrics(self):
+        """Ocupação do registro, lida a cada coleta de /metrics."""
+        stats = self.stats()
+        yield "intent_registry_bytes", "gauge", "Memória estimada de índices e encoders.", [
+            ({}, stats["bytes"])
+        ]
+        yield "intent_registry_max_bytes", "gauge", "Orçamento de memória do registro.", [
+            ({}, stats["max_bytes"])
+        ]
+        yield "intent_registry_loaded", "gauge", "1 para tenants com índice carregado.", [
+            ({"tenant": name}, int(info["loaded"])) for name, info in stats["tenants"].items()
+        ]
+        yield "intent_registry_encoders", "gauge", "Encoders carregados pelo registro.", [
+            ({}, len(stats["encoders"]))
+        ]
+
+
+# Criado na primeira requisição com ``tenant``, a partir de TENANTS_FILE
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Registro do processo (vazio se ``TENANTS_FILE`` não estiver definido)."""
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ModelRegistry(load_tenants(TENANTS_FILE) if TENANTS_FILE else {})
+                metrics.REGISTRY.add_collector(registry.collect_metrics)
+                _registry = registry
+    return _registry
+
+
+def set_registry(registry: ModelRegistry) -> Optional[ModelRegistry]:
+    """Substitui o registro do processo (ex.: em testes) e retorna o anterior."""
+    global _registry  # pylint: disable=global-statement
+    with _registry_lock:
+        old, _registry = _registry, registry
+    return old
+
+
+def predict(
+    tenant: str, text: str, top_k: int, threshold: float, timings: Optional[dict] = None
+) -> dict:
+    """Prediz com o modelo do tenant (carregado sob demanda)."""
+    return get_registry().get(tenant).predict(text, top_k, threshold, timings=timings)
+
+
+def predict_batch(
+    tenant: str, texts: list[str], top_k, threshold, timings: Optional[dict] = None
+) -> list[dict]:
+    """Predição em lote com o modelo do tenant (carregado sob demanda)."""
+    return get_registry().get(tenant).predict_batch(texts, top_k, threshold, timings=timings)
@@ -0,0 +1,144 @@
+"""
+Re-ranking exato dos candidatos de índices comprimidos.
+
+Índices com vetores comprimidos (``HNSW32,SQ8``, ``IVF4096,PQ48``, ``LSHrt``...)
+ocupam uma fração da memória do ``HNSW32,Flat``, mas as similaridades que
+devolvem são aproximadas. Com o re-ranking, a busca traz ``oversample`` vezes
+mais candidatos e as similaridades deles são recalculadas contra os vetores
+float32 exatos, guardados por id em ``<MODEL_NAME>_vectors.npy`` e lidos via
+memory-map: só as páginas dos candidatos vão para a memória.
+"""
+
+import os
+from typing import Optional
+
+import faiss
+import numpy as np
+
+
+def vectors_path(data_dir: str, model_name: str) -> str:
+    """Caminho do arquivo de vetores exatos de um modelo."""
+    return os.path.join(data_dir, f"{model_name}_vectors.npy")
+
+
+def needs_rerank(index: faiss.Index) -> bool:
+    """Índices que não devolvem produto interno (ex.: LSH, distância de Hamming)."""
+    return index.metric_type != faiss.METRIC_INNER_PRODUCT
+
+
+class VectorFileWriter:
+    """
+    Grava um ``.npy`` float32 em streaming, bloco a bloco, sem conhecer o
+    número de linhas de antemão: o cabeçalho é regravado no ``close`` com o
+    total (o numpy reserva espaço para o eixo 0 crescer sem mudar o tamanho).
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._header_size = self._write_header()
+
+    def _write_header(self) -> int:
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(
+            self._file,
+            {"descr": "<f4", "fortran_order": False, "shape": (self.rows, self.dim)},
+        )
+        return self._file.tell()
+
+    def write(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Esperado shape (n, {self.dim}), recebido {vectors.shape}.")
+        self._file.write(vectors.tobytes())
+        self.rows += len(vectors)
+
+    def close(self) -> int:
+        """Fecha o arquivo com o cabeçalho final e retorna o número de linhas."""
+        if self._write_header() != self._header_size:
+            raise RuntimeError("Cabeçalho do .npy mudou de tamanho ao regravar.")
+        self._file.close()
+        return self.rows
+
+    def abort(self):
+        """Fecha e remove o arquivo incompleto."""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ExactVectors:
+    """
+    Vetores exatos por id: o arquivo mapeado em memória, mais as linhas
+    inseridas depois da carga (atualizações incrementais), em memória.
+
+    Args:
+        base (np.ndarray): Matriz (n, dim) float32, em geral um memmap.
+    """
+
+    def __init__(self, base: np.ndarray):
+        self.base = base
+        self.extra: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, path: str) -> "ExactVectors":
+        return cls(np.load(path, mmap_mode="r"))
+
+    @property
+    def dim(self) -> int:
+        return self.base.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.base) + (0 if self.extra is None else len(self.extra))
+
+    def append(self, vectors: np.ndarray):
+        """Acrescenta linhas (ids seguintes); a matriz nova é publicada em uma atribuição."""
+        vectors = np.asarray(vectors, dtype="float32")
+        self.extra = vectors.copy() if self.extra is None else np.concatenate([self.extra, vectors])
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        """Vetores dos ids, com shape ``ids.shape + (dim,)``; ids negativos viram o vetor 0."""
+        flat = np.asarray(ids, dtype=np.int64).ravel()
+        rows = np.zeros((len(flat), self.dim), dtype="float32")
+        n_base = len(self.base)
+        in_base = (flat >= 0) & (flat < n_base)
+        rows[in_base] = self.base[flat[in_base]]
+        if self.extra is not None:
+            in_extra = flat >= n_base
+            rows[in_extra] = self.extra[flat[in_extra] - n_base]
+        return rows.reshape(*np.shape(ids), self.dim)
+
+    def save(self, path: str):
+        """Grava todas as linhas em ``path`` (arquivo temporário + ``os.replace``)."""
+        tmp_path = f"{path}.tmp"
+        writer = VectorFileWriter(tmp_path, self.dim)
+        try:
+            for start in range(0, len(self.base), 65536):
+                writer.write(self.base[start : start + 65536])
+            if self.extra is not None:
+                writer.write(self.extra)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        os.replace(tmp_path, path)
+
+
+def rerank(
+    emb: np.ndarray, ids: np.ndarray, vectors: ExactVectors, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reordena os candidatos ``ids`` (n, m) de cada consulta pela similaridade
+    exata com ``emb`` (n, dim) e mantém os ``k`` melhores. Candidatos
+    inexistentes (id -1) ficam no fim, com similaridade ``-inf``.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: ``(sims, ids)``, shape (n, min(k, m)).
+    """
+    cand = vectors.take(ids)
+    sims = np.matmul(cand, emb[:, :, None])[:, :, 0]
+    sims = np.where(ids >= 0, sims, -np.inf).astype("float32")
+    order = np.argsort(-sims, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(sims, order, axis=1), np.take_along_axis(ids, order, axis=1)
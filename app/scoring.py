@@ -0,0 +1,332 @@
+"""
+Pontuação vetorizada dos vizinhos do kNN e probabilidade OOS calibrada.
+
+Cada consulta tem ``k`` vizinhos (intenção e similaridade). As estratégias dão
+um peso a cada vizinho e somam os pesos por intenção, sobre arrays (n, k):
+
+- ``majority``: peso 1 (contagem); empates decididos pela similaridade média;
+- ``weighted``: peso igual à similaridade (as negativas não contam);
+- ``softmax``: peso ``exp(sim / temperature)``, que concentra o voto nos
+  vizinhos mais próximos quanto menor a temperatura.
+
+A confiança de uma intenção é a fração do peso total que ela recebeu. A
+probabilidade OOS vem de uma regressão logística sobre a similaridade do
+vizinho mais próximo, a confiança da vencedora e a margem para o segundo
+vizinho, ajustada offline por ``flask calibrate`` e salva em
+``<MODEL_NAME>_calibration.json``.
+"""
+
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+STRATEGIES = ("majority", "weighted", "softmax")
+
+# Atributos da regressão logística da probabilidade OOS, nesta ordem
+FEATURES = ("top1", "confidence", "margin")
+
+
+def calibration_path(data_dir: str, model_name: str) -> str:
+    """Caminho do arquivo de calibração de um modelo."""
+    return os.path.join(data_dir, f"{model_name}_calibration.json")
+
+
+def _weights(sims: np.ndarray, valid: np.ndarray, strategy: str, temperature: float) -> np.ndarray:
+    if strategy == "majority":
+        weights = np.ones_like(sims)
+    elif strategy == "weighted":
+        # Piso pequeno para que vizinhos com similaridade <= 0 ainda desempatem
+        weights = np.maximum(sims, 0.0) + 1e-6
+    elif strategy == "softmax":
+        if temperature <= 0:
+            raise ValueError(f"temperature deve ser positiva, recebido {temperature}.")
+        top = np.where(valid, sims, -np.inf).max(axis=1, keepdims=True)
+        weights = np.exp((sims - np.where(np.isfinite(top), top, 0.0)) / temperature)
+    else:
+        raise ValueError(f"Estratégia de voto desconhecida: {strategy!r} (use {STRATEGIES}).")
+    return np.where(valid, weights, 0.0)
+
+
+def score_neighbors(
+    cand: np.ndarray,
+    sims: np.ndarray,
+    valid: np.ndarray,
+    strategy: str = "majority",
+    temperature: float = 0.05,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Voto dos vizinhos de ``n`` consultas.
+
+    Args:
+        cand (np.ndarray): ids de intenção dos vizinhos, shape (n, k).
+        sims (np.ndarray): similaridades dos vizinhos, shape (n, k), em ordem decrescente.
+        valid (np.ndarray): máscara booleana (n, k) dos vizinhos que participam do voto.
+        strategy (str): ``majority``, ``weighted`` ou ``softmax``.
+        temperature (float): Temperatura do ``softmax``.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: coluna do vizinho cuja intenção vence
+        (n,) e a confiança da intenção de cada coluna (n, k), 0 nas inválidas.
+        Empatando o peso, vence a intenção que aparece primeiro entre os vizinhos.
+    """
+    n, k = cand.shape
+    if k == 0:
+        return np.zeros(n, dtype=np.int64), np.zeros((n, 0), dtype="float32")
+
+    weights = _weights(sims, valid, strategy, temperature)
+    # group[i, j]: grupo (linha, intenção) do vizinho j, em O(n·k): ordena cada
+    # linha pela intenção e numera as trocas de intenção na matriz achatada
+    order = np.argsort(cand, axis=1, kind="stable")
+    ordered = np.take_along_axis(cand, order, axis=1)
+    starts = np.ones((n, k), dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    group = np.empty((n, k), dtype=np.int64)
+    np.put_along_axis(group, order, np.cumsum(starts).reshape(n, k) - 1, axis=1)
+
+    def per_group(values):
+        # Soma dos vizinhos válidos de cada grupo, repetida em cada vizinho
+        return np.bincount(group.ravel(), np.where(valid, values, 0.0).ravel())[group]
+
+    totals = per_group(weights)
+    shares = np.where(valid, totals / np.maximum(weights.sum(axis=1, keepdims=True), 1e-12), 0.0)
+
+    keys = np.where(valid, totals, -1.0)
+    if strategy == "majority":
+        # Empates na contagem são decididos pela média de similaridade
+        means = per_group(sims) / np.maximum(totals, 1)
+        tied = keys == keys.max(axis=1, keepdims=True)
+        best = np.where(tied, means, -np.inf).argmax(axis=1)
+    else:
+        best = keys.argmax(axis=1)
+    return best, shares.astype("float32")
+
+
+def oos_features(sims: np.ndarray, valid: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """Matriz (n, 3) com ``FEATURES``: similaridade do 1º vizinho, confiança e margem."""
+    top1 = np.where(valid[:, 0], sims[:, 0], 0.0) if sims.shape[1] else np.zeros(len(sims))
+    if sims.shape[1] > 1:
+        margin = np.where(valid[:, 1], sims[:, 0] - sims[:, 1], top1)
+    else:
+        margin = top1
+    return np.stack([top1, confidence, margin], axis=1).astype("float64")
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def fit_logistic(
+    x: np.ndarray, y: np.ndarray, l2: float = 1e-3, iterations: int = 50
+) -> tuple[np.ndarray, float]:
+    """
+    Regressão logística por Newton-Raphson (IRLS) com regularização L2 nos
+    coeficientes. Os atributos são padronizados internamente.
+
+    Returns:
+        tuple[np.ndarray, float]: coeficientes e intercepto na escala original.
+    """
+    mean, std = x.mean(axis=0), x.std(axis=0)
+    std = np.where(std > 0, std, 1.0)
+    z = np.hstack([(x - mean) / std, np.ones((len(x), 1))])
+    w = np.zeros(z.shape[1])
+    reg = np.full(z.shape[1], l2 * len(x))
+    reg[-1] = 0.0
+    for _ in range(iterations):
+        p = _sigmoid(z @ w)
+        grad = z.T @ (p - y) + reg * w
+        hess = (z * (p * (1 - p))[:, None]).T @ z + np.diag(reg) + 1e-9 * np.eye(len(w))
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    coef = w[:-1] / std
+    return coef, float(w[-1] - (coef * mean).sum())
+
+
+class Calibration:
+    """
+    Estratégia de voto e probabilidade OOS ajustadas offline.
+
+    Args:
+        strategy (str): Estratégia de voto usada no ajuste.
+        temperature (float): Temperatura do ``softmax``.
+        top_k (int): Número de vizinhos usado no ajuste.
+        coef (list[float]): Coeficientes da regressão logística (``FEATURES``).
+        intercept (float): Intercepto da regressão logística.
+        cutoff (float): Probabilidade OOS a partir da qual a consulta é OOS.
+        metrics (dict): Acurácias medidas no ajuste (informativo).
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        temperature: float,
+        top_k: int,
+        coef,
+        intercept: float,
+        cutoff: float,
+        metrics: Optional[dict] = None,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de voto desconhecida: {strategy!r} (use {STRATEGIES}).")
+        self.strategy = strategy
+        self.temperature = float(temperature)
+        self.top_k = int(top_k)
+        self.coef = np.asarray(coef, dtype="float64")
+        self.intercept = float(intercept)
+        self.cutoff = float(cutoff)
+        self.metrics = metrics or {}
+
+    def oos_probability(self, features: np.ndarray) -> np.ndarray:
+        """Probabilidade OOS de cada linha de ``oos_features``."""
+        return _sigmoid(features @ self.coef + self.intercept)
+
+    def to_dict(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "temperature": self.temperature,
+            "top_k": self.top_k,
+            "features": list(FEATURES),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+            "cutoff": self.cutoff,
+            "metrics": self.metrics,
+        }
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Calibration":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if tuple(data.get("features", ())) != FEATURES:
+            raise ValueError(f"'{path}': atributos {data.get('features')} diferentes de {FEATURES}.")
+        return cls(
+            data["strategy"], data["temperature"], data["top_k"], data["coef"],
+            data["intercept"], data["cutoff"], data.get("metrics"),
+        )
+
+
+def best_cutoff(scores: np.ndarray, correct_in: np.ndarray, is_oos: np.ndarray) -> tuple[float, float]:
+    """
+    Corte em ``scores`` (maior = mais OOS) que maximiza a acurácia: acima do
+    corte a consulta vira OOS (acerta se ``is_oos``); abaixo, vale a intenção
+    prevista (acerta se ``correct_in``).
+
+    Returns:
+        tuple[float, float]: (corte, acurácia).
+    """
+    order = np.argsort(scores, kind="stable")
+    s = np.asarray(scores, dtype="float64")[order]
+    # Com o corte logo acima da posição i, as linhas [0, i] ficam com a intenção
+    kept = np.concatenate([[0], np.cumsum(correct_in[order])])
+    rejected = np.concatenate([np.cumsum(is_oos[order][::-1])[::-1], [0]])
+    accuracy = (kept + rejected) / len(scores)
+    # Só posições entre valores distintos são cortes realizáveis
+    cuts = np.concatenate([[s[0] - 1e-6], (s[:-1] + s[1:]) / 2, [s[-1] + 1e-6]])
+    distinct = np.concatenate([[True], s[1:] > s[:-1], [True]])
+    best = int(np.where(distinct, accuracy, -1).argmax())
+    return float(cuts[best]), float(accuracy[best])
+
+
+def _evaluate(
+    cand: np.ndarray,
+    sims: np.ndarray,
+    valid: np.ndarray,
+    truth: np.ndarray,
+    strategy: str,
+    temperature: float,
+    top_k: int,
+) -> tuple[dict, Calibration]:
+    """Acurácias de uma configuração: limiar na similaridade vs probabilidade calibrada."""
+    cand, sims = cand[:, :top_k], sims[:, :top_k]
+    valid = valid[:, :top_k]
+    best, shares = score_neighbors(cand, sims, valid, strategy, temperature)
+    rows = np.arange(len(cand))
+    confidence = shares[rows, best]
+    correct_in = (cand[rows, best] == truth) & valid[:, 0] & (truth >= 0)
+    is_oos = truth < 0
+
+    # Referência: só o limiar na similaridade do vizinho mais próximo
+    top1 = np.where(valid[:, 0], sims[:, 0], -1.0)
+    cut, threshold_accuracy = best_cutoff(-top1, correct_in, is_oos)
+
+    # Calibrada: ajusta nas linhas pares e mede nas ímpares; depois, ajuste final com todas
+    x = oos_features(sims, valid, confidence)
+    fit, held = rows % 2 == 0, rows % 2 == 1
+    coef, intercept = fit_logistic(x[fit], is_oos[fit].astype("float64"))
+    probe = Calibration(strategy, temperature, top_k, coef, intercept, 0.5)
+    p_fit = probe.oos_probability(x[fit])
+    holdout_cutoff, _ = best_cutoff(p_fit, correct_in[fit], is_oos[fit])
+    p_held = probe.oos_probability(x[held])
+    holdout = np.where(p_held >= holdout_cutoff, is_oos[held], correct_in[held]).mean()
+
+    coef, intercept = fit_logistic(x, is_oos.astype("float64"))
+    calibration = Calibration(strategy, temperature, top_k, coef, intercept, 0.5)
+    cutoff, accuracy = best_cutoff(calibration.oos_probability(x), correct_in, is_oos)
+    calibration.cutoff = cutoff
+    row = {
+        "strategy": strategy,
+        "temperature": temperature if strategy == "softmax" else None,
+        "top_k": top_k,
+        "threshold": -cut,
+        "threshold_accuracy": threshold_accuracy,
+        "calibrated_accuracy": accuracy,
+        "holdout_accuracy": float(holdout),
+        "cutoff": cutoff,
+    }
+    calibration.metrics = {k: row[k] for k in ("threshold_accuracy", "calibrated_accuracy",
+                                               "holdout_accuracy", "threshold")}
+    return row, calibration
+
+
+def fit_calibration(
+    cand: np.ndarray,
+    sims: np.ndarray,
+    valid: np.ndarray,
+    truth: np.ndarray,
+    strategies=STRATEGIES,
+    top_ks=(1, 3, 5, 10),
+    temperatures=(0.02, 0.05, 0.1),
+    tolerance: float = 0.002,
+) -> tuple[Calibration, list[dict]]:
+    """
+    Avalia cada combinação de estratégia, temperatura (só ``softmax``) e
+    ``top_k`` sobre os vizinhos de um split rotulado e escolhe a calibração.
+
+    Args:
+        cand (np.ndarray): ids de intenção dos vizinhos, shape (n, max(top_ks)).
+        sims (np.ndarray): similaridades dos vizinhos, mesmo shape.
+        valid (np.ndarray): máscara dos vizinhos encontrados, mesmo shape.
+        truth (np.ndarray): id da intenção correta de cada consulta, -1 para OOS.
+        tolerance (float): Diferença de acurácia (holdout) tolerada para
+            preferir um ``top_k`` menor.
+
+    Returns:
+        tuple[Calibration, list[dict]]: a calibração escolhida (ajustada com
+        todas as consultas) e uma linha de métricas por combinação.
+    """
+    if not (truth < 0).any() or (truth < 0).all():
+        raise ValueError("A calibração exige consultas OOS e consultas de intenções conhecidas.")
+    if max(top_ks) > cand.shape[1]:
+        raise ValueError(f"top_k {max(top_ks)} maior que os {cand.shape[1]} vizinhos buscados.")
+
+    rows, fitted = [], []
+    for strategy in strategies:
+        for temperature in temperatures if strategy == "softmax" else temperatures[:1]:
+            for top_k in sorted(top_ks):
+                row, calibration = _evaluate(cand, sims, valid, truth, strategy, temperature, top_k)
+                rows.append(row)
+                fitted.append(calibration)
+
+    best = max(r["holdout_accuracy"] for r in rows)
+    eligible = [i for i, r in enumerate(rows) if r["holdout_accuracy"] >= best - tolerance]
+    chosen = min(eligible, key=lambda i: (rows[i]["top_k"], -rows[i]["holdout_accuracy"]))
+    rows[chosen]["chosen"] = True
+    return fitted[chosen], rows
@@ -0,0 +1,124 @@
+"""
+Cache semântico de consultas quase duplicadas.
+
+Guarda, para as consultas respondidas recentemente, o embedding normalizado e
+os vizinhos (ids e similaridades) devolvidos pela busca no índice principal.
+Uma consulta nova cujo embedding tem similaridade de cosseno de pelo menos
+``threshold`` com uma consulta guardada reaproveita esses vizinhos e pula a
+busca (ex.: "whats my balance" e "what is my balance"). O voto é refeito sobre
+os vizinhos reaproveitados, pois ``top_k`` e o limiar OOS variam por requisição.
+
+Os embeddings ficam em uma matriz de ``max_entries`` slots pré-alocada: a busca
+é um produto interno exato contra todos os slots (como um ``IndexFlatIP``),
+e um slot descartado é sobrescrito no lugar, sem reconstruir índice algum.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+POLICIES = ("lru", "fifo")
+
+
+class SemanticCache:
+    """
+    Cache limitado de vizinhos por similaridade de embedding.
+
+    Args:
+        dim (int): Dimensão dos embeddings (normalizados).
+        threshold (float): Similaridade mínima (0 < threshold <= 1) para um acerto.
+        max_entries (int): Número de consultas guardadas.
+        policy (str): ``lru`` (descarta a menos usada) ou ``fifo`` (a mais antiga).
+    """
+
+    def __init__(self, dim: int, threshold: float, max_entries: int = 4096, policy: str = "lru"):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold do cache semântico deve estar em (0, 1], recebido {threshold}.")
+        if policy not in POLICIES:
+            raise ValueError(f"Política de descarte desconhecida: {policy!r} (use {POLICIES}).")
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.policy = policy
+        # Slots vazios têm vetor zero: similaridade 0, abaixo de qualquer threshold
+        self._vectors = np.zeros((self.max_entries, dim), dtype="float32")
+        self._neighbors: list = [None] * self.max_entries
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória da matriz de embeddings pré-alocada (os vizinhos são pequenos)."""
+        return self._vectors.nbytes
+
+    def lookup(self, emb: np.ndarray, top_ks: np.ndarray) -> list:
+        """
+        Vizinhos guardados para cada linha de ``emb``: ``(sims, ids)`` da
+        consulta guardada mais parecida, ou ``None`` (miss) se a similaridade
+        fica abaixo do threshold ou se ela guardou menos de ``top_k`` vizinhos.
+        """
+        with self._lock:
+            if not self._order:
+                self.misses += len(emb)
+                return [None] * len(emb)
+            # Os slots ocupados são sempre os primeiros len(self._order)
+            scores = emb @ self._vectors[: len(self._order)].T
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(emb)), best]
+            out = []
+            for slot, score, k in zip(best.tolist(), best_scores.tolist(), top_ks.tolist()):
+                entry = self._neighbors[slot] if score >= self.threshold else None
+                if entry is None or entry[0].shape[0] < k:
+                    self.misses += 1
+                    out.append(None)
+                    continue
+                self.hits += 1
+                if self.policy == "lru":
+                    self._order.move_to_end(slot)
+                out.append(entry)
+            return out
+
+    def put(self, emb: np.ndarray, sims: np.ndarray, ids: np.ndarray):
+        """Guarda os vizinhos ``(sims, ids)`` de cada linha de ``emb``."""
+        with self._lock:
+            for vector, row_sims, row_ids in zip(emb, sims, ids):
+                if len(self._order) < self.max_entries:
+                    slot = len(self._order)
+                else:
+                    slot, _ = self._order.popitem(last=False)
+                    self.evictions += 1
+                self._vectors[slot] = vector
+                self._neighbors[slot] = (row_sims.copy(), row_ids.copy())
+                self._order[slot] = None
+
+    def clear(self):
+        """Remove todas as entradas (após alterar ou recarregar o índice)."""
+        with self._lock:
+            self._vectors[:] = 0
+            self._neighbors = [None] * self.max_entries
+            self._order.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Contadores de uso e ocupação, nos mesmos campos de ``LRUCache.stats``."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._order),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "policy": self.policy,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,211 @@
+"""
+Benchmark de tipos de índice FAISS: recall@k contra a busca exata,
+QPS, latência, tempo de construção e memória de cada candidato.
+
+Com ``rerank_oversample``, cada candidato comprimido (SQ8, PQ, LSH) é medido
+também com o re-ranking exato de ``app.rerank``: os vetores float32 vão para
+um ``.npy`` temporário lido via memory-map, como em produção.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import faiss
+
+from .builder import make_index, train_index
+from .config import INDEX_EF_CONSTRUCTION
+from .rerank import ExactVectors, VectorFileWriter, rerank
+
+logger = logging.getLogger(__name__)
+
+# Candidatos padrão no formato "factory|parâmetros de busca"
+DEFAULT_CANDIDATES = [
+    "Flat",
+    "HNSW32,Flat|efSearch=64",
+    "HNSW32,Flat|efSearch=128",
+    "HNSW32,SQ8|efSearch=128",
+    "IVF256,Flat|nprobe=16",
+    "IVF256,PQ48|nprobe=16",
+    "LSHrt",
+]
+
+# Referência das colunas de memória relativa (o índice padrão do builder)
+BASELINE_FACTORY = "HNSW32,Flat"
+
+
+def parse_candidate(spec: str) -> tuple[str, str]:
+    """Separa ``"factory|params"`` em (factory, params)."""
+    factory, _, params = spec.partition("|")
+    return factory.strip(), params.strip()
+
+
+def recall_at_k(ids: np.ndarray, truth: np.ndarray) -> float:
+    """Fração média dos k vizinhos exatos recuperados por consulta."""
+    k = truth.shape[1]
+    hits = sum(len(set(row[row >= 0]) & set(ref)) for row, ref in zip(ids, truth))
+    return hits / float(truth.shape[0] * k)
+
+
+def is_compressed(factory: str) -> bool:
+    """Se o índice guarda os vetores com perda (tudo que não termina em ``Flat``)."""
+    return factory.split(",")[-1].strip() != "Flat"
+
+
+def _rss_mb() -> float:
+    """Memória residente atual do processo, em MB (0 fora do Linux)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _search(index: faiss.Index, queries: np.ndarray, k: int, exact, oversample: int) -> np.ndarray:
+    """Ids dos k vizinhos; com ``exact``, busca ``k * oversample`` e re-ranqueia."""
+    if exact is None:
+        return index.search(queries, k)[1]
+    _, ids = index.search(queries, k * oversample)
+    return rerank(queries, ids, exact, k)[1]
+
+
+def _latencies(
+    index: faiss.Index, queries: np.ndarray, k: int, exact=None, oversample: int = 1
+) -> np.ndarray:
+    """Latência (ms) de consultas individuais, como no caminho de /predict."""
+    out = np.empty(len(queries))
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _search(index, queries[i : i + 1], k, exact, oversample)
+        out[i] = (time.perf_counter() - start) * 1000.0
+    return out
+
+
+def benchmark_candidate(
+    spec: str,
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int = 5,
+    latency_queries: int = 500,
+    ef_construction: int = INDEX_EF_CONSTRUCTION,
+    rerank_oversample: int = 0,
+) -> dict:
+    """
+    Constrói um candidato e mede recall@k, QPS, latências, build e memória.
+    Com ``rerank_oversample`` > 0, as buscas trazem ``k * rerank_oversample``
+    candidatos, re-ranqueados contra os vetores exatos mapeados em memória.
+
+    ``memory_mb`` é o tamanho do índice serializado, ``vectors_mb`` o do
+    arquivo de vetores exatos (em disco) e ``rss_mb`` o crescimento da memória
+    residente do processo com o índice construído e as consultas feitas.
+    """
+    factory, params = parse_candidate(spec)
+    rss_before = _rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index = make_index(embeddings.shape[1], factory, ef_construction, params)
+        train_index(index, embeddings)
+        index.add(embeddings)
+        exact, vectors_mb = None, 0.0
+        if rerank_oversample:
+            path = os.path.join(tmp, "vectors.npy")
+            writer = VectorFileWriter(path, embeddings.shape[1])
+            writer.write(embeddings)
+            writer.close()
+            exact = ExactVectors.load(path)
+            vectors_mb = os.path.getsize(path) / 2**20
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ids = _search(index, queries, k, exact, rerank_oversample)
+        qps = len(queries) / (time.perf_counter() - start)
+
+        lat = _latencies(index, queries[:latency_queries], k, exact, rerank_oversample)
+        rss_mb = _rss_mb() - rss_before
+        del exact  # libera o memmap antes de apagar o diretório
+    return {
+        "candidate": spec,
+        "rerank": rerank_oversample,
+        "recall": recall_at_k(ids, truth),
+        "qps": qps,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "build_s": build_s,
+        "memory_mb": faiss.serialize_index(index).nbytes / 2**20,
+        "vectors_mb": vectors_mb,
+        "rss_mb": max(0.0, rss_mb),
+    }
+
+
+def benchmark_indexes(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    candidates: Optional[list[str]] = None,
+    k: int = 5,
+    latency_queries: int = 500,
+    rerank_oversample: int = 0,
+) -> list[dict]:
+    """
+    Avalia cada candidato contra a busca exata (``IndexFlatIP``).
+    Candidatos que falham ao construir (ex.: poucos vetores para o IVF) são
+    reportados com o campo ``error``. Com ``rerank_oversample``, os candidatos
+    comprimidos ganham uma segunda linha com o re-ranking exato. Se algum
+    candidato usa ``BASELINE_FACTORY``, cada linha traz ``memory_ratio``: o
+    tamanho do índice relativo ao dele.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)
+    _, truth = exact.search(queries, k)
+
+    runs = []
+    for spec in candidates or DEFAULT_CANDIDATES:
+        runs.append((spec, 0))
+        if rerank_oversample and is_compressed(parse_candidate(spec)[0]):
+            runs.append((spec, rerank_oversample))
+
+    rows = []
+    for spec, oversample in runs:
+        logger.info("Avaliando índice '%s'%s...", spec, " com re-ranking" if oversample else "")
+        try:
+            rows.append(
+                benchmark_candidate(
+                    spec, embeddings, queries, truth, k, latency_queries,
+                    rerank_oversample=oversample,
+                )
+            )
+        except RuntimeError as e:
+            logger.warning("Falha ao avaliar '%s': %s", spec, e)
+            rows.append({"candidate": spec, "rerank": oversample, "error": str(e)})
+
+    baseline = next(
+        (r for r in rows if "error" not in r
+         and not r["rerank"] and parse_candidate(r["candidate"])[0] == BASELINE_FACTORY),
+        None,
+    )
+    if baseline is not None:
+        for r in rows:
+            if "error" not in r:
+                r["memory_ratio"] = r["memory_mb"] / baseline["memory_mb"]
+    return rows
+
+
+def pick_best(rows: list[dict], min_recall: float = 0.95) -> Optional[dict]:
+    """
+    Escolhe o candidato com maior QPS entre os que atingem ``min_recall``;
+    se nenhum atingir, escolhe o de maior recall.
+    """
+    ok = [r for r in rows if "error" not in r]
+    if not ok:
+        return None
+    eligible = [r for r in ok if r["recall"] >= min_recall]
+    if eligible:
+        return max(eligible, key=lambda r: r["qps"])
+    return max(ok, key=lambda r: r["recall"])
@@ -1,13 +1,73 @@
 """
-Funções utilitárias para pré-processamento de texto.
+Funções utilitárias para pré-processamento de texto e medição de tempo.
 """
 
 import re
+import time
+import unicodedata
+
+from .config import PREPROCESS_STEPS
+
+# Caracteres que não sejam letras, números ou espaços
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def _fold_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+# Etapas disponíveis do pré-processamento, aplicadas na ordem configurada
+PREPROCESS_FUNCTIONS = {
+    "lower": str.lower,
+    "accents": _fold_accents,
+    "punct": lambda text: _PUNCT_RE.sub("", text),
+    "whitespace": lambda text: " ".join(text.split()),
+}
+
+
+class Preprocessor:
+    """
+    Pipeline de normalização de texto: ``strip`` seguido das etapas de
+    ``PREPROCESS_FUNCTIONS``, na ordem recebida.
+
+    Args:
+        steps (str | list[str]): Nomes das etapas (ex.: ``"lower,punct"``).
+    """
+
+    def __init__(self, steps):
+        if isinstance(steps, str):
+            steps = [s.strip() for s in steps.split(",") if s.strip()]
+        unknown = [s for s in steps if s not in PREPROCESS_FUNCTIONS]
+        if unknown:
+            raise ValueError(
+                f"Etapas de pré-processamento desconhecidas: {unknown} "
+                f"(disponíveis: {sorted(PREPROCESS_FUNCTIONS)})"
+            )
+        self.steps = tuple(steps)
+        self._functions = (str.strip,) + tuple(PREPROCESS_FUNCTIONS[s] for s in steps)
+
+    def __call__(self, text: str) -> str:
+        for function in self._functions:
+            text = function(text)
+        return text
+
+    def batch(self, texts: list[str]) -> list[str]:
+        """Aplica o pipeline a vários textos, etapa a etapa."""
+        for function in self._functions:
+            texts = [function(t) for t in texts]
+        return texts
+
+
+_default_preprocessor = Preprocessor(PREPROCESS_STEPS)
 
 
 def preprocess(text: str) -> str:
     """
-    Converte o texto para lowercase, remove espaços extras e pontuação.
+    Normaliza o texto com o pipeline de ``PREPROCESS_STEPS`` (por padrão,
+    lowercase, remove espaços nas pontas e pontuação).
     
     Args:
         text (str): Texto de entrada.
@@ -15,7 +75,39 @@ def preprocess(text: str) -> str:
     Returns:
         str: Texto pré-processado.
     """
-    text = text.lower().strip()
-    # Remove caracteres que não sejam letras, números ou espaços
-    text = re.sub(r"[^\w\s]", "", text)
-    return text
+    return _default_preprocessor(text)
+
+
+def preprocess_batch(texts: list[str]) -> list[str]:
+    """Como ``preprocess``, para uma lista de textos."""
+    return _default_preprocessor.batch(texts)
+
+
+class _Timer:
+    """Context manager de ``timed``; classe em vez de gerador por ser mais barata."""
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: dict, name: str):
+        self.timings = timings
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def timed(timings: dict, name: str) -> _Timer:
+    """Acumula em ``timings[name]`` o tempo (em segundos) gasto no bloco."""
+    return _Timer(timings, name)
+
+
+def format_timings(timings: dict) -> str:
+    """Formata tempos por etapa como ``etapa=0.123s``, na ordem de inserção."""
+    return " ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items())
@@ -0,0 +1,6 @@
+"""
+Benchmarks do serviço de detecção de intenções.
+Execute a partir da raiz do repositório, por exemplo:
+
+    python -m benchmarks.bench_batching --help
+"""
@@ -0,0 +1,88 @@
+"""
+Compara o caminho de predição um-a-um com o micro-batching dinâmico.
+
+Dispara ``--requests`` predições a partir de ``--concurrency`` threads e
+reporta throughput e percentis de latência de cada modo.
+
+    python -m benchmarks.bench_batching --concurrency 32 --requests 2000
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.batching import MicroBatcher
+from app.config import DEFAULT_THRESHOLD
+from app.model import IntentModel
+from app.utils import preprocess
+
+from .common import latency_summary, load_texts, print_table
+
+
+def _run(call, texts: list[str], concurrency: int) -> dict:
+    latencies = [0.0] * len(texts)
+
+    def one(i: int):
+        start = time.perf_counter()
+        call(texts[i])
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(len(texts))))
+    elapsed = time.perf_counter() - start
+
+    return {"throughput_rps": len(texts) / elapsed, **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", help="Arquivo de consultas (NDJSON ou uma por linha).")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-batch-size", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    texts = [preprocess(t) for t in load_texts(args.input, args.requests)]
+    model = IntentModel()
+    model.load()
+    # Aquecimento para não medir inicialização preguiçosa do modelo
+    model.predict(texts[0], top_k=args.top_k, threshold=DEFAULT_THRESHOLD)
+
+    rows = [
+        {
+            "mode": "one-at-a-time",
+            **_run(
+                lambda t: model.predict(t, top_k=args.top_k, threshold=DEFAULT_THRESHOLD),
+                texts,
+                args.concurrency,
+            ),
+        }
+    ]
+
+    for size in args.max_batch_size:
+        batcher = MicroBatcher(
+            lambda items: model.predict_batch(
+                [t for t, _, _ in items], [k for _, k, _ in items], [thr for _, _, thr in items]
+            ),
+            max_batch_size=size,
+            max_wait_ms=args.max_wait_ms,
+        )
+        try:
+            stats = _run(
+                lambda t, b=batcher: b.run((t, args.top_k, DEFAULT_THRESHOLD)),
+                texts,
+                args.concurrency,
+            )
+        finally:
+            batcher.close()
+        rows.append({"mode": f"batched(max={size},wait={args.max_wait_ms}ms)", **stats})
+
+    print(f"requests={len(texts)} concurrency={args.concurrency} top_k={args.top_k}")
+    print_table(rows, ["mode", "throughput_rps", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
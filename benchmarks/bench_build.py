@@ -0,0 +1,84 @@
+"""
+Pico de memória e vazão do build do índice em streaming.
+
+Gera corpora sintéticos (JSONL) de tamanhos crescentes e constrói o índice de
+cada um em um processo novo, com blocos de ``--chunk-size`` e com o corpus em
+um único bloco (equivalente ao build antigo, todo em memória). Com blocos, o
+pico de RSS deve ficar estável quando o corpus cresce.
+
+    python -m benchmarks.bench_build --sizes 20000 80000 --factory IVF64,Flat
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from .common import print_table, write_corpus
+
+
+def _child(args):
+    # pylint: disable=import-outside-toplevel
+    from app.builder import IndexBuilder
+    from app.ingest import Corpus
+
+    builder = IndexBuilder(
+        data_dir=args.data_dir,
+        index_factory=args.factory,
+        search_params="",
+        corpus=Corpus(args.source),
+        chunk_size=args.chunk_size,
+        train_sample_size=args.train_sample,
+    )
+    builder.build(force=True)
+    print(json.dumps(builder.last_report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[20000, 80000])
+    parser.add_argument("--factory", default="IVF64,Flat")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--train-sample", type=int, default=10000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            source = os.path.join(tmp, f"corpus_{size}.jsonl")
+            write_corpus(source, size)
+            for mode, chunk_size in (("streaming", args.chunk_size), ("single", size)):
+                proc = subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.bench_build", "--child",
+                        "--source", source,
+                        "--data-dir", os.path.join(tmp, f"{mode}_{size}"),
+                        "--factory", args.factory,
+                        "--chunk-size", str(chunk_size),
+                        "--train-sample", str(args.train_sample),
+                    ],
+                    env={**os.environ, "EMBEDDING_STORE_ENABLED": "false", "LOG_LEVEL": "WARNING"},
+                    capture_output=True, text=True, check=True,
+                )
+                report = json.loads(proc.stdout.strip().splitlines()[-1])
+                rows.append({"mode": mode, "size": size, **report})
+
+    print(f"factory={args.factory} chunk_size={args.chunk_size} train_sample={args.train_sample}")
+    print_table(
+        rows,
+        ["mode", "size", "chunks", "seconds", "texts_per_s", "encode_seconds", "add_seconds",
+         "peak_rss_mb"],
+    )
+
+
+if __name__ == "__main__":
+    main()
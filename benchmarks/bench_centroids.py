@@ -0,0 +1,71 @@
+"""
+Mede velocidade e acurácia do caminho rápido por centróides de intenção.
+
+Para cada margem, prediz o split de teste do CLINC-OOS uma consulta por vez
+e reporta acurácia, fração respondida pelos centróides e latência.
+
+    python -m benchmarks.bench_centroids --margins 0.05 0.1 0.2
+"""
+
+import argparse
+import time
+
+from app.builder import IndexBuilder
+from app.config import DEFAULT_THRESHOLD
+from app.model import IntentModel
+from app.utils import preprocess
+
+from .common import latency_summary, print_table
+
+
+def _evaluate(model: IntentModel, texts: list[str], labels: list[str], top_k: int) -> dict:
+    latencies, correct, centroid = [], 0, 0
+    for text, label in zip(texts, labels):
+        start = time.perf_counter()
+        result = model.predict_batch([text], top_k, DEFAULT_THRESHOLD)[0]
+        latencies.append(time.perf_counter() - start)
+        correct += result["predicted_intent"] == label
+        centroid += result["path"] == "centroid"
+    return {
+        "accuracy": correct / len(texts),
+        "centroid_share": centroid / len(texts),
+        **latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.05, 0.1, 0.2])
+    args = parser.parse_args()
+
+    texts, labels, _ = IndexBuilder()._load_dataset(args.split)  # pylint: disable=protected-access
+    texts = [preprocess(t) for t in texts[: args.limit]]
+    labels = labels[: args.limit]
+
+    model = IntentModel()
+    model.load()
+    if model.centroids is None:
+        raise SystemExit("Centróides não encontrados: rode 'flask build-index --force'.")
+    # Sem cache, para medir o custo real de cada caminho
+    model.embedding_cache = None
+    model.result_cache = None
+    model.predict_batch(texts[:8], args.top_k, DEFAULT_THRESHOLD)
+
+    model.centroid_fast_path = False
+    rows = [{"mode": "knn", **_evaluate(model, texts, labels, args.top_k)}]
+    model.centroid_fast_path = True
+    for margin in args.margins:
+        model.centroid_margin = margin
+        rows.append(
+            {"mode": f"centroid(margin={margin})", **_evaluate(model, texts, labels, args.top_k)}
+        )
+
+    print(f"split={args.split} queries={len(texts)} top_k={args.top_k}")
+    print_table(rows, ["mode", "accuracy", "centroid_share", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Vazão da classificação offline em lote (``flask classify``).
+
+Gera um NDJSON com ``--records`` consultas e o classifica de três formas:
+uma predição por linha (como chamadas a ``/predict``, sem o HTTP), blocos em
+sequência (lê, pré-processa, prediz e grava um bloco por vez) e o pipeline de
+``app.classify``, em que leitura, encode, busca e escrita se sobrepõem. Os
+caches do modelo ficam desligados, para que textos repetidos sejam codificados.
+
+    python -m benchmarks.bench_classify --records 50000 --chunk-size 1024
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.builder import peak_rss_mb
+from app.classify import RecordReader, ResultWriter, classify_file
+from app.config import DEFAULT_THRESHOLD
+from app.model import IntentModel
+from app.utils import preprocess, preprocess_batch
+
+from .common import load_texts, print_table
+
+
+def per_line(model, source, output, top_k, chunk_size) -> int:
+    writer = ResultWriter(output, source)
+    n = 0
+    for ids, raw, offset in RecordReader(source).chunks(chunk_size):
+        results = [model.predict(preprocess(t), top_k, DEFAULT_THRESHOLD) for t in raw]
+        writer.write(ids, raw, results, offset)
+        n += len(ids)
+    writer.close(completed=True)
+    return n
+
+
+def sequential(model, source, output, top_k, chunk_size) -> int:
+    writer = ResultWriter(output, source)
+    n = 0
+    for ids, raw, offset in RecordReader(source).chunks(chunk_size):
+        results = model.predict_batch(preprocess_batch(raw), top_k, DEFAULT_THRESHOLD)
+        writer.write(ids, raw, results, offset)
+        n += len(ids)
+    writer.close(completed=True)
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", help="Arquivo com um texto por linha (ou NDJSON com 'text').")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--per-line-records", type=int, default=5000,
+                        help="Registros do modo uma-predição-por-linha (mais lento).")
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--queue-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    model = IntentModel()
+    model.load()
+    model.embedding_cache = None
+    model.result_cache = None
+    model.semantic_cache = None
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        def write_source(name, n):
+            path = os.path.join(tmp, name)
+            with open(path, "w", encoding="utf-8") as f:
+                for text in load_texts(args.input, n):
+                    f.write(json.dumps({"text": text}) + "\n")
+            return path
+
+        source = write_source("in.jsonl", args.records)
+        small = write_source("small.jsonl", min(args.per_line_records, args.records))
+        output = os.path.join(tmp, "out.jsonl")
+        model.predict_batch(["warm up"], args.top_k, DEFAULT_THRESHOLD)
+
+        for mode, fn, path in (("per_line", per_line, small), ("sequential", sequential, source)):
+            start = time.perf_counter()
+            n = fn(model, path, output, args.top_k, args.chunk_size)
+            elapsed = time.perf_counter() - start
+            rows.append({"mode": mode, "queue": "-", "records": n, "seconds": elapsed,
+                         "records_per_s": n / elapsed, "peak_rss_mb": peak_rss_mb()})
+
+        for queue_size in args.queue_sizes:
+            report = classify_file(
+                model, source, output, args.top_k, DEFAULT_THRESHOLD,
+                chunk_size=args.chunk_size, queue_size=queue_size,
+            )
+            rows.append({"mode": "pipeline", "queue": queue_size, **report})
+
+    print(f"registros={args.records} chunk_size={args.chunk_size} top_k={args.top_k}")
+    print_table(rows, ["mode", "queue", "records", "seconds", "records_per_s", "encode_seconds",
+                       "search_seconds", "write_seconds", "peak_rss_mb"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Tempo de build do índice em função do número de processos de encoding.
+
+Gera um corpus sintético (JSONL) e o indexa com ``EMBED_WORKERS`` = 1, 2, 4...
+(cada build em um processo novo e sem o cache de embeddings), reportando o
+tempo total, o tempo de encoding, a vazão e o ganho em relação a um processo.
+O tempo inclui a inicialização dos workers (cada um carrega o encoder).
+
+    python -m benchmarks.bench_embed_workers --size 50000 --workers 1 2 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from .common import print_table, write_corpus
+
+
+def _child(args):
+    # pylint: disable=import-outside-toplevel
+    from app.builder import IndexBuilder
+    from app.ingest import Corpus
+
+    builder = IndexBuilder(
+        data_dir=args.data_dir,
+        index_factory="Flat",
+        search_params="",
+        corpus=Corpus(args.source),
+        chunk_size=args.chunk_size,
+        embed_workers=args.workers[0],
+    )
+    builder.build(force=True)
+    print(json.dumps(builder.last_report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=8192)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(source, args.size)
+        for workers in args.workers:
+            proc = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_embed_workers", "--child",
+                    "--source", source,
+                    "--data-dir", os.path.join(tmp, f"w{workers}"),
+                    "--chunk-size", str(args.chunk_size),
+                    "--workers", str(workers),
+                ],
+                env={**os.environ, "EMBEDDING_STORE_ENABLED": "false", "LOG_LEVEL": "WARNING"},
+                capture_output=True, text=True, check=True,
+            )
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+            rows.append({"workers": workers, **report})
+
+    base = rows[0]["seconds"]
+    for row in rows:
+        row["speedup"] = base / row["seconds"] if row["seconds"] else 0.0
+    print(f"textos={args.size} chunk_size={args.chunk_size} núcleos={os.cpu_count()}")
+    print_table(
+        rows, ["workers", "seconds", "encode_seconds", "texts_per_s", "speedup", "peak_rss_mb"]
+    )
+
+
+if __name__ == "__main__":
+    main()
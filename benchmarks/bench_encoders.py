@@ -0,0 +1,106 @@
+"""
+Compara os backends do encoder (torch, onnx, onnx-int8): tempo de carga,
+latência por consulta, vazão em lote e memória residente.
+
+Cada backend roda em um subprocesso próprio, para que a memória de um não
+contamine a medição do outro. Os modelos ONNX precisam ter sido gerados antes
+com ``flask export-onnx``.
+
+    python -m benchmarks.bench_encoders --backends torch onnx onnx-int8
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from app.config import ENCODER_THREADS, MODEL_NAME
+from app.encoders import BACKENDS, default_model_dir, load_encoder
+
+from .common import latency_summary, load_texts, print_table
+
+
+def _rss_mb() -> float:
+    """Memória residente atual do processo, em MB (pico, se /proc não existir)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(backend: str, model_dir: str, texts: list[str], batch_size: int) -> dict:
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    encoder = load_encoder(model_dir, backend, ENCODER_THREADS)
+    load_s = time.perf_counter() - start
+
+    encoder.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)
+
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        encoder.encode([text], batch_size=1, normalize_embeddings=True)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    batch_s = time.perf_counter() - start
+
+    summary = latency_summary(latencies)
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "p50_ms": summary["p50_ms"],
+        "p99_ms": summary["p99_ms"],
+        "texts_per_s": len(texts) / batch_s,
+        "rss_mb": _rss_mb(),
+        "model_rss_mb": _rss_mb() - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--model-dir", default=default_model_dir(MODEL_NAME))
+    parser.add_argument("--texts", help="Arquivo de consultas (NDJSON ou uma por linha).")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts, args.limit)
+    if args.child:
+        row = _measure(args.backends[0], args.model_dir, texts, args.batch_size)
+        print(json.dumps(row))
+        return
+
+    rows = []
+    for backend in args.backends:
+        cmd = [
+            sys.executable, "-m", "benchmarks.bench_encoders", "--child",
+            "--backends", backend, "--model-dir", args.model_dir,
+            "--limit", str(args.limit), "--batch-size", str(args.batch_size),
+        ]
+        if args.texts:
+            cmd += ["--texts", args.texts]
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if proc.returncode != 0:
+            rows.append({"backend": backend, "load_s": "erro: " + proc.stderr.strip().splitlines()[-1]})
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"model_dir={args.model_dir} queries={len(texts)} batch_size={args.batch_size}")
+    print_table(
+        rows,
+        ["backend", "load_s", "p50_ms", "p99_ms", "texts_per_s", "rss_mb", "model_rss_mb"],
+    )
+
+
+if __name__ == "__main__":
+    main()
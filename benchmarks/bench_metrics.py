@@ -0,0 +1,104 @@
+"""
+Custo da coleta de métricas no caminho quente da predição.
+
+Carrega o modelo (sem caches, para medir a predição completa) e alterna
+rodadas curtas de ``predict`` com a coleta ligada e desligada; o overhead é a
+mediana das diferenças entre rodadas vizinhas, o que reduz o efeito do ruído
+da máquina. Mede também, isoladamente, o custo por requisição da
+instrumentação (histogramas e contadores).
+
+    python -m benchmarks.bench_metrics --requests 2000 --rounds 20
+"""
+
+import argparse
+import statistics
+import time
+
+from app import metrics
+from app.config import DEFAULT_THRESHOLD
+from app.model import MODEL_STAGES, IntentModel
+from app.utils import preprocess, timed
+
+from .common import load_texts, print_table
+
+
+def _round(model: IntentModel, texts: list[str], top_k: int) -> float:
+    """Latência média (segundos) de uma predição, como faz a rota /predict."""
+    total = 0.0
+    for text in texts:
+        start = time.perf_counter()
+        timings = {}
+        with timed(timings, "preprocess"):
+            query = preprocess(text)
+        model.predict(query, top_k, DEFAULT_THRESHOLD, timings=timings)
+        metrics.observe_stages(timings, ("preprocess",))
+        elapsed = time.perf_counter() - start
+        metrics.observe_request("/predict", elapsed)
+        total += elapsed
+    return total / len(texts)
+
+
+def _instrumentation_cost(n: int) -> float:
+    """Custo (segundos) por requisição só da instrumentação, sem o modelo."""
+    result = [{"predicted_intent": "balance"}]
+    start = time.perf_counter()
+    for _ in range(n):
+        timings = {}
+        for stage in ("preprocess",) + MODEL_STAGES:
+            with timed(timings, stage):
+                pass
+        metrics.observe_stages(timings, MODEL_STAGES)
+        metrics.record_predictions(result)
+        metrics.observe_stages(timings, ("preprocess",))
+        metrics.observe_request("/predict", 0.001)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", default=None, help="Arquivo NDJSON ou texto com consultas")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts(args.queries, args.requests)
+    model = IntentModel()
+    model.load()
+    model.embedding_cache = None
+    model.result_cache = None
+    _round(model, texts[:50], args.top_k)
+
+    # Rodadas intercaladas (e em ordem alternada), para que variações da
+    # máquina afetem igualmente os dois modos
+    size = max(1, len(texts) // args.rounds)
+    latencies = {True: [], False: []}
+    for i in range(args.rounds):
+        chunk = texts[i * size : (i + 1) * size] or texts[:size]
+        for enabled in ((False, True) if i % 2 == 0 else (True, False)):
+            metrics.set_enabled(enabled)
+            latencies[enabled].append(_round(model, chunk, args.top_k))
+    metrics.set_enabled(True)
+
+    off = statistics.median(latencies[False])
+    on = statistics.median(latencies[True])
+    overhead = statistics.median(
+        (a - b) / b * 100 for a, b in zip(latencies[True], latencies[False])
+    )
+    cost = _instrumentation_cost(args.requests * 10)
+    print(f"requisições={args.requests} rodadas={args.rounds} (mediana das rodadas)")
+    print_table(
+        [
+            {"metrics": "off", "mean_ms": off * 1000, "overhead_pct": 0.0},
+            {"metrics": "on", "mean_ms": on * 1000, "overhead_pct": overhead},
+        ],
+        ["metrics", "mean_ms", "overhead_pct"],
+    )
+    print(
+        f"\ninstrumentação isolada: {cost * 1e6:.2f} µs por requisição "
+        f"({cost / off * 100:.3f}% da latência média sem métricas)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Custo por requisição do pré-processamento e dos logs do caminho quente.
+
+Simula a parte de ``/predict`` que não depende do modelo: pré-processa o texto
+e loga o texto e o resultado (um dict como o de ``IntentModel.predict``) em um
+arquivo real. Compara o caminho antigo (``re.sub`` sem compilar, handler
+síncrono e o resultado logado duas vezes) com o pipeline de ``app.utils`` e o
+handler assíncrono de ``app.logs``, com e sem amostragem. Reporta o tempo na
+thread da requisição e o tempo de CPU do processo (inclui a thread do listener).
+
+    python -m benchmarks.bench_preprocess --requests 20000 --sample-rates 1 0.01
+"""
+
+import argparse
+import logging
+import os
+import re
+import tempfile
+import time
+
+from app.logs import SampledLogger, setup_logging
+from app.utils import Preprocessor, preprocess, preprocess_batch
+
+from .common import load_texts, print_table
+
+
+def legacy_preprocess(text: str) -> str:
+    text = text.lower().strip()
+    text = re.sub(r"[^\w\s]", "", text)
+    return text
+
+
+def fake_result(text: str) -> dict:
+    candidates = [{"intent": f"intent_{i}", "score": 0.9 - i * 0.1, "count": 5 - i} for i in range(5)]
+    return {"query": text, "predicted_intent": "intent_0", "confidence": 0.9, "candidates": candidates}
+
+
+def run_requests(texts, pre, log_text, log_result, log_twice) -> float:
+    """Segundos por requisição do laço pré-processa + loga, na thread chamadora."""
+    start = time.perf_counter()
+    for raw in texts:
+        text = pre(raw)
+        log_text('Predicting intent for text="%s", top_k=%d, threshold=%s', text, 5, 0.7)
+        result = fake_result(text)
+        if log_twice:
+            log_result("Resultado da predição: %s", result)
+        log_result("Prediction result: %s", result)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", help="Arquivo com um texto por linha.")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rates", nargs="+", type=float, default=[1.0, 0.01])
+    parser.add_argument("--steps", default="lower,accents,punct,whitespace",
+                        help="Pipeline extra medido no pré-processamento isolado.")
+    args = parser.parse_args()
+
+    texts = load_texts(args.input, 1000)
+    texts = (texts * (args.requests // len(texts) + 1))[: args.requests]
+    logger = logging.getLogger("bench.preprocess")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = [("legacy", False, None)]
+        configs += [("async", True, rate) for rate in args.sample_rates]
+        for name, async_, rate in configs:
+            with open(os.path.join(tmp, f"{name}_{rate}.log"), "w", encoding="utf-8") as stream:
+                handler = setup_logging(logger, "INFO", async_=async_, stream=stream)
+                if rate is None:
+                    pre, log_text, log_result, twice = legacy_preprocess, logger.info, logger.info, True
+                else:
+                    sampled = SampledLogger(logger, rate)
+                    pre, log_text, log_result, twice = preprocess, sampled.info, sampled.info, False
+                start_cpu = time.process_time()
+                per_request = run_requests(texts, pre, log_text, log_result, twice)
+                handler.close()  # espera a fila esvaziar
+                cpu = time.process_time() - start_cpu
+                rows.append({
+                    "mode": name,
+                    "sample_rate": "-" if rate is None else rate,
+                    "request_us": per_request * 1e6,
+                    "cpu_us": cpu / len(texts) * 1e6,
+                    "log_bytes": os.path.getsize(stream.name),
+                })
+
+    base = rows[0]["request_us"]
+    for row in rows:
+        row["saving_us"] = base - row["request_us"]
+    print(f"requisições={len(texts)} (pré-processamento + logs, sem o modelo)")
+    print_table(rows, ["mode", "sample_rate", "request_us", "saving_us", "cpu_us", "log_bytes"])
+
+    # Pré-processamento isolado: re.sub antigo, pipeline padrão, lote e pipeline completo
+    full = Preprocessor(args.steps)
+    cases = [
+        ("legacy re.sub", lambda: [legacy_preprocess(t) for t in texts]),
+        ("preprocess", lambda: [preprocess(t) for t in texts]),
+        ("preprocess_batch", lambda: preprocess_batch(texts)),
+        (args.steps, lambda: full.batch(texts)),
+    ]
+    rows = []
+    for name, fn in cases:
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        rows.append({"pipeline": name, "ns_per_text": best / len(texts) * 1e9})
+    print()
+    print_table(rows, ["pipeline", "ns_per_text"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Replay de requisições gravadas e suíte de regressão de desempenho.
+
+Reenvia um arquivo de requisições (NDJSON no formato do corpo de ``/predict``
+ou ``/predict_batch``, com ``label``/``labels`` opcionais) ou um split do
+CLINC-OOS com N clientes concorrentes, em malha fechada ou a uma taxa fixa
+(``--rate``, com a latência medida a partir do horário agendado de cada
+requisição). Os alvos são:
+
+- ``model``: ``app.model.predict``/``predict_batch`` no próprio processo;
+- ``app``: as rotas do Flask pelo cliente de teste (sem rede);
+- ``url``: um servidor HTTP em execução (``--url``);
+- ``build``: ``IndexBuilder.build`` completo em uma pasta temporária.
+
+Reporta vazão, latência p50/p90/p99, RSS e, quando as requisições têm label,
+acurácia e taxa de OOS. ``--save-baseline`` grava o relatório em um JSON de
+baseline (um cenário por alvo e fonte) e ``--baseline`` compara com ele: o
+processo termina com código 1 se alguma métrica piorar além da tolerância.
+
+    python -m benchmarks.bench_replay --target model --split test --concurrency 8 \\
+        --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from .common import SAMPLE_TEXTS, latency_summary, print_table
+
+OOS_LABEL = "oos"
+
+# Direção de cada métrica comparada com a baseline; as de acurácia usam
+# tolerância absoluta, as demais relativa
+HIGHER_IS_BETTER = ("rps", "texts_per_s", "accuracy", "in_scope_accuracy", "oos_recall")
+LOWER_IS_BETTER = ("p50_ms", "p99_ms", "peak_rss_mb", "seconds")
+ACCURACY_METRICS = ("accuracy", "in_scope_accuracy", "oos_recall", "oos_rate")
+
+
+def load_requests(path: str, limit: int = 0) -> list[dict]:
+    """
+    Lê um arquivo de requisições: uma por linha, como objeto JSON com ``text``
+    (ou ``texts``) e, opcionalmente, ``top_k``, ``threshold``, ``tenant`` e
+    ``label`` (ou ``labels``); linhas que não são JSON viram ``{"text": linha}``.
+    """
+    requests = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            requests.append(json.loads(line) if line.startswith("{") else {"text": line})
+            if limit and len(requests) >= limit:
+                break
+    if not requests:
+        raise ValueError(f"Nenhuma requisição em '{path}'.")
+    return requests
+
+
+def split_requests(split: str, limit: int = 0, batch_size: int = 1) -> list[dict]:
+    """
+    Requisições com label a partir de um split do CLINC-OOS local (ou das
+    frases de exemplo, sem label, se o dataset não existir).
+    """
+    from app.ingest import CLINC_SOURCE, Corpus  # pylint: disable=import-outside-toplevel
+
+    if os.path.isdir(CLINC_SOURCE):
+        pairs = []
+        for texts, labels in Corpus(split=split).chunks(4096):
+            pairs.extend(zip(texts, labels))
+            if limit and len(pairs) >= limit:
+                break
+        pairs = pairs[:limit] if limit else pairs
+    else:
+        pairs = [(text, None) for text in SAMPLE_TEXTS]
+    if batch_size <= 1:
+        return [{"text": t} if l is None else {"text": t, "label": l} for t, l in pairs]
+    requests = []
+    for start in range(0, len(pairs), batch_size):
+        chunk = pairs[start : start + batch_size]
+        request = {"texts": [t for t, _ in chunk]}
+        if all(l is not None for _, l in chunk):
+            request["labels"] = [l for _, l in chunk]
+        requests.append(request)
+    return requests
+
+
+def _body(request: dict) -> dict:
+    return {k: v for k, v in request.items() if k not in ("label", "labels")}
+
+
+class ModelTarget:
+    """Chama ``app.model.predict``/``predict_batch`` (com o pré-processamento da API)."""
+
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        from app import model
+        from app.config import DEFAULT_THRESHOLD
+        from app.utils import preprocess
+
+        self.model, self.preprocess, self.threshold = model, preprocess, DEFAULT_THRESHOLD
+        if not model.is_loaded():
+            model.load_model()
+
+    def __call__(self, request: dict) -> tuple[int, list[dict]]:
+        top_k = request.get("top_k", 5)
+        threshold = request.get("threshold", self.threshold)
+        if "texts" in request:
+            texts = [self.preprocess(t) for t in request["texts"]]
+            return 200, self.model.predict_batch(texts, top_k, threshold)
+        return 200, [self.model.predict(self.preprocess(request["text"]), top_k, threshold)]
+
+
+class AppTarget:
+    """Envia as requisições às rotas do Flask pelo cliente de teste, no próprio processo."""
+
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        from app import app, model
+
+        if not model.is_loaded():
+            model.load_model()
+        self.app = app
+        self._local = threading.local()
+
+    def __call__(self, request: dict) -> tuple[int, list[dict]]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        path = "/predict_batch" if "texts" in request else "/predict"
+        resp = client.post(path, json=_body(request))
+        return resp.status_code, _results(resp.status_code, resp.get_json(silent=True))
+
+
+class HttpTarget:
+    """Envia as requisições a um servidor em execução, uma conexão keep-alive por cliente."""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self._local = threading.local()
+
+    def __call__(self, request: dict) -> tuple[int, list[dict]]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        path = "/predict_batch" if "texts" in request else "/predict"
+        try:
+            conn.request("POST", path, json.dumps(_body(request)), {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            data = resp.read()
+        except OSError:
+            conn.close()
+            self._local.conn = None
+            raise
+        payload = json.loads(data) if data else None
+        return resp.status, _results(resp.status, payload)
+
+
+def _results(status: int, payload) -> list[dict]:
+    if status != 200 or not isinstance(payload, dict):
+        return []
+    return payload.get("results", [payload])
+
+
+def replay(target, requests: list[dict], concurrency: int = 1, rate: float = 0.0) -> dict:
+    """
+    Envia cada requisição uma vez com ``concurrency`` clientes. Com ``rate``
+    (requisições/s), a i-ésima requisição é agendada para ``i / rate`` segundos
+    após o início e a latência conta a partir do horário agendado, incluindo a
+    espera quando os clientes não dão conta da taxa.
+    """
+    latencies, statuses, pairs = [], Counter(), []
+    lock, next_index = threading.Lock(), [0]
+    start = time.perf_counter()
+
+    def client():
+        while True:
+            with lock:
+                i = next_index[0]
+                next_index[0] += 1
+            if i >= len(requests):
+                return
+            request = requests[i]
+            if rate > 0:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            try:
+                status, results = target(request)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Justificado: qualquer falha do alvo conta como erro, sem parar o replay
+                status, results = "erro", []
+            elapsed = time.perf_counter() - scheduled
+            labels = request.get("labels") or (
+                [request["label"]] if "label" in request else []
+            )
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+                    pairs.extend(zip(labels, (r["predicted_intent"] for r in results)))
+
+    threads = [threading.Thread(target=client) for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    n_texts = sum(len(r["texts"]) if "texts" in r else 1 for r in requests)
+    report = {
+        "requests": len(requests),
+        "ok": statuses[200],
+        "errors": len(requests) - statuses[200],
+        "seconds": round(elapsed, 3),
+        "rps": statuses[200] / elapsed,
+        "texts_per_s": n_texts / elapsed,
+        **latency_summary(latencies),
+    }
+    report.update(quality(pairs))
+    return report
+
+
+def quality(pairs: list[tuple[str, str]]) -> dict:
+    """Acurácia, acurácia nas intenções conhecidas, taxa de OOS e recall de OOS."""
+    if not pairs:
+        return {}
+    in_scope = [(l, p) for l, p in pairs if l != OOS_LABEL]
+    oos = [p for l, p in pairs if l == OOS_LABEL]
+    report = {
+        "labeled": len(pairs),
+        "accuracy": sum(l == p for l, p in pairs) / len(pairs),
+        "oos_rate": sum(p == OOS_LABEL for _, p in pairs) / len(pairs),
+    }
+    if in_scope:
+        report["in_scope_accuracy"] = sum(l == p for l, p in in_scope) / len(in_scope)
+    if oos:
+        report["oos_recall"] = sum(p == OOS_LABEL for p in oos) / len(oos)
+    return report
+
+
+def memory_report() -> dict:
+    """RSS atual (de /proc, no Linux) e pico de RSS do processo, em MB."""
+    report = {"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    report["rss_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return report
+
+
+def run_build(source: str) -> dict:
+    """Build completo (forçado) em uma pasta temporária, com o relatório do builder."""
+    # pylint: disable=import-outside-toplevel
+    from app.builder import IndexBuilder
+    from app.ingest import Corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = IndexBuilder(data_dir=tmp, corpus=Corpus(source) if source else None)
+        builder.build(force=True)
+        return dict(builder.last_report)
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    tolerance: float = 0.1,
+    accuracy_tolerance: float = 0.005,
+) -> list[str]:
+    """
+    Regressões do relatório em relação à baseline: métricas de desempenho
+    piores por mais de ``tolerance`` (relativa) e métricas de qualidade que
+    mudaram mais de ``accuracy_tolerance`` (absoluta) na direção ruim.
+    """
+    regressions = []
+    for name in sorted(set(report) & set(baseline)):
+        value, base = report[name], baseline[name]
+        if not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+            continue
+        if name in ACCURACY_METRICS:
+            # oos_rate não tem direção boa: qualquer mudança grande é regressão
+            delta = value - base if name != "oos_rate" else -abs(value - base)
+            if delta < -accuracy_tolerance:
+                regressions.append(f"{name}: {value:.4f} vs baseline {base:.4f}")
+        elif name in HIGHER_IS_BETTER and value < base * (1 - tolerance):
+            regressions.append(f"{name}: {value:.2f} vs baseline {base:.2f} (-{1 - value / base:.0%})")
+        elif name in LOWER_IS_BETTER and base > 0 and value > base * (1 + tolerance):
+            regressions.append(f"{name}: {value:.2f} vs baseline {base:.2f} (+{value / base - 1:.0%})")
+    return regressions
+
+
+def save_baseline(path: str, scenario: str, report: dict):
+    """Grava (ou substitui) o cenário no arquivo de baseline."""
+    data = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    data[scenario] = report
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_baseline(path: str, scenario: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get(scenario, {})
+
+
+def run(args) -> tuple[str, dict]:
+    """Executa o cenário pedido e devolve (nome do cenário, relatório)."""
+    if args.target == "build":
+        return f"build:{args.build_source or 'clinc'}", run_build(args.build_source)
+
+    if args.requests_file:
+        requests = load_requests(args.requests_file, args.limit)
+        source = os.path.basename(args.requests_file)
+    else:
+        requests = split_requests(args.split, args.limit, args.batch_size)
+        source = f"{args.split}" + (f"x{args.batch_size}" if args.batch_size > 1 else "")
+
+    if args.target == "model":
+        target = ModelTarget()
+    elif args.target == "app":
+        target = AppTarget()
+    else:
+        if not args.url:
+            raise SystemExit("--target url exige --url.")
+        target = HttpTarget(args.url)
+
+    # Aquecimento (caches do encoder, páginas do índice), fora da medição
+    replay(target, requests[: min(len(requests), args.warmup)], args.concurrency)
+    report = replay(target, requests, args.concurrency, args.rate)
+    report.update(memory_report())
+    scenario = f"{args.target}:{source}:c{args.concurrency}" + (f":r{args.rate:g}" if args.rate else "")
+    return scenario, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=["model", "app", "url", "build"], default="model")
+    parser.add_argument("--requests-file", help="Requisições gravadas (NDJSON).")
+    parser.add_argument("--split", default="test", help="Split do CLINC-OOS sem --requests-file.")
+    parser.add_argument("--limit", type=int, default=0, help="Máximo de requisições (0 = todas).")
+    parser.add_argument("--batch-size", type=int, default=1, help="Textos por requisição do split.")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=0.0, help="Requisições/s (0 = malha fechada).")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--url", help="Servidor do alvo url (ex.: http://127.0.0.1:5000).")
+    parser.add_argument("--build-source", default="", help="Corpus do alvo build (padrão: CLINC).")
+    parser.add_argument("--baseline", help="JSON de baseline para comparar.")
+    parser.add_argument("--save-baseline", help="Grava o relatório neste JSON de baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.005)
+    parser.add_argument("--output", help="Grava o relatório em JSON.")
+    args = parser.parse_args(argv)
+
+    scenario, report = run(args)
+    print(f"cenário={scenario}")
+    print_table([report], [k for k in report if not isinstance(report[k], (dict, list))])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"scenario": scenario, **report}, f, indent=2)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, scenario, report)
+        print(f"Baseline '{scenario}' salva em {args.save_baseline}")
+    if args.baseline:
+        baseline = load_baseline(args.baseline, scenario)
+        if not baseline:
+            print(f"Baseline sem o cenário '{scenario}'; nada a comparar.")
+            return 0
+        regressions = compare(report, baseline, args.tolerance, args.accuracy_tolerance)
+        if regressions:
+            print("Regressões em relação à baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Sem regressões em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
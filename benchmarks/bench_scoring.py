@@ -0,0 +1,71 @@
+"""
+Custo do voto dos vizinhos do kNN por estratégia.
+
+Gera vizinhos sintéticos (``--queries`` consultas, ``--intents`` intenções) e
+mede o voto original (``Counter`` e ``np.mean`` por intenção empatada, uma
+consulta por vez) contra ``app.scoring.score_neighbors`` sobre o lote inteiro,
+para cada estratégia e ``top_k``. Reporta microssegundos por consulta.
+
+    python -m benchmarks.bench_scoring --queries 10000 --top-ks 1 3 5 10
+"""
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from app.scoring import STRATEGIES, score_neighbors
+
+from .common import print_table
+
+
+def legacy_vote(intents: list, sims: list, thr: float):
+    if not sims or sims[0] < thr:
+        return "oos"
+    votes = Counter(intents)
+    top_count = max(votes.values())
+    tied = [c for c, v in votes.items() if v == top_count]
+    return max(tied, key=lambda c: np.mean([s for i, s in enumerate(sims) if intents[i] == c]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--intents", type=int, default=150)
+    parser.add_argument("--top-ks", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--temperature", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for top_k in args.top_ks:
+        # Vizinhos concentrados em poucas intenções, como nas consultas reais
+        base = rng.integers(0, args.intents, (args.queries, 1))
+        noise = rng.integers(0, args.intents, (args.queries, top_k))
+        cand = np.where(rng.random((args.queries, top_k)) < 0.7, base, noise)
+        sims = np.sort(rng.uniform(0.3, 0.95, (args.queries, top_k)), axis=1)[:, ::-1]
+        sims = sims.astype("float32")
+        valid = np.ones_like(cand, dtype=bool)
+
+        cand_lists, sims_lists = cand.tolist(), sims.tolist()
+        start = time.perf_counter()
+        for intents, scores in zip(cand_lists, sims_lists):
+            legacy_vote(intents, scores, 0.5)
+        elapsed = time.perf_counter() - start
+        rows.append({"top_k": top_k, "strategy": "legacy_counter",
+                     "us_per_query": elapsed / args.queries * 1e6})
+
+        for strategy in STRATEGIES:
+            start = time.perf_counter()
+            score_neighbors(cand, sims, valid, strategy, args.temperature)
+            elapsed = time.perf_counter() - start
+            rows.append({"top_k": top_k, "strategy": strategy,
+                         "us_per_query": elapsed / args.queries * 1e6})
+
+    print(f"consultas={args.queries} intenções={args.intents}")
+    print_table(rows, ["top_k", "strategy", "us_per_query"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Taxa de acerto, latência e desvio de acurácia do cache semântico.
+
+Gera um tráfego com consultas repetidas e paráfrases (contrações, palavras de
+preenchimento removidas ou acrescentadas) a partir de um split do CLINC-OOS e o
+prediz uma consulta por vez, sem cache e com o cache semântico em cada
+threshold. O desvio é a fração de intenções previstas diferentes das do modo
+sem cache; com labels, reporta também a acurácia de cada modo.
+
+    python -m benchmarks.bench_semantic_cache --queries 5000 --thresholds 0.95 0.97 0.99
+"""
+
+import argparse
+import random
+import time
+
+from app.builder import IndexBuilder
+from app.config import DEFAULT_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES
+from app.ingest import Corpus
+from app.model import IntentModel
+from app.semantic_cache import SemanticCache
+from app.utils import preprocess
+
+from .common import SAMPLE_TEXTS, latency_summary, print_table
+
+# Pares (forma, variante) trocados para gerar paráfrases
+REWRITES = [
+    ("what is", "whats"),
+    ("i am", "im"),
+    ("do not", "dont"),
+    ("can you", "could you"),
+    ("i want to", "i'd like to"),
+    ("tell me", "let me know"),
+]
+FILLERS = ["please", "hey", "ok", "now"]
+
+
+def paraphrase(text: str, rng: random.Random) -> str:
+    """Variante da consulta com uma reescrita ou palavra de preenchimento."""
+    for old, new in rng.sample(REWRITES, len(REWRITES)):
+        if old in text:
+            return text.replace(old, new, 1)
+        if new in text:
+            return text.replace(new, old, 1)
+    words = text.split()
+    if words and words[0] in FILLERS:
+        return " ".join(words[1:])
+    return f"{rng.choice(FILLERS)} {text}" if rng.random() < 0.5 else f"{text} {rng.choice(FILLERS)}"
+
+
+def make_traffic(texts, labels, n: int, repeat: float, seed: int = 0):
+    """
+    ``n`` consultas: com probabilidade ``repeat``, uma já vista (metade das
+    vezes parafraseada), com popularidade concentrada nas primeiras vistas.
+    """
+    rng = random.Random(seed)
+    seen, queries = [], []
+    order = list(range(len(texts)))
+    rng.shuffle(order)
+    fresh = iter(order * (n // len(order) + 1))
+    for _ in range(n):
+        if seen and rng.random() < repeat:
+            i = seen[min(int(rng.paretovariate(1.2)) - 1, len(seen) - 1)]
+            text = paraphrase(texts[i], rng) if rng.random() < 0.5 else texts[i]
+        else:
+            i = next(fresh)
+            seen.append(i)
+            text = texts[i]
+        queries.append((preprocess(text), labels[i] if labels else None))
+    return queries
+
+
+def run(model: IntentModel, queries, top_k: int) -> tuple[list[str], dict]:
+    predictions, latencies, search = [], [], 0.0
+    for text, _ in queries:
+        timings = {}
+        start = time.perf_counter()
+        result = model.predict_batch([text], top_k, DEFAULT_THRESHOLD, timings=timings)[0]
+        latencies.append(time.perf_counter() - start)
+        search += sum(timings.get(s, 0.0) for s in ("semantic_cache", "search"))
+        predictions.append(result["predicted_intent"])
+    return predictions, {"search_ms": search / len(queries) * 1000, **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", help="Corpus com text/label (.jsonl, .csv, .parquet); padrão: CLINC.")
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--repeat", type=float, default=0.6, help="Fração de consultas já vistas.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.95, 0.97, 0.99])
+    parser.add_argument("--max-entries", type=int, default=SEMANTIC_CACHE_MAX_ENTRIES)
+    parser.add_argument("--policy", default="lru")
+    args = parser.parse_args()
+
+    try:
+        if args.source:
+            texts, labels = [], []
+            for chunk_texts, chunk_labels in Corpus(args.source).chunks(8192):
+                texts += chunk_texts
+                labels += chunk_labels
+        else:
+            texts, labels, _ = IndexBuilder()._load_dataset(args.split)  # pylint: disable=protected-access
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Justificado: sem o CLINC-OOS local, mede com as frases de exemplo (sem acurácia)
+        texts, labels = list(SAMPLE_TEXTS), None
+    queries = make_traffic(texts, labels, args.queries, args.repeat)
+
+    model = IntentModel()
+    model.load()
+    # Sem os caches exatos, para medir só o efeito do cache semântico
+    model.embedding_cache = None
+    model.result_cache = None
+    model.semantic_cache = None
+    model.predict_batch([q for q, _ in queries[:8]], args.top_k, DEFAULT_THRESHOLD)
+
+    reference, stats = run(model, queries, args.top_k)
+    rows = [{"mode": "uncached", "hit_rate": 0.0, "drift": 0.0, **stats}]
+    for threshold in args.thresholds:
+        model.semantic_cache = SemanticCache(
+            model.index.d, threshold, args.max_entries, args.policy
+        )
+        predictions, stats = run(model, queries, args.top_k)
+        rows.append({
+            "mode": f"semantic({threshold})",
+            "hit_rate": model.semantic_cache.stats()["hit_rate"],
+            "drift": sum(p != r for p, r in zip(predictions, reference)) / len(queries),
+            **stats,
+        })
+        if labels:
+            rows[-1]["accuracy"] = sum(p == l for p, (_, l) in zip(predictions, queries)) / len(queries)
+    if labels:
+        rows[0]["accuracy"] = sum(p == l for p, (_, l) in zip(reference, queries)) / len(queries)
+
+    print(
+        f"split={args.split} consultas={len(queries)} repetidas={args.repeat:.0%} "
+        f"top_k={args.top_k} max_entries={args.max_entries} policy={args.policy}"
+    )
+    columns = ["mode", "hit_rate", "drift", "search_ms", "mean_ms", "p50_ms", "p99_ms"]
+    print_table(rows, columns + (["accuracy"] if labels else []))
+
+
+if __name__ == "__main__":
+    main()
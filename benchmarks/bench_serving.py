@@ -0,0 +1,144 @@
+"""
+Teste de carga de /predict: servidor do Flask (app.run) vs modo ASGI.
+
+Para cada modo, sobe ``run.py`` em um subprocesso (``SERVER_MODE``), espera o
+/health responder e dispara requisições com N clientes concorrentes, cada um
+com sua conexão keep-alive. Reporta vazão, latência p50/p99 e as respostas
+503 (fila cheia) e 504 (prazo vencido). Com ``--url``, mede um servidor já
+em execução.
+
+    python -m benchmarks.bench_serving --modes flask asgi --concurrency 64 --requests 5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from .common import latency_summary, load_texts, print_table
+
+
+def _wait_ready(host: str, port: int, timeout: float) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def _client(host, port, path, texts, next_index, lock, latencies, statuses):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    while True:
+        with lock:
+            i = next_index[0]
+            next_index[0] += 1
+        if i >= len(texts):
+            break
+        body = json.dumps({"text": texts[i]})
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+            if resp.getheader("Connection", "").lower() == "close":
+                conn.close()
+        except OSError:
+            status = "erro"
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed)
+    conn.close()
+
+
+def run_load(url: str, texts: list[str], concurrency: int) -> dict:
+    """Envia cada texto uma vez para ``url`` usando ``concurrency`` clientes."""
+    parsed = urlparse(url)
+    latencies, statuses = [], Counter()
+    lock, next_index = threading.Lock(), [0]
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(parsed.hostname, parsed.port or 80, parsed.path or "/predict",
+                  texts, next_index, lock, latencies, statuses),
+        )
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "ok": statuses[200],
+        "503": statuses[503],
+        "504": statuses[504],
+        "other": sum(v for k, v in statuses.items() if k not in (200, 503, 504)),
+        "rps": statuses[200] / elapsed,
+        **latency_summary(latencies),
+    }
+
+
+def _serve(mode: str, port: int, startup_timeout: float) -> subprocess.Popen:
+    env = {**os.environ, "SERVER_MODE": mode, "PORT": str(port), "HOST": "127.0.0.1"}
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "run.py"], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if not _wait_ready("127.0.0.1", port, startup_timeout):
+        proc.terminate()
+        raise SystemExit(f"Servidor '{mode}' não respondeu em {startup_timeout:.0f}s.")
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=["flask", "asgi"], default=["flask", "asgi"])
+    parser.add_argument("--url", help="Mede um servidor já em execução (ex.: http://host:5000/predict).")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--path", default="/predict")
+    parser.add_argument("--texts", help="Arquivo de consultas (NDJSON ou uma por linha).")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts, args.requests)
+    targets = [("url", args.url)] if args.url else [
+        (mode, f"http://127.0.0.1:{args.port}{args.path}") for mode in args.modes
+    ]
+
+    rows = []
+    for mode, url in targets:
+        proc = _serve(mode, args.port, args.startup_timeout) if mode != "url" else None
+        try:
+            run_load(url, texts[: min(len(texts), 4 * args.concurrency)], args.concurrency)
+            rows.append({"mode": mode, **run_load(url, texts, args.concurrency)})
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(60)
+
+    print(f"requests={len(texts)} concurrency={args.concurrency}")
+    print_table(rows, ["mode", "ok", "503", "504", "other", "rps", "p50_ms", "p90_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Tempo de inicialização do serviço, por etapa.
+
+Cada repetição roda em um processo novo (imports frios do Python, mas com o
+page cache já aquecido) e mede: imports da aplicação, validação dos artefatos
+pelo manifesto e pela leitura completa, e as etapas do ``IntentModel.load``.
+Reporta a mediana de cada etapa e quais bibliotecas pesadas foram importadas.
+
+    python -m benchmarks.bench_startup --repeat 5 --backends torch onnx-int8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import print_table
+
+HEAVY_MODULES = ("datasets", "torch", "sentence_transformers", "transformers", "onnxruntime")
+
+
+def _child():
+    start = time.perf_counter()
+    # pylint: disable=import-outside-toplevel
+    import app  # noqa: F401  pylint: disable=unused-import
+    from app.builder import IndexBuilder
+    from app.model import IntentModel
+
+    row = {"imports": time.perf_counter() - start}
+
+    builder = IndexBuilder()
+    start = time.perf_counter()
+    builder._artifacts_are_valid()  # pylint: disable=protected-access
+    row["validate_manifest"] = time.perf_counter() - start
+    start = time.perf_counter()
+    builder._validate_artifacts()  # pylint: disable=protected-access
+    row["validate_full"] = time.perf_counter() - start
+
+    model = IntentModel()
+    model.load()
+    row.update({f"load_{k}": v for k, v in model.load_timings.items()})
+    row["modules"] = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(json.dumps(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=[os.getenv("ENCODER_BACKEND", "torch")])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    rows = []
+    for backend in args.backends:
+        runs = []
+        for _ in range(args.repeat):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                env={**os.environ, "ENCODER_BACKEND": backend},
+                capture_output=True, text=True, check=True,
+            )
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        stages = [k for k in runs[0] if k != "modules"]
+        row = {"backend": backend}
+        row.update({k: statistics.median(r[k] for r in runs) for k in stages})
+        row["modules"] = ",".join(runs[0]["modules"]) or "-"
+        rows.append(row)
+
+    print(f"repetições={args.repeat} (mediana, segundos)")
+    columns = ["backend", "imports", "validate_manifest", "validate_full"]
+    columns += [k for k in rows[0] if k.startswith("load_")] + ["modules"]
+    print_table(rows, columns)
+
+
+if __name__ == "__main__":
+    main()
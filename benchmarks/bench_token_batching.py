@@ -0,0 +1,104 @@
+"""
+Lotes fixos vs lotes agrupados por comprimento (orçamento de tokens) no encoder.
+
+Monta um corpus misto, com comandos curtos e mensagens longas de vários
+parágrafos embaralhados, e o codifica com ``encode_batched``: lotes fixos na
+ordem recebida (``max_tokens=0``) e lotes de comprimento parecido sob cada
+orçamento de tokens. Reporta vazão, fração de tokens de padding e a maior
+diferença para os embeddings de referência (texto a texto).
+
+    python -m benchmarks.bench_token_batching --texts 4000 --budgets 4096 8192 16384
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.config import ENCODER_BACKEND, ENCODER_THREADS, MODEL_NAME
+from app.encoders import (
+    default_model_dir,
+    encode_batched,
+    load_encoder,
+    token_budget_batches,
+    token_lengths,
+)
+
+from .common import SAMPLE_TEXTS, load_texts, print_table
+
+
+def mixed_corpus(n: int, long_fraction: float, seed: int = 0) -> list[str]:
+    """Comandos curtos misturados a mensagens longas (várias frases concatenadas)."""
+    rng = random.Random(seed)
+    short = load_texts(None, 1000)
+    texts = []
+    for _ in range(n):
+        if rng.random() < long_fraction:
+            texts.append(" ".join(rng.choices(SAMPLE_TEXTS, k=rng.randint(6, 20))))
+        else:
+            texts.append(rng.choice(short))
+    return texts
+
+
+def padding_ratio(lengths: np.ndarray, batches: list[np.ndarray]) -> float:
+    """Fração dos tokens processados que são padding."""
+    padded = sum(len(idx) * int(lengths[idx].max()) for idx in batches)
+    return 1.0 - float(lengths.sum()) / padded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default=ENCODER_BACKEND)
+    parser.add_argument("--texts", type=int, default=4000)
+    parser.add_argument("--long-fraction", type=float, default=0.2)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[32, 256])
+    parser.add_argument("--budgets", nargs="+", type=int, default=[4096, 8192, 16384])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    encoder = load_encoder(default_model_dir(MODEL_NAME), args.backend, ENCODER_THREADS)
+    texts = mixed_corpus(args.texts, args.long_fraction)
+    lengths = token_lengths(encoder, texts)
+    reference = encode_batched(encoder, texts, max_tokens=0, max_batch_size=1)
+
+    configs = [("fixed", 0, size) for size in args.batch_sizes]
+    configs += [("bucketed", budget, 256) for budget in args.budgets]
+    rows = []
+    for mode, budget, size in configs:
+        if budget:
+            batches = token_budget_batches(lengths, budget, size)
+        else:
+            batches = [np.arange(s, min(s + size, len(texts))) for s in range(0, len(texts), size)]
+        best, out = float("inf"), None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = encode_batched(encoder, texts, max_tokens=budget, max_batch_size=size)
+            best = min(best, time.perf_counter() - start)
+        rows.append({
+            "mode": mode,
+            "max_tokens": budget or "-",
+            "max_batch": size,
+            "batches": len(batches),
+            "padding_pct": padding_ratio(lengths, batches) * 100,
+            "texts_per_s": len(texts) / best,
+            "max_abs_diff": float(np.abs(out - reference).max()),
+        })
+
+    base = rows[0]["texts_per_s"]
+    for row in rows:
+        row["speedup"] = row["texts_per_s"] / base
+    print(
+        f"backend={args.backend} textos={len(texts)} longos={args.long_fraction:.0%} "
+        f"tokens/texto: mediana={int(np.median(lengths))} máx={int(lengths.max())} "
+        f"(melhor de {args.repeat})"
+    )
+    print_table(
+        rows,
+        ["mode", "max_tokens", "max_batch", "batches", "padding_pct", "texts_per_s", "speedup",
+         "max_abs_diff"],
+    )
+
+
+if __name__ == "__main__":
+    main()
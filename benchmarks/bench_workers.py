@@ -0,0 +1,97 @@
+"""
+Memória de N workers do gunicorn com e sem preload do modelo no master.
+
+Para cada modo, sobe ``gunicorn -c gunicorn.conf.py app:app``, espera o
+/health, faz algumas predições e soma o RSS e o PSS (memória proporcional, que
+divide as páginas compartilhadas entre os processos) do master e dos workers,
+lidos de ``/proc/<pid>/smaps_rollup`` (Linux).
+
+    python -m benchmarks.bench_workers --workers 4
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .bench_serving import _wait_ready
+from .common import SAMPLE_TEXTS, print_table
+
+
+def _memory_kb(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower()] = int(rest.split()[0])
+    return values
+
+
+def _children(pid: int) -> list[int]:
+    path = f"/proc/{pid}/task/{pid}/children"
+    with open(path, "r", encoding="utf-8") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _measure(preload: bool, workers: int, port: int, timeout: float) -> dict:
+    env = {
+        **os.environ,
+        "GUNICORN_PRELOAD": "true" if preload else "false",
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "HOST": "127.0.0.1",
+    }
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not _wait_ready("127.0.0.1", port, timeout):
+            raise SystemExit("gunicorn não respondeu a tempo.")
+        # Várias predições, para que cada worker sirva ao menos algumas
+        for i in range(20 * workers):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            body = json.dumps({"text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]})
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            conn.getresponse().read()
+            conn.close()
+        time.sleep(1)
+
+        master = _memory_kb(proc.pid)
+        children = [_memory_kb(pid) for pid in _children(proc.pid)]
+        return {
+            "mode": "preload" if preload else "sem preload",
+            "workers": len(children),
+            "master_rss_mb": master["rss"] / 1024,
+            "worker_rss_mb": sum(c["rss"] for c in children) / 1024 / max(1, len(children)),
+            "worker_pss_mb": sum(c["pss"] for c in children) / 1024 / max(1, len(children)),
+            "total_pss_mb": (master["pss"] + sum(c["pss"] for c in children)) / 1024,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    rows = [
+        _measure(preload, args.workers, args.port, args.startup_timeout)
+        for preload in (False, True)
+    ]
+    print_table(
+        rows,
+        ["mode", "workers", "master_rss_mb", "worker_rss_mb", "worker_pss_mb", "total_pss_mb"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Funções auxiliares compartilhadas pelos benchmarks.
+"""
+
+import json
+import os
+import random
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "check my balance",
+    "hi",
+    "what is my balance",
+    "i need to transfer money to my savings account",
+    "how do i reset my pin",
+    "can you book a table for two at an italian restaurant tonight",
+    "what's the weather going to be like tomorrow in boston",
+    "please freeze my credit card because i think i lost it somewhere",
+    "set an alarm for 7am",
+    "tell me a joke",
+]
+
+
+def load_texts(path: str = None, limit: int = 1000) -> list[str]:
+    """
+    Carrega textos de consulta para os benchmarks.
+
+    Aceita um arquivo NDJSON (campo ``text``) ou texto puro (uma consulta por
+    linha). Sem arquivo, usa o split de teste do CLINC-OOS local e, se ele não
+    estiver disponível, uma lista fixa de frases de exemplo.
+    """
+    texts: list[str] = []
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                texts.append(json.loads(line)["text"] if line.startswith("{") else line)
+    elif os.path.isdir("./datasets/clinc_oos"):
+        from datasets import load_dataset  # pylint: disable=import-outside-toplevel
+
+        dataset = load_dataset(
+            path="./datasets/clinc_oos", name="default", cache_dir="./datasets"
+        )
+        texts = list(dataset["test"]["text"])
+    else:
+        texts = list(SAMPLE_TEXTS)
+
+    if not texts:
+        raise ValueError("Nenhum texto de consulta encontrado.")
+    # Repete os textos até atingir o limite pedido
+    reps = -(-limit // len(texts))
+    return (texts * reps)[:limit]
+
+
+def latency_summary(latencies_s: list[float]) -> dict:
+    """Resume latências (em segundos) como percentis em milissegundos."""
+    arr = np.asarray(latencies_s, dtype="float64") * 1000.0
+    if arr.size == 0:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0}
+    return {
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p90_ms": float(np.percentile(arr, 90)),
+        "p99_ms": float(np.percentile(arr, 99)),
+    }
+
+
+def print_table(rows: list[dict], columns: list[str]):
+    """Imprime uma lista de dicionários como tabela alinhada."""
+    def fmt(value):
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    cells = [[fmt(row.get(col, "")) for col in columns] for row in rows]
+    widths = [max(len(col), *(len(r[i]) for r in cells)) for i, col in enumerate(columns)]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in cells:
+        print("  ".join(c.ljust(w) for c, w in zip(r, widths)))
+
+
+def write_corpus(path: str, size: int, n_intents: int = 150):
+    """Gera um corpus sintético JSONL (``text``, ``label``) para os benchmarks de build."""
+    rng = random.Random(0)
+    words = " ".join(SAMPLE_TEXTS).split()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(size):
+            text = " ".join(rng.choices(words, k=rng.randint(4, 16)))
+            f.write(json.dumps({"text": f"{text} {i}", "label": f"intent_{i % n_intents}"}) + "\n")
@@ -0,0 +1,41 @@
+"""
+Configuração do gunicorn para servir a API com vários workers que compartilham
+um único modelo carregado no master (preload + fork copy-on-write).
+
+    gunicorn -c gunicorn.conf.py app:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker app.asgi:asgi_app
+"""
+
+import os
+
+# Definidos antes de o app ser importado: o master só carrega os recursos, sem
+# criar pools de threads que não sobreviveriam ao fork; cada worker ajusta as
+# suas threads em post_fork. O índice é lido via memory-map.
+for _name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "ENCODER_THREADS"):
+    os.environ.setdefault(_name, "1")
+os.environ.setdefault("INDEX_MMAP", "true")
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+# Threads de inferência por worker (0 = núcleos / workers)
+worker_threads = int(os.getenv("WORKER_INFERENCE_THREADS", "0"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(float(os.getenv("SHUTDOWN_TIMEOUT_S", "30")))
+
+
+def on_starting(server):  # pylint: disable=unused-argument
+    """No master, depois do preload do app e antes de criar os workers."""
+    if preload_app:
+        from app.prefork import preload  # pylint: disable=import-outside-toplevel
+
+        preload()
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Em cada worker, logo após o fork."""
+    from app.prefork import init_worker  # pylint: disable=import-outside-toplevel
+
+    init_worker(workers, threads=worker_threads, preloaded=preload_app)
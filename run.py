@@ -1,20 +1,47 @@
 """
 Entrypoint da API Flask para o serviço de detecção de intents.
+
+Com ``SERVER_MODE=asgi`` a API roda no uvicorn (``app.asgi``), com a inferência
+em um executor limitado; o padrão continua sendo o servidor do Flask.
 """
 
 import os
-from app import app
-from app.model import load_model
+import time
+
+_start = time.perf_counter()
+from app import app  # noqa: E402  pylint: disable=wrong-import-position
+from app.config import BACKGROUND_LOAD, SERVER_MODE, SHUTDOWN_TIMEOUT_S  # noqa: E402
+from app.model import load_model, load_model_in_background  # noqa: E402
+
+IMPORT_SECONDS = time.perf_counter() - _start
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "5000"))
     debug = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    app.logger.info("Imports da aplicação: %.3fs", IMPORT_SECONDS)
+
+    if SERVER_MODE == "asgi":
+        import uvicorn
 
-    app.logger.info("Starting server at http://%s:%s (debug=%s)", host, port, debug)
+        app.logger.info("Starting ASGI server at http://%s:%s", host, port)
+        # O modelo é carregado no evento de startup do próprio app ASGI
+        uvicorn.run(
+            "app.asgi:asgi_app",
+            host=host,
+            port=port,
+            log_level="debug" if debug else "info",
+            timeout_graceful_shutdown=int(SHUTDOWN_TIMEOUT_S),
+        )
+    else:
+        app.logger.info("Starting server at http://%s:%s (debug=%s)", host, port, debug)
 
-    print("Inicializando recursos da API (modelo, índice FAISS, labels)...")
-    load_model()
-    print("Recursos carregados com sucesso. Servidor pronto para receber requisições.")
+        if BACKGROUND_LOAD:
+            print("Carregando recursos em segundo plano; acompanhe em /ready.")
+            load_model_in_background()
+        else:
+            print("Inicializando recursos da API (modelo, índice FAISS, labels)...")
+            load_model()
+            print("Recursos carregados com sucesso. Servidor pronto para receber requisições.")
 
-    app.run(host=host, port=port, debug=debug)
+        app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,36 @@
+"""Dublês compartilhados pelos testes."""
+
+import numpy as np
+
+
+class FakeEncoder:
+    """
+    Codificador determinístico. Com ``vectors``, cada texto conhecido vira o
+    vetor fixo correspondente; com ``by_number``, o vetor inteiro guarda o
+    número no fim do texto (0 sem número); senão, é one-hot pelo primeiro
+    caractere (``ord % dim``). Guarda os lotes recebidos em ``calls`` e as
+    threads pedidas por ``set_num_threads`` em ``threads``.
+    """
+
+    def __init__(self, dim: int = 16, vectors: dict = None, by_number: bool = False):
+        self.dim = dim
+        self.vectors = vectors
+        self.by_number = by_number
+        self.calls = []
+        self.threads = []
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        texts = list(texts)
+        self.calls.append(texts)
+        if self.vectors is not None:
+            return np.stack([self.vectors[t] for t in texts])
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            if self.by_number:
+                out[i] = float(text.rsplit(" ", 1)[-1]) if text[-1].isdigit() else 0.0
+            else:
+                out[i, ord(text[0]) % self.dim] = 1.0
+        return out
+
+    def set_num_threads(self, n: int):
+        self.threads.append(n)
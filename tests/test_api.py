@@ -20,6 +20,27 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.get_json(), {"status": "ok"})
 
+    def test_ready(self):
+        state = {"status": "ready", "error": None, "startup": {"total": 1.0}}
+        with patch("app.api.readiness", lambda: state):
+            resp = self.client.get("/ready")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), state)
+
+    def test_not_ready(self):
+        state = {"status": "loading", "error": None, "startup": {}}
+        with patch("app.api.readiness", lambda: state):
+            resp = self.client.get("/ready")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.get_json()["status"], "loading")
+
+    def test_cache_stats(self):
+        stats = {"embedding": {"hits": 1, "misses": 2}, "result": None}
+        with patch("app.api.cache_stats", lambda: stats):
+            resp = self.client.get("/cache/stats")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), stats)
+
     def test_predict_missing_text(self):
         resp = self.client.post("/predict", json={})
         self.assertEqual(resp.status_code, 400)
@@ -28,7 +49,7 @@ class TestAPI(unittest.TestCase):
 
     def test_predict_success(self):
         with patch("app.api.preprocess", lambda text: text + "_pp"), \
-             patch("app.api.predict", lambda text, top_k, threshold: {"query": text, "predicted_intent": "i", "candidates": ["i"], "scores": [1.0]}):
+             patch("app.api.predict", lambda text, top_k, threshold, timings=None: {"query": text, "predicted_intent": "i", "candidates": ["i"], "scores": [1.0]}):
             resp = self.client.post("/predict", json={"text": "test", "top_k": 3, "threshold": 0.6})
         self.assertEqual(resp.status_code, 200)
         data = resp.get_json()
@@ -36,7 +57,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(data["predicted_intent"], "i")
 
     def test_predict_internal_error(self):
-        def raise_error(text, top_k, threshold):
+        def raise_error(text, top_k, threshold, timings=None):
             raise RuntimeError("fail")
 
         with patch("app.api.predict", raise_error):
@@ -45,20 +66,168 @@ class TestAPI(unittest.TestCase):
         data = resp.get_json()
         self.assertEqual(data.get("error"), "Internal server error")
 
+    def test_predict_batch_success(self):
+        def fake_batch(texts, top_k, threshold, timings=None):
+            return [{"query": t, "predicted_intent": "i", "candidates": ["i"], "scores": [1.0]} for t in texts]
+
+        with patch("app.api.preprocess_batch", lambda texts: [t + "_pp" for t in texts]), \
+             patch("app.api.predict_batch", fake_batch):
+            resp = self.client.post("/predict_batch", json={"texts": ["a", "b"], "top_k": [3, 4]})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual([r["query"] for r in data["results"]], ["a_pp", "b_pp"])
+
+    def test_predict_timing_header(self):
+        def fake_predict(text, top_k, threshold, timings=None):
+            timings["encode"] = 0.002
+            return {"query": text, "predicted_intent": "i", "candidates": ["i"], "scores": [1.0]}
+
+        with patch("app.api.predict", fake_predict):
+            plain = self.client.post("/predict", json={"text": "test"}).get_json()
+            resp = self.client.post(
+                "/predict", json={"text": "test"}, headers={"X-Debug-Timing": "1"}
+            )
+        self.assertNotIn("timing", plain)
+        timing = resp.get_json()["timing"]
+        self.assertEqual(timing["encode_ms"], 2.0)
+        self.assertIn("preprocess_ms", timing)
+        self.assertIn("total_ms", timing)
+
+    def test_metrics(self):
+        from app import metrics
+
+        metrics.REGISTRY.clear()
+        with patch("app.api.predict_batch", lambda texts, top_k, threshold, timings=None: []):
+            self.client.post("/predict_batch", json={"texts": ["a"]})
+        resp = self.client.get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        text = resp.get_data(as_text=True)
+        self.assertIn('intent_request_seconds_count{route="/predict_batch"} 1', text)
+        self.assertIn('intent_stage_seconds_count{stage="preprocess"} 1', text)
+        self.assertIn("intent_model_loaded", text)
+
+    def test_predict_batch_missing_texts(self):
+        resp = self.client.post("/predict_batch", json={"texts": []})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/predict_batch", json={"texts": ["ok", " "]})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_predict_invalid_params(self):
+        for payload in ({"top_k": 0}, {"top_k": 10**6}, {"top_k": "x"}, {"threshold": "high"}, {"threshold": None}):
+            with patch("app.api.predict") as fake_predict:
+                resp = self.client.post("/predict", json={"text": "test", **payload})
+            self.assertEqual(resp.status_code, 400, payload)
+            fake_predict.assert_not_called()
+
+        with patch("app.api.predict_batch") as fake_batch:
+            for payload in ({"top_k": [1, 0]}, {"top_k": [1, 10**6]}, {"top_k": [1]}, {"threshold": [0.5, "x"]}):
+                resp = self.client.post("/predict_batch", json={"texts": ["a", "b"], **payload})
+                self.assertEqual(resp.status_code, 400, payload)
+            fake_batch.assert_not_called()
+
+    def test_predict_batch_invalid_params(self):
+        def raise_value_error(texts, top_k, threshold, timings=None):
+            raise ValueError("'top_k' deve ter 2 valores, recebido 1.")
+
+        with patch("app.api.predict_batch", raise_value_error):
+            resp = self.client.post("/predict_batch", json={"texts": ["a", "b"], "top_k": [1]})
+        self.assertEqual(resp.status_code, 400)
+
+    def _wait_job(self, job_id):
+        from app.jobs import jobs
+
+        jobs.wait(job_id, timeout=5)
+        return self.client.get(f"/build_index/{job_id}")
+
     def test_build_index_success(self):
-        with patch("app.api.build_index", lambda: ("idx", "lbl")):
+        with patch("app.api.build_and_reload", lambda force: {"index_path": "idx", "labels_path": "lbl"}):
             resp = self.client.post("/build_index")
-        self.assertEqual(resp.status_code, 201)
-        data = resp.get_json()
-        self.assertEqual(data.get("index_path"), "idx")
-        self.assertEqual(data.get("labels_path"), "lbl")
+            self.assertEqual(resp.status_code, 202)
+            job_id = resp.get_json()["job_id"]
+            self.assertEqual(resp.headers["Location"], f"/build_index/{job_id}")
+            status = self._wait_job(job_id)
+        self.assertEqual(status.status_code, 200)
+        data = status.get_json()
+        self.assertEqual(data.get("status"), "succeeded")
+        self.assertEqual(data["result"].get("index_path"), "idx")
+        self.assertEqual(data["result"].get("labels_path"), "lbl")
+
+    def test_build_index_force(self):
+        calls = []
+        with patch("app.api.build_and_reload", lambda force: calls.append(force) or {}):
+            resp = self.client.post("/build_index", json={"force": True})
+            self._wait_job(resp.get_json()["job_id"])
+        self.assertEqual(calls, [True])
 
     def test_build_index_failure(self):
-        def raise_error():
+        def raise_error(force):
             raise RuntimeError("fail")
 
-        with patch("app.api.build_index", raise_error):
+        with patch("app.api.build_and_reload", raise_error):
             resp = self.client.post("/build_index")
-        self.assertEqual(resp.status_code, 500)
-        data = resp.get_json()
-        self.assertEqual(data.get("error"), "Falha ao gerar índice")
\ No newline at end of file
+            status = self._wait_job(resp.get_json()["job_id"])
+        data = status.get_json()
+        self.assertEqual(data.get("status"), "failed")
+        self.assertEqual(data.get("error"), "fail")
+
+    def test_mutations_refused_with_several_workers(self):
+        with patch("app.api.worker_count", lambda: 2), patch("app.api.jobs") as fake_jobs, \
+             patch("app.api.add_examples") as fake_add, patch("app.api.remove_examples") as fake_remove:
+            responses = [
+                self.client.post("/build_index", json={"force": True}),
+                self.client.post("/examples", json={"examples": [{"text": "a", "label": "b"}]}),
+                self.client.delete("/examples", json={"ids": [1]}),
+                self.client.post("/examples/compact"),
+            ]
+        self.assertEqual([r.status_code for r in responses], [409] * 4)
+        self.assertIn("WEB_CONCURRENCY=1", responses[0].get_json()["error"])
+        fake_jobs.submit.assert_not_called()
+        fake_add.assert_not_called()
+        fake_remove.assert_not_called()
+
+    def test_build_index_unknown_job(self):
+        resp = self.client.get("/build_index/unknown")
+        self.assertEqual(resp.status_code, 404)
+
+
+    def test_add_examples(self):
+        calls = []
+
+        def fake_add(texts, labels):
+            calls.append((texts, labels))
+            return [10, 11]
+
+        with patch("app.api.add_examples", fake_add):
+            resp = self.client.post(
+                "/examples",
+                json={"examples": [{"text": " oi ", "label": "greet"}, {"text": "tchau", "label": "bye"}]},
+            )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.get_json()["ids"], [10, 11])
+        self.assertEqual(calls, [(["oi", "tchau"], ["greet", "bye"])])
+
+    def test_add_examples_invalid(self):
+        resp = self.client.post("/examples", json={"examples": [{"text": "oi"}]})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_remove_examples(self):
+        with patch("app.api.remove_examples", lambda ids: len(ids)):
+            resp = self.client.delete("/examples", json={"ids": [1, 2]})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["removed"], 2)
+
+    def test_remove_examples_unknown_id(self):
+        def raise_value_error(ids):
+            raise ValueError("Id de exemplo inexistente.")
+
+        with patch("app.api.remove_examples", raise_value_error):
+            resp = self.client.delete("/examples", json={"ids": [999]})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_compact_examples(self):
+        with patch("app.api.compact_index", lambda: {"vectors": 3, "index_path": "idx"}):
+            resp = self.client.post("/examples/compact")
+            self.assertEqual(resp.status_code, 202)
+            status = self._wait_job(resp.get_json()["job_id"])
+        self.assertEqual(status.get_json()["result"]["vectors"], 3)
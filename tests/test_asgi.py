@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest.mock import patch
+
+try:
+    import asgiref  # noqa: F401
+    HAS_ASGIREF = True
+except ImportError:
+    HAS_ASGIREF = False
+
+if HAS_ASGIREF:
+    from app.asgi import IntentASGIApp
+    from app.executor import InferenceExecutor, Overloaded
+
+
+def call(app, method, path, payload=None, headers=()):
+    """Executa uma requisição HTTP no app ASGI e retorna (status, headers, json)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    data = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], dict(start["headers"]), json.loads(data) if data else None
+
+
+def fake_predict(text, top_k, threshold, timings=None):
+    return {"query": text, "predicted_intent": "i", "candidates": ["i"], "scores": [1.0]}
+
+
+@unittest.skipUnless(HAS_ASGIREF, "asgiref library is required for ASGI tests")
+class TestASGIApp(unittest.TestCase):
+    def setUp(self):
+        self.executor = InferenceExecutor(max_workers=1, max_queue=0)
+        self.app = IntentASGIApp(executor=self.executor, load_on_startup=False)
+
+    def tearDown(self):
+        self.executor.shutdown(timeout=5)
+
+    def test_health(self):
+        status, _, data = call(self.app, "GET", "/health")
+        self.assertEqual((status, data), (200, {"status": "ok"}))
+
+    def test_ready(self):
+        with patch("app.asgi.readiness", lambda: {"status": "loading"}):
+            status, _, data = call(self.app, "GET", "/ready")
+        self.assertEqual((status, data), (503, {"status": "loading"}))
+
+    def test_predict(self):
+        with patch("app.asgi.predict", fake_predict):
+            status, _, data = call(self.app, "POST", "/predict", {"text": "Oi!", "top_k": 3})
+        self.assertEqual(status, 200)
+        self.assertEqual(data["query"], "oi")
+
+    def test_predict_timing_header(self):
+        with patch("app.asgi.predict", fake_predict):
+            status, _, data = call(
+                self.app, "POST", "/predict", {"text": "oi"}, headers=[(b"x-debug-timing", b"1")]
+            )
+        self.assertEqual(status, 200)
+        self.assertEqual(set(data["timing"]), {"preprocess_ms", "total_ms"})
+
+    def test_predict_missing_text(self):
+        status, _, data = call(self.app, "POST", "/predict", {})
+        self.assertEqual(status, 400)
+        self.assertEqual(data["error"], "Missing 'text' parameter")
+
+    def test_invalid_json(self):
+        status, _, _ = call(self.app, "POST", "/predict", "texto")
+        self.assertEqual(status, 400)
+
+    def test_predict_batch(self):
+        def fake_batch(texts, top_k, threshold, timings=None):
+            return [fake_predict(t, top_k, threshold) for t in texts]
+
+        with patch("app.asgi.predict_batch", fake_batch):
+            status, _, data = call(self.app, "POST", "/predict_batch", {"texts": ["a", "b"]})
+        self.assertEqual(status, 200)
+        self.assertEqual([r["query"] for r in data["results"]], ["a", "b"])
+
+    def test_predict_batch_invalid_list(self):
+        def bad_batch(texts, top_k, threshold, timings=None):
+            raise ValueError("'top_k' deve ter 2 valores")
+
+        with patch("app.asgi.predict_batch", bad_batch):
+            status, _, data = call(
+                self.app, "POST", "/predict_batch", {"texts": ["a", "b"], "top_k": [1]}
+            )
+        self.assertEqual(status, 400)
+        self.assertIn("top_k", data["error"])
+
+    def test_internal_error(self):
+        def fail(text, top_k, threshold, timings=None):
+            raise RuntimeError("fail")
+
+        with patch("app.asgi.predict", fail):
+            status, _, data = call(self.app, "POST", "/predict", {"text": "x"})
+        self.assertEqual(status, 500)
+        self.assertEqual(data["detail"], "fail")
+
+    def test_overloaded_returns_503(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        self.executor.submit(block)
+        started.wait(5)
+        try:
+            with patch("app.asgi.predict", fake_predict):
+                status, headers, _ = call(self.app, "POST", "/predict", {"text": "x"})
+        finally:
+            release.set()
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b"retry-after"], b"1")
+
+    def test_deadline_returns_504(self):
+        release = threading.Event()
+
+        def slow(text, top_k, threshold, timings=None):
+            release.wait(5)
+
+        try:
+            with patch("app.asgi.predict", slow):
+                status, _, data = call(
+                    self.app, "POST", "/predict", {"text": "x"},
+                    headers=[(b"x-request-timeout-ms", b"50")],
+                )
+        finally:
+            release.set()
+        self.assertEqual(status, 504)
+        self.assertEqual(data["error"], "Deadline exceeded")
+
+    def test_other_routes_use_flask(self):
+        stats = {"embedding": None, "result": None}
+        with patch("app.api.cache_stats", lambda: stats):
+            status, _, data = call(self.app, "GET", "/cache/stats")
+        self.assertEqual((status, data), (200, stats))
+
+    def test_lifespan_shutdown_drains_executor(self):
+        events = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return events.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(self.app({"type": "lifespan"}, receive, send))
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        with self.assertRaises(Overloaded):
+            self.executor.submit(lambda: 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
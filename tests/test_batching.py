@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+from app.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_coalesces_concurrent_calls(self):
+        batch_sizes = []
+
+        def handler(items):
+            batch_sizes.append(len(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=200)
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = batcher.run(i)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.close()
+
+        self.assertEqual(results, {i: i * 2 for i in range(8)})
+        self.assertEqual(sum(batch_sizes), 8)
+        self.assertLess(len(batch_sizes), 8)
+
+    def test_respects_max_batch_size(self):
+        batch_sizes = []
+
+        def handler(items):
+            batch_sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(handler, max_batch_size=3, max_wait_ms=50)
+        futures = [batcher.submit(i) for i in range(10)]
+        self.assertEqual([f.result(timeout=5) for f in futures], list(range(10)))
+        batcher.close()
+        self.assertTrue(all(size <= 3 for size in batch_sizes))
+
+    def test_handler_error_propagates(self):
+        def handler(items):
+            raise RuntimeError("fail")
+
+        batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.run("x", timeout=5)
+        batcher.close()
+
+    def test_failing_item_does_not_fail_batch(self):
+        def handler(items):
+            if any(item < 0 for item in items):
+                raise ValueError("'top_k' deve ser >= 1.")
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=200)
+        good, bad = batcher.submit(1), batcher.submit(-1)
+        self.assertEqual(good.result(timeout=5), 2)
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        batcher.close()
+
+    def test_submit_after_close(self):
+        batcher = MicroBatcher(lambda items: items)
+        batcher.close()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1)
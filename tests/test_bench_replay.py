@@ -0,0 +1,98 @@
+import json
+import os
+import shlex
+import tempfile
+import unittest
+
+from benchmarks.bench_replay import (
+    compare,
+    load_baseline,
+    load_requests,
+    main,
+    quality,
+    replay,
+    save_baseline,
+)
+
+
+class FakeTarget:
+    """Alvo falso: prevê o primeiro termo do texto; 'fail' gera erro."""
+
+    def __call__(self, request):
+        texts = request.get("texts") or [request["text"]]
+        if "fail" in texts:
+            raise RuntimeError("falhou")
+        return 200, [{"predicted_intent": t.split()[0]} for t in texts]
+
+
+class TestReplay(unittest.TestCase):
+    def test_load_requests(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write('{"text": "oi", "label": "greeting"}\n\n')
+            f.write('{"texts": ["a", "b"]}\n')
+            f.write("texto puro\n")
+        self.addCleanup(os.remove, f.name)
+        requests = load_requests(f.name)
+        self.assertEqual(requests[2], {"text": "texto puro"})
+        self.assertEqual(len(load_requests(f.name, limit=2)), 2)
+
+    def test_replay_counts_and_quality(self):
+        requests = [
+            {"text": "balance now", "label": "balance"},
+            {"texts": ["oos x", "alarm y"], "labels": ["oos", "timer"]},
+            {"text": "fail"},
+        ]
+        report = replay(FakeTarget(), requests, concurrency=2)
+        self.assertEqual((report["ok"], report["errors"]), (2, 1))
+        self.assertEqual(report["labeled"], 3)
+        self.assertAlmostEqual(report["accuracy"], 2 / 3)
+        self.assertEqual(report["oos_recall"], 1.0)
+        self.assertEqual(report["in_scope_accuracy"], 0.5)
+
+    def test_rate_limits_replay(self):
+        report = replay(FakeTarget(), [{"text": "a"}] * 5, concurrency=1, rate=100)
+        self.assertGreaterEqual(report["seconds"], 0.04)
+
+    def test_quality_without_labels(self):
+        self.assertEqual(quality([]), {})
+
+
+class TestBaseline(unittest.TestCase):
+    BASE = {"rps": 100.0, "p99_ms": 10.0, "accuracy": 0.9, "oos_rate": 0.2, "requests": 10}
+
+    def test_within_tolerance(self):
+        report = {"rps": 95.0, "p99_ms": 10.5, "accuracy": 0.898, "oos_rate": 0.203, "requests": 10}
+        self.assertEqual(compare(report, self.BASE, tolerance=0.1), [])
+
+    def test_regressions(self):
+        report = {"rps": 80.0, "p99_ms": 12.0, "accuracy": 0.85, "oos_rate": 0.1}
+        names = [line.split(":")[0] for line in compare(report, self.BASE, tolerance=0.1)]
+        self.assertEqual(names, ["accuracy", "oos_rate", "p99_ms", "rps"])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+            save_baseline(path, "model:test", self.BASE)
+            save_baseline(path, "app:test", {"rps": 1.0})
+            self.assertEqual(load_baseline(path, "model:test"), self.BASE)
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(sorted(json.load(f)), ["app:test", "model:test"])
+            self.assertEqual(load_baseline(path, "nope"), {})
+
+
+@unittest.skipUnless(
+    os.getenv("BENCH_BASELINE"), "BENCH_BASELINE aponta a baseline da suíte de regressão"
+)
+class TestRegressionSuite(unittest.TestCase):
+    """
+    Replay real contra a baseline (opt-in): ``BENCH_BASELINE=benchmarks/baseline.json
+    BENCH_ARGS="--target app --concurrency 8" python -m pytest tests/test_bench_replay.py``.
+    """
+
+    def test_no_regression(self):
+        args = ["--baseline", os.environ["BENCH_BASELINE"]]
+        self.assertEqual(main(shlex.split(os.getenv("BENCH_ARGS", "")) + args), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
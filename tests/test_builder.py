@@ -1,12 +1,23 @@
 import unittest
 
+import numpy as np
+
 try:
     import faiss
     HAS_FAISS = True
 except ImportError:
     HAS_FAISS = False
 
-from app.builder import build_hnsw
+from app.builder import (
+    apply_search_params,
+    build_hnsw,
+    compute_centroids,
+    make_index,
+    read_index,
+    train_index,
+    write_index,
+)
+from tests.helpers import FakeEncoder
 
 
 @unittest.skipUnless(HAS_FAISS, "faiss library is required for builder tests")
@@ -26,4 +37,150 @@ class TestBuilder(unittest.TestCase):
         index = build_hnsw(dim, m=m, ef_construction=ef_construction)
         self.assertEqual(index.d, dim)
         self.assertEqual(index.hnsw.efConstruction, ef_construction)
-        self.assertEqual(index.hnsw.efSearch, 128)
\ No newline at end of file
+        self.assertEqual(index.hnsw.efSearch, 128)
+
+    def test_make_index_flat_ignores_hnsw_params(self):
+        index = make_index(16, "Flat", search_params="efSearch=64")
+        self.assertEqual(index.d, 16)
+        self.assertEqual(index.metric_type, faiss.METRIC_INNER_PRODUCT)
+
+    def test_make_index_sets_ef_construction(self):
+        index = faiss.downcast_index(make_index(16, "HNSW16,SQ8", 123, "efSearch=77"))
+        self.assertEqual(index.hnsw.efConstruction, 123)
+        self.assertEqual(index.hnsw.efSearch, 77)
+
+    def test_train_and_search_params_ivf(self):
+        data = np.random.default_rng(0).standard_normal((400, 16)).astype("float32")
+        index = make_index(16, "IVF8,Flat", search_params="nprobe=4")
+        self.assertFalse(index.is_trained)
+        train_index(index, data)
+        self.assertTrue(index.is_trained)
+        apply_search_params(index, "nprobe=2, efSearch=10")
+        self.assertEqual(faiss.extract_index_ivf(index).nprobe, 2)
+
+    def test_compute_centroids(self):
+        emb = np.array([[1, 0], [0, 1], [1, 0]], dtype="float32")
+        centroids = compute_centroids(emb, np.array([0, 0, 2]), 3)
+        self.assertEqual(centroids.shape, (3, 2))
+        np.testing.assert_allclose(centroids[0], [0.70710677, 0.70710677], rtol=1e-6)
+        np.testing.assert_array_equal(centroids[1], [0, 0])
+        np.testing.assert_array_equal(centroids[2], [1, 0])
+
+    def test_write_and_read_index_mmap(self):
+        import os
+        import tempfile
+
+        data = np.random.default_rng(0).standard_normal((50, 16)).astype("float32")
+        index = make_index(16, "HNSW16,Flat", search_params="efSearch=32")
+        index.add(data)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.faiss")
+            write_index(index, path)
+            self.assertFalse(os.path.exists(f"{path}.tmp"))
+            for mmap in (False, True):
+                loaded = read_index(path, mmap=mmap)
+                self.assertEqual(loaded.ntotal, 50)
+                _, ids = loaded.search(data[:3], 1)
+                self.assertEqual(ids[:, 0].tolist(), [0, 1, 2])
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for builder tests")
+class TestStreamingBuild(unittest.TestCase):
+    def setUp(self):
+        import json
+        import os
+        import tempfile
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.rows = [(f"{c}{i}", f"intent_{c}") for i in range(25) for c in "zyxab"]
+        self.source = os.path.join(self._tmp.name, "corpus.jsonl")
+        with open(self.source, "w", encoding="utf-8") as f:
+            for text, label in self.rows:
+                f.write(json.dumps({"text": text, "label": label}) + "\n")
+
+    def _build(self, factory, **kwargs):
+        from unittest.mock import patch
+
+        from app.builder import IndexBuilder
+        from app.ingest import Corpus
+
+        builder = IndexBuilder(
+            model_name="m",
+            data_dir=self._tmp.name,
+            index_factory=factory,
+            search_params="nprobe=4",
+            corpus=Corpus(self.source),
+            **kwargs,
+        )
+        builder.model = FakeEncoder()
+        with patch("app.builder.EMBEDDING_STORE_ENABLED", False):
+            builder.build(force=True)
+        return builder
+
+    def test_chunked_build_matches_corpus(self):
+        from app.labels import LabelStore
+
+        builder = self._build("Flat", chunk_size=7)
+        index = read_index(builder.index_path)
+        self.assertEqual(index.ntotal, len(self.rows))
+        labels = LabelStore.load(self._tmp.name, "m", load_texts=True)
+        # Vocabulário em ordem alfabética, como em LabelStore.from_labels
+        self.assertEqual(labels.intent_names, sorted({l for _, l in self.rows}))
+        self.assertEqual(labels.texts, [t for t, _ in self.rows])
+        self.assertEqual(list(labels.names(np.arange(5))), [l for _, l in self.rows[:5]])
+
+        expected = compute_centroids(
+            FakeEncoder().encode([t for t, _ in self.rows]),
+            labels.label_ids,
+            len(labels.intent_names),
+        )
+        np.testing.assert_allclose(np.load(builder.centroids_path), expected, atol=1e-6)
+
+        report = builder.last_report
+        self.assertEqual((report["texts"], report["chunks"]), (len(self.rows), 18))
+        self.assertIn("peak_rss_mb", report)
+
+    def test_trains_on_sample_before_adding(self):
+        builder = self._build("IVF4,Flat", chunk_size=10, train_sample_size=40)
+        index = read_index(builder.index_path)
+        self.assertTrue(index.is_trained)
+        self.assertEqual(index.ntotal, len(self.rows))
+        self.assertIn("train_seconds", builder.last_report)
+
+    def test_saves_exact_vectors_for_rerank(self):
+        import os
+
+        builder = self._build("HNSW16,SQ8", chunk_size=9, save_vectors=True)
+        vectors = np.load(builder.vectors_path)
+        np.testing.assert_allclose(
+            vectors, FakeEncoder().encode([t for t, _ in self.rows]), atol=1e-6
+        )
+        # Um build sem os vetores apaga os de um build anterior
+        builder = self._build("HNSW16,SQ8", chunk_size=9, save_vectors=False)
+        self.assertFalse(os.path.exists(builder.vectors_path))
+
+    def test_rebuild_drops_delta_log(self):
+        import os
+
+        from app.delta import DeltaLog, delta_path
+
+        DeltaLog(delta_path(self._tmp.name, "m")).append({"op": "remove", "ids": [0]})
+        builder = self._build("Flat")
+        self.assertFalse(os.path.exists(builder.delta_path))
+
+    def test_rebuild_drops_calibration(self):
+        import os
+
+        from app.scoring import Calibration, calibration_path
+
+        path = calibration_path(self._tmp.name, "m")
+        Calibration("majority", 0.05, 3, [0.0, 0.0, 0.0], 0.0, 0.5).save(path)
+        self._build("Flat")
+        self.assertFalse(os.path.exists(path))
+
+    def test_binary_index_requires_vectors(self):
+        with self.assertRaises(ValueError):
+            self._build("LSHrt", save_vectors=False)
+        builder = self._build("LSHrt", save_vectors=True)
+        self.assertEqual(read_index(builder.index_path).ntotal, len(self.rows))
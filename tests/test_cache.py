@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = LRUCache(max_entries=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_eviction(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_cap(self):
+        cache = LRUCache(max_entries=100, max_bytes=3 * 4096)
+        for i in range(10):
+            cache.put(i, np.zeros(1024, dtype="float32"))
+        self.assertLessEqual(cache.stats()["bytes"], 3 * 4096)
+        self.assertLess(len(cache), 10)
+        self.assertIsNotNone(cache.get(9))
+
+    def test_value_larger_than_cap_is_ignored(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put("big", np.zeros(1024, dtype="float32"))
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl_expiration(self):
+        cache = LRUCache(ttl_seconds=10)
+        with patch("app.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with patch("app.cache.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("app.cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+        self.assertEqual(cache.stats()["bytes"], 0)
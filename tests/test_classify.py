@@ -0,0 +1,140 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.classify import RecordReader, checkpoint_path, classify_file
+
+
+class FakeModel:
+    """Modelo mínimo: a intenção é a primeira palavra do texto pré-processado."""
+
+    def __init__(self, fail_on_chunk=None):
+        self.fail_on_chunk = fail_on_chunk
+        self.chunks = 0
+
+    def encode(self, texts, timings=None):
+        return np.zeros((len(texts), 4), dtype="float32")
+
+    def predict_embeddings(self, emb, texts, top_k, threshold, timings=None):
+        self.chunks += 1
+        if self.chunks == self.fail_on_chunk:
+            raise RuntimeError("falha simulada")
+        return [
+            {"query": t, "predicted_intent": t.split()[0], "candidates": [t.split()[0]],
+             "scores": [0.9], "path": "knn"}
+            for t in texts
+        ]
+
+
+class TestClassifyFile(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.input = os.path.join(self._tmp.name, "in.jsonl")
+        with open(self.input, "w", encoding="utf-8") as f:
+            for i in range(53):
+                f.write(json.dumps({"msg": f"Intent{i % 3} Número {i}!", "uid": f"u{i}"}) + "\n")
+                if i == 10:
+                    f.write("\n")
+
+    def path(self, name):
+        return os.path.join(self._tmp.name, name)
+
+    def read_jsonl(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_writes_one_result_per_record_in_order(self):
+        report = classify_file(
+            FakeModel(), self.input, self.path("out.jsonl"), 5, 0.5,
+            text_column="msg", chunk_size=7, queue_size=1,
+        )
+        rows = self.read_jsonl(self.path("out.jsonl"))
+        self.assertEqual([r["id"] for r in rows], list(range(53)))
+        self.assertEqual(rows[4]["text"], "Intent1 Número 4!")
+        # A predição usa o texto pré-processado
+        self.assertEqual(rows[4]["predicted_intent"], "intent1")
+        self.assertNotIn("query", rows[4])
+        self.assertEqual((report["records"], report["chunks"]), (53, 8))
+        for stage in ("read", "encode", "search", "write"):
+            self.assertIn(f"{stage}_seconds", report)
+        self.assertFalse(os.path.exists(checkpoint_path(self.path("out.jsonl"))))
+
+    def test_resume_after_failure_matches_full_run(self):
+        classify_file(FakeModel(), self.input, self.path("full.jsonl"), 5, 0.5,
+                      text_column="msg", id_column="uid", chunk_size=5)
+        out = self.path("out.jsonl")
+        with self.assertRaises(RuntimeError):
+            classify_file(FakeModel(fail_on_chunk=4), self.input, out, 5, 0.5,
+                          text_column="msg", id_column="uid", chunk_size=5)
+        # O erro para o pipeline: só os blocos anteriores ao que falhou podem ter sido gravados
+        done = 0
+        if os.path.exists(checkpoint_path(out)):
+            with open(checkpoint_path(out), "r", encoding="utf-8") as f:
+                done = json.load(f)["records"]
+        self.assertLessEqual(done, 15)
+        # Lixo depois do checkpoint (escrita interrompida) é descartado
+        with open(out, "a", encoding="utf-8") as f:
+            f.write('{"id": "parcial"')
+
+        report = classify_file(FakeModel(), self.input, out, 5, 0.5,
+                               text_column="msg", id_column="uid", chunk_size=5, resume=True)
+        self.assertEqual((report["resumed_from"], report["records"]), (done, 53 - done))
+        self.assertEqual(self.read_jsonl(out), self.read_jsonl(self.path("full.jsonl")))
+        self.assertFalse(os.path.exists(checkpoint_path(out)))
+
+    def test_resume_rejects_other_input(self):
+        out = self.path("out.jsonl")
+        open(out, "w", encoding="utf-8").close()
+        with open(checkpoint_path(out), "w", encoding="utf-8") as f:
+            json.dump({"input": os.path.abspath(self.input), "offset": 0, "records": 0,
+                       "output_bytes": 0}, f)
+        other = self.path("other.jsonl")
+        with open(other, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"msg": "x"}) + "\n")
+        with self.assertRaises(ValueError):
+            classify_file(FakeModel(), other, out, 5, 0.5, text_column="msg", resume=True)
+
+    def test_csv_input_and_output(self):
+        source = self.path("in.csv")
+        with open(source, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["uid", "text"])
+            for i in range(12):
+                writer.writerow([f"u{i}", f"intent{i % 2} linha\ncom quebra" if i == 3 else f"intent{i % 2} x"])
+
+        out = self.path("out.csv")
+        with self.assertRaises(RuntimeError):
+            classify_file(FakeModel(fail_on_chunk=2), source, out, 5, 0.5,
+                          id_column="uid", chunk_size=4)
+        classify_file(FakeModel(), source, out, 5, 0.5, id_column="uid", chunk_size=4, resume=True)
+        with open(out, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r["id"] for r in rows], [f"u{i}" for i in range(12)])
+        self.assertEqual(rows[3]["text"], "intent1 linha\ncom quebra")
+        self.assertEqual(rows[3]["predicted_intent"], "intent1")
+
+
+class TestRecordReader(unittest.TestCase):
+    def test_offsets_resume_between_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "in.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write('text\nfirst\n"second\nrecord"\nthird\n')
+            reader = RecordReader(path)
+            chunks = list(reader.chunks(2))
+            self.assertEqual([c[1] for c in chunks], [["first", "second\nrecord"], ["third"]])
+            rest = list(RecordReader(path).chunks(2, start=chunks[0][2], first_record=2))
+            self.assertEqual(rest, [([2], ["third"], chunks[1][2])])
+
+    def test_rejects_other_formats(self):
+        with self.assertRaises(ValueError):
+            RecordReader("dump.parquet")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from app.delta import DeltaLog, delta_path
+
+
+class TestDeltaLog(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.log = DeltaLog(delta_path(self._tmp.name, "m"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_append_and_replay(self):
+        self.log.append({"op": "add", "ids": [3], "texts": ["olá"], "labels": ["greet"]})
+        self.log.append({"op": "remove", "ids": [1]})
+        records = list(self.log.records())
+        self.assertEqual([r["op"] for r in records], ["add", "remove"])
+        self.assertEqual(records[0]["texts"], ["olá"])
+
+    def test_missing_log_is_empty(self):
+        self.assertEqual(list(self.log.records()), [])
+
+    def test_truncated_line_is_skipped(self):
+        self.log.append({"op": "remove", "ids": [1]})
+        with open(self.log.path, "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "ids"')
+        self.assertEqual(len(list(self.log.records())), 1)
+
+    def test_truncate(self):
+        self.log.append({"op": "remove", "ids": [1]})
+        self.log.truncate()
+        self.assertFalse(os.path.exists(self.log.path))
+        self.assertEqual(list(self.log.records()), [])
@@ -0,0 +1,87 @@
+import glob
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.embedding_store import EmbeddingStore, text_key
+
+
+def fake_vectors(texts):
+    return np.asarray([[float(len(t)), float(text_key(t) % 97)] for t in texts], dtype="float32")
+
+
+class CountingEncoder:
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+
+    def __call__(self, texts):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("crash")
+        self.calls.append(list(texts))
+        return fake_vectors(texts)
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_encodes_only_new_texts(self):
+        encoder = CountingEncoder()
+        store = EmbeddingStore(self.data_dir, "m")
+        first = store.encode(["a", "bb", "a"], encoder)
+        np.testing.assert_array_equal(first, fake_vectors(["a", "bb", "a"]))
+        self.assertEqual(sorted(encoder.calls[0]), ["a", "bb"])
+
+        # Nova instância (novo build) reaproveita o que foi persistido
+        encoder = CountingEncoder()
+        store = EmbeddingStore(self.data_dir, "m")
+        second = store.encode(["bb", "ccc", "a"], encoder)
+        np.testing.assert_array_equal(second, fake_vectors(["bb", "ccc", "a"]))
+        self.assertEqual(encoder.calls, [["ccc"]])
+
+    def test_keyed_by_model(self):
+        EmbeddingStore(self.data_dir, "m1").encode(["a"], CountingEncoder())
+        encoder = CountingEncoder()
+        EmbeddingStore(self.data_dir, "m2").encode(["a"], encoder)
+        self.assertEqual(encoder.calls, [["a"]])
+
+    def test_resumes_after_crash(self):
+        texts = [f"t{i}" for i in range(10)]
+        with self.assertRaises(RuntimeError):
+            EmbeddingStore(self.data_dir, "m").encode(texts, CountingEncoder(fail_after=2), chunk_size=3)
+
+        encoder = CountingEncoder()
+        out = EmbeddingStore(self.data_dir, "m").encode(texts, encoder, chunk_size=3)
+        self.assertEqual(sum(len(c) for c in encoder.calls), 4)
+        np.testing.assert_array_equal(out, fake_vectors(texts))
+
+    def test_fills_preallocated_output(self):
+        out = np.lib.format.open_memmap(
+            os.path.join(self.data_dir, "out.npy"), mode="w+", dtype="float32", shape=(2, 2)
+        )
+        result = EmbeddingStore(self.data_dir, "m").encode(["x", "yy"], CountingEncoder(), out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(np.asarray(out), fake_vectors(["x", "yy"]))
+
+    def test_consolidate(self):
+        store = EmbeddingStore(self.data_dir, "m")
+        store.encode([f"t{i}" for i in range(7)], CountingEncoder(), chunk_size=2)
+        self.assertEqual(store.num_chunks, 4)
+        store.consolidate()
+        self.assertEqual(store.num_chunks, 1)
+
+        encoder = CountingEncoder()
+        reopened = EmbeddingStore(self.data_dir, "m")
+        self.assertEqual((reopened.num_chunks, len(reopened)), (1, 7))
+        texts = [f"t{i}" for i in reversed(range(7))]
+        out = reopened.encode(texts, encoder)
+        self.assertEqual(encoder.calls, [])
+        np.testing.assert_array_equal(out, fake_vectors(texts))
+        self.assertEqual(len(glob.glob(os.path.join(reopened.path, "*.npy"))), 2)
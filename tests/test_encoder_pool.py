@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.encoder_pool import EncoderPool
+from tests.helpers import FakeEncoder
+
+
+def fake_loader(model_dir, backend, num_threads):
+    # Definido no módulo para poder ser enviado aos processos do pool
+    return FakeEncoder(dim=4, by_number=True)
+
+
+class TestEncoderPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = EncoderPool("unused", "torch", workers=2, encoder_loader=fake_loader)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_results_keep_input_order(self):
+        texts = [f"texto {i}" for i in range(101)]
+        out = self.pool.encode(texts, batch_size=8)
+        self.assertEqual(out.shape, (101, 4))
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_array_equal(out[:, 0], np.arange(101, dtype="float32"))
+
+    def test_writes_into_memory_mapped_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.npy")
+            out = self.pool.encode(["a 1", "b 2", "c 3"], out_path=path)
+            self.assertIsInstance(out, np.memmap)
+            np.testing.assert_array_equal(np.load(path)[:, 0], [1, 2, 3])
+
+    def test_empty_input(self):
+        self.assertEqual(self.pool.encode([]).shape, (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
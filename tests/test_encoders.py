@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+try:
+    import onnxruntime  # noqa: F401
+    import torch  # noqa: F401
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    HAS_ONNX = True
+except ImportError:
+    HAS_ONNX = False
+
+from app.encoders import (
+    encode_batched,
+    encoder_key,
+    export_onnx,
+    load_encoder,
+    parity_check,
+    quantize_onnx,
+    token_budget_batches,
+    token_lengths,
+)
+
+TEXTS = ["check my balance", "hi", "set an alarm for seven am", "tell me a joke about cats"]
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(
+    {w for t in TEXTS for w in t.split()} | set("abcdefghijklmnopqrstuvwxyz")
+)
+
+
+def make_tiny_model(path):
+    """Salva um SentenceTransformer BERT minúsculo, com pesos aleatórios."""
+    os.makedirs(path, exist_ok=True)
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(VOCAB) + "\n")
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(VOCAB), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(path)
+    BertTokenizerFast(vocab_file=vocab_file).save_pretrained(path)
+    transformer = models.Transformer(path, max_seq_length=32)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling], device="cpu").save(path)
+
+
+class TestEncoderHelpers(unittest.TestCase):
+    def test_encoder_key(self):
+        self.assertEqual(encoder_key("m", "torch"), "m")
+        self.assertEqual(encoder_key("m", "onnx-int8"), "m-onnx-int8")
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            load_encoder("models/x", "tensorrt")
+
+    def test_missing_onnx_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(FileNotFoundError):
+                load_encoder(tmp, "onnx")
+
+
+class RecordingEncoder:
+    """Encoder falso: o vetor é o número de palavras; guarda os lotes recebidos."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        self.batches.append(list(texts))
+        return np.array([[len(t.split()), 1.0] for t in texts], dtype="float32")
+
+
+class TestTokenBatching(unittest.TestCase):
+    def test_batches_respect_token_budget(self):
+        lengths = np.array([50, 3, 4, 50, 3, 200, 4])
+        batches = token_budget_batches(lengths, max_tokens=100, max_batch_size=3)
+        self.assertEqual(sorted(np.concatenate(batches).tolist()), list(range(7)))
+        for idx in batches:
+            self.assertTrue(len(idx) == 1 or len(idx) * lengths[idx].max() <= 100)
+            self.assertLessEqual(len(idx), 3)
+        # Em ordem de comprimento; o texto acima do orçamento fica sozinho
+        self.assertEqual([b.tolist() for b in batches], [[1, 4, 2], [6, 0], [3], [5]])
+
+    def test_encode_batched_restores_order(self):
+        encoder = RecordingEncoder()
+        texts = ["a b c d e f", "a", "a b c d e f g h", "a b", "a"]
+        out = encode_batched(encoder, texts, max_tokens=12, max_batch_size=8)
+        np.testing.assert_array_equal(out[:, 0], [6, 1, 8, 2, 1])
+        # Cada lote tem textos de comprimento parecido
+        self.assertEqual(encoder.batches[0], ["a", "a", "a b"])
+
+    def test_skips_lengths_when_one_batch_fits(self):
+        encoder = RecordingEncoder()
+        encoder.max_seq_length = 4
+        texts = ["a b c", "a", "a b"]
+        with patch("app.encoders.token_lengths") as lengths:
+            encode_batched(encoder, texts, max_tokens=12, max_batch_size=8)
+        lengths.assert_not_called()
+        self.assertEqual(encoder.batches, [texts])
+
+        # Acima do orçamento no pior caso, mede os comprimentos e agrupa
+        encoder.batches = []
+        encode_batched(encoder, texts + ["a"], max_tokens=12, max_batch_size=8)
+        self.assertEqual(encoder.batches, [["a", "a", "a b"], ["a b c"]])
+
+    def test_fixed_batches_without_budget(self):
+        encoder = RecordingEncoder()
+        encode_batched(encoder, ["a b", "a", "a b c"], max_tokens=0, max_batch_size=2)
+        self.assertEqual(encoder.batches, [["a b", "a"], ["a b c"]])
+
+    def test_fallback_lengths(self):
+        self.assertEqual(token_lengths(RecordingEncoder(), ["a b", "c"]).tolist(), [4, 3])
+
+
+@unittest.skipUnless(HAS_ONNX, "onnxruntime, torch e sentence-transformers são necessários")
+class TestOnnxEncoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = os.path.join(cls._tmp.name, "tiny")
+        make_tiny_model(cls.model_dir)
+        export_onnx(cls.model_dir)
+        quantize_onnx(cls.model_dir)
+        cls.reference = load_encoder(cls.model_dir, "torch")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_onnx_matches_torch(self):
+        encoder = load_encoder(self.model_dir, "onnx")
+        report = parity_check(self.reference, encoder, TEXTS, batch_size=3)
+        self.assertEqual(report["texts"], len(TEXTS))
+        self.assertGreater(report["min_cosine"], 0.9999)
+
+    def test_int8_close_to_torch(self):
+        encoder = load_encoder(self.model_dir, "onnx-int8")
+        report = parity_check(self.reference, encoder, TEXTS)
+        self.assertGreater(report["mean_cosine"], 0.9)
+
+    def test_encode_shapes_and_normalization(self):
+        encoder = load_encoder(self.model_dir, "onnx")
+        emb = encoder.encode(TEXTS, batch_size=2, normalize_embeddings=True)
+        self.assertEqual(emb.shape, (len(TEXTS), 32))
+        self.assertEqual(emb.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(emb, axis=1), 1.0, rtol=1e-5)
+        self.assertEqual(encoder.encode("hi").shape, (32,))
+        self.assertEqual(encoder.encode([]).shape, (0, 32))
+
+    def test_token_lengths_match_backends(self):
+        texts = TEXTS + ["a b c d e f g h i j k l m n o p q r s t u v w x y z " * 3]
+        torch_lengths = token_lengths(self.reference, texts)
+        onnx_lengths = token_lengths(load_encoder(self.model_dir, "onnx"), texts)
+        np.testing.assert_array_equal(torch_lengths, onnx_lengths)
+        # Truncados em max_seq_length
+        self.assertEqual(torch_lengths[-1], 32)
+
+    def test_encode_batched_matches_plain_encode(self):
+        texts = TEXTS * 3 + ["hi"]
+        for encoder in (self.reference, load_encoder(self.model_dir, "onnx")):
+            expected = encoder.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+            out = encode_batched(encoder, texts, max_tokens=24, max_batch_size=4)
+            np.testing.assert_allclose(out, expected, atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from app.executor import DeadlineExceeded, InferenceExecutor, Overloaded
+
+
+class TestInferenceExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = InferenceExecutor(max_workers=1, max_queue=1)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown(timeout=5)
+
+    def _block(self):
+        self.started.set()
+        self.release.wait(5)
+        return "done"
+
+    def test_runs_tasks(self):
+        self.assertEqual(self.executor.submit(lambda a, b: a + b, 1, b=2).result(5), 3)
+        self.assertEqual(self.executor.stats()["completed"], 1)
+
+    def test_rejects_when_queue_full(self):
+        running = self.executor.submit(self._block)
+        self.started.wait(5)
+        queued = self.executor.submit(lambda: "queued")
+        with self.assertRaises(Overloaded):
+            self.executor.submit(lambda: "rejected")
+        self.assertEqual(self.executor.stats()["pending"], 2)
+        self.assertEqual(self.executor.stats()["rejected"], 1)
+
+        self.release.set()
+        self.assertEqual(running.result(5), "done")
+        self.assertEqual(queued.result(5), "queued")
+        # Com a fila esvaziada, novas tarefas voltam a ser aceitas
+        self.assertEqual(self.executor.submit(lambda: 1).result(5), 1)
+        self.assertEqual(self.executor.stats()["pending"], 0)
+
+    def test_expired_task_is_skipped(self):
+        calls = []
+        self.executor.submit(self._block)
+        self.started.wait(5)
+        expired = self.executor.submit(calls.append, 1, deadline=time.monotonic() + 0.01)
+        time.sleep(0.05)
+        self.release.set()
+        with self.assertRaises(DeadlineExceeded):
+            expired.result(5)
+        self.assertEqual(calls, [])
+        self.assertEqual(self.executor.stats()["expired"], 1)
+
+    def test_cancelled_task_releases_slot(self):
+        running = self.executor.submit(self._block)
+        self.started.wait(5)
+        queued = self.executor.submit(lambda: "queued")
+        # Como no asyncio.wait_for que vence: a tarefa é cancelada ainda na fila
+        self.assertTrue(queued.cancel())
+        self.assertEqual(self.executor.stats()["pending"], 1)
+        # A vaga liberada pelo cancelamento aceita uma nova tarefa
+        following = self.executor.submit(lambda: "next")
+
+        self.release.set()
+        self.assertEqual(running.result(5), "done")
+        self.assertEqual(following.result(5), "next")
+        self.assertEqual(self.executor.submit(lambda: 1).result(5), 1)
+        self.assertEqual(self.executor.stats()["pending"], 0)
+
+    def test_failed_task(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.executor.submit(fail).result(5)
+        self.assertEqual(self.executor.stats()["failed"], 1)
+
+    def test_shutdown_waits_and_rejects(self):
+        future = self.executor.submit(self._block)
+        self.started.wait(5)
+        self.assertFalse(self.executor.shutdown(timeout=0.05))
+        with self.assertRaises(Overloaded):
+            self.executor.submit(lambda: 1)
+        self.release.set()
+        self.assertTrue(self.executor.shutdown(timeout=5))
+        self.assertEqual(future.result(5), "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from app.ingest import Corpus, detect_format
+
+ROWS = [(f"texto {i}", f"intent_{i % 3}") for i in range(10)]
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _path(self, name):
+        return os.path.join(self._tmp.name, name)
+
+    def _jsonl(self):
+        path = self._path("corpus.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for text, label in ROWS:
+                f.write(json.dumps({"text": text, "label": label}) + "\n")
+            f.write("\n")
+        return path
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("a/b.ndjson"), "jsonl")
+        self.assertEqual(detect_format("b.TSV"), "csv")
+        self.assertEqual(detect_format("b.parquet"), "parquet")
+        self.assertEqual(detect_format("hf:clinc_oos"), "hf")
+        with self.assertRaises(ValueError):
+            detect_format("b.txt")
+
+    def test_jsonl_chunks(self):
+        chunks = list(Corpus(self._jsonl()).chunks(4))
+        self.assertEqual([len(texts) for texts, _ in chunks], [4, 4, 2])
+        texts = [t for chunk, _ in chunks for t in chunk]
+        labels = [l for _, chunk in chunks for l in chunk]
+        self.assertEqual(list(zip(texts, labels)), ROWS)
+
+    def test_csv_custom_columns(self):
+        path = self._path("corpus.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["utterance", "intent"])
+            writer.writerows(ROWS)
+        chunks = list(Corpus(path, text_column="utterance", label_column="intent").chunks(100))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0][1][:2], ["intent_0", "intent_1"])
+
+    def test_missing_field(self):
+        path = self._path("bad.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"text": "oi"}) + "\n")
+        with self.assertRaisesRegex(ValueError, "bad.jsonl:1"):
+            list(Corpus(path).chunks(10))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow library is required for parquet tests")
+    def test_parquet_chunks(self):
+        import pyarrow.parquet as pq
+
+        path = self._path("corpus.parquet")
+        table = pyarrow.table({"text": [t for t, _ in ROWS], "label": [i for i in range(10)]})
+        pq.write_table(table, path)
+        chunks = list(Corpus(path).chunks(6))
+        self.assertEqual([len(texts) for texts, _ in chunks], [6, 4])
+        self.assertEqual(chunks[1][1], ["6", "7", "8", "9"])
+
+    def test_sample_is_bounded_and_uniform(self):
+        corpus = Corpus(self._jsonl())
+        sample = corpus.sample(4, chunk_size=3)
+        self.assertEqual(len(sample), 4)
+        self.assertTrue(set(sample) <= {t for t, _ in ROWS})
+        self.assertEqual(corpus.sample(4, chunk_size=3), sample)
+        self.assertEqual(len(corpus.sample(100, chunk_size=3)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import threading
+import unittest
+
+from app.jobs import JobManager
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.jobs = JobManager()
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def test_successful_job(self):
+        job_id = self.jobs.submit("sum", lambda a, b: a + b, 1, b=2)
+        job = self.jobs.wait(job_id, timeout=5)
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"], 3)
+        self.assertIsNotNone(job["finished_at"])
+
+    def test_failed_job(self):
+        def fail():
+            raise ValueError("boom")
+
+        job = self.jobs.wait(self.jobs.submit("fail", fail), timeout=5)
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "boom")
+
+    def test_status_while_running(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        job_id = self.jobs.submit("slow", slow)
+        started.wait(5)
+        self.assertEqual(self.jobs.get(job_id)["status"], "running")
+        release.set()
+        self.assertEqual(self.jobs.wait(job_id, timeout=5)["status"], "succeeded")
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.jobs.get("nope"))
+
+    def test_history_is_bounded(self):
+        jobs = JobManager(max_history=2)
+        ids = [jobs.submit("n", lambda: None) for _ in range(4)]
+        for job_id in ids:
+            jobs.wait(job_id, timeout=5)
+        jobs.submit("n", lambda: None)
+        self.assertLessEqual(len(jobs.list()), 3)
+        jobs.shutdown()
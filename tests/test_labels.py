@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.labels import LabelStore, label_paths, migrate_legacy_labels
+
+
+class TestLabelStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_from_labels(self):
+        store = LabelStore.from_labels(["b", "a", "b"])
+        self.assertEqual(store.intent_names, ["a", "b"])
+        self.assertEqual(store.label_ids.dtype, np.int32)
+        self.assertEqual(store.label_ids.tolist(), [1, 0, 1])
+        self.assertEqual(store.names(np.array([2, 1])).tolist(), ["b", "a"])
+
+    def test_from_labels_with_vocabulary(self):
+        store = LabelStore.from_labels(["x", "y"], intent_names=["y", "x", "z"])
+        self.assertEqual(store.label_ids.tolist(), [1, 0])
+
+    def test_save_and_load_roundtrip(self):
+        store = LabelStore.from_labels(["a", "b"], texts=["hello", "linha\nnova"])
+        ids_path = store.save(self.data_dir, "m")
+        self.assertTrue(ids_path.endswith("m_labels.npy"))
+
+        loaded = LabelStore.load(self.data_dir, "m", load_texts=True)
+        self.assertIsInstance(loaded.label_ids, np.memmap)
+        self.assertEqual(loaded.label_ids.tolist(), [0, 1])
+        self.assertEqual(loaded.intent_names, ["a", "b"])
+        self.assertEqual(loaded.texts, ["hello", "linha\nnova"])
+
+    def test_save_without_texts(self):
+        LabelStore.from_labels(["a"], texts=["hello"]).save(self.data_dir, "m", save_texts=False)
+        self.assertFalse(os.path.exists(label_paths(self.data_dir, "m")["texts"]))
+
+    def _write_legacy(self):
+        legacy = label_paths(self.data_dir, "m")["legacy"]
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([{"text": "t1", "label": "b"}, {"text": "t2", "label": "a"}], f)
+        return legacy
+
+    def test_load_falls_back_to_legacy_json(self):
+        self._write_legacy()
+        store = LabelStore.load(self.data_dir, "m")
+        self.assertEqual(store.names(np.array([0, 1])).tolist(), ["b", "a"])
+        self.assertEqual(store.texts, ["t1", "t2"])
+
+    def test_migrate_legacy_labels(self):
+        self._write_legacy()
+        migrate_legacy_labels(self.data_dir, "m")
+        self.assertTrue(LabelStore.exists(self.data_dir, "m"))
+        self.assertEqual(len(LabelStore.load(self.data_dir, "m")), 2)
+
+    def test_load_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            LabelStore.load(self.data_dir, "m")
@@ -0,0 +1,45 @@
+import threading
+import time
+import unittest
+
+from app.locks import ReadWriteLock
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_concurrent_readers(self):
+        lock = ReadWriteLock()
+        inside = threading.Barrier(2, timeout=5)
+
+        def reader():
+            with lock.read():
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertFalse(inside.broken)
+
+    def test_writer_excludes_readers(self):
+        lock = ReadWriteLock()
+        events = []
+
+        def writer():
+            with lock.write():
+                events.append("w-start")
+                time.sleep(0.05)
+                events.append("w-end")
+
+        def reader():
+            with lock.read():
+                events.append("r")
+
+        w = threading.Thread(target=writer)
+        w.start()
+        time.sleep(0.01)
+        r = threading.Thread(target=reader)
+        r.start()
+        w.join(5)
+        r.join(5)
+        self.assertEqual(events, ["w-start", "w-end", "r"])
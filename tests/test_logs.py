@@ -0,0 +1,47 @@
+import io
+import logging
+import unittest
+
+from app.logs import SampledLogger, setup_logging
+
+
+class TestLogs(unittest.TestCase):
+    def test_sampled_logger(self):
+        logger = logging.getLogger("test.sampled")
+        with self.assertLogs(logger, "INFO") as logs:
+            sampled = SampledLogger(logger, 0.25)
+            for i in range(8):
+                sampled.info("req %d", i)
+            logger.info("fim")
+        self.assertEqual(logs.output[:-1], ["INFO:test.sampled:req 0", "INFO:test.sampled:req 4"])
+
+    def test_sampled_logger_disabled(self):
+        logger = logging.getLogger("test.sampled_off")
+        with self.assertLogs(logger, "INFO") as logs:
+            SampledLogger(logger, 0).info("nunca")
+            SampledLogger(logger, 1.0).info("sempre")
+        self.assertEqual(logs.output, ["INFO:test.sampled_off:sempre"])
+
+    def test_async_handler_writes_through_queue(self):
+        logger = logging.getLogger("test.async")
+        stream = io.StringIO()
+        handler = setup_logging(logger, "INFO", async_=True, stream=stream)
+        logger.info("resultado %s", {"predicted_intent": "balance"})
+        logger.debug("oculto")
+        # close() esvazia a fila antes de encerrar a thread do listener
+        handler.close()
+        self.assertIn("INFO test.async: resultado {'predicted_intent': 'balance'}", stream.getvalue())
+        self.assertNotIn("oculto", stream.getvalue())
+
+    def test_setup_replaces_handlers(self):
+        logger = logging.getLogger("test.sync")
+        setup_logging(logger, "INFO", async_=True, stream=io.StringIO())
+        stream = io.StringIO()
+        handler = setup_logging(logger, "WARNING", async_=False, stream=stream)
+        self.assertEqual(logger.handlers, [handler])
+        logger.warning("aviso")
+        self.assertIn("WARNING test.sync: aviso", stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
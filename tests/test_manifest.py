@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from app.manifest import load_manifest, manifest_path, verify_manifest, write_manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        self.files = {}
+        for role, content in (("index", b"idx"), ("labels", b"lbl"), ("intents", b"[]")):
+            path = os.path.join(self.data_dir, f"m_{role}")
+            with open(path, "wb") as f:
+                f.write(content)
+            self.files[role] = path
+        self.files["centroids"] = os.path.join(self.data_dir, "missing.npy")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, path, content):
+        with open(path, "wb") as f:
+            f.write(content)
+
+    def test_roundtrip(self):
+        write_manifest(self.data_dir, "m", self.files, ntotal=3)
+        manifest = load_manifest(self.data_dir, "m")
+        self.assertEqual(manifest["ntotal"], 3)
+        self.assertEqual(sorted(manifest["artifacts"]), ["index", "intents", "labels"])
+        self.assertEqual(manifest["artifacts"]["index"]["file"], "m_index")
+        self.assertTrue(verify_manifest(self.data_dir, "m"))
+        self.assertTrue(verify_manifest(self.data_dir, "m", verify_checksums=True))
+
+    def test_missing_manifest(self):
+        self.assertIsNone(load_manifest(self.data_dir, "m"))
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+    def test_corrupted_manifest(self):
+        self._write(manifest_path(self.data_dir, "m"), b"{")
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+    def test_size_change(self):
+        write_manifest(self.data_dir, "m", self.files)
+        self._write(self.files["labels"], b"labels")
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+    def test_same_size_content_change_detected_by_mtime(self):
+        write_manifest(self.data_dir, "m", self.files)
+        self._write(self.files["labels"], b"LBL")
+        os.utime(self.files["labels"], ns=(0, 1))
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+    def test_touched_file_with_same_content(self):
+        write_manifest(self.data_dir, "m", self.files)
+        os.utime(self.files["index"], ns=(0, 1))
+        self.assertTrue(verify_manifest(self.data_dir, "m"))
+
+    def test_missing_required_artifact(self):
+        files = dict(self.files)
+        del files["intents"]
+        write_manifest(self.data_dir, "m", files)
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+    def test_deleted_artifact(self):
+        write_manifest(self.data_dir, "m", self.files)
+        os.remove(self.files["index"])
+        self.assertFalse(verify_manifest(self.data_dir, "m"))
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_serving_path_does_not_import_datasets(self):
+        code = (
+            "import sys, app, app.asgi; "
+            "print(','.join(m for m in ('datasets', 'sentence_transformers', 'torch') "
+            "if m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+            cwd=os.path.join(os.path.dirname(__file__), ".."),
+        )
+        self.assertEqual(out.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from app import metrics
+from app.metrics import Counter, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_with_labels(self):
+        counter = self.registry.counter("x_total", "Contador.", ["intent"])
+        counter.labels("a").inc()
+        counter.labels("a").inc(2)
+        counter.labels("b").inc()
+        self.assertEqual(counter.values(), {("a",): 3.0, ("b",): 1.0})
+        text = self.registry.render()
+        self.assertIn("# TYPE x_total counter", text)
+        self.assertIn('x_total{intent="a"} 3.0', text)
+
+    def test_label_count_is_checked(self):
+        counter = Counter("x_total", "Contador.", ["a", "b"])
+        with self.assertRaises(ValueError):
+            counter.labels("only-one")
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("x_total", "Contador.", ["intent"])
+        counter.labels('a"b').inc()
+        self.assertIn('x_total{intent="a\\"b"} 1.0', self.registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram("lat_seconds", "Latência.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            hist.observe(value)
+        lines = hist.render()
+        self.assertIn('lat_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('lat_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('lat_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("lat_seconds_count 4", lines)
+        self.assertIn("lat_seconds_sum 6.25", lines)
+
+    def test_bucket_upper_bound_is_inclusive(self):
+        hist = Histogram("lat_seconds", "Latência.", buckets=(0.1, 1.0))
+        hist.observe(0.1)
+        self.assertIn('lat_seconds_bucket{le="0.1"} 1', hist.render())
+
+    def test_collectors_are_read_on_render(self):
+        calls = []
+
+        def collect():
+            calls.append(1)
+            yield "queue_size", "gauge", "Fila.", [({"pool": "p"}, 3)]
+
+        self.registry.add_collector(collect)
+        self.assertEqual(calls, [])
+        text = self.registry.render()
+        self.assertIn("# TYPE queue_size gauge", text)
+        self.assertIn('queue_size{pool="p"} 3', text)
+
+    def test_disabled_collection_is_noop(self):
+        metrics.REGISTRY.clear()
+        metrics.set_enabled(False)
+        try:
+            metrics.observe_stages({"encode": 0.1})
+            metrics.record_predictions([{"predicted_intent": "a"}])
+        finally:
+            metrics.set_enabled(True)
+        self.assertEqual(metrics.STAGE_SECONDS.series(), [])
+        self.assertEqual(metrics.prediction_counts(), {})
+
+    def test_record_predictions(self):
+        metrics.REGISTRY.clear()
+        metrics.record_predictions([{"predicted_intent": "a"}, {"predicted_intent": "oos"}])
+        metrics.record_predictions([{"predicted_intent": "a"}])
+        self.assertEqual(metrics.prediction_counts(), {"a": 2.0, "oos": 1.0})
+        self.assertIn("intent_batch_size_count 2", metrics.render())
+
+    def test_observe_stages_filters_names(self):
+        metrics.REGISTRY.clear()
+        metrics.observe_stages({"encode": 0.01, "total": 0.02}, ("encode", "search"))
+        self.assertEqual([key for key, _ in metrics.STAGE_SECONDS.series()], [("encode",)])
+
+    def test_timing_helpers(self):
+        self.assertTrue(metrics.timing_requested("1"))
+        self.assertTrue(metrics.timing_requested(b"true"))
+        self.assertFalse(metrics.timing_requested(None))
+        self.assertFalse(metrics.timing_requested("0"))
+        self.assertEqual(metrics.timing_ms({"encode": 0.0015}), {"encode_ms": 1.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 from app.model import _predict_intent
@@ -17,4 +18,500 @@ class TestModelPredictIntent(unittest.TestCase):
     def test_threshold_oos(self):
         intents = ["a", "b", "c"]
         sims = [0.4, 0.3, 0.2]
-        self.assertEqual(_predict_intent(intents, sims, thr=0.5), "oos")
\ No newline at end of file
+        self.assertEqual(_predict_intent(intents, sims, thr=0.5), "oos")
+
+try:
+    import faiss
+    import numpy as np
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+from app.builder import compute_centroids
+from app.cache import LRUCache
+from app.model import IntentModel, _majority_vote
+from tests.helpers import FakeEncoder
+
+
+def make_model():
+    rng = np.random.default_rng(0)
+    texts = ["a1", "a2", "b1", "b2", "c1"]
+    labels = ["a", "a", "b", "b", "c"]
+    vectors = {}
+    for t in texts + ["qa", "qb"]:
+        v = rng.standard_normal(16).astype("float32")
+        vectors[t] = v / np.linalg.norm(v)
+    # Consultas próximas dos exemplos das intenções "a" e "b"
+    for q, src in (("qa", "a1"), ("qb", "b2")):
+        v = vectors[src] + 0.05 * vectors[q]
+        vectors[q] = (v / np.linalg.norm(v)).astype("float32")
+
+    model = IntentModel()
+    model.model = FakeEncoder(vectors=vectors)
+    model.index = faiss.IndexFlatIP(16)
+    model.index.add(np.stack([vectors[t] for t in texts]))
+    model.intent_names = np.asarray(["a", "b", "c"], dtype=object)
+    model.label_ids = np.asarray([0, 0, 1, 1, 2], dtype=np.int32)
+    model.centroids = compute_centroids(
+        np.stack([vectors[t] for t in texts]), model.label_ids, 3
+    )
+    model.centroid_fast_path = False
+    return model
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestPredictBatch(unittest.TestCase):
+    def test_majority_vote_matrix(self):
+        cand = np.array([[0, 1, 0, 2], [0, 1, 0, 1]])
+        sims = np.array([[0.9, 0.8, 0.7, 0.6], [0.4, 0.3, 0.2, 0.1]], dtype="float32")
+        valid = np.ones_like(cand, dtype=bool)
+        winners = _majority_vote(cand, sims, valid, np.array([0.5, 0.5]))
+        self.assertEqual(winners.tolist(), [0, -1])
+
+    def test_majority_vote_respects_mask(self):
+        cand = np.array([[0, 1, 1]])
+        sims = np.array([[0.9, 0.8, 0.7]], dtype="float32")
+        valid = np.array([[True, False, False]])
+        self.assertEqual(_majority_vote(cand, sims, valid, np.array([0.5])).tolist(), [0])
+
+    def test_predict_batch(self):
+        model = make_model()
+        results = model.predict_batch(["qa", "qb"], top_k=2, threshold=0.5)
+        self.assertEqual([r["predicted_intent"] for r in results], ["a", "b"])
+        self.assertEqual(results[0]["query"], "qa")
+        self.assertEqual(len(results[0]["candidates"]), 2)
+        self.assertEqual(len(results[0]["scores"]), 2)
+
+    def test_predict_batch_reports_confidence(self):
+        model = make_model()
+        result = model.predict_batch(["qa"], top_k=3, threshold=0.5)[0]
+        self.assertEqual(set(result["intent_confidence"]), set(result["candidates"]))
+        self.assertAlmostEqual(result["confidence"], result["intent_confidence"]["a"], places=6)
+        self.assertNotIn("oos_probability", result)
+
+        model.scoring_strategy = "softmax"
+        model.scoring_temperature = 0.01
+        self.assertGreater(model.predict_batch(["qa"], 3, 0.5)[0]["confidence"], 0.9)
+
+    def test_calibration_marks_oos(self):
+        from app.scoring import Calibration
+
+        model = make_model()
+        model.result_cache = None
+        # Probabilidade OOS alta para qualquer similaridade abaixo de 2
+        model.calibration = Calibration("majority", 0.05, 2, [-10.0, 0.0, 0.0], 20.0, 0.5)
+        result = model.predict_batch(["qa"], top_k=2, threshold=0.0)[0]
+        self.assertEqual(result["predicted_intent"], "oos")
+        self.assertGreater(result["oos_probability"], 0.5)
+
+        model.calibration.cutoff = 1.01
+        self.assertEqual(model.predict_batch(["qa"], 2, 0.0)[0]["predicted_intent"], "a")
+
+    def test_neighbors(self):
+        model = make_model()
+        sims, cand = model.neighbors(["qa", "qb"], 2)
+        self.assertEqual(cand.shape, (2, 2))
+        self.assertEqual(cand[:, 0].tolist(), [0, 1])
+        self.assertTrue(np.all(sims[:, 0] >= sims[:, 1]))
+
+    def test_predict_batch_per_item_params(self):
+        model = make_model()
+        results = model.predict_batch(["qa", "qb"], top_k=[1, 3], threshold=[0.5, 1.1])
+        self.assertEqual(len(results[0]["candidates"]), 1)
+        self.assertEqual(len(results[1]["candidates"]), 3)
+        self.assertEqual(results[1]["predicted_intent"], "oos")
+
+    def test_predict_matches_batch(self):
+        model = make_model()
+        single = model.predict("qb", top_k=3, threshold=0.5)
+        self.assertEqual(single, model.predict_batch(["qb"], 3, 0.5)[0])
+
+    def test_predict_embeddings_matches_batch(self):
+        model = make_model()
+        model.result_cache = None
+        emb = model.encode(["qa", "qb"])
+        self.assertEqual(emb.shape, (2, 16))
+        self.assertEqual(
+            model.predict_embeddings(emb, ["qa", "qb"], 3, 0.5),
+            model.predict_batch(["qa", "qb"], 3, 0.5),
+        )
+        with self.assertRaises(ValueError):
+            model.predict_embeddings(emb, ["qa"], 3, 0.5)
+
+    def test_predict_batch_reports_stage_timings(self):
+        from app import metrics
+
+        metrics.REGISTRY.clear()
+        model = make_model()
+        timings = {}
+        model.predict_batch(["qa", "qb"], top_k=2, threshold=0.5, timings=timings)
+        self.assertEqual(set(timings), {"encode", "search", "vote"})
+        self.assertEqual(metrics.prediction_counts(), {"a": 1.0, "b": 1.0})
+        stages = {key[0] for key, _ in metrics.STAGE_SECONDS.series()}
+        self.assertEqual(stages, {"encode", "search", "vote"})
+
+    def test_coalesced_batch_copies_timings(self):
+        from unittest.mock import patch
+
+        from app import model as model_module
+
+        model = make_model()
+        timings = {}
+        with patch("app.model.get_model", lambda: model):
+            results = model_module._predict_coalesced(
+                [("qa", 2, 0.5, timings), ("qb", 2, 0.5, None)]
+            )
+        self.assertEqual([r["predicted_intent"] for r in results], ["a", "b"])
+        self.assertIn("encode", timings)
+
+    def test_predict_batch_invalid_lengths(self):
+        model = make_model()
+        with self.assertRaises(ValueError):
+            model.predict_batch(["qa", "qb"], top_k=[1], threshold=0.5)
+
+    def test_predict_not_loaded(self):
+        with self.assertRaises(RuntimeError):
+            IntentModel().predict_batch(["x"], 5, 0.5)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestPredictCache(unittest.TestCase):
+    def test_embedding_cache_skips_encode(self):
+        model = make_model()
+        model.embedding_cache = LRUCache()
+        model.result_cache = None
+        first = model.predict_batch(["qa", "qb", "qa"], top_k=2, threshold=0.5)
+        second = model.predict_batch(["qa"], top_k=2, threshold=0.5)
+        self.assertEqual(model.model.calls, [["qa", "qb"]])
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(model.cache_stats()["embedding"]["hits"], 1)
+
+    def test_result_cache_keyed_by_params(self):
+        model = make_model()
+        model.embedding_cache = None
+        model.result_cache = LRUCache()
+        model.predict_batch(["qa"], top_k=2, threshold=0.5)
+        model.predict_batch(["qa"], top_k=2, threshold=0.5)
+        model.predict_batch(["qa"], top_k=3, threshold=0.5)
+        self.assertEqual(len(model.model.calls), 2)
+        stats = model.cache_stats()["result"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_memory_bytes_counts_cache_limits(self):
+        model = make_model()
+        model.embedding_cache = None
+        model.result_cache = None
+        base = model.memory_bytes()
+        model.embedding_cache = LRUCache(max_bytes=1000)
+        model.result_cache = LRUCache(max_bytes=500)
+        self.assertEqual(model.memory_bytes(), base + 1500)
+
+    def test_clear_cache(self):
+        model = make_model()
+        model.embedding_cache = LRUCache()
+        model.result_cache = LRUCache()
+        model.predict_batch(["qa"], top_k=2, threshold=0.5)
+        model.clear_cache()
+        model.predict_batch(["qa"], top_k=2, threshold=0.5)
+        self.assertEqual(len(model.model.calls), 2)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestSemanticCache(unittest.TestCase):
+    def make_model(self):
+        from app.semantic_cache import SemanticCache
+
+        model = make_model()
+        model.embedding_cache = None
+        model.result_cache = None
+        model.semantic_cache = SemanticCache(16, threshold=0.99, max_entries=8)
+        # Paráfrase de "qa": quase o mesmo vetor
+        v = model.model.vectors["qa"] + 0.01 * model.model.vectors["qb"]
+        model.model.vectors["qa2"] = (v / np.linalg.norm(v)).astype("float32")
+        return model
+
+    def test_near_duplicate_reuses_neighbors(self):
+        model = self.make_model()
+        first = model.predict("qa", top_k=2, threshold=0.5)
+        second = model.predict_batch(["qa2", "qb"], top_k=2, threshold=0.5)
+        self.assertEqual([r["path"] for r in second], ["semantic_cache", "knn"])
+        self.assertEqual(second[0]["predicted_intent"], first["predicted_intent"])
+        self.assertEqual(second[0]["candidates"], first["candidates"])
+        self.assertEqual(second[0]["query"], "qa2")
+        stats = model.cache_stats()["semantic"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_revotes_with_request_params(self):
+        model = self.make_model()
+        model.predict("qa", top_k=3, threshold=0.5)
+        result = model.predict("qa2", top_k=1, threshold=1.1)
+        self.assertEqual(result["path"], "semantic_cache")
+        self.assertEqual(len(result["candidates"]), 1)
+        self.assertEqual(result["predicted_intent"], "oos")
+        # Mais vizinhos do que os guardados: vai ao índice
+        self.assertEqual(model.predict("qa2", top_k=4, threshold=0.5)["path"], "knn")
+
+    def test_cleared_after_mutation(self):
+        model = self.make_model()
+        model.predict("qa", top_k=2, threshold=0.5)
+        # Inserções e remoções passam por _after_mutation: ids guardados ficam obsoletos
+        model._after_mutation(1)
+        self.assertEqual(model.predict("qa2", top_k=2, threshold=0.5)["path"], "knn")
+        self.assertEqual(model.cache_stats()["semantic"]["invalidations"], 1)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestCentroidFastPath(unittest.TestCase):
+    def test_knn_path_when_disabled(self):
+        model = make_model()
+        result = model.predict("qa", top_k=2, threshold=0.5)
+        self.assertEqual(result["path"], "knn")
+
+    def test_centroid_path_when_margin_is_large(self):
+        model = make_model()
+        model.centroid_fast_path = True
+        model.centroid_margin = 0.0
+        result = model.predict("qa", top_k=2, threshold=0.5)
+        self.assertEqual(result["path"], "centroid")
+        self.assertEqual(result["predicted_intent"], "a")
+        self.assertEqual(len(result["candidates"]), 2)
+
+    def test_falls_back_to_knn_below_margin(self):
+        model = make_model()
+        model.centroid_fast_path = True
+        model.centroid_margin = 10.0
+        results = model.predict_batch(["qa", "qb"], top_k=2, threshold=0.5)
+        self.assertEqual([r["path"] for r in results], ["knn", "knn"])
+        self.assertEqual([r["predicted_intent"] for r in results], ["a", "b"])
+
+    def test_calibration_disables_fast_path(self):
+        from app.scoring import Calibration
+
+        model = make_model()
+        model.result_cache = None
+        model.centroid_fast_path = True
+        model.centroid_margin = 0.0
+        model.calibration = Calibration("majority", 0.05, 2, [-10.0, 0.0, 0.0], 20.0, 0.5)
+        result = model.predict("qa", top_k=2, threshold=0.0)
+        self.assertEqual(result["path"], "knn")
+        self.assertIn("oos_probability", result)
+
+    def test_mixed_batch_keeps_order(self):
+        model = make_model()
+        model.centroid_fast_path = True
+        model.centroid_margin = 0.0
+        results = model.predict_batch(["qa", "qb"], top_k=2, threshold=[0.5, 1.1])
+        self.assertEqual([r["query"] for r in results], ["qa", "qb"])
+        self.assertEqual([r["path"] for r in results], ["centroid", "knn"])
+        self.assertEqual(results[1]["predicted_intent"], "oos")
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestModelSwap(unittest.TestCase):
+    def test_swap_model_publishes_new_instance(self):
+        from app import model as model_module
+
+        new_model = make_model()
+        old = model_module.swap_model(new_model)
+        try:
+            self.assertIs(model_module.get_model(), new_model)
+            result = model_module.predict_batch(["qa"], top_k=2, threshold=0.5)[0]
+            self.assertEqual(result["predicted_intent"], "a")
+        finally:
+            model_module.swap_model(old)
+
+    def test_reload_model_reuses_encoder(self):
+        from unittest.mock import patch
+
+        from app import model as model_module
+
+        current = make_model()
+        old = model_module.swap_model(current)
+        loaded = []
+
+        def fake_load(self, encoder=None):
+            loaded.append(encoder)
+            self.label_ids = current.label_ids
+
+        try:
+            with patch.object(IntentModel, "load", fake_load):
+                new_model = model_module.reload_model()
+            self.assertIs(loaded[0], current.model)
+            self.assertIs(model_module.get_model(), new_model)
+            self.assertIsNot(new_model, current)
+        finally:
+            model_module.swap_model(old)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for model tests")
+class TestIncrementalUpdates(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+
+        from app.labels import LabelStore
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        base = make_model()
+        self.encoder = base.model
+        for t, v in (("a3", [1.0] + [0.0] * 15), ("qd", [1.0] + [0.0] * 15)):
+            self.encoder.vectors[t] = np.asarray(v, dtype="float32")
+
+        # Artefatos base em disco: 5 vetores das intenções a, b e c
+        index = faiss.IndexFlatIP(16)
+        index.add(np.stack([self.encoder.vectors[t] for t in ["a1", "a2", "b1", "b2", "c1"]]))
+        faiss.write_index(index, os.path.join(self.data_dir, "m.faiss"))
+        LabelStore.from_labels(
+            ["a", "a", "b", "b", "c"], texts=["a1", "a2", "b1", "b2", "c1"]
+        ).save(self.data_dir, "m")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _load(self):
+        model = IntentModel(model_name="m", data_dir=self.data_dir)
+        model.embedding_cache = None
+        model.load(encoder=self.encoder)
+        return model
+
+    def test_add_examples_new_intent(self):
+        model = self._load()
+        ids = model.add_examples(["a3"], ["d"])
+        self.assertEqual(ids, [5])
+        result = model.predict("qd", top_k=1, threshold=0.5)
+        self.assertEqual(result["predicted_intent"], "d")
+        self.assertIsNone(model.centroids)
+
+    def test_add_examples_to_mmapped_index(self):
+        model = IntentModel(model_name="m", data_dir=self.data_dir)
+        model.embedding_cache = None
+        model.index_mmap = True
+        model.load(encoder=self.encoder)
+        self.assertTrue(model._index_mapped)
+        mapped = model.index
+        self.assertEqual(model.add_examples(["a3"], ["d"]), [5])
+        self.assertIsNot(model.index, mapped)
+        self.assertFalse(model._index_mapped)
+        self.assertEqual(model.index.ntotal, 6)
+        self.assertEqual(model.predict("qd", top_k=1, threshold=0.5)["predicted_intent"], "d")
+
+    def test_remove_examples_hides_vectors(self):
+        model = self._load()
+        model.add_examples(["a3"], ["d"])
+        self.assertEqual(model.remove_examples([5, 5]), 1)
+        result = model.predict("qd", top_k=2, threshold=0.0)
+        self.assertNotIn("d", result["candidates"])
+        self.assertEqual(len(result["candidates"]), 2)
+        with self.assertRaises(ValueError):
+            model.remove_examples([99])
+
+    def test_removals_beyond_overfetch_limit(self):
+        from app.model import MAX_TOMBSTONE_OVERFETCH
+
+        model = self._load()
+        expected_sims, expected = model.neighbors(["qd"], 3)
+        # Mais remoções do que o over-fetch, todas mais próximas da consulta
+        texts = [f"d{i}" for i in range(MAX_TOMBSTONE_OVERFETCH + 50)]
+        for t in texts:
+            self.encoder.vectors[t] = self.encoder.vectors["qd"]
+        model.remove_examples(model.add_examples(texts, ["d"] * len(texts)))
+
+        sims, intents = model.neighbors(["qd"], 3)
+        np.testing.assert_array_equal(intents, expected)
+        np.testing.assert_allclose(sims, expected_sims, rtol=1e-6)
+        self.assertNotIn("d", model.predict("qd", top_k=3, threshold=0.0)["candidates"])
+
+    def test_delta_log_is_replayed_on_load(self):
+        model = self._load()
+        model.add_examples(["a3"], ["d"])
+        model.remove_examples([0])
+
+        reloaded = self._load()
+        self.assertEqual(len(reloaded.label_ids), 6)
+        self.assertEqual(reloaded.n_deleted, 1)
+        self.assertEqual(reloaded.pending_changes, 2)
+        self.assertEqual(reloaded.predict("qd", top_k=1, threshold=0.5)["predicted_intent"], "d")
+
+    def test_load_writes_and_uses_manifest(self):
+        from unittest.mock import patch
+
+        from app.builder import IndexBuilder
+        from app.manifest import load_manifest, verify_manifest
+
+        model = self._load()
+        manifest = load_manifest(self.data_dir, "m")
+        self.assertEqual(manifest["ntotal"], 5)
+        self.assertEqual(
+            set(model.load_timings),
+            {"artifacts", "index", "labels", "encoder", "delta", "total"},
+        )
+
+        # Com o manifesto conferindo, a validação completa não é refeita
+        with patch.object(IndexBuilder, "_validate_artifacts", side_effect=AssertionError):
+            self._load()
+
+        model.add_examples(["a3"], ["d"])
+        model.compact()
+        self.assertTrue(verify_manifest(self.data_dir, "m", verify_checksums=True))
+        self.assertEqual(load_manifest(self.data_dir, "m")["ntotal"], 6)
+
+    def test_compact_preserves_ids(self):
+        model = self._load()
+        model.add_examples(["a3"], ["d"])
+        model.remove_examples([0, 2])
+        model.compact()
+
+        self.assertEqual(model.pending_changes, 0)
+        self.assertEqual(model.index.ntotal, 4)
+        self.assertIsNotNone(model.centroids)
+        self.assertEqual(list(model.delta_log.records()), [])
+
+        reloaded = self._load()
+        self.assertEqual(reloaded.index.ntotal, 4)
+        self.assertTrue(reloaded.deleted[[0, 2]].all())
+        self.assertEqual(reloaded.n_deleted, 0)
+        # Id 5 continua válido após a compactação
+        self.assertEqual(reloaded.remove_examples([5]), 1)
+        result = reloaded.predict("qd", top_k=1, threshold=0.0)
+        self.assertNotEqual(result["predicted_intent"], "d")
+
+    def test_rerank_with_exact_vectors(self):
+        from app.rerank import vectors_path
+
+        np.save(vectors_path(self.data_dir, "m"), np.stack(
+            [self.encoder.vectors[t] for t in ["a1", "a2", "b1", "b2", "c1"]]
+        ))
+        model = IntentModel(model_name="m", data_dir=self.data_dir)
+        model.embedding_cache = None
+        model.rerank = True
+        model.load(encoder=self.encoder)
+        self.assertEqual(len(model.exact_vectors), 5)
+
+        timings = {}
+        result = model.predict_batch(["qb"], top_k=2, threshold=0.5, timings=timings)[0]
+        self.assertEqual(result["predicted_intent"], "b")
+        self.assertIn("rerank", timings)
+
+        # Inserções e a compactação mantêm os vetores exatos alinhados aos ids
+        model.add_examples(["a3"], ["d"])
+        self.assertEqual(len(model.exact_vectors), 6)
+        self.assertEqual(model.predict("qd", top_k=1, threshold=0.5)["predicted_intent"], "d")
+        model.remove_examples([0])
+        model.compact()
+        # Os vetores continuam indexados pelo id (a compactação preserva os ids)
+        self.assertEqual(np.load(vectors_path(self.data_dir, "m")).shape, (6, 16))
+        self.assertEqual(model.predict("qd", top_k=1, threshold=0.5)["predicted_intent"], "d")
+
+        reloaded = IntentModel(model_name="m", data_dir=self.data_dir)
+        reloaded.rerank = True
+        reloaded.load(encoder=self.encoder)
+        self.assertEqual(len(reloaded.exact_vectors), 6)
+
+    def test_binary_index_requires_exact_vectors(self):
+        index = faiss.index_factory(16, "LSHrt")
+        data = np.stack([self.encoder.vectors[t] for t in ["a1", "a2", "b1", "b2", "c1"]])
+        index.train(data)
+        index.add(data)
+        faiss.write_index(index, os.path.join(self.data_dir, "m.faiss"))
+        with self.assertRaises(RuntimeError):
+            self._load()
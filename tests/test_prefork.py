@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest.mock import patch
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+if HAS_FAISS:
+    from app import model as model_module
+    from app import prefork
+
+from tests.helpers import FakeEncoder
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for prefork tests")
+class TestPrefork(unittest.TestCase):
+    def setUp(self):
+        self._env = dict(os.environ)
+        self._omp = faiss.omp_get_max_threads()
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self._env)
+        faiss.omp_set_num_threads(self._omp)
+        prefork._cpu_budget = 0
+        prefork._workers = 1
+
+    def test_threads_per_worker(self):
+        self.assertEqual(prefork.threads_per_worker(4, cpus=16), 4)
+        self.assertEqual(prefork.threads_per_worker(3, cpus=8), 2)
+        self.assertEqual(prefork.threads_per_worker(8, cpus=4), 1)
+        self.assertEqual(prefork.threads_per_worker(0, cpus=4), 4)
+
+    def test_set_num_threads(self):
+        encoder = FakeEncoder()
+        prefork.set_num_threads(2, encoder=encoder)
+        self.assertEqual(faiss.omp_get_max_threads(), 2)
+        self.assertEqual(os.environ["OMP_NUM_THREADS"], "2")
+        self.assertEqual(encoder.threads, [2])
+        self.assertEqual(prefork.cpu_budget(), 2)
+
+    def test_init_worker_loads_without_preload(self):
+        encoder = FakeEncoder()
+        loaded = []
+
+        def fake_load():
+            loaded.append(True)
+            model_module.get_model().model = encoder
+
+        current = model_module.IntentModel()
+        old = model_module.swap_model(current)
+        try:
+            with patch("app.model.load_model", fake_load):
+                prefork.init_worker(workers=2, threads=3, preloaded=False)
+        finally:
+            model_module.swap_model(old)
+        self.assertEqual(loaded, [True])
+        self.assertEqual(encoder.threads, [3])
+        self.assertEqual(prefork.worker_count(), 2)
+
+    def test_batcher_recreated_after_fork(self):
+        with patch.object(model_module, "_batcher", None), \
+             patch.object(model_module, "_batcher_pid", None):
+            first = model_module._get_batcher()
+            self.assertIs(model_module._get_batcher(), first)
+            with patch("app.model.os.getpid", lambda: -1):
+                self.assertIsNot(model_module._get_batcher(), first)
+            model_module._batcher.close()
+            first.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import faiss
+    import numpy as np
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+from app.registry import ModelRegistry, UnknownTenant, load_tenants
+from tests.helpers import FakeEncoder
+
+
+def write_artifacts(data_dir, model_name, labels, texts):
+    from app.labels import LabelStore
+
+    os.makedirs(data_dir, exist_ok=True)
+    index = faiss.IndexFlatIP(8)
+    index.add(FakeEncoder(dim=8).encode(texts))
+    faiss.write_index(index, os.path.join(data_dir, f"{model_name}.faiss"))
+    LabelStore.from_labels(labels, texts=texts).save(data_dir, model_name)
+
+
+class TestLoadTenants(unittest.TestCase):
+    def _write(self, content):
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        with f:
+            json.dump(content, f)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_defaults(self):
+        tenants = load_tenants(self._write({"loja": {"data_dir": "/tmp/loja"}}))
+        self.assertEqual(tenants["loja"]["data_dir"], "/tmp/loja")
+        self.assertIn("model_name", tenants["loja"])
+        self.assertIn("encoder_backend", tenants["loja"])
+
+    def test_invalid(self):
+        for content in (
+            [],
+            {"default": {}},
+            {"loja": {"unknown": 1}},
+            {"loja": {"encoder_backend": "tensorflow"}},
+        ):
+            with self.assertRaises(ValueError):
+                load_tenants(self._write(content))
+
+
+class RegistryFixture(unittest.TestCase):
+    """Três tenants em disco: loja e banco com o encoder m1, viagem com m2."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        base = self._tmp.name
+        self.tenants = {}
+        for name, model_name in (("loja", "m1"), ("banco", "m1"), ("viagem", "m2")):
+            data_dir = os.path.join(base, name)
+            write_artifacts(data_dir, model_name, [f"{name}_a", f"{name}_b"], ["a", "b"])
+            self.tenants[name] = {
+                "model_name": model_name,
+                "data_dir": data_dir,
+                "encoder_backend": "torch",
+            }
+        self.loaded = []
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _loader(self, model_dir, backend, num_threads):
+        self.loaded.append(os.path.basename(model_dir))
+        return FakeEncoder(dim=8)
+
+    def _registry(self, max_bytes=1 << 30):
+        return ModelRegistry(self.tenants, max_bytes=max_bytes, encoder_loader=self._loader)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for registry tests")
+class TestModelRegistry(RegistryFixture):
+    def test_lazy_load_and_hit(self):
+        registry = self._registry()
+        self.assertFalse(registry.stats()["tenants"]["loja"]["loaded"])
+        model = registry.get("loja")
+        self.assertIs(registry.get("loja"), model)
+        self.assertEqual(model.predict("b", 1, 0.5)["predicted_intent"], "loja_b")
+        stats = registry.stats()
+        self.assertTrue(stats["tenants"]["loja"]["loaded"])
+        self.assertEqual(stats["tenants"]["loja"]["hits"], 1)
+        self.assertEqual(stats["loads"], 1)
+
+    def test_encoder_is_shared(self):
+        registry = self._registry()
+        loja, banco = registry.get("loja"), registry.get("banco")
+        self.assertIs(loja.model, banco.model)
+        self.assertEqual(self.loaded, ["m1"])
+        self.assertEqual(registry.stats()["encoders"]["m1"]["tenants"], ["banco", "loja"])
+        self.assertEqual(banco.predict("a", 1, 0.5)["predicted_intent"], "banco_a")
+
+    def test_lru_eviction_under_budget(self):
+        one = self._registry()
+        one.get("loja")
+        budget = one.stats()["bytes"]
+        self.loaded.clear()
+
+        registry = self._registry(max_bytes=budget)
+        registry.get("loja")
+        registry.get("viagem")
+        stats = registry.stats()
+        self.assertFalse(stats["tenants"]["loja"]["loaded"])
+        self.assertTrue(stats["tenants"]["viagem"]["loaded"])
+        self.assertEqual(stats["evictions"], 1)
+        # O encoder de m1 não é mais usado por nenhum índice carregado
+        self.assertEqual(list(stats["encoders"]), ["m2"])
+        self.assertLessEqual(stats["bytes"], budget)
+
+        registry.get("loja")
+        self.assertEqual(self.loaded, ["m1", "m2", "m1"])
+
+    def test_recently_used_tenant_is_kept(self):
+        one = self._registry()
+        one.get("loja")
+        one.get("banco")
+        registry = self._registry(max_bytes=one.stats()["bytes"])
+        registry.get("loja")
+        registry.get("banco")
+        registry.get("loja")
+        registry.get("viagem")
+        tenants = registry.stats()["tenants"]
+        self.assertTrue(tenants["loja"]["loaded"])
+        self.assertFalse(tenants["banco"]["loaded"])
+
+    def test_unknown_tenant(self):
+        with self.assertRaises(UnknownTenant):
+            self._registry().get("nope")
+
+    def test_missing_artifacts_release_encoder(self):
+        self.tenants["vazio"] = {
+            "model_name": "m3",
+            "data_dir": os.path.join(self._tmp.name, "vazio"),
+            "encoder_backend": "torch",
+        }
+        registry = self._registry()
+        with self.assertRaises(FileNotFoundError):
+            registry.get("vazio")
+        self.assertEqual(registry.stats()["encoders"], {})
+
+    def test_evict(self):
+        registry = self._registry()
+        registry.get("loja")
+        self.assertTrue(registry.evict("loja"))
+        self.assertFalse(registry.evict("loja"))
+        self.assertEqual(registry.stats()["encoders"], {})
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for registry tests")
+class TestTenantAPI(RegistryFixture):
+    def setUp(self):
+        super().setUp()
+        from app import app as flask_app
+        from app import registry as registry_module
+
+        self.client = flask_app.test_client()
+        self._old = registry_module.set_registry(self._registry())
+        self.addCleanup(registry_module.set_registry, self._old)
+
+    def test_predict_with_tenant(self):
+        resp = self.client.post("/predict", json={"text": "b", "top_k": 1, "tenant": "viagem"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["predicted_intent"], "viagem_b")
+
+        resp = self.client.post("/predict_batch", json={"texts": ["a"], "tenant": "loja"})
+        self.assertEqual(resp.get_json()["results"][0]["predicted_intent"], "loja_a")
+
+    def test_unknown_tenant_returns_404(self):
+        resp = self.client.post("/predict", json={"text": "b", "tenant": "nope"})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post("/predict", json={"text": "b", "tenant": 3})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_tenants_route(self):
+        self.client.post("/predict", json={"text": "b", "tenant": "loja"})
+        data = self.client.get("/tenants").get_json()
+        self.assertTrue(data["tenants"]["loja"]["loaded"])
+        self.assertFalse(data["tenants"]["banco"]["loaded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+if HAS_FAISS:
+    from app.builder import make_index
+    from app.rerank import ExactVectors, VectorFileWriter, needs_rerank, rerank, vectors_path
+
+
+def unit_rows(n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.standard_normal((n, dim)).astype("float32")
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for rerank tests")
+class TestVectorFiles(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = vectors_path(self._tmp.name, "m")
+
+    def test_vectors_path(self):
+        self.assertEqual(os.path.basename(self.path), "m_vectors.npy")
+
+    def test_streaming_writer_round_trip(self):
+        data = unit_rows(10)
+        writer = VectorFileWriter(self.path, 8)
+        writer.write(data[:3])
+        writer.write(data[3:])
+        self.assertEqual(writer.close(), 10)
+        np.testing.assert_array_equal(np.load(self.path), data)
+        with self.assertRaises(ValueError):
+            VectorFileWriter(f"{self.path}.x", 8).write(data[:, :4])
+
+    def test_abort_removes_file(self):
+        writer = VectorFileWriter(self.path, 8)
+        writer.write(unit_rows(2))
+        writer.abort()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_exact_vectors_take_append_and_save(self):
+        data = unit_rows(6)
+        np.save(self.path, data[:4])
+        vectors = ExactVectors.load(self.path)
+        self.assertIsInstance(vectors.base, np.memmap)
+        vectors.append(data[4:])
+        self.assertEqual((len(vectors), vectors.dim), (6, 8))
+
+        rows = vectors.take(np.array([[5, 0], [-1, 3]]))
+        self.assertEqual(rows.shape, (2, 2, 8))
+        np.testing.assert_array_equal(rows[0, 0], data[5])
+        np.testing.assert_array_equal(rows[1, 0], np.zeros(8))
+
+        vectors.save(self.path)
+        np.testing.assert_array_equal(np.load(self.path), data)
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for rerank tests")
+class TestRerank(unittest.TestCase):
+    def test_orders_by_exact_similarity(self):
+        data = unit_rows(20)
+        vectors = ExactVectors(data)
+        query = data[[7]]
+        # Candidatos fora de ordem, com o vizinho exato no fim e um id inexistente
+        ids = np.array([[3, -1, 11, 7]])
+        sims, top = rerank(query, ids, vectors, k=4)
+        self.assertEqual(top[0, 0], 7)
+        self.assertAlmostEqual(float(sims[0, 0]), 1.0, places=5)
+        self.assertEqual(top[0, 3], -1)
+        self.assertEqual(sims[0, 3], -np.inf)
+        self.assertTrue(np.all(np.diff(sims[0, :3]) <= 0))
+        np.testing.assert_allclose(sims[0, :3], data[top[0, :3]] @ data[7], rtol=1e-5)
+        self.assertEqual(rerank(query, ids, vectors, k=2)[1].shape, (1, 2))
+
+    def test_compressed_index_recall_with_rerank(self):
+        data = unit_rows(2000, dim=32, seed=1)
+        queries = data[:50]
+        index = make_index(32, "LSHrt")
+        self.assertTrue(needs_rerank(index))
+        self.assertFalse(needs_rerank(make_index(32, "HNSW32,SQ8")))
+        index.train(data)
+        index.add(data)
+
+        _, ids = index.search(queries, 40)
+        _, top = rerank(queries, ids, ExactVectors(data), k=1)
+        # Cada consulta é um vetor do próprio índice: o re-ranking o recupera
+        np.testing.assert_array_equal(top[:, 0], np.arange(50))
+
+
+if __name__ == "__main__":
+    unittest.main()
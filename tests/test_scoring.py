@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.scoring import (
+    Calibration,
+    best_cutoff,
+    calibration_path,
+    fit_calibration,
+    fit_logistic,
+    oos_features,
+    score_neighbors,
+)
+
+
+class TestScoreNeighbors(unittest.TestCase):
+    def setUp(self):
+        # Um vizinho muito próximo de "0" contra dois mais distantes de "1"
+        self.cand = np.array([[0, 1, 1]])
+        self.sims = np.array([[0.95, 0.6, 0.55]], dtype="float32")
+        self.valid = np.ones((1, 3), dtype=bool)
+
+    def test_majority_counts_neighbors(self):
+        best, shares = score_neighbors(self.cand, self.sims, self.valid, "majority")
+        self.assertEqual(self.cand[0, best[0]], 1)
+        np.testing.assert_allclose(shares[0], [1 / 3, 2 / 3, 2 / 3], rtol=1e-6)
+
+    def test_weighted_sums_similarities(self):
+        best, shares = score_neighbors(self.cand, self.sims, self.valid, "weighted")
+        self.assertEqual(self.cand[0, best[0]], 1)
+        self.assertAlmostEqual(float(shares[0, 0]), 0.95 / 2.1, places=5)
+
+    def test_softmax_favours_closest_neighbor(self):
+        best, shares = score_neighbors(self.cand, self.sims, self.valid, "softmax", 0.05)
+        self.assertEqual(self.cand[0, best[0]], 0)
+        self.assertGreater(shares[0, 0], 0.99)
+        # Com temperatura alta o softmax se aproxima da contagem
+        best, _ = score_neighbors(self.cand, self.sims, self.valid, "softmax", 10.0)
+        self.assertEqual(self.cand[0, best[0]], 1)
+
+    def test_invalid_neighbors_do_not_vote(self):
+        valid = np.array([[True, False, False]])
+        for strategy in ("majority", "weighted", "softmax"):
+            best, shares = score_neighbors(self.cand, self.sims, valid, strategy)
+            self.assertEqual(best[0], 0)
+            np.testing.assert_allclose(shares[0], [1.0, 0.0, 0.0], rtol=1e-6)
+
+    def test_majority_tie_by_average(self):
+        cand = np.array([[0, 1, 0, 1]])
+        sims = np.array([[0.9, 0.8, 0.7, 0.6]], dtype="float32")
+        best, _ = score_neighbors(cand, sims, np.ones((1, 4), dtype=bool), "majority")
+        self.assertEqual(cand[0, best[0]], 0)
+
+    def test_matches_per_query_reference(self):
+        rng = np.random.default_rng(2)
+        cand = rng.integers(0, 5, (50, 8))
+        sims = np.sort(rng.uniform(0, 1, (50, 8)), axis=1)[:, ::-1].astype("float32")
+        valid = rng.random((50, 8)) < 0.8
+        best, shares = score_neighbors(cand, sims, valid, "weighted")
+        for i in range(50):
+            totals = {}
+            for c, s, ok in zip(cand[i], sims[i], valid[i]):
+                if ok:
+                    totals[c] = totals.get(c, 0.0) + s + 1e-6
+            if not totals:
+                continue
+            winner = max(totals, key=totals.get)
+            self.assertEqual(cand[i, best[i]], winner)
+            self.assertAlmostEqual(
+                float(shares[i, best[i]]), totals[winner] / sum(totals.values()), places=5
+            )
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            score_neighbors(self.cand, self.sims, self.valid, "borda")
+        with self.assertRaises(ValueError):
+            score_neighbors(self.cand, self.sims, self.valid, "softmax", 0.0)
+
+
+class TestCalibration(unittest.TestCase):
+    def test_best_cutoff(self):
+        scores = np.array([0.1, 0.2, 0.8, 0.9])
+        correct_in = np.array([True, True, False, False])
+        is_oos = np.array([False, False, True, True])
+        cut, accuracy = best_cutoff(scores, correct_in, is_oos)
+        self.assertTrue(0.2 < cut <= 0.8)
+        self.assertEqual(accuracy, 1.0)
+
+    def test_fit_logistic_separates_classes(self):
+        rng = np.random.default_rng(0)
+        x = np.vstack([rng.normal(0.8, 0.05, (50, 1)), rng.normal(0.4, 0.05, (50, 1))])
+        y = np.r_[np.zeros(50), np.ones(50)]
+        coef, intercept = fit_logistic(x, y)
+        self.assertLess(coef[0], 0)
+        p = 1 / (1 + np.exp(-(x @ coef + intercept)))
+        self.assertEqual(((p >= 0.5) == y.astype(bool)).mean(), 1.0)
+
+    def test_save_and_load(self):
+        calibration = Calibration("softmax", 0.05, 3, [-1.0, -2.0, 0.5], 0.3, 0.6, {"a": 1})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = calibration_path(tmp, "m")
+            self.assertEqual(os.path.basename(path), "m_calibration.json")
+            calibration.save(path)
+            loaded = Calibration.load(path)
+        self.assertEqual(loaded.to_dict(), calibration.to_dict())
+        with self.assertRaises(ValueError):
+            Calibration("borda", 0.05, 3, [0, 0, 0], 0, 0.5)
+
+    def test_fit_calibration_prefers_smaller_top_k(self):
+        rng = np.random.default_rng(1)
+        n, k = 400, 5
+        truth = rng.integers(0, 4, n)
+        truth[: n // 4] = -1
+        # Consultas conhecidas: vizinhos da intenção correta com similaridade alta;
+        # OOS: vizinhos de intenções aleatórias com similaridade baixa
+        cand = np.where(truth[:, None] >= 0, truth[:, None], rng.integers(0, 4, (n, k)))
+        top = np.where(truth >= 0, rng.uniform(0.7, 0.9, n), rng.uniform(0.4, 0.6, n))
+        sims = np.sort(top[:, None] - rng.uniform(0, 0.05, (n, k)), axis=1)[:, ::-1]
+        valid = np.ones((n, k), dtype=bool)
+
+        calibration, rows = fit_calibration(
+            cand, sims, valid, truth, strategies=("majority", "softmax"), top_ks=(1, 5),
+            temperatures=(0.05,),
+        )
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(calibration.top_k, 1)
+        self.assertEqual(sum(bool(r.get("chosen")) for r in rows), 1)
+        self.assertGreater(rows[0]["holdout_accuracy"], 0.95)
+
+        _, shares = score_neighbors(cand[:, :1], sims[:, :1], valid[:, :1])
+        p = calibration.oos_probability(oos_features(sims[:, :1], valid[:, :1], shares[:, 0]))
+        self.assertGreater(((p >= calibration.cutoff) == (truth < 0)).mean(), 0.95)
+
+    def test_fit_calibration_requires_oos_and_in_scope(self):
+        cand = np.zeros((4, 1), dtype=np.int64)
+        sims = np.ones((4, 1), dtype="float32")
+        with self.assertRaises(ValueError):
+            fit_calibration(cand, sims, np.ones((4, 1), dtype=bool), np.zeros(4), top_ks=(1,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from app.semantic_cache import SemanticCache
+
+
+def unit(*values):
+    v = np.asarray(values, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+def neighbors(i, k=3):
+    return np.full(k, 0.9, dtype="float32") - i, np.arange(k, dtype=np.int64) + 10 * i
+
+
+class TestSemanticCache(unittest.TestCase):
+    def put(self, cache, i, vector, k=3):
+        sims, ids = neighbors(i, k)
+        cache.put(vector[None], sims[None], ids[None])
+
+    def test_hit_above_threshold(self):
+        cache = SemanticCache(3, threshold=0.95)
+        self.put(cache, 1, unit(1, 0, 0))
+        near, far = unit(1, 0.05, 0), unit(1, 1, 0)
+        hit, miss = cache.lookup(np.stack([near, far]), np.array([3, 3]))
+        self.assertEqual(hit[1].tolist(), [10, 11, 12])
+        self.assertIsNone(miss)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_miss_when_top_k_exceeds_cached(self):
+        cache = SemanticCache(3, threshold=0.95)
+        self.put(cache, 1, unit(1, 0, 0), k=2)
+        self.assertEqual(cache.lookup(unit(1, 0, 0)[None], np.array([3])), [None])
+
+    def test_lru_and_fifo_eviction(self):
+        a, b, c = unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1)
+        for policy, kept in (("lru", a), ("fifo", b)):
+            cache = SemanticCache(3, threshold=0.95, max_entries=2, policy=policy)
+            self.put(cache, 1, a)
+            self.put(cache, 2, b)
+            cache.lookup(a[None], np.array([1]))
+            self.put(cache, 3, c)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.evictions, 1)
+            self.assertIsNotNone(cache.lookup(kept[None], np.array([1]))[0], policy)
+
+    def test_clear_and_stats(self):
+        cache = SemanticCache(3, threshold=0.95)
+        self.put(cache, 1, unit(1, 0, 0))
+        cache.clear()
+        self.assertEqual(cache.lookup(unit(1, 0, 0)[None], np.array([1])), [None])
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["invalidations"], stats["hit_rate"]), (0, 1, 0.0))
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            SemanticCache(3, threshold=0.0)
+        with self.assertRaises(ValueError):
+            SemanticCache(3, threshold=0.9, policy="random")
+
+
+if __name__ == "__main__":
+    unittest.main()
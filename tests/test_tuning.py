@@ -0,0 +1,67 @@
+import unittest
+
+try:
+    import faiss  # noqa: F401
+    import numpy as np
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+from app.tuning import benchmark_indexes, parse_candidate, pick_best, recall_at_k
+
+
+class TestTuningHelpers(unittest.TestCase):
+    def test_parse_candidate(self):
+        self.assertEqual(parse_candidate("HNSW32,Flat|efSearch=64"), ("HNSW32,Flat", "efSearch=64"))
+        self.assertEqual(parse_candidate("Flat"), ("Flat", ""))
+
+    def test_pick_best(self):
+        rows = [
+            {"candidate": "a", "recall": 1.0, "qps": 100.0},
+            {"candidate": "b", "recall": 0.97, "qps": 500.0},
+            {"candidate": "c", "recall": 0.5, "qps": 9000.0},
+            {"candidate": "d", "error": "fail"},
+        ]
+        self.assertEqual(pick_best(rows, min_recall=0.95)["candidate"], "b")
+        self.assertEqual(pick_best(rows, min_recall=0.999)["candidate"], "a")
+        self.assertIsNone(pick_best([{"candidate": "d", "error": "fail"}]))
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss library is required for tuning tests")
+class TestBenchmarkIndexes(unittest.TestCase):
+    def test_recall_at_k(self):
+        truth = np.array([[1, 2], [3, 4]])
+        self.assertEqual(recall_at_k(np.array([[2, 1], [3, -1]]), truth), 0.75)
+
+    def test_benchmark_indexes(self):
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((500, 16)).astype("float32")
+        rows = benchmark_indexes(
+            data, data[:50], ["Flat", "HNSW16,Flat|efSearch=32", "IVF4096,Flat"], k=3,
+            latency_queries=10,
+        )
+        self.assertEqual(rows[0]["recall"], 1.0)
+        self.assertGreater(rows[1]["recall"], 0.5)
+        for key in ("qps", "p50_ms", "p99_ms", "build_s", "memory_mb"):
+            self.assertIn(key, rows[1])
+        # IVF com mais listas que vetores não consegue ser treinado
+        self.assertIn("error", rows[2])
+
+    def test_benchmark_with_rerank(self):
+        from app.tuning import is_compressed
+
+        self.assertTrue(is_compressed("HNSW32,SQ8"))
+        self.assertFalse(is_compressed("HNSW32,Flat"))
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((500, 16)).astype("float32")
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        rows = benchmark_indexes(
+            data, data[:50], ["HNSW16,Flat", "LSHrt"], k=3, latency_queries=5,
+            rerank_oversample=4,
+        )
+        self.assertEqual([(r["candidate"], r["rerank"]) for r in rows],
+                         [("HNSW16,Flat", 0), ("LSHrt", 0), ("LSHrt", 4)])
+        self.assertGreater(rows[2]["recall"], rows[1]["recall"])
+        self.assertGreater(rows[2]["vectors_mb"], 0)
+        for r in rows:
+            self.assertIn("rss_mb", r)
@@ -1,10 +1,38 @@
 import unittest
 
-from app.utils import preprocess
+from app.utils import Preprocessor, format_timings, preprocess, preprocess_batch, timed
 
 
 class TestUtils(unittest.TestCase):
     def test_preprocess(self):
         self.assertEqual(preprocess("Hello, WORLD!"), "hello world")
         self.assertEqual(preprocess("  Test...  "), "test")
-        self.assertEqual(preprocess("Número 123!"), "número 123")
\ No newline at end of file
+        self.assertEqual(preprocess("Número 123!"), "número 123")
+
+    def test_preprocessor_steps(self):
+        full = Preprocessor("lower,accents,punct,whitespace")
+        self.assertEqual(full("  Ação,   JÁ!  "), "acao ja")
+        self.assertEqual(full("ﬁm"), "fim")
+        self.assertEqual(Preprocessor([])("  Olá!  "), "Olá!")
+        with self.assertRaises(ValueError):
+            Preprocessor("lower,stem")
+
+    def test_preprocess_batch(self):
+        texts = ["Hello, WORLD!", "  Test...  ", "Número 123!", "a , b"]
+        self.assertEqual(preprocess_batch(texts), [preprocess(t) for t in texts])
+
+    def test_timed_accumulates(self):
+        timings = {}
+        with timed(timings, "a"):
+            pass
+        first = timings["a"]
+        with timed(timings, "a"):
+            pass
+        self.assertGreaterEqual(timings["a"], first)
+        with self.assertRaises(ValueError):
+            with timed(timings, "b"):
+                raise ValueError("x")
+        self.assertIn("b", timings)
+
+    def test_format_timings(self):
+        self.assertEqual(format_timings({"index": 0.5, "total": 1.25}), "index=0.500s total=1.250s")